@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""Data source status endpoints."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from api.v1.schemas.data_sources import SourceHealthItem, SourceHealthResponse
+from data_provider.realtime_types import get_chip_circuit_breaker, get_realtime_circuit_breaker
+from data_provider.source_health import get_source_health_tracker
+from src.config import get_config
+
+router = APIRouter()
+
+
+@router.get(
+    "/health",
+    response_model=SourceHealthResponse,
+    summary="数据源健康度",
+    description="返回本进程内各数据源按操作统计的 EWMA 延迟、成功率、降级状态及熔断器统计",
+)
+def get_source_health() -> SourceHealthResponse:
+    """查看数据源健康度与自适应排序状态"""
+    rows = get_source_health_tracker().snapshot()
+    return SourceHealthResponse(
+        adaptive_order=get_config().adaptive_source_order,
+        items=[SourceHealthItem(**row) for row in rows],
+        circuit_breakers={
+            breaker.name: breaker.get_metrics()
+            for breaker in (get_realtime_circuit_breaker(), get_chip_circuit_breaker())
+        },
+    )
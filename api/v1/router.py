@@ -11,7 +11,7 @@ API v1 路由聚合
 
 from fastapi import APIRouter
 
-from api.v1.endpoints import analysis, history, stocks, backtest, system_config
+from api.v1.endpoints import analysis, history, stocks, backtest, system_config, data_sources
 
 # 创建 v1 版本主路由
 router = APIRouter(prefix="/api/v1")
@@ -45,3 +45,9 @@ router.include_router(
     prefix="/system",
     tags=["SystemConfig"]
 )
+
+router.include_router(
+    data_sources.router,
+    prefix="/data-sources",
+    tags=["DataSources"]
+)
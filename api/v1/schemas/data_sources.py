@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""Data source health API schemas."""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class SourceHealthItem(BaseModel):
+    operation: str = Field(..., description="操作类型（daily/realtime/chip/indices）")
+    source: str = Field(..., description="数据源名称")
+    latency_ewma: Optional[float] = Field(None, description="EWMA 延迟（秒）")
+    success_rate: float = Field(..., description="EWMA 成功率")
+    samples: int = Field(..., description="样本数")
+    successes: int = Field(..., description="成功次数")
+    failures: int = Field(..., description="失败次数")
+    expected_cost: float = Field(..., description="期望耗时（延迟/成功率，越小越好）")
+    degraded: bool = Field(..., description="是否已被降级到队尾")
+    last_error: Optional[str] = Field(None, description="最近一次错误")
+    updated_at: float = Field(..., description="最近更新时间戳")
+
+
+class CircuitBreakerItem(BaseModel):
+    state: str = Field(..., description="熔断状态（closed/open/half_open）")
+    failures: int = Field(..., description="连续失败次数")
+    transitions: Dict[str, int] = Field(default_factory=dict, description="状态切换计数，如 closed->open")
+    open_seconds: float = Field(..., description="累计熔断时长（秒）")
+    rejected: int = Field(..., description="熔断期间被拒绝的请求数")
+
+
+class SourceHealthResponse(BaseModel):
+    adaptive_order: bool = Field(..., description="是否开启自适应排序")
+    items: List[SourceHealthItem] = Field(default_factory=list)
+    circuit_breakers: Dict[str, Dict[str, CircuitBreakerItem]] = Field(
+        default_factory=dict, description="熔断器统计 {熔断器: {数据源: 统计}}"
+    )
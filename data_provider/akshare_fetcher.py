@@ -7,13 +7,13 @@ AkshareFetcher - 主数据源 (Priority 1)
 数据来源：
 1. 东方财富爬虫（通过 akshare 库） - 默认数据源
 2. 新浪财经接口 - 备选数据源
-3. 腾讯财经接口 - 备选数据源
+3. 腾讯财经接口 - 备选数据源（新浪/腾讯实时行情支持按代码列表批量查询）
 
 特点：免费、无需 Token、数据全面
 风险：爬虫机制易被反爬封禁
 
 防封禁策略：
-1. 每次请求前随机休眠 2-5 秒
+1. 请求前通过进程级令牌桶限流（按上游：东财/新浪/腾讯）
 2. 随机轮换 User-Agent
 3. 使用 tenacity 实现指数退避重试
 4. 熔断器机制：连续失败后自动冷却
@@ -26,6 +26,8 @@ AkshareFetcher - 主数据源 (Priority 1)
 import logging
 import os
 import random
+import re
+import threading
 import time
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -44,8 +46,11 @@ from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
 from .realtime_types import (
     UnifiedRealtimeQuote, ChipDistribution, RealtimeSource,
     get_realtime_circuit_breaker, get_chip_circuit_breaker,
-    safe_float, safe_int  # 使用统一的类型转换函数
+    safe_float, safe_int,  # 使用统一的类型转换函数
+    build_code_index,
 )
+from .rate_limiter import acquire_rate_limit
+from .snapshot_cache import QuoteCache, SnapshotCache
 
 
 # 保留旧的 RealtimeQuote 别名，用于向后兼容
@@ -70,18 +75,59 @@ USER_AGENTS = [
 # - 批量分析场景：通常 30 只股票在 5 分钟内分析完，20 分钟足够覆盖
 # - 实时性要求：股票分析不需要秒级实时数据，20 分钟延迟可接受
 # - 防封禁：减少 API 调用频率
-_realtime_cache: Dict[str, Any] = {
-    'data': None,
-    'timestamp': 0,
-    'ttl': 1200  # 20分钟缓存有效期
-}
+# 并发未命中时只有一个线程拉取；过期后的宽限期内先返回旧快照并在后台刷新
+_realtime_cache = SnapshotCache(
+    "A股实时行情(东财)",
+    ttl=1200,  # 20分钟缓存有效期
+    index_builder=lambda df: build_code_index(df, '代码'),
+    shared_key="akshare_spot_em",
+)
 
 # ETF 实时行情缓存
-_etf_realtime_cache: Dict[str, Any] = {
-    'data': None,
-    'timestamp': 0,
-    'ttl': 1200  # 20分钟缓存有效期
+_etf_realtime_cache = SnapshotCache(
+    "ETF实时行情(东财)",
+    ttl=1200,  # 20分钟缓存有效期
+    index_builder=lambda df: build_code_index(df, '代码'),
+    shared_key="akshare_etf_spot_em",
+)
+
+# 新浪/腾讯逐代码行情缓存：批量查询结果按代码写入，单只查询同样经过该缓存，
+# TTL 读取 REALTIME_CACHE_TTL（不沿用全量行情的 20 分钟）
+_lite_quote_caches = {
+    'sina': QuoteCache("A股实时行情(新浪)"),
+    'tencent': QuoteCache("A股实时行情(腾讯)"),
 }
+_LITE_QUOTE_LABELS = {'sina': '新浪', 'tencent': '腾讯'}
+_LITE_QUOTE_BREAKER_KEYS = {'sina': 'akshare_sina', 'tencent': 'tencent'}
+# 新浪：var hq_str_sh600519="..."; 腾讯：v_sh600519="...";
+_LITE_QUOTE_PATTERN = re.compile(r'(?:hq_str_|v_)(\w+)="([^"]*)"')
+
+# 新浪/腾讯直连接口共用的 HTTP 会话（连接池复用 Keep-Alive 连接，避免每次请求重新握手）
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def _get_http_session():
+    """获取进程级 requests 会话（首次调用时创建）"""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _http_session = session
+    return _http_session
+
+
+def _lite_symbol(stock_code: str) -> str:
+    """新浪/腾讯接口的带市场前缀代码，如 sh600519 / sz000001"""
+    if stock_code.startswith(('6', '5', '9')):
+        return f"sh{stock_code}"
+    return f"sz{stock_code}"
 
 
 def _is_etf_code(stock_code: str) -> bool:
@@ -166,7 +212,7 @@ class AkshareFetcher(BaseFetcher):
     数据来源：东方财富网爬虫
     
     关键策略：
-    - 每次请求前随机休眠 2.0-5.0 秒
+    - 请求前通过进程级令牌桶限流（按上游区分）
     - 随机 User-Agent 轮换
     - 失败后指数退避重试（最多3次）
     """
@@ -174,17 +220,9 @@ class AkshareFetcher(BaseFetcher):
     name = "AkshareFetcher"
     priority = int(os.getenv("AKSHARE_PRIORITY", "1"))
     
-    def __init__(self, sleep_min: float = 2.0, sleep_max: float = 5.0):
-        """
-        初始化 AkshareFetcher
-        
-        Args:
-            sleep_min: 最小休眠时间（秒）
-            sleep_max: 最大休眠时间（秒）
-        """
-        self.sleep_min = sleep_min
-        self.sleep_max = sleep_max
-        self._last_request_time: Optional[float] = None
+    # 新浪/腾讯行情接口单次请求的代码数上限（代码列表拼在 URL 中，过长会被拒绝）
+    SINA_MAX_CODES_PER_REQUEST = 800
+    TENCENT_MAX_CODES_PER_REQUEST = 60
     
     def _set_random_user_agent(self) -> None:
         """
@@ -202,26 +240,14 @@ class AkshareFetcher(BaseFetcher):
         except Exception as e:
             logger.debug(f"设置 User-Agent 失败: {e}")
     
-    def _enforce_rate_limit(self) -> None:
+    def _enforce_rate_limit(self, upstream: str = 'eastmoney') -> None:
         """
         强制执行速率限制
-        
-        策略：
-        1. 检查距离上次请求的时间间隔
-        2. 如果间隔不足，补充休眠时间
-        3. 然后再执行随机 jitter 休眠
+
+        akshare 的接口分属不同上游（东财 _em、新浪、腾讯），
+        在对应上游的进程级令牌桶上取令牌，令牌充足时不等待
         """
-        if self._last_request_time is not None:
-            elapsed = time.time() - self._last_request_time
-            min_interval = self.sleep_min
-            if elapsed < min_interval:
-                additional_sleep = min_interval - elapsed
-                logger.debug(f"补充休眠 {additional_sleep:.2f} 秒")
-                time.sleep(additional_sleep)
-        
-        # 执行随机 jitter 休眠
-        self.random_sleep(self.sleep_min, self.sleep_max)
-        self._last_request_time = time.time()
+        acquire_rate_limit(upstream)
     
     @retry(
         stop=stop_after_attempt(3),  # 最多重试3次
@@ -242,7 +268,7 @@ class AkshareFetcher(BaseFetcher):
         流程：
         1. 判断代码类型（美股/港股/ETF/A股）
         2. 设置随机 User-Agent
-        3. 执行速率限制（随机休眠）
+        3. 执行速率限制（令牌桶）
         4. 调用对应的 akshare API
         5. 处理返回数据
         """
@@ -300,7 +326,7 @@ class AkshareFetcher(BaseFetcher):
         # 防封禁策略 1: 随机 User-Agent
         self._set_random_user_agent()
 
-        # 防封禁策略 2: 强制休眠
+        # 防封禁策略 2: 令牌桶限流
         self._enforce_rate_limit()
 
         logger.info(f"[API调用] ak.stock_zh_a_hist(symbol={stock_code}, ...)")
@@ -345,7 +371,7 @@ class AkshareFetcher(BaseFetcher):
         else:
             symbol = f"sz{stock_code}"
 
-        self._enforce_rate_limit()
+        self._enforce_rate_limit('sina')
 
         try:
             df = ak.stock_zh_a_daily(
@@ -394,7 +420,7 @@ class AkshareFetcher(BaseFetcher):
         else:
             symbol = f"sz{stock_code}"
 
-        self._enforce_rate_limit()
+        self._enforce_rate_limit('tencent')
 
         try:
             df = ak.stock_zh_a_hist_tx(
@@ -446,7 +472,7 @@ class AkshareFetcher(BaseFetcher):
         # 防封禁策略 1: 随机 User-Agent
         self._set_random_user_agent()
         
-        # 防封禁策略 2: 强制休眠
+        # 防封禁策略 2: 令牌桶限流
         self._enforce_rate_limit()
         
         logger.info(f"[API调用] ak.fund_etf_hist_em(symbol={stock_code}, period=daily, "
@@ -507,8 +533,8 @@ class AkshareFetcher(BaseFetcher):
         # 防封禁策略 1: 随机 User-Agent
         self._set_random_user_agent()
         
-        # 防封禁策略 2: 强制休眠
-        self._enforce_rate_limit()
+        # 防封禁策略 2: 令牌桶限流
+        self._enforce_rate_limit('sina')
         
         # 美股代码直接使用大写
         symbol = stock_code.strip().upper()
@@ -602,7 +628,7 @@ class AkshareFetcher(BaseFetcher):
         # 防封禁策略 1: 随机 User-Agent
         self._set_random_user_agent()
         
-        # 防封禁策略 2: 强制休眠
+        # 防封禁策略 2: 令牌桶限流
         self._enforce_rate_limit()
         
         # 确保代码格式正确（5位数字）
@@ -691,7 +717,7 @@ class AkshareFetcher(BaseFetcher):
         数据源优先级（可配置）：
         1. em: 东方财富（akshare ak.stock_zh_a_spot_em）- 数据最全，含量比/PE/PB/市值等
         2. sina: 新浪财经（akshare ak.stock_zh_a_spot）- 轻量级，基本行情
-        3. tencent: 腾讯直连接口 - 单股票查询，负载小
+        3. tencent: 腾讯直连接口 - 支持代码列表批量查询，负载小
 
         Args:
             stock_code: 股票/ETF代码
@@ -700,14 +726,7 @@ class AkshareFetcher(BaseFetcher):
         Returns:
             UnifiedRealtimeQuote 对象，获取失败返回 None
         """
-        # 检查熔断器状态
-        circuit_breaker = get_realtime_circuit_breaker()
-        source_key = f"akshare_{source}"
-        
-        if not circuit_breaker.is_available(source_key):
-            logger.warning(f"[熔断] 数据源 {source_key} 处于熔断状态，跳过")
-            return None
-        
+        # 熔断检查在各数据源的请求路径中进行（按实际的熔断键占用半开试探名额）
         # 根据代码类型选择不同的获取方法
         if _is_us_code(stock_code):
             # 美股不使用 Akshare，由 YfinanceFetcher 处理
@@ -726,6 +745,45 @@ class AkshareFetcher(BaseFetcher):
             else:
                 return self._get_stock_realtime_quote_em(stock_code)
     
+    def _load_stock_spot_em(self) -> pd.DataFrame:
+        """
+        全量拉取 A 股实时行情（东财），供 _realtime_cache 刷新使用
+
+        失败时返回空 DataFrame（不覆盖已有快照，由熔断器避免反复请求）
+        """
+        import akshare as ak
+        circuit_breaker = get_realtime_circuit_breaker()
+        source_key = "akshare_em"
+
+        last_error: Optional[Exception] = None
+        for attempt in range(1, 3):
+            try:
+                # 防封禁策略
+                self._set_random_user_agent()
+                self._enforce_rate_limit()
+
+                logger.info(f"[API调用] ak.stock_zh_a_spot_em() 获取A股实时行情... (attempt {attempt}/2)")
+                api_start = time.time()
+
+                df = ak.stock_zh_a_spot_em()
+
+                api_elapsed = time.time() - api_start
+                logger.info(f"[API返回] ak.stock_zh_a_spot_em 成功: 返回 {len(df)} 只股票, 耗时 {api_elapsed:.2f}s")
+                circuit_breaker.record_success(source_key)
+                return df
+            except Exception as e:
+                last_error = e
+                logger.warning(f"[API错误] ak.stock_zh_a_spot_em 获取失败 (attempt {attempt}/2): {e}")
+                time.sleep(min(2 ** attempt, 5))
+
+        logger.error(f"[API错误] ak.stock_zh_a_spot_em 最终失败: {last_error}")
+        circuit_breaker.record_failure(source_key, str(last_error))
+        return pd.DataFrame()
+
+    def get_spot_snapshot(self):
+        """全量 A 股实时行情快照（东财，读 _realtime_cache），供 MarketSnapshot 构建使用"""
+        return _realtime_cache.get(self._load_stock_spot_em)
+
     def _get_stock_realtime_quote_em(self, stock_code: str) -> Optional[UnifiedRealtimeQuote]:
         """
         获取普通 A 股实时行情数据（东方财富数据源）
@@ -734,294 +792,298 @@ class AkshareFetcher(BaseFetcher):
         优点：数据最全，含量比、换手率、市盈率、市净率、总市值、流通市值等
         缺点：全量拉取，数据量大，容易超时/限流
         """
-        import akshare as ak
         circuit_breaker = get_realtime_circuit_breaker()
         source_key = "akshare_em"
         
-        try:
-            # 检查缓存
-            current_time = time.time()
-            if (_realtime_cache['data'] is not None and 
-                current_time - _realtime_cache['timestamp'] < _realtime_cache['ttl']):
-                df = _realtime_cache['data']
-                cache_age = int(current_time - _realtime_cache['timestamp'])
-                logger.debug(f"[缓存命中] A股实时行情(东财) - 缓存年龄 {cache_age}s/{_realtime_cache['ttl']}s")
-            else:
-                # 触发全量刷新
-                logger.info(f"[缓存未命中] 触发全量刷新 A股实时行情(东财)")
-                last_error: Optional[Exception] = None
-                df = None
-                for attempt in range(1, 3):
-                    try:
-                        # 防封禁策略
-                        self._set_random_user_agent()
-                        self._enforce_rate_limit()
-
-                        logger.info(f"[API调用] ak.stock_zh_a_spot_em() 获取A股实时行情... (attempt {attempt}/2)")
-                        import time as _time
-                        api_start = _time.time()
-
-                        df = ak.stock_zh_a_spot_em()
-
-                        api_elapsed = _time.time() - api_start
-                        logger.info(f"[API返回] ak.stock_zh_a_spot_em 成功: 返回 {len(df)} 只股票, 耗时 {api_elapsed:.2f}s")
-                        circuit_breaker.record_success(source_key)
-                        break
-                    except Exception as e:
-                        last_error = e
-                        logger.warning(f"[API错误] ak.stock_zh_a_spot_em 获取失败 (attempt {attempt}/2): {e}")
-                        time.sleep(min(2 ** attempt, 5))
-
-                # 更新缓存：成功缓存数据；失败也缓存空数据，避免同一轮任务对同一接口反复请求
-                if df is None:
-                    logger.error(f"[API错误] ak.stock_zh_a_spot_em 最终失败: {last_error}")
-                    circuit_breaker.record_failure(source_key, str(last_error))
-                    df = pd.DataFrame()
-                _realtime_cache['data'] = df
-                _realtime_cache['timestamp'] = current_time
-                logger.info(f"[缓存更新] A股实时行情(东财) 缓存已刷新，TTL={_realtime_cache['ttl']}s")
-
-            if df is None or df.empty:
-                logger.warning(f"[实时行情] A股实时行情数据为空，跳过 {stock_code}")
+        with circuit_breaker.probe(source_key) as allowed:
+            if not allowed:
+                logger.warning(f"[熔断] 数据源 {source_key} 处于熔断状态，跳过")
                 return None
+            try:
+                # 读取缓存（并发未命中时只有一个线程发起全量刷新）
+                snapshot = _realtime_cache.get(self._load_stock_spot_em)
+                if snapshot.data.empty:
+                    logger.warning(f"[实时行情] A股实时行情数据为空，跳过 {stock_code}")
+                    return None
+            
+                # 查找指定股票（刷新时已建好代码索引）
+                row = snapshot.index.get(stock_code)
+                if row is None:
+                    logger.warning(f"[API返回] 未找到股票 {stock_code} 的实时行情")
+                    return None
+            
+                # 使用 realtime_types.py 中的统一转换函数
+                quote = UnifiedRealtimeQuote(
+                    code=stock_code,
+                    name=str(row.get('名称', '')),
+                    source=RealtimeSource.AKSHARE_EM,
+                    price=safe_float(row.get('最新价')),
+                    change_pct=safe_float(row.get('涨跌幅')),
+                    change_amount=safe_float(row.get('涨跌额')),
+                    volume=safe_int(row.get('成交量')),
+                    amount=safe_float(row.get('成交额')),
+                    volume_ratio=safe_float(row.get('量比')),
+                    turnover_rate=safe_float(row.get('换手率')),
+                    amplitude=safe_float(row.get('振幅')),
+                    open_price=safe_float(row.get('今开')),
+                    high=safe_float(row.get('最高')),
+                    low=safe_float(row.get('最低')),
+                    pe_ratio=safe_float(row.get('市盈率-动态')),
+                    pb_ratio=safe_float(row.get('市净率')),
+                    total_mv=safe_float(row.get('总市值')),
+                    circ_mv=safe_float(row.get('流通市值')),
+                    change_60d=safe_float(row.get('60日涨跌幅')),
+                    high_52w=safe_float(row.get('52周最高')),
+                    low_52w=safe_float(row.get('52周最低')),
+                )
+            
+                logger.info(f"[实时行情-东财] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
+                           f"量比={quote.volume_ratio}, 换手率={quote.turnover_rate}%")
+                return quote
             
-            # 查找指定股票
-            row = df[df['代码'] == stock_code]
-            if row.empty:
-                logger.warning(f"[API返回] 未找到股票 {stock_code} 的实时行情")
+            except Exception as e:
+                logger.error(f"[API错误] 获取 {stock_code} 实时行情(东财)失败: {e}")
+                circuit_breaker.record_failure(source_key, str(e))
                 return None
-            
-            row = row.iloc[0]
-            
-            # 使用 realtime_types.py 中的统一转换函数
-            quote = UnifiedRealtimeQuote(
-                code=stock_code,
-                name=str(row.get('名称', '')),
-                source=RealtimeSource.AKSHARE_EM,
-                price=safe_float(row.get('最新价')),
-                change_pct=safe_float(row.get('涨跌幅')),
-                change_amount=safe_float(row.get('涨跌额')),
-                volume=safe_int(row.get('成交量')),
-                amount=safe_float(row.get('成交额')),
-                volume_ratio=safe_float(row.get('量比')),
-                turnover_rate=safe_float(row.get('换手率')),
-                amplitude=safe_float(row.get('振幅')),
-                open_price=safe_float(row.get('今开')),
-                high=safe_float(row.get('最高')),
-                low=safe_float(row.get('最低')),
-                pe_ratio=safe_float(row.get('市盈率-动态')),
-                pb_ratio=safe_float(row.get('市净率')),
-                total_mv=safe_float(row.get('总市值')),
-                circ_mv=safe_float(row.get('流通市值')),
-                change_60d=safe_float(row.get('60日涨跌幅')),
-                high_52w=safe_float(row.get('52周最高')),
-                low_52w=safe_float(row.get('52周最低')),
-            )
-            
-            logger.info(f"[实时行情-东财] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
-                       f"量比={quote.volume_ratio}, 换手率={quote.turnover_rate}%")
-            return quote
-            
-        except Exception as e:
-            logger.error(f"[API错误] 获取 {stock_code} 实时行情(东财)失败: {e}")
-            circuit_breaker.record_failure(source_key, str(e))
-            return None
     
     def _get_stock_realtime_quote_sina(self, stock_code: str) -> Optional[UnifiedRealtimeQuote]:
         """
         获取普通 A 股实时行情数据（新浪财经数据源）
         
-        数据来源：新浪财经接口（直连，单股票查询）
-        优点：单股票查询，负载小，速度快
+        数据来源：新浪财经接口（直连，支持代码列表）
+        优点：负载小，速度快；批量预取后直接命中缓存
         缺点：数据字段较少，无量比/PE/PB等
         
         接口格式：http://hq.sinajs.cn/list=sh600519,sz000001
         """
-        circuit_breaker = get_realtime_circuit_breaker()
-        source_key = "akshare_sina"
-        
-        try:
-            import requests
-            
-            # 判断市场前缀
-            if stock_code.startswith(('6', '5', '9')):
-                symbol = f"sh{stock_code}"
-            else:
-                symbol = f"sz{stock_code}"
-            
-            url = f"http://hq.sinajs.cn/list={symbol}"
-            headers = {
-                'Referer': 'http://finance.sina.com.cn',
-                'User-Agent': random.choice(USER_AGENTS)
-            }
-            
-            logger.info(f"[API调用] 新浪财经接口获取 {stock_code} 实时行情...")
-            
-            self._enforce_rate_limit()
-            response = requests.get(url, headers=headers, timeout=10)
-            response.encoding = 'gbk'
-            
-            if response.status_code != 200:
-                logger.warning(f"[API错误] 新浪接口返回状态码 {response.status_code}")
-                circuit_breaker.record_failure(source_key, f"HTTP {response.status_code}")
-                return None
-            
-            # 解析数据：var hq_str_sh600519="贵州茅台,1866.000,1870.000,..."
-            content = response.text.strip()
-            if '=""' in content or not content:
-                logger.warning(f"[API返回] 新浪接口未找到 {stock_code} 数据")
-                return None
-            
-            # 提取引号内的数据
-            data_start = content.find('"')
-            data_end = content.rfind('"')
-            if data_start == -1 or data_end == -1:
-                logger.warning(f"[API返回] 新浪接口数据格式异常")
-                circuit_breaker.record_failure(source_key, "数据格式异常")
-                return None
-            
-            data_str = content[data_start+1:data_end]
-            fields = data_str.split(',')
-            
-            if len(fields) < 32:
-                logger.warning(f"[API返回] 新浪接口数据字段不足: {len(fields)}")
-                return None
-            
-            circuit_breaker.record_success(source_key)
-            
-            # 新浪数据字段顺序：
-            # 0:名称 1:今开 2:昨收 3:最新价 4:最高 5:最低 6:买一价 7:卖一价
-            # 8:成交量(股) 9:成交额(元) ... 30:日期 31:时间
-            # 使用 realtime_types.py 中的统一转换函数
-            price = safe_float(fields[3])
-            pre_close = safe_float(fields[2])
-            change_pct = None
-            change_amount = None
-            if price and pre_close and pre_close > 0:
-                change_amount = price - pre_close
-                change_pct = (change_amount / pre_close) * 100
-            
-            quote = UnifiedRealtimeQuote(
-                code=stock_code,
-                name=fields[0],
-                source=RealtimeSource.AKSHARE_SINA,
-                price=price,
-                change_pct=change_pct,
-                change_amount=change_amount,
-                volume=safe_int(fields[8]),  # 成交量（股）
-                amount=safe_float(fields[9]),  # 成交额（元）
-                open_price=safe_float(fields[1]),
-                high=safe_float(fields[4]),
-                low=safe_float(fields[5]),
-                pre_close=pre_close,
-            )
-            
-            logger.info(f"[实时行情-新浪] {stock_code} {quote.name}: 价格={quote.price}, "
-                       f"涨跌={quote.change_pct:.2f}%" if quote.change_pct else "")
-            return quote
-            
-        except Exception as e:
-            logger.error(f"[API错误] 获取 {stock_code} 实时行情(新浪)失败: {e}")
-            circuit_breaker.record_failure(source_key, str(e))
-            return None
+        return self._get_lite_realtime_quote(stock_code, 'sina')
     
     def _get_stock_realtime_quote_tencent(self, stock_code: str) -> Optional[UnifiedRealtimeQuote]:
         """
         获取普通 A 股实时行情数据（腾讯财经数据源）
         
-        数据来源：腾讯财经接口（直连，单股票查询）
-        优点：单股票查询，负载小，包含换手率
-        缺点：无量比/PE/PB等估值数据
+        数据来源：腾讯财经接口（直连，支持代码列表）
+        优点：负载小，包含换手率/量比/PE/PB/市值
+        缺点：部分字段偶尔缺失
         
         接口格式：http://qt.gtimg.cn/q=sh600519,sz000001
         """
-        circuit_breaker = get_realtime_circuit_breaker()
-        source_key = "tencent"
+        return self._get_lite_realtime_quote(stock_code, 'tencent')
+    
+    def _get_lite_realtime_quote(self, stock_code: str, source: str) -> Optional[UnifiedRealtimeQuote]:
+        """单只查询：先读逐代码缓存，未命中时按一只股票的代码列表请求"""
+        quote = _lite_quote_caches[source].get(stock_code)
+        if quote is not None:
+            logger.debug(f"[缓存命中] {stock_code} 实时行情({source})")
+            return quote
         
-        try:
-            import requests
-            
-            # 判断市场前缀
-            if stock_code.startswith(('6', '5', '9')):
-                symbol = f"sh{stock_code}"
-            else:
-                symbol = f"sz{stock_code}"
-            
-            url = f"http://qt.gtimg.cn/q={symbol}"
-            headers = {
-                'Referer': 'http://finance.qq.com',
-                'User-Agent': random.choice(USER_AGENTS)
-            }
-            
-            logger.info(f"[API调用] 腾讯财经接口获取 {stock_code} 实时行情...")
-            
-            self._enforce_rate_limit()
-            response = requests.get(url, headers=headers, timeout=10)
-            response.encoding = 'gbk'
-            
-            if response.status_code != 200:
-                logger.warning(f"[API错误] 腾讯接口返回状态码 {response.status_code}")
-                circuit_breaker.record_failure(source_key, f"HTTP {response.status_code}")
-                return None
-            
-            content = response.text.strip()
-            if '=""' in content or not content:
-                logger.warning(f"[API返回] 腾讯接口未找到 {stock_code} 数据")
-                return None
-            
-            # 提取数据
-            data_start = content.find('"')
-            data_end = content.rfind('"')
-            if data_start == -1 or data_end == -1:
-                logger.warning(f"[API返回] 腾讯接口数据格式异常")
-                circuit_breaker.record_failure(source_key, "数据格式异常")
-                return None
-            
-            data_str = content[data_start+1:data_end]
-            fields = data_str.split('~')
-            
-            if len(fields) < 45:
-                logger.warning(f"[API返回] 腾讯接口数据字段不足: {len(fields)}")
+        circuit_breaker = get_realtime_circuit_breaker()
+        source_key = _LITE_QUOTE_BREAKER_KEYS[source]
+        with circuit_breaker.probe(source_key) as allowed:
+            if not allowed:
+                logger.warning(f"[熔断] 数据源 {source_key} 处于熔断状态，跳过")
                 return None
+            quote = self._fetch_lite_quotes([stock_code], source).get(stock_code)
+        if quote is None:
+            logger.warning(f"[API返回] {_LITE_QUOTE_LABELS[source]}接口未找到 {stock_code} 数据")
+            return None
+        logger.info(f"[实时行情-{_LITE_QUOTE_LABELS[source]}] {stock_code} {quote.name}: 价格={quote.price}, "
+                    f"涨跌={quote.change_pct}%, 量比={quote.volume_ratio}, 换手率={quote.turnover_rate}%")
+        return quote
+    
+    def get_realtime_quotes_batch(self, stock_codes: List[str], source: str = "sina") -> Dict[str, UnifiedRealtimeQuote]:
+        """
+        批量获取普通 A 股实时行情（新浪/腾讯）
+        
+        缓存命中的代码直接返回；其余代码按接口上限分块，每块一次 HTTP 请求（复用连接池），
+        结果写入逐代码缓存，之后的单只查询不再请求
+        
+        Args:
+            stock_codes: 股票代码列表（港股/美股/ETF 不走新浪/腾讯接口，会被忽略）
+            source: "sina" 或 "tencent"
             
-            circuit_breaker.record_success(source_key)
-            
-            # 腾讯数据字段顺序（完整）：
-            # 1:名称 2:代码 3:最新价 4:昨收 5:今开 6:成交量(手) 7:外盘 8:内盘
-            # 9-28:买卖五档 30:时间戳 31:涨跌额 32:涨跌幅(%) 33:今开 34:最高 35:最低/成交量/成交额
-            # 36:成交量(手) 37:成交额(万) 38:换手率(%) 39:市盈率 43:振幅(%)
-            # 44:流通市值(亿) 45:总市值(亿) 46:市净率 47:涨停价 48:跌停价 49:量比
-            # 使用 realtime_types.py 中的统一转换函数
-            quote = UnifiedRealtimeQuote(
-                code=stock_code,
-                name=fields[1] if len(fields) > 1 else "",
-                source=RealtimeSource.TENCENT,
-                price=safe_float(fields[3]),
-                change_pct=safe_float(fields[32]),
-                change_amount=safe_float(fields[31]) if len(fields) > 31 else None,
-                volume=safe_int(fields[6]) * 100 if fields[6] else None,  # 腾讯返回的是手，转为股
-                open_price=safe_float(fields[5]),
-                high=safe_float(fields[34]) if len(fields) > 34 else None,
-                low=safe_float(fields[35].split('/')[0]) if len(fields) > 35 and '/' in str(fields[35]) else safe_float(fields[35]) if len(fields) > 35 else None,
-                pre_close=safe_float(fields[4]),
-                turnover_rate=safe_float(fields[38]) if len(fields) > 38 else None,
-                amplitude=safe_float(fields[43]) if len(fields) > 43 else None,
-                volume_ratio=safe_float(fields[49]) if len(fields) > 49 else None,  # 量比
-                pe_ratio=safe_float(fields[39]) if len(fields) > 39 else None,  # 市盈率
-                pb_ratio=safe_float(fields[46]) if len(fields) > 46 else None,  # 市净率
-                circ_mv=safe_float(fields[44]) * 100000000 if len(fields) > 44 and fields[44] else None,  # 流通市值(亿->元)
-                total_mv=safe_float(fields[45]) * 100000000 if len(fields) > 45 and fields[45] else None,  # 总市值(亿->元)
-            )
-            
-            logger.info(f"[实时行情-腾讯] {stock_code} {quote.name}: 价格={quote.price}, "
-                       f"涨跌={quote.change_pct}%, 量比={quote.volume_ratio}, 换手率={quote.turnover_rate}%")
-            return quote
-            
-        except Exception as e:
-            logger.error(f"[API错误] 获取 {stock_code} 实时行情(腾讯)失败: {e}")
-            circuit_breaker.record_failure(source_key, str(e))
+        Returns:
+            {stock_code: UnifiedRealtimeQuote}，获取失败的代码不出现在结果中
+        """
+        if source not in _lite_quote_caches:
+            raise ValueError(f"不支持批量查询的实时行情数据源: {source}")
+        
+        codes = [c for c in dict.fromkeys(stock_codes) if c.isdigit() and len(c) == 6 and not _is_etf_code(c)]
+        quotes = _lite_quote_caches[source].get_many(codes)
+        missing = [c for c in codes if c not in quotes]
+        if missing:
+            circuit_breaker = get_realtime_circuit_breaker()
+            source_key = _LITE_QUOTE_BREAKER_KEYS[source]
+            with circuit_breaker.probe(source_key) as allowed:
+                if not allowed:
+                    logger.warning(f"[熔断] 数据源 {source_key} 处于熔断状态，跳过批量查询")
+                else:
+                    quotes.update(self._fetch_lite_quotes(missing, source))
+        return quotes
+    
+    def _fetch_lite_quotes(self, stock_codes: List[str], source: str) -> Dict[str, UnifiedRealtimeQuote]:
+        """按接口上限分块请求新浪/腾讯行情，解析结果并写入缓存"""
+        circuit_breaker = get_realtime_circuit_breaker()
+        source_key = _LITE_QUOTE_BREAKER_KEYS[source]
+        label = _LITE_QUOTE_LABELS[source]
+        if source == 'sina':
+            url_prefix, referer = "http://hq.sinajs.cn/list=", 'http://finance.sina.com.cn'
+            chunk_size, parser = self.SINA_MAX_CODES_PER_REQUEST, self._parse_sina_quote
+        else:
+            url_prefix, referer = "http://qt.gtimg.cn/q=", 'http://finance.qq.com'
+            chunk_size, parser = self.TENCENT_MAX_CODES_PER_REQUEST, self._parse_tencent_quote
+        
+        session = _get_http_session()
+        quotes: Dict[str, UnifiedRealtimeQuote] = {}
+        for i in range(0, len(stock_codes), chunk_size):
+            chunk = stock_codes[i:i + chunk_size]
+            symbols = {_lite_symbol(code): code for code in chunk}
+            try:
+                logger.info(f"[API调用] {label}接口获取 {len(chunk)} 只股票实时行情...")
+                self._enforce_rate_limit(source)
+                response = session.get(
+                    url_prefix + ','.join(symbols),
+                    headers={'Referer': referer, 'User-Agent': random.choice(USER_AGENTS)},
+                    timeout=10,
+                )
+                response.encoding = 'gbk'
+                
+                if response.status_code != 200:
+                    logger.warning(f"[API错误] {label}接口返回状态码 {response.status_code}")
+                    circuit_breaker.record_failure(source_key, f"HTTP {response.status_code}")
+                    continue
+                
+                # 每只股票一行：var hq_str_sh600519="..."; / v_sh600519="...";
+                # 未知代码返回空串（新浪）或 v_pv_none_match（腾讯），直接忽略
+                content = response.text.strip()
+                lines = _LITE_QUOTE_PATTERN.findall(content)
+                if content and not lines:
+                    logger.warning(f"[API返回] {label}接口数据格式异常")
+                    circuit_breaker.record_failure(source_key, "数据格式异常")
+                    continue
+                
+                for symbol, data_str in lines:
+                    stock_code = symbols.get(symbol)
+                    if stock_code is None or not data_str:
+                        continue
+                    quote = parser(stock_code, data_str)
+                    if quote is not None:
+                        quotes[stock_code] = quote
+                circuit_breaker.record_success(source_key)
+            except Exception as e:
+                logger.error(f"[API错误] {label}接口获取 {len(chunk)} 只股票实时行情失败: {e}")
+                circuit_breaker.record_failure(source_key, str(e))
+        
+        if len(stock_codes) > 1:
+            logger.info(f"[实时行情-{label}] 批量获取 {len(quotes)}/{len(stock_codes)} 只股票")
+        _lite_quote_caches[source].put_many(quotes)
+        return quotes
+    
+    @staticmethod
+    def _parse_sina_quote(stock_code: str, data_str: str) -> Optional[UnifiedRealtimeQuote]:
+        """解析新浪单只股票行情：贵州茅台,1866.000,1870.000,..."""
+        fields = data_str.split(',')
+        if len(fields) < 32:
+            logger.warning(f"[API返回] 新浪接口 {stock_code} 数据字段不足: {len(fields)}")
             return None
+        
+        # 新浪数据字段顺序：
+        # 0:名称 1:今开 2:昨收 3:最新价 4:最高 5:最低 6:买一价 7:卖一价
+        # 8:成交量(股) 9:成交额(元) ... 30:日期 31:时间
+        # 使用 realtime_types.py 中的统一转换函数
+        price = safe_float(fields[3])
+        pre_close = safe_float(fields[2])
+        change_pct = None
+        change_amount = None
+        if price and pre_close and pre_close > 0:
+            change_amount = price - pre_close
+            change_pct = (change_amount / pre_close) * 100
+        
+        return UnifiedRealtimeQuote(
+            code=stock_code,
+            name=fields[0],
+            source=RealtimeSource.AKSHARE_SINA,
+            price=price,
+            change_pct=change_pct,
+            change_amount=change_amount,
+            volume=safe_int(fields[8]),  # 成交量（股）
+            amount=safe_float(fields[9]),  # 成交额（元）
+            open_price=safe_float(fields[1]),
+            high=safe_float(fields[4]),
+            low=safe_float(fields[5]),
+            pre_close=pre_close,
+        )
     
+    @staticmethod
+    def _parse_tencent_quote(stock_code: str, data_str: str) -> Optional[UnifiedRealtimeQuote]:
+        """解析腾讯单只股票行情：1~贵州茅台~600519~1866.00~..."""
+        fields = data_str.split('~')
+        if len(fields) < 45:
+            logger.warning(f"[API返回] 腾讯接口 {stock_code} 数据字段不足: {len(fields)}")
+            return None
+        
+        # 腾讯数据字段顺序（完整）：
+        # 1:名称 2:代码 3:最新价 4:昨收 5:今开 6:成交量(手) 7:外盘 8:内盘
+        # 9-28:买卖五档 30:时间戳 31:涨跌额 32:涨跌幅(%) 33:今开 34:最高 35:最低/成交量/成交额
+        # 36:成交量(手) 37:成交额(万) 38:换手率(%) 39:市盈率 43:振幅(%)
+        # 44:流通市值(亿) 45:总市值(亿) 46:市净率 47:涨停价 48:跌停价 49:量比
+        # 使用 realtime_types.py 中的统一转换函数
+        return UnifiedRealtimeQuote(
+            code=stock_code,
+            name=fields[1] if len(fields) > 1 else "",
+            source=RealtimeSource.TENCENT,
+            price=safe_float(fields[3]),
+            change_pct=safe_float(fields[32]),
+            change_amount=safe_float(fields[31]) if len(fields) > 31 else None,
+            volume=safe_int(fields[6]) * 100 if fields[6] else None,  # 腾讯返回的是手，转为股
+            open_price=safe_float(fields[5]),
+            high=safe_float(fields[34]) if len(fields) > 34 else None,
+            low=safe_float(fields[35].split('/')[0]) if len(fields) > 35 and '/' in str(fields[35]) else safe_float(fields[35]) if len(fields) > 35 else None,
+            pre_close=safe_float(fields[4]),
+            turnover_rate=safe_float(fields[38]) if len(fields) > 38 else None,
+            amplitude=safe_float(fields[43]) if len(fields) > 43 else None,
+            volume_ratio=safe_float(fields[49]) if len(fields) > 49 else None,  # 量比
+            pe_ratio=safe_float(fields[39]) if len(fields) > 39 else None,  # 市盈率
+            pb_ratio=safe_float(fields[46]) if len(fields) > 46 else None,  # 市净率
+            circ_mv=safe_float(fields[44]) * 100000000 if len(fields) > 44 and fields[44] else None,  # 流通市值(亿->元)
+            total_mv=safe_float(fields[45]) * 100000000 if len(fields) > 45 and fields[45] else None,  # 总市值(亿->元)
+        )
+    
+    def _load_etf_spot_em(self) -> pd.DataFrame:
+        """
+        全量拉取 ETF 实时行情（东财），供 _etf_realtime_cache 刷新使用
+
+        失败时返回空 DataFrame（不覆盖已有快照）
+        """
+        import akshare as ak
+        circuit_breaker = get_realtime_circuit_breaker()
+        source_key = "akshare_etf"
+
+        last_error: Optional[Exception] = None
+        for attempt in range(1, 3):
+            try:
+                # 防封禁策略
+                self._set_random_user_agent()
+                self._enforce_rate_limit()
+
+                logger.info(f"[API调用] ak.fund_etf_spot_em() 获取ETF实时行情... (attempt {attempt}/2)")
+                api_start = time.time()
+
+                df = ak.fund_etf_spot_em()
+
+                api_elapsed = time.time() - api_start
+                logger.info(f"[API返回] ak.fund_etf_spot_em 成功: 返回 {len(df)} 只ETF, 耗时 {api_elapsed:.2f}s")
+                circuit_breaker.record_success(source_key)
+                return df
+            except Exception as e:
+                last_error = e
+                logger.warning(f"[API错误] ak.fund_etf_spot_em 获取失败 (attempt {attempt}/2): {e}")
+                time.sleep(min(2 ** attempt, 5))
+
+        logger.error(f"[API错误] ak.fund_etf_spot_em 最终失败: {last_error}")
+        circuit_breaker.record_failure(source_key, str(last_error))
+        return pd.DataFrame()
+
     def _get_etf_realtime_quote(self, stock_code: str) -> Optional[UnifiedRealtimeQuote]:
         """
         获取 ETF 基金实时行情数据
@@ -1035,91 +1097,57 @@ class AkshareFetcher(BaseFetcher):
         Returns:
             UnifiedRealtimeQuote 对象，获取失败返回 None
         """
-        import akshare as ak
         circuit_breaker = get_realtime_circuit_breaker()
         source_key = "akshare_etf"
         
-        try:
-            # 检查缓存
-            current_time = time.time()
-            if (_etf_realtime_cache['data'] is not None and 
-                current_time - _etf_realtime_cache['timestamp'] < _etf_realtime_cache['ttl']):
-                df = _etf_realtime_cache['data']
-                logger.debug(f"[缓存命中] 使用缓存的ETF实时行情数据")
-            else:
-                last_error: Optional[Exception] = None
-                df = None
-                for attempt in range(1, 3):
-                    try:
-                        # 防封禁策略
-                        self._set_random_user_agent()
-                        self._enforce_rate_limit()
-
-                        logger.info(f"[API调用] ak.fund_etf_spot_em() 获取ETF实时行情... (attempt {attempt}/2)")
-                        import time as _time
-                        api_start = _time.time()
-
-                        df = ak.fund_etf_spot_em()
-
-                        api_elapsed = _time.time() - api_start
-                        logger.info(f"[API返回] ak.fund_etf_spot_em 成功: 返回 {len(df)} 只ETF, 耗时 {api_elapsed:.2f}s")
-                        circuit_breaker.record_success(source_key)
-                        break
-                    except Exception as e:
-                        last_error = e
-                        logger.warning(f"[API错误] ak.fund_etf_spot_em 获取失败 (attempt {attempt}/2): {e}")
-                        time.sleep(min(2 ** attempt, 5))
-
-                if df is None:
-                    logger.error(f"[API错误] ak.fund_etf_spot_em 最终失败: {last_error}")
-                    circuit_breaker.record_failure(source_key, str(last_error))
-                    df = pd.DataFrame()
-                _etf_realtime_cache['data'] = df
-                _etf_realtime_cache['timestamp'] = current_time
-
-            if df is None or df.empty:
-                logger.warning(f"[实时行情] ETF实时行情数据为空，跳过 {stock_code}")
+        with circuit_breaker.probe(source_key) as allowed:
+            if not allowed:
+                logger.warning(f"[熔断] 数据源 {source_key} 处于熔断状态，跳过")
                 return None
+            try:
+                # 读取缓存（并发未命中时只有一个线程发起全量刷新）
+                snapshot = _etf_realtime_cache.get(self._load_etf_spot_em)
+                if snapshot.data.empty:
+                    logger.warning(f"[实时行情] ETF实时行情数据为空，跳过 {stock_code}")
+                    return None
+            
+                # 查找指定 ETF（刷新时已建好代码索引）
+                row = snapshot.index.get(stock_code)
+                if row is None:
+                    logger.warning(f"[API返回] 未找到 ETF {stock_code} 的实时行情")
+                    return None
+            
+                # 使用 realtime_types.py 中的统一转换函数
+                # ETF 行情数据构建
+                quote = UnifiedRealtimeQuote(
+                    code=stock_code,
+                    name=str(row.get('名称', '')),
+                    source=RealtimeSource.AKSHARE_EM,
+                    price=safe_float(row.get('最新价')),
+                    change_pct=safe_float(row.get('涨跌幅')),
+                    change_amount=safe_float(row.get('涨跌额')),
+                    volume=safe_int(row.get('成交量')),
+                    amount=safe_float(row.get('成交额')),
+                    volume_ratio=safe_float(row.get('量比')),
+                    turnover_rate=safe_float(row.get('换手率')),
+                    amplitude=safe_float(row.get('振幅')),
+                    open_price=safe_float(row.get('今开')),
+                    high=safe_float(row.get('最高')),
+                    low=safe_float(row.get('最低')),
+                    total_mv=safe_float(row.get('总市值')),
+                    circ_mv=safe_float(row.get('流通市值')),
+                    high_52w=safe_float(row.get('52周最高')),
+                    low_52w=safe_float(row.get('52周最低')),
+                )
+            
+                logger.info(f"[ETF实时行情] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
+                           f"换手率={quote.turnover_rate}%")
+                return quote
             
-            # 查找指定 ETF
-            row = df[df['代码'] == stock_code]
-            if row.empty:
-                logger.warning(f"[API返回] 未找到 ETF {stock_code} 的实时行情")
+            except Exception as e:
+                logger.error(f"[API错误] 获取 ETF {stock_code} 实时行情失败: {e}")
+                circuit_breaker.record_failure(source_key, str(e))
                 return None
-            
-            row = row.iloc[0]
-            
-            # 使用 realtime_types.py 中的统一转换函数
-            # ETF 行情数据构建
-            quote = UnifiedRealtimeQuote(
-                code=stock_code,
-                name=str(row.get('名称', '')),
-                source=RealtimeSource.AKSHARE_EM,
-                price=safe_float(row.get('最新价')),
-                change_pct=safe_float(row.get('涨跌幅')),
-                change_amount=safe_float(row.get('涨跌额')),
-                volume=safe_int(row.get('成交量')),
-                amount=safe_float(row.get('成交额')),
-                volume_ratio=safe_float(row.get('量比')),
-                turnover_rate=safe_float(row.get('换手率')),
-                amplitude=safe_float(row.get('振幅')),
-                open_price=safe_float(row.get('今开')),
-                high=safe_float(row.get('最高')),
-                low=safe_float(row.get('最低')),
-                total_mv=safe_float(row.get('总市值')),
-                circ_mv=safe_float(row.get('流通市值')),
-                high_52w=safe_float(row.get('52周最高')),
-                low_52w=safe_float(row.get('52周最低')),
-            )
-            
-            logger.info(f"[ETF实时行情] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
-                       f"换手率={quote.turnover_rate}%")
-            return quote
-            
-        except Exception as e:
-            logger.error(f"[API错误] 获取 ETF {stock_code} 实时行情失败: {e}")
-            circuit_breaker.record_failure(source_key, str(e))
-            return None
     
     def _get_hk_realtime_quote(self, stock_code: str) -> Optional[UnifiedRealtimeQuote]:
         """
@@ -1138,62 +1166,66 @@ class AkshareFetcher(BaseFetcher):
         circuit_breaker = get_realtime_circuit_breaker()
         source_key = "akshare_hk"
         
-        try:
-            # 防封禁策略
-            self._set_random_user_agent()
-            self._enforce_rate_limit()
-            
-            # 确保代码格式正确（5位数字）
-            code = stock_code.lower().replace('hk', '').zfill(5)
-            
-            logger.info(f"[API调用] ak.stock_hk_spot_em() 获取港股实时行情...")
-            import time as _time
-            api_start = _time.time()
-            
-            df = ak.stock_hk_spot_em()
-            
-            api_elapsed = _time.time() - api_start
-            logger.info(f"[API返回] ak.stock_hk_spot_em 成功: 返回 {len(df)} 只港股, 耗时 {api_elapsed:.2f}s")
-            circuit_breaker.record_success(source_key)
-            
-            # 查找指定港股
-            row = df[df['代码'] == code]
-            if row.empty:
-                logger.warning(f"[API返回] 未找到港股 {code} 的实时行情")
+        with circuit_breaker.probe(source_key) as allowed:
+            if not allowed:
+                logger.warning(f"[熔断] 数据源 {source_key} 处于熔断状态，跳过")
                 return None
+            try:
+                # 防封禁策略
+                self._set_random_user_agent()
+                self._enforce_rate_limit()
+            
+                # 确保代码格式正确（5位数字）
+                code = stock_code.lower().replace('hk', '').zfill(5)
+            
+                logger.info(f"[API调用] ak.stock_hk_spot_em() 获取港股实时行情...")
+                import time as _time
+                api_start = _time.time()
+            
+                df = ak.stock_hk_spot_em()
+            
+                api_elapsed = _time.time() - api_start
+                logger.info(f"[API返回] ak.stock_hk_spot_em 成功: 返回 {len(df)} 只港股, 耗时 {api_elapsed:.2f}s")
+                circuit_breaker.record_success(source_key)
+            
+                # 查找指定港股
+                row = df[df['代码'] == code]
+                if row.empty:
+                    logger.warning(f"[API返回] 未找到港股 {code} 的实时行情")
+                    return None
+            
+                row = row.iloc[0]
+            
+                # 使用 realtime_types.py 中的统一转换函数
+                # 港股行情数据构建
+                quote = UnifiedRealtimeQuote(
+                    code=stock_code,
+                    name=str(row.get('名称', '')),
+                    source=RealtimeSource.AKSHARE_EM,
+                    price=safe_float(row.get('最新价')),
+                    change_pct=safe_float(row.get('涨跌幅')),
+                    change_amount=safe_float(row.get('涨跌额')),
+                    volume=safe_int(row.get('成交量')),
+                    amount=safe_float(row.get('成交额')),
+                    volume_ratio=safe_float(row.get('量比')),
+                    turnover_rate=safe_float(row.get('换手率')),
+                    amplitude=safe_float(row.get('振幅')),
+                    pe_ratio=safe_float(row.get('市盈率')),
+                    pb_ratio=safe_float(row.get('市净率')),
+                    total_mv=safe_float(row.get('总市值')),
+                    circ_mv=safe_float(row.get('流通市值')),
+                    high_52w=safe_float(row.get('52周最高')),
+                    low_52w=safe_float(row.get('52周最低')),
+                )
+            
+                logger.info(f"[港股实时行情] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
+                           f"换手率={quote.turnover_rate}%")
+                return quote
             
-            row = row.iloc[0]
-            
-            # 使用 realtime_types.py 中的统一转换函数
-            # 港股行情数据构建
-            quote = UnifiedRealtimeQuote(
-                code=stock_code,
-                name=str(row.get('名称', '')),
-                source=RealtimeSource.AKSHARE_EM,
-                price=safe_float(row.get('最新价')),
-                change_pct=safe_float(row.get('涨跌幅')),
-                change_amount=safe_float(row.get('涨跌额')),
-                volume=safe_int(row.get('成交量')),
-                amount=safe_float(row.get('成交额')),
-                volume_ratio=safe_float(row.get('量比')),
-                turnover_rate=safe_float(row.get('换手率')),
-                amplitude=safe_float(row.get('振幅')),
-                pe_ratio=safe_float(row.get('市盈率')),
-                pb_ratio=safe_float(row.get('市净率')),
-                total_mv=safe_float(row.get('总市值')),
-                circ_mv=safe_float(row.get('流通市值')),
-                high_52w=safe_float(row.get('52周最高')),
-                low_52w=safe_float(row.get('52周最低')),
-            )
-            
-            logger.info(f"[港股实时行情] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
-                       f"换手率={quote.turnover_rate}%")
-            return quote
-            
-        except Exception as e:
-            logger.error(f"[API错误] 获取港股 {stock_code} 实时行情失败: {e}")
-            circuit_breaker.record_failure(source_key, str(e))
-            return None
+            except Exception as e:
+                logger.error(f"[API错误] 获取港股 {stock_code} 实时行情失败: {e}")
+                circuit_breaker.record_failure(source_key, str(e))
+                return None
     
     def get_chip_distribution(self, stock_code: str) -> Optional[ChipDistribution]:
         """
@@ -1319,7 +1351,7 @@ class AkshareFetcher(BaseFetcher):
 
         try:
             self._set_random_user_agent()
-            self._enforce_rate_limit()
+            self._enforce_rate_limit('sina')
 
             # 使用 akshare 获取指数行情（新浪财经接口）
             df = ak.stock_zh_index_spot_sina()
@@ -1375,22 +1407,19 @@ class AkshareFetcher(BaseFetcher):
         """
         import akshare as ak
 
-        # 优先东财接口
+        # 优先东财接口（与实时行情共用全量快照缓存）
         try:
-            self._set_random_user_agent()
-            self._enforce_rate_limit()
-
-            logger.info("[API调用] ak.stock_zh_a_spot_em() 获取市场统计...")
-            df = ak.stock_zh_a_spot_em()
+            df = self.get_spot_snapshot().data
             if df is not None and not df.empty:
-                return self._calc_market_stats(df, change_col='涨跌幅', amount_col='成交额')
+                # 快照在多线程间共享，计算前复制
+                return self._calc_market_stats(df.copy(), change_col='涨跌幅', amount_col='成交额')
         except Exception as e:
             logger.warning(f"[Akshare] 东财接口获取市场统计失败: {e}，尝试新浪接口")
 
         # 东财失败后，尝试新浪接口
         try:
             self._set_random_user_agent()
-            self._enforce_rate_limit()
+            self._enforce_rate_limit('sina')
 
             logger.info("[API调用] ak.stock_zh_a_spot() 获取市场统计(新浪)...")
             df = ak.stock_zh_a_spot()
@@ -1481,7 +1510,7 @@ class AkshareFetcher(BaseFetcher):
         # 东财失败后，尝试新浪接口
         try:
             self._set_random_user_agent()
-            self._enforce_rate_limit()
+            self._enforce_rate_limit('sina')
 
             logger.info("[API调用] ak.stock_sector_spot() 获取板块排行(新浪)...")
             df = ak.stock_sector_spot(indicator='新浪行业')
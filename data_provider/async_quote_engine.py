@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+异步实时行情引擎（httpx + asyncio）
+===================================
+
+职责：
+1. 在专用事件循环线程上用一个 httpx.AsyncClient 并发请求新浪/腾讯/东财行情接口
+2. 连接池复用 Keep-Alive 连接，h2 可用时启用 HTTP/2，按主机限制并发请求数
+3. 多个数据源按优先级依次补齐缺失代码，结果写入逐代码行情缓存
+4. 提供同步门面 get_quotes()，供 DataFetcherManager 在工作线程中调用
+
+背景：
+原有实时行情路径都是工作线程内的阻塞 requests/akshare 调用，
+数百只自选股每隔几秒刷新一次需要同样数量的线程。
+改为协程后，所有请求在同一个线程上并发进行，线程数与自选股数量无关。
+
+接口：
+- sina:    https://hq.sinajs.cn/list=sh600519,sz000001（每次最多 800 只）
+- tencent: https://qt.gtimg.cn/q=sh600519,sz000001（每次最多 60 只）
+- em:      https://push2.eastmoney.com/api/qt/ulist.np/get?secids=1.600519,0.000001（每次最多 100 只）
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import random
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from .akshare_fetcher import (
+    USER_AGENTS,
+    AkshareFetcher,
+    _LITE_QUOTE_PATTERN,
+    _is_etf_code,
+    _lite_quote_caches,
+    _lite_symbol,
+)
+from .rate_limiter import acquire_rate_limit_async
+from .realtime_types import (
+    RealtimeSource,
+    UnifiedRealtimeQuote,
+    get_realtime_circuit_breaker,
+    safe_float,
+    safe_int,
+)
+from .snapshot_cache import QuoteCache
+
+logger = logging.getLogger(__name__)
+
+# 东财逐代码行情缓存（新浪/腾讯复用 akshare_fetcher 中的缓存，同步路径可直接命中）
+_em_quote_cache = QuoteCache("A股实时行情(东财列表)")
+
+# 东财 ulist 接口字段：f12 代码 f14 名称 f2 最新价 f3 涨跌幅 f4 涨跌额 f5 成交量(手) f6 成交额
+# f7 振幅 f8 换手率 f9 市盈率(动) f10 量比 f15 最高 f16 最低 f17 今开 f18 昨收
+# f20 总市值 f21 流通市值 f23 市净率
+_EM_FIELDS = "f2,f3,f4,f5,f6,f7,f8,f9,f10,f12,f14,f15,f16,f17,f18,f20,f21,f23"
+_EM_MAX_CODES_PER_REQUEST = 100
+
+# 实时行情优先级中的数据源名称 -> 引擎数据源
+_PRIORITY_TO_ENGINE_SOURCE = {
+    'tencent': 'tencent',
+    'akshare_qq': 'tencent',
+    'akshare_sina': 'sina',
+    'akshare_em': 'em',
+    'efinance': 'em',  # efinance 同样取自东财
+}
+
+# 引擎数据源 -> (限流上游, 熔断键)
+_ENGINE_SOURCES = {
+    'sina': ('sina', 'akshare_sina'),
+    'tencent': ('tencent', 'tencent'),
+    'em': ('eastmoney', 'akshare_em'),
+}
+
+
+def resolve_engine_sources(priority: Iterable[str]) -> List[str]:
+    """将实时行情优先级（如 tencent,akshare_sina,efinance）映射为引擎支持的数据源，去重保序"""
+    sources = (_PRIORITY_TO_ENGINE_SOURCE.get(name.strip().lower()) for name in priority)
+    return list(dict.fromkeys(s for s in sources if s))
+
+
+def _quote_cache(source: str) -> QuoteCache:
+    return _em_quote_cache if source == 'em' else _lite_quote_caches[source]
+
+
+def _em_secid(stock_code: str) -> str:
+    return f"1.{stock_code}" if stock_code.startswith(('6', '5', '9')) else f"0.{stock_code}"
+
+
+def _parse_em_quote(item: Dict[str, Any]) -> Optional[UnifiedRealtimeQuote]:
+    """解析东财 ulist 单条记录（fltt=2，数值已是小数，缺失为 '-'）"""
+    code = str(item.get('f12', ''))
+    if not code:
+        return None
+    volume = safe_int(item.get('f5'))
+    return UnifiedRealtimeQuote(
+        code=code,
+        name=str(item.get('f14', '')),
+        source=RealtimeSource.AKSHARE_EM,
+        price=safe_float(item.get('f2')),
+        change_pct=safe_float(item.get('f3')),
+        change_amount=safe_float(item.get('f4')),
+        volume=volume * 100 if volume is not None else None,  # 手 -> 股
+        amount=safe_float(item.get('f6')),
+        amplitude=safe_float(item.get('f7')),
+        turnover_rate=safe_float(item.get('f8')),
+        pe_ratio=safe_float(item.get('f9')),
+        volume_ratio=safe_float(item.get('f10')),
+        high=safe_float(item.get('f15')),
+        low=safe_float(item.get('f16')),
+        open_price=safe_float(item.get('f17')),
+        pre_close=safe_float(item.get('f18')),
+        total_mv=safe_float(item.get('f20')),
+        circ_mv=safe_float(item.get('f21')),
+        pb_ratio=safe_float(item.get('f23')),
+    )
+
+
+def _default_http2() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class AsyncQuoteEngine:
+    """
+    异步实时行情引擎（线程安全的同步门面）
+
+    Args:
+        per_host_limit: 单个主机的最大并发请求数
+        max_connections: 连接池最大连接数
+        timeout: 单次请求超时（秒）
+        http2: 是否启用 HTTP/2（默认 h2 已安装时启用）
+        client_factory: 创建 httpx.AsyncClient 的工厂函数（测试注入，需在事件循环线程内调用）
+    """
+
+    def __init__(
+        self,
+        per_host_limit: int = 8,
+        max_connections: int = 64,
+        timeout: float = 10.0,
+        http2: Optional[bool] = None,
+        client_factory: Optional[Callable[[], Any]] = None,
+    ):
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.http2 = _default_http2() if http2 is None else http2
+        self._client_factory = client_factory
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        # 以下状态只在事件循环线程内读写
+        self._client = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        # 统计信息
+        self.requests = 0
+        self.failures = 0
+
+    # ---------- 事件循环线程 ----------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="quote-engine", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def _get_client(self):
+        if self._client is None:
+            if self._client_factory is not None:
+                self._client = self._client_factory()
+            else:
+                import httpx
+                self._client = httpx.AsyncClient(
+                    http2=self.http2,
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    ),
+                )
+        return self._client
+
+    async def _get_text(self, url: str, headers: Dict[str, str], encoding: Optional[str] = None) -> str:
+        host = url.split('/')[2]
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        async with limit:
+            self.requests += 1
+            response = await self._get_client().get(url, headers=headers)
+        response.raise_for_status()
+        if encoding:
+            response.encoding = encoding
+        return response.text
+
+    # ---------- 单个数据源 ----------
+
+    async def _fetch_chunk(self, chunk: List[str], source: str) -> Dict[str, UnifiedRealtimeQuote]:
+        upstream, _ = _ENGINE_SOURCES[source]
+        await acquire_rate_limit_async(upstream)
+        headers = {'User-Agent': random.choice(USER_AGENTS)}
+
+        if source == 'em':
+            url = (
+                "https://push2.eastmoney.com/api/qt/ulist.np/get?fltt=2&invt=2"
+                f"&fields={_EM_FIELDS}&secids={','.join(_em_secid(c) for c in chunk)}"
+            )
+            payload = json.loads(await self._get_text(url, headers))
+            wanted = set(chunk)
+            quotes = {}
+            for item in ((payload.get('data') or {}).get('diff') or []):
+                quote = _parse_em_quote(item)
+                if quote is not None and quote.code in wanted:
+                    quotes[quote.code] = quote
+            return quotes
+
+        symbols = {_lite_symbol(code): code for code in chunk}
+        if source == 'sina':
+            url = f"https://hq.sinajs.cn/list={','.join(symbols)}"
+            headers['Referer'] = 'https://finance.sina.com.cn'
+            parser = AkshareFetcher._parse_sina_quote
+        else:
+            url = f"https://qt.gtimg.cn/q={','.join(symbols)}"
+            headers['Referer'] = 'https://finance.qq.com'
+            parser = AkshareFetcher._parse_tencent_quote
+
+        text = await self._get_text(url, headers, encoding='gbk')
+        quotes = {}
+        for symbol, data_str in _LITE_QUOTE_PATTERN.findall(text):
+            stock_code = symbols.get(symbol)
+            if stock_code is None or not data_str:
+                continue
+            quote = parser(stock_code, data_str)
+            if quote is not None:
+                quotes[stock_code] = quote
+        return quotes
+
+    async def fetch(self, stock_codes: Sequence[str], source: str) -> Dict[str, UnifiedRealtimeQuote]:
+        """
+        从单个数据源并发获取行情（按接口上限分块，所有分块同时发出）
+
+        Returns:
+            {stock_code: UnifiedRealtimeQuote}，失败的分块不出现在结果中
+        """
+        if source not in _ENGINE_SOURCES:
+            raise ValueError(f"异步行情引擎不支持的数据源: {source}")
+        _, breaker_key = _ENGINE_SOURCES[source]
+        circuit_breaker = get_realtime_circuit_breaker()
+        if not stock_codes or not circuit_breaker.try_acquire_probe(breaker_key):
+            return {}
+        try:
+            return await self._fetch_chunks(stock_codes, source, breaker_key)
+        finally:
+            # 各分块已上报结果时为空操作；全部分块被取消等未上报的情况释放半开试探名额
+            circuit_breaker.release_probe(breaker_key)
+
+    async def _fetch_chunks(
+        self, stock_codes: Sequence[str], source: str, breaker_key: str
+    ) -> Dict[str, UnifiedRealtimeQuote]:
+        """按接口上限分块并发请求，逐块向熔断器上报结果"""
+        circuit_breaker = get_realtime_circuit_breaker()
+        chunk_size = {
+            'sina': AkshareFetcher.SINA_MAX_CODES_PER_REQUEST,
+            'tencent': AkshareFetcher.TENCENT_MAX_CODES_PER_REQUEST,
+            'em': _EM_MAX_CODES_PER_REQUEST,
+        }[source]
+        chunks = [list(stock_codes[i:i + chunk_size]) for i in range(0, len(stock_codes), chunk_size)]
+        results = await asyncio.gather(*(self._fetch_chunk(chunk, source) for chunk in chunks), return_exceptions=True)
+
+        quotes: Dict[str, UnifiedRealtimeQuote] = {}
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                self.failures += 1
+                logger.warning(f"[异步行情] {source} 获取 {len(chunk)} 只股票失败: {result}")
+                circuit_breaker.record_failure(breaker_key, str(result) or type(result).__name__)
+                continue
+            circuit_breaker.record_success(breaker_key)
+            quotes.update(result)
+        _quote_cache(source).put_many(quotes)
+        return quotes
+
+    async def fetch_with_fallback(
+        self,
+        stock_codes: Sequence[str],
+        sources: Sequence[str],
+        use_cache: bool = True,
+    ) -> Dict[str, UnifiedRealtimeQuote]:
+        """按数据源优先级依次获取，前一个数据源缺失的代码交给下一个"""
+        quotes: Dict[str, UnifiedRealtimeQuote] = {}
+        remaining = list(dict.fromkeys(stock_codes))
+        if use_cache:
+            # 先查所有数据源的缓存，避免上次由后备数据源补齐的代码再次请求首选数据源
+            for source in sources:
+                quotes.update(_quote_cache(source).get_many(c for c in remaining if c not in quotes))
+            remaining = [c for c in remaining if c not in quotes]
+        for source in sources:
+            if not remaining:
+                break
+            quotes.update(await self.fetch(remaining, source))
+            remaining = [c for c in remaining if c not in quotes]
+        return quotes
+
+    # ---------- 同步门面（任意线程） ----------
+
+    def get_quotes(
+        self,
+        stock_codes: Sequence[str],
+        sources: Sequence[str] = ('tencent',),
+        use_cache: bool = True,
+        timeout: Optional[float] = 30.0,
+    ) -> Dict[str, UnifiedRealtimeQuote]:
+        """
+        同步获取普通 A 股实时行情（在引擎线程上并发执行）
+
+        Args:
+            stock_codes: 股票代码列表（港股/美股/ETF 会被忽略）
+            sources: 引擎数据源优先级，见 resolve_engine_sources
+            use_cache: 是否先读逐代码缓存；定时刷新自选股时传 False
+            timeout: 等待结果的最长秒数
+
+        Returns:
+            {stock_code: UnifiedRealtimeQuote}
+        """
+        codes = [c for c in dict.fromkeys(stock_codes) if c.isdigit() and len(c) == 6 and not _is_etf_code(c)]
+        if not codes or not sources:
+            return {}
+        future = asyncio.run_coroutine_threadsafe(
+            self.fetch_with_fallback(codes, sources, use_cache), self._ensure_loop()
+        )
+        try:
+            quotes = future.result(timeout)
+        except Exception:
+            future.cancel()
+            raise
+        logger.debug(f"[异步行情] 请求 {len(codes)} 只, 返回 {len(quotes)} 只 ({','.join(sources)})")
+        return quotes
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'http2': self.http2,
+            'per_host_limit': self.per_host_limit,
+            'requests': self.requests,
+            'failures': self.failures,
+        }
+
+    def close(self) -> None:
+        """关闭连接池并停止事件循环线程"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def _shutdown():
+            if self._client is not None:
+                await self._client.aclose()
+                self._client = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(_shutdown(), loop).result(timeout=5)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        self._host_limits.clear()
+
+
+_engine: Optional[AsyncQuoteEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_async_quote_engine() -> AsyncQuoteEngine:
+    """获取进程级异步行情引擎（首次调用时创建，进程退出时自动关闭）"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                try:
+                    from src.config import get_config
+                    per_host_limit = get_config().async_quote_per_host_limit
+                except Exception:
+                    per_host_limit = 8
+                _engine = AsyncQuoteEngine(per_host_limit=per_host_limit)
+                atexit.register(_engine.close)
+    return _engine
@@ -9,16 +9,14 @@ BaostockFetcher - 备用数据源 2 (Priority 3)
 优点：稳定、无配额限制
 
 关键策略：
-1. 管理 bs.login() 和 bs.logout() 生命周期
-2. 使用上下文管理器防止连接泄露
+1. 进程级长会话：所有查询在专用线程上复用同一次登录，过期或出错时才重新登录
+2. 批量接口在同一会话内连续拉取多只股票（适合回测回补）
 3. 失败后指数退避重试
 """
 
 import logging
 import re
-from contextlib import contextmanager
-from datetime import datetime
-from typing import Optional, Generator
+from typing import Dict, List, Optional
 
 import pandas as pd
 from tenacity import (
@@ -29,7 +27,9 @@ from tenacity import (
     before_sleep_log,
 )
 
-from .base import BaseFetcher, DataFetchError, STANDARD_COLUMNS
+from .base import BaseFetcher, DataFetchError, UnsupportedMarketError, STANDARD_COLUMNS
+from .baostock_session import BaostockSession, get_baostock_session
+from .rate_limiter import acquire_rate_limit
 import os
 
 logger = logging.getLogger(__name__)
@@ -55,8 +55,7 @@ class BaostockFetcher(BaseFetcher):
     数据来源：证券宝 Baostock API
     
     关键策略：
-    - 使用上下文管理器管理连接生命周期
-    - 每次请求都重新登录/登出，防止连接泄露
+    - 复用进程级长会话（线程封闭），避免每次请求都登录/登出
     - 失败后指数退避重试
     
     Baostock 特点：
@@ -68,59 +67,32 @@ class BaostockFetcher(BaseFetcher):
     name = "BaostockFetcher"
     priority = int(os.getenv("BAOSTOCK_PRIORITY", "3"))
     
-    def __init__(self):
-        """初始化 BaostockFetcher"""
-        self._bs_module = None
+    # 日线查询字段
+    _K_FIELDS = "date,open,high,low,close,volume,amount,pctChg"
     
-    def _get_baostock(self):
+    def __init__(self, session: Optional[BaostockSession] = None):
         """
-        延迟加载 baostock 模块
+        初始化 BaostockFetcher
         
-        只在首次使用时导入，避免未安装时报错
+        Args:
+            session: Baostock 会话（默认使用进程级长会话）
         """
-        if self._bs_module is None:
-            import baostock as bs
-            self._bs_module = bs
-        return self._bs_module
+        self._session = session
+    
+    @property
+    def session(self) -> BaostockSession:
+        if self._session is None:
+            self._session = get_baostock_session()
+        return self._session
     
-    @contextmanager
-    def _baostock_session(self) -> Generator:
+    def _query(self, api_name: str, **kwargs) -> pd.DataFrame:
         """
-        Baostock 连接上下文管理器
+        在长会话上执行一次查询
         
-        确保：
-        1. 进入上下文时自动登录
-        2. 退出上下文时自动登出
-        3. 异常时也能正确登出
-        
-        使用示例：
-            with self._baostock_session():
-                # 在这里执行数据查询
+        进程级限流在调用方线程等待，不占用会话线程
         """
-        bs = self._get_baostock()
-        login_result = None
-        
-        try:
-            # 登录 Baostock
-            login_result = bs.login()
-            
-            if login_result.error_code != '0':
-                raise DataFetchError(f"Baostock 登录失败: {login_result.error_msg}")
-            
-            logger.debug("Baostock 登录成功")
-            
-            yield bs
-            
-        finally:
-            # 确保登出，防止连接泄露
-            try:
-                logout_result = bs.logout()
-                if logout_result.error_code == '0':
-                    logger.debug("Baostock 登出成功")
-                else:
-                    logger.warning(f"Baostock 登出异常: {logout_result.error_msg}")
-            except Exception as e:
-                logger.warning(f"Baostock 登出时发生错误: {e}")
+        acquire_rate_limit('baostock')
+        return self.session.query(api_name, **kwargs)
     
     def _convert_stock_code(self, stock_code: str) -> str:
         """
@@ -175,45 +147,61 @@ class BaostockFetcher(BaseFetcher):
         """
         # 美股不支持，抛出异常让 DataFetcherManager 切换到其他数据源
         if _is_us_code(stock_code):
-            raise DataFetchError(f"BaostockFetcher 不支持美股 {stock_code}，请使用 AkshareFetcher 或 YfinanceFetcher")
+            raise UnsupportedMarketError(f"BaostockFetcher 不支持美股 {stock_code}，请使用 AkshareFetcher 或 YfinanceFetcher")
         
         # 转换代码格式
         bs_code = self._convert_stock_code(stock_code)
         
         logger.debug(f"调用 Baostock query_history_k_data_plus({bs_code}, {start_date}, {end_date})")
         
-        with self._baostock_session() as bs:
+        try:
+            return self._query_k_data(bs_code, start_date, end_date)
+        except DataFetchError:
+            raise
+        except Exception as e:
+            raise DataFetchError(f"Baostock 获取数据失败: {e}") from e
+    
+    def _query_k_data(self, bs_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """查询日线数据（adjustflag: 1-后复权，2-前复权，3-不复权）"""
+        return self._query(
+            'query_history_k_data_plus',
+            code=bs_code,
+            fields=self._K_FIELDS,
+            start_date=start_date,
+            end_date=end_date,
+            frequency="d",  # 日线
+            adjustflag="2"  # 前复权
+        )
+    
+    def get_daily_data_batch(
+        self,
+        stock_codes: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        days: int = 30
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取多只股票的日线数据
+        
+        所有查询在同一个长会话内依次完成（只登录一次），适合回测等大批量回补场景
+        
+        Returns:
+            {stock_code: 标准化 DataFrame}，获取失败的代码不出现在结果中
+        """
+        start_date, end_date = self._resolve_date_range(start_date, end_date, days)
+        codes = [c for c in dict.fromkeys(stock_codes) if not _is_us_code(c)]
+        logger.info(f"[{self.name}] 批量获取 {len(codes)} 只股票日线: {start_date} ~ {end_date}")
+        
+        results: Dict[str, pd.DataFrame] = {}
+        for stock_code in codes:
             try:
-                # 查询日线数据
-                # adjustflag: 1-后复权，2-前复权，3-不复权
-                rs = bs.query_history_k_data_plus(
-                    code=bs_code,
-                    fields="date,open,high,low,close,volume,amount,pctChg",
-                    start_date=start_date,
-                    end_date=end_date,
-                    frequency="d",  # 日线
-                    adjustflag="2"  # 前复权
-                )
-                
-                if rs.error_code != '0':
-                    raise DataFetchError(f"Baostock 查询失败: {rs.error_msg}")
-                
-                # 转换为 DataFrame
-                data_list = []
-                while rs.next():
-                    data_list.append(rs.get_row_data())
-                
-                if not data_list:
-                    raise DataFetchError(f"Baostock 未查询到 {stock_code} 的数据")
-                
-                df = pd.DataFrame(data_list, columns=rs.fields)
-                
-                return df
-                
+                raw_df = self._query_k_data(self._convert_stock_code(stock_code), start_date, end_date)
+                results[stock_code] = self._process_raw_data(raw_df, stock_code)
             except Exception as e:
-                if isinstance(e, DataFetchError):
-                    raise
-                raise DataFetchError(f"Baostock 获取数据失败: {e}") from e
+                logger.warning(f"[{self.name}] 批量获取 {stock_code} 失败: {e}")
+        
+        logger.info(f"[{self.name}] 批量获取完成: 成功 {len(results)}/{len(codes)}")
+        return results
     
     def _normalize_data(self, df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
         """
@@ -273,24 +261,15 @@ class BaostockFetcher(BaseFetcher):
         try:
             bs_code = self._convert_stock_code(stock_code)
             
-            with self._baostock_session() as bs:
-                # 查询股票基本信息
-                rs = bs.query_stock_basic(code=bs_code)
-                
-                if rs.error_code == '0':
-                    data_list = []
-                    while rs.next():
-                        data_list.append(rs.get_row_data())
-                    
-                    if data_list:
-                        # Baostock 返回的字段：code, code_name, ipoDate, outDate, type, status
-                        fields = rs.fields
-                        name_idx = fields.index('code_name') if 'code_name' in fields else None
-                        if name_idx is not None and len(data_list[0]) > name_idx:
-                            name = data_list[0][name_idx]
-                            self._stock_name_cache[stock_code] = name
-                            logger.debug(f"Baostock 获取股票名称成功: {stock_code} -> {name}")
-                            return name
+            # 查询股票基本信息
+            # Baostock 返回的字段：code, code_name, ipoDate, outDate, type, status
+            df = self._query('query_stock_basic', code=bs_code)
+            
+            if not df.empty and 'code_name' in df.columns:
+                name = df.iloc[0]['code_name']
+                self._stock_name_cache[stock_code] = name
+                logger.debug(f"Baostock 获取股票名称成功: {stock_code} -> {name}")
+                return name
                 
         except Exception as e:
             logger.warning(f"Baostock 获取股票名称失败 {stock_code}: {e}")
@@ -304,33 +283,29 @@ class BaostockFetcher(BaseFetcher):
         使用 Baostock 的 query_stock_basic 接口获取全部股票列表
         
         Returns:
-            包含 code, name 列的 DataFrame，失败返回 None
+            包含 code, name, list_status 列的 DataFrame，失败返回 None
         """
         try:
-            with self._baostock_session() as bs:
-                # 查询所有股票基本信息
-                rs = bs.query_stock_basic()
+            # 查询所有股票基本信息
+            df = self._query('query_stock_basic')
+            
+            if not df.empty:
+                # 剔除指数（type=2）：去掉交易所前缀后 sh.000001（上证指数）会与 sz.000001 重名
+                if 'type' in df.columns:
+                    df = df[df['type'] != '2'].copy()
+                # 转换代码格式（去除 sh. 或 sz. 前缀）
+                df['code'] = df['code'].apply(lambda x: x.split('.')[1] if '.' in x else x)
+                df = df.rename(columns={'code_name': 'name'})
+                # status: 1 上市 / 0 退市
+                df['list_status'] = df['status'].map({'1': 'L', '0': 'D'}) if 'status' in df.columns else 'L'
+                
+                # 更新缓存
+                if not hasattr(self, '_stock_name_cache'):
+                    self._stock_name_cache = {}
+                self._stock_name_cache.update(zip(df['code'], df['name']))
                 
-                if rs.error_code == '0':
-                    data_list = []
-                    while rs.next():
-                        data_list.append(rs.get_row_data())
-                    
-                    if data_list:
-                        df = pd.DataFrame(data_list, columns=rs.fields)
-                        
-                        # 转换代码格式（去除 sh. 或 sz. 前缀）
-                        df['code'] = df['code'].apply(lambda x: x.split('.')[1] if '.' in x else x)
-                        df = df.rename(columns={'code_name': 'name'})
-                        
-                        # 更新缓存
-                        if not hasattr(self, '_stock_name_cache'):
-                            self._stock_name_cache = {}
-                        for _, row in df.iterrows():
-                            self._stock_name_cache[row['code']] = row['name']
-                        
-                        logger.info(f"Baostock 获取股票列表成功: {len(df)} 条")
-                        return df[['code', 'name']]
+                logger.info(f"Baostock 获取股票列表成功: {len(df)} 条")
+                return df[['code', 'name', 'list_status']]
                 
         except Exception as e:
             logger.warning(f"Baostock 获取股票列表失败: {e}")
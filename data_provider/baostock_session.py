@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+Baostock 长会话（线程封闭）
+===================================
+
+职责：
+1. 维护一个长期有效的 Baostock 登录会话，仅在过期、空闲过久或出错时重新登录
+2. 所有 Baostock 调用在同一个专用线程上串行执行
+
+背景：
+baostock 库使用模块级全局连接（bs.login() 之后所有查询共享同一个 socket），
+既不是线程安全的，也无法同时维护多个会话。原先每次查询都 login/logout，
+每只股票都要多付一次完整握手。将会话封闭在专用线程中后，
+多线程调用方可以安全共享同一个登录状态。
+"""
+
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from .base import DataFetchError
+
+logger = logging.getLogger(__name__)
+
+# 会话/网络类错误码前缀：10001xxx 登录相关（如 10001001 用户未登录），10002xxx 网络相关
+_RELOGIN_ERROR_PREFIXES = ('10001', '10002')
+
+
+class BaostockSession:
+    """
+    线程封闭的 Baostock 长会话
+
+    Args:
+        bs_loader: 返回 baostock 模块的函数（测试注入）
+        idle_timeout: 会话空闲超过该秒数后，下次查询前主动重新登录（服务端会回收空闲连接）
+    """
+
+    def __init__(self, bs_loader: Optional[Callable[[], Any]] = None, idle_timeout: float = 300.0):
+        self._bs_loader = bs_loader or self._import_baostock
+        self.idle_timeout = idle_timeout
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="baostock")
+        # 以下状态只在会话线程内读写
+        self._bs = None
+        self._logged_in = False
+        self._last_used = 0.0
+        # 统计信息
+        self.logins = 0
+        self.queries = 0
+
+    @staticmethod
+    def _import_baostock():
+        import baostock as bs
+        return bs
+
+    # ---------- 以下方法只在会话线程内执行 ----------
+
+    def _login(self) -> None:
+        if self._bs is None:
+            self._bs = self._bs_loader()
+        self._logout()
+        result = self._bs.login()
+        if result.error_code != '0':
+            raise DataFetchError(f"Baostock 登录失败: {result.error_msg}")
+        self._logged_in = True
+        self._last_used = time.monotonic()
+        self.logins += 1
+        logger.debug("Baostock 登录成功（长会话）")
+
+    def _logout(self) -> None:
+        if not self._logged_in:
+            return
+        self._logged_in = False
+        try:
+            self._bs.logout()
+        except Exception as e:
+            logger.debug(f"Baostock 登出时发生错误: {e}")
+
+    def _ensure_login(self) -> None:
+        if not self._logged_in or time.monotonic() - self._last_used > self.idle_timeout:
+            self._login()
+
+    def _query_once(self, api_name: str, kwargs: dict) -> pd.DataFrame:
+        rs = getattr(self._bs, api_name)(**kwargs)
+        if rs.error_code != '0':
+            raise _QueryError(rs.error_code, rs.error_msg)
+        rows = []
+        # rs.next() 会按页继续请求，必须同样在会话线程内完成
+        while rs.next():
+            rows.append(rs.get_row_data())
+        if rs.error_code != '0':
+            raise _QueryError(rs.error_code, rs.error_msg)
+        return pd.DataFrame(rows, columns=rs.fields)
+
+    def _run_query(self, api_name: str, kwargs: dict) -> pd.DataFrame:
+        self._ensure_login()
+        try:
+            try:
+                return self._query_once(api_name, kwargs)
+            except _QueryError as e:
+                if not e.code.startswith(_RELOGIN_ERROR_PREFIXES):
+                    raise DataFetchError(f"Baostock {api_name} 查询失败: {e.msg}") from e
+                logger.info(f"[Baostock] 会话失效（{e.code} {e.msg}），重新登录后重试")
+            except Exception as e:
+                logger.info(f"[Baostock] 查询异常（{e}），重新登录后重试")
+
+            self._login()
+            try:
+                return self._query_once(api_name, kwargs)
+            except _QueryError as e:
+                raise DataFetchError(f"Baostock {api_name} 查询失败: {e.msg}") from e
+        finally:
+            self.queries += 1
+            self._last_used = time.monotonic()
+
+    # ---------- 对外接口（任意线程） ----------
+
+    def query(self, api_name: str, **kwargs) -> pd.DataFrame:
+        """
+        在会话线程上执行 baostock 查询并取回全部结果
+
+        Args:
+            api_name: baostock 接口名，如 'query_history_k_data_plus'
+            **kwargs: 接口参数
+
+        Returns:
+            结果 DataFrame（列为 rs.fields，值均为字符串）
+
+        Raises:
+            DataFetchError: 登录失败或查询返回错误
+        """
+        return self._executor.submit(self._run_query, api_name, kwargs).result()
+
+    def close(self) -> None:
+        """登出并停止会话线程"""
+        try:
+            self._executor.submit(self._logout).result(timeout=5)
+        except Exception:
+            pass
+        self._executor.shutdown(wait=False)
+
+
+class _QueryError(Exception):
+    def __init__(self, code: str, msg: str):
+        super().__init__(f"{code} {msg}")
+        self.code = code or ''
+        self.msg = msg
+
+
+_session: Optional[BaostockSession] = None
+_session_lock = threading.Lock()
+
+
+def get_baostock_session() -> BaostockSession:
+    """获取进程级 Baostock 长会话（首次调用时创建，进程退出时自动登出）"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = BaostockSession()
+                atexit.register(_session.close)
+    return _session
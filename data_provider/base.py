@@ -12,12 +12,15 @@
 1. 每个 Fetcher 内置流控逻辑
 2. 失败自动切换到下一个数据源
 3. 指数退避重试机制
+4. 可选对冲模式：主数据源超出延迟预算时并行启动下一个数据源
 """
 
 import logging
 import random
+import threading
 import time
 from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
 from typing import Optional, List, Tuple, Dict, Any
 
@@ -30,6 +33,8 @@ from tenacity import (
     retry_if_exception_type,
 )
 
+from .source_health import get_source_health_tracker
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
@@ -53,6 +58,11 @@ class DataSourceUnavailableError(DataFetchError):
     pass
 
 
+class UnsupportedMarketError(DataFetchError):
+    """数据源不支持该代码所属市场（如 A 股数据源遇到美股代码），不计入数据源健康度"""
+    pass
+
+
 class BaseFetcher(ABC):
     """
     数据源抽象基类
@@ -164,14 +174,7 @@ class BaseFetcher(ABC):
             标准化的 DataFrame，包含技术指标
         """
         # 计算日期范围
-        if end_date is None:
-            end_date = datetime.now().strftime('%Y-%m-%d')
-        
-        if start_date is None:
-            # 默认获取最近 30 个交易日（按日历日估算，多取一些）
-            from datetime import timedelta
-            start_dt = datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=days * 2)
-            start_date = start_dt.strftime('%Y-%m-%d')
+        start_date, end_date = self._resolve_date_range(start_date, end_date, days)
         
         logger.info(f"[{self.name}] 获取 {stock_code} 数据: {start_date} ~ {end_date}")
         
@@ -179,24 +182,65 @@ class BaseFetcher(ABC):
             # Step 1: 获取原始数据
             raw_df = self._fetch_raw_data(stock_code, start_date, end_date)
             
-            if raw_df is None or raw_df.empty:
-                raise DataFetchError(f"[{self.name}] 未获取到 {stock_code} 的数据")
-            
-            # Step 2: 标准化列名
-            df = self._normalize_data(raw_df, stock_code)
-            
-            # Step 3: 数据清洗
-            df = self._clean_data(df)
-            
-            # Step 4: 计算技术指标
-            df = self._calculate_indicators(df)
+            # Step 2-4: 标准化列名、数据清洗、计算技术指标
+            df = self._process_raw_data(raw_df, stock_code)
             
             logger.info(f"[{self.name}] {stock_code} 获取成功，共 {len(df)} 条数据")
             return df
             
+        except UnsupportedMarketError:
+            raise
         except Exception as e:
             logger.error(f"[{self.name}] 获取 {stock_code} 失败: {str(e)}")
             raise DataFetchError(f"[{self.name}] {stock_code}: {str(e)}") from e
+
+    def get_daily_data_batch(
+        self,
+        stock_codes: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        days: int = 30
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取多只股票的日线数据
+
+        默认实现逐只调用 get_daily_data；支持批量接口或长会话的数据源可覆盖此方法
+
+        Returns:
+            {stock_code: 标准化 DataFrame}，获取失败的代码不出现在结果中
+        """
+        results: Dict[str, pd.DataFrame] = {}
+        for stock_code in dict.fromkeys(stock_codes):
+            try:
+                results[stock_code] = self.get_daily_data(stock_code, start_date, end_date, days)
+            except DataFetchError:
+                continue
+        return results
+
+    @staticmethod
+    def _resolve_date_range(
+        start_date: Optional[str],
+        end_date: Optional[str],
+        days: int
+    ) -> Tuple[str, str]:
+        """补全日期范围：end_date 默认今天，start_date 按 days 的两倍日历日估算"""
+        if end_date is None:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        
+        if start_date is None:
+            # 默认获取最近 30 个交易日（按日历日估算，多取一些）
+            from datetime import timedelta
+            start_dt = datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=days * 2)
+            start_date = start_dt.strftime('%Y-%m-%d')
+        return start_date, end_date
+
+    def _process_raw_data(self, raw_df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
+        """原始数据 -> 标准化 -> 清洗 -> 技术指标"""
+        if raw_df is None or raw_df.empty:
+            raise DataFetchError(f"[{self.name}] 未获取到 {stock_code} 的数据")
+        df = self._normalize_data(raw_df, stock_code)
+        df = self._clean_data(df)
+        return self._calculate_indicators(df)
     
     def _clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -228,7 +272,8 @@ class BaseFetcher(ABC):
         
         return df
     
-    def _calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+    @staticmethod
+    def _calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
         """
         计算技术指标
         
@@ -283,14 +328,29 @@ class DataFetcherManager:
     - 所有数据源都失败时抛出异常
     """
     
-    def __init__(self, fetchers: Optional[List[BaseFetcher]] = None):
+    # 对冲模式：计算 p90 延迟所需的最少成功样本数（样本取自进程级 source_health 统计）
+    _HEDGE_MIN_SAMPLES = 10
+    # 对冲请求共享线程池（进程级，落败的请求在后台自然结束）
+    _hedge_executor: Optional[ThreadPoolExecutor] = None
+    _hedge_executor_lock = threading.Lock()
+
+    def __init__(
+        self,
+        fetchers: Optional[List[BaseFetcher]] = None,
+        hedge_delay: Optional[float] = None
+    ):
         """
         初始化管理器
         
         Args:
             fetchers: 数据源列表（可选，默认按优先级自动创建）
+            hedge_delay: 对冲延迟预算（秒），>0 时开启对冲模式；
+                         None 表示读取配置 HEDGED_FETCH_ENABLED / HEDGED_FETCH_DELAY
         """
         self._fetchers: List[BaseFetcher] = []
+        self._hedge_delay = self._load_hedge_delay() if hedge_delay is None else hedge_delay
+        self._adaptive_order = self._load_adaptive_order()
+        self._health = get_source_health_tracker()
         
         if fetchers:
             # 按优先级排序
@@ -348,6 +408,32 @@ class DataFetcherManager:
         priority_info = ", ".join([f"{f.name}(P{f.priority})" for f in self._fetchers])
         logger.info(f"已初始化 {len(self._fetchers)} 个数据源（按优先级）: {priority_info}")
     
+    @staticmethod
+    def _load_hedge_delay() -> float:
+        """从配置读取对冲延迟预算，未开启时返回 0"""
+        try:
+            from src.config import get_config
+            config = get_config()
+            return config.hedged_fetch_delay if config.hedged_fetch_enabled else 0.0
+        except Exception as e:
+            logger.debug(f"读取对冲配置失败，使用顺序切换: {e}")
+            return 0.0
+
+    @staticmethod
+    def _load_adaptive_order() -> bool:
+        """读取是否按数据源健康度动态排序"""
+        try:
+            from src.config import get_config
+            return get_config().adaptive_source_order
+        except Exception:
+            return True
+
+    def _ordered(self, operation: str, items: List[Any], key=None) -> List[Any]:
+        """按数据源健康度调整尝试顺序（关闭自适应排序时保持静态优先级）"""
+        if not self._adaptive_order:
+            return list(items)
+        return self._health.rank(operation, items, key=key or (lambda f: f.name))
+
     def add_fetcher(self, fetcher: BaseFetcher) -> None:
         """添加数据源并重新排序"""
         self._fetchers.append(fetcher)
@@ -381,9 +467,13 @@ class DataFetcherManager:
         Raises:
             DataFetchError: 所有数据源都失败时抛出
         """
+        if self._hedge_delay > 0 and len(self._fetchers) > 1:
+            return self._get_daily_data_hedged(stock_code, start_date, end_date, days)
+
         errors = []
         
-        for fetcher in self._fetchers:
+        for fetcher in self._ordered('daily', self._fetchers):
+            started = time.monotonic()
             try:
                 logger.info(f"尝试使用 [{fetcher.name}] 获取 {stock_code}...")
                 df = fetcher.get_daily_data(
@@ -393,11 +483,20 @@ class DataFetcherManager:
                     days=days
                 )
                 
+                elapsed = time.monotonic() - started
                 if df is not None and not df.empty:
+                    self._health.record('daily', fetcher.name, True, elapsed)
                     logger.info(f"[{fetcher.name}] 成功获取 {stock_code}")
                     return df, fetcher.name
+                self._health.record('daily', fetcher.name, False, elapsed, 'empty result')
                     
+            except UnsupportedMarketError as e:
+                # 市场不支持不是数据源故障，不计入健康度（否则美股/港股较多时会拖累 A 股排序）
+                logger.debug(f"[{fetcher.name}] 跳过 {stock_code}: {e}")
+                errors.append(f"[{fetcher.name}] 跳过: {str(e)}")
+                continue
             except Exception as e:
+                self._health.record('daily', fetcher.name, False, time.monotonic() - started, str(e))
                 error_msg = f"[{fetcher.name}] 失败: {str(e)}"
                 logger.warning(error_msg)
                 errors.append(error_msg)
@@ -408,7 +507,256 @@ class DataFetcherManager:
         error_summary = f"所有数据源获取 {stock_code} 失败:\n" + "\n".join(errors)
         logger.error(error_summary)
         raise DataFetchError(error_summary)
-    
+
+    def get_daily_data_batch(
+        self,
+        stock_codes: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        days: int = 30,
+        fallback: bool = True
+    ) -> Dict[str, Tuple[pd.DataFrame, str]]:
+        """
+        批量获取日线数据
+
+        策略：
+        1. 美股/港股代码合并交给 YfinanceFetcher 一次批量下载
+        2. 批量未覆盖的代码（A 股、批量下载失败或无数据的代码）逐只走 get_daily_data 故障切换
+
+        Args:
+            stock_codes: 股票代码列表
+            fallback: 是否对批量未覆盖的代码逐只获取（调用方另有逐只路径时可关闭）
+
+        Returns:
+            {stock_code: (标准化 DataFrame, 数据源名称)}，所有数据源都失败的代码不出现在结果中
+        """
+        from .akshare_fetcher import _is_hk_code, _is_us_code
+
+        codes = list(dict.fromkeys(stock_codes))
+        results: Dict[str, Tuple[pd.DataFrame, str]] = {}
+
+        overseas = [code for code in codes if _is_us_code(code) or _is_hk_code(code)]
+        yfinance = self._find_fetcher('YfinanceFetcher')
+        if yfinance is not None and len(overseas) > 1:
+            started = time.monotonic()
+            try:
+                frames = yfinance.get_daily_data_batch(overseas, start_date, end_date, days)
+                self._health.record(
+                    'daily', yfinance.name, bool(frames), time.monotonic() - started,
+                    None if frames else 'empty result'
+                )
+            except Exception as e:
+                self._health.record('daily', yfinance.name, False, time.monotonic() - started, str(e))
+                logger.warning(f"[{yfinance.name}] 批量下载失败，回退到逐只获取: {e}")
+                frames = {}
+            results.update({code: (df, yfinance.name) for code, df in frames.items() if not df.empty})
+
+        for code in codes:
+            if code in results or not fallback:
+                continue
+            try:
+                results[code] = self.get_daily_data(code, start_date, end_date, days)
+            except DataFetchError as e:
+                logger.warning(f"[批量日线] {code} 获取失败: {e}")
+
+        return results
+
+    def _hedge_budget(self, fetcher_name: str) -> float:
+        """
+        计算数据源的对冲延迟预算
+
+        样本充足时取该数据源近期成功耗时的 p90（不超过配置值），否则使用配置值；
+        样本来自进程级健康度统计，跨 DataFetcherManager 实例共享
+        """
+        p90 = self._health.latency_percentile('daily', fetcher_name, 90, self._HEDGE_MIN_SAMPLES)
+        if p90 is None:
+            return self._hedge_delay
+        return min(self._hedge_delay, p90)
+
+    @classmethod
+    def _get_hedge_executor(cls) -> ThreadPoolExecutor:
+        with cls._hedge_executor_lock:
+            if cls._hedge_executor is None:
+                cls._hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedged_fetch")
+            return cls._hedge_executor
+
+    def _get_daily_data_hedged(
+        self,
+        stock_code: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        days: int
+    ) -> Tuple[pd.DataFrame, str]:
+        """
+        对冲模式获取日线数据
+
+        策略：
+        1. 按优先级启动第一个数据源
+        2. 若在其延迟预算内未返回，并行启动下一个数据源（对冲）
+        3. 某个请求失败时立即启动下一个数据源
+        4. 第一个返回有效数据的请求胜出，其余未开始的请求取消、已开始的结果丢弃
+
+        Raises:
+            DataFetchError: 所有数据源都失败时抛出
+        """
+        executor = self._get_hedge_executor()
+        remaining = self._ordered('daily', self._fetchers)
+        pending: Dict[Future, Tuple[BaseFetcher, float]] = {}
+        errors: List[str] = []
+
+        def launch() -> Optional[BaseFetcher]:
+            if not remaining:
+                return None
+            fetcher = remaining.pop(0)
+            logger.info(f"[对冲] 启动 [{fetcher.name}] 获取 {stock_code}...")
+            future = executor.submit(
+                fetcher.get_daily_data,
+                stock_code=stock_code,
+                start_date=start_date,
+                end_date=end_date,
+                days=days,
+            )
+            pending[future] = (fetcher, time.monotonic())
+            return fetcher
+
+        latest = launch()
+        while pending:
+            timeout = self._hedge_budget(latest.name) if remaining else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # 当前数据源超出延迟预算，并行启动下一个
+                logger.info(f"[对冲] [{latest.name}] {timeout:.1f}s 内未返回，并行启动下一个数据源")
+                latest = launch()
+                continue
+
+            for future in done:
+                fetcher, started = pending.pop(future)
+                elapsed = time.monotonic() - started
+                try:
+                    df = future.result()
+                except UnsupportedMarketError as e:
+                    logger.debug(f"[对冲] [{fetcher.name}] 跳过 {stock_code}: {e}")
+                    errors.append(f"[{fetcher.name}] 跳过: {str(e)}")
+                    continue
+                except Exception as e:
+                    self._health.record('daily', fetcher.name, False, elapsed, str(e))
+                    error_msg = f"[{fetcher.name}] 失败: {str(e)}"
+                    logger.warning(error_msg)
+                    errors.append(error_msg)
+                    continue
+
+                if df is None or df.empty:
+                    self._health.record('daily', fetcher.name, False, elapsed, 'empty result')
+                    errors.append(f"[{fetcher.name}] 失败: 返回空数据")
+                else:
+                    self._health.record('daily', fetcher.name, True, elapsed)
+                    for other in pending:
+                        other.cancel()
+                    if pending:
+                        losers = ", ".join(f.name for f, _ in pending.values())
+                        logger.info(f"[对冲] [{fetcher.name}] 胜出，丢弃 {losers} 的结果")
+                    logger.info(f"[{fetcher.name}] 成功获取 {stock_code}")
+                    return df, fetcher.name
+
+            # 本轮完成的请求全部失败：若无进行中的请求则立即启动下一个
+            if not pending:
+                latest = launch() or latest
+
+        error_summary = f"所有数据源获取 {stock_code} 失败:\n" + "\n".join(errors)
+        logger.error(error_summary)
+        raise DataFetchError(error_summary)
+
+    # 增量校验：重叠区间收盘价允许的相对误差（超过则视为复权等导致历史变动）
+    _INCREMENTAL_CLOSE_TOLERANCE = 1e-3
+    # 计算 MA20 等指标所需的最少历史 K 线数
+    _INCREMENTAL_INDICATOR_WARMUP = 20
+
+    def get_daily_data_incremental(
+        self,
+        stock_code: str,
+        history: Optional[pd.DataFrame],
+        end_date: Optional[str] = None,
+        days: int = 30,
+        overlap_bars: int = 2
+    ) -> Tuple[pd.DataFrame, str]:
+        """
+        增量获取日线数据（仅拉取本地最新日期之后的缺口）
+
+        策略：
+        1. 本地无历史或历史过旧/不足以计算指标时，退化为全量 get_daily_data
+        2. 否则从本地倒数第 overlap_bars 根 K 线开始请求，重叠部分用于校验
+        3. 重叠区间收盘价不一致（如除权导致前复权价格变化）时，退化为全量拉取
+        4. 将新数据拼接到本地历史后重算技术指标，仅返回本地最新一根及之后的行
+
+        Args:
+            stock_code: 股票代码
+            history: 本地已存储的日线数据（按日期升序，见 DatabaseManager.get_daily_history_df）
+            end_date: 结束日期（可选，默认今天）
+            days: 全量拉取时的获取天数
+            overlap_bars: 与本地数据重叠校验的 K 线数量
+
+        Returns:
+            Tuple[DataFrame, str]: (需要写入的数据, 成功的数据源名称)
+
+        Raises:
+            DataFetchError: 所有数据源都失败时抛出
+        """
+        if end_date is None:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+
+        if history is None or history.empty or len(history) < self._INCREMENTAL_INDICATOR_WARMUP:
+            logger.info(f"[增量] {stock_code} 本地历史不足，执行全量拉取")
+            return self.get_daily_data(stock_code, end_date=end_date, days=days)
+
+        history = history.copy()
+        history['date'] = pd.to_datetime(history['date'])
+        history = history.sort_values('date').reset_index(drop=True)
+
+        last_date = history['date'].iloc[-1]
+        end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+        if (end_dt - last_date.to_pydatetime()).days > days * 2:
+            logger.info(f"[增量] {stock_code} 本地最新数据 {last_date.date()} 过旧，执行全量拉取")
+            return self.get_daily_data(stock_code, end_date=end_date, days=days)
+
+        overlap_bars = max(1, min(overlap_bars, len(history)))
+        start_dt = history['date'].iloc[-overlap_bars]
+        start_date = start_dt.strftime('%Y-%m-%d')
+
+        logger.info(f"[增量] {stock_code} 本地最新 {last_date.date()}，增量拉取 {start_date} ~ {end_date}")
+        delta_df, source_name = self.get_daily_data(stock_code, start_date=start_date, end_date=end_date)
+
+        delta_df = delta_df.copy()
+        delta_df['date'] = pd.to_datetime(delta_df['date'])
+
+        # 校验重叠区间：历史收盘价发生变化说明复权基准变了，需要全量重拉
+        overlap = history[['date', 'close']].merge(
+            delta_df[['date', 'close']], on='date', suffixes=('_local', '_remote')
+        )
+        if not overlap.empty:
+            local_close = overlap['close_local'].astype(float)
+            remote_close = overlap['close_remote'].astype(float)
+            rel_diff = ((remote_close - local_close).abs() / local_close.abs().clip(lower=1e-9)).max()
+            if rel_diff > self._INCREMENTAL_CLOSE_TOLERANCE:
+                logger.warning(
+                    f"[增量] {stock_code} 重叠区间收盘价不一致(最大偏差 {rel_diff:.2%})，"
+                    f"可能发生除权，执行全量拉取"
+                )
+                return self.get_daily_data(stock_code, end_date=end_date, days=days)
+
+        # 拼接历史并重算指标，仅返回增量窗口内的行
+        base_cols = [col for col in STANDARD_COLUMNS if col in history.columns]
+        prior = history.loc[history['date'] < start_dt, base_cols]
+        delta_cols = [col for col in STANDARD_COLUMNS if col in delta_df.columns]
+        combined = pd.concat([prior, delta_df[delta_cols]], ignore_index=True)
+        combined = combined.sort_values('date').reset_index(drop=True)
+        combined = BaseFetcher._calculate_indicators(combined)
+
+        # 重叠区首行的涨跌幅等字段可能因窗口截断而失真，只回写本地最新一根及之后的数据
+        affected = combined[combined['date'] >= last_date].reset_index(drop=True)
+        logger.info(f"[增量] {stock_code} 获取 {len(delta_df)} 条，写入 {len(affected)} 条 (来源: {source_name})")
+        return affected, source_name
+
     @property
     def available_fetchers(self) -> List[str]:
         """返回可用数据源名称列表"""
@@ -419,12 +767,13 @@ class DataFetcherManager:
         批量预取实时行情数据（在分析开始前调用）
         
         策略：
-        1. 检查优先级中是否包含全量拉取数据源（efinance/akshare_em）
-        2. 如果不包含，跳过预取（新浪/腾讯是单股票查询，无需预取）
+        0. 开启 ASYNC_QUOTE_ENGINE 时：由异步行情引擎并发获取全部普通 A 股
+        1. 优先级首位是新浪/腾讯时：按代码列表分块批量查询，写入逐代码缓存
+        2. 检查优先级中是否包含全量拉取数据源（efinance/akshare_em）
         3. 如果自选股数量 >= 5 且使用全量数据源，则预取填充缓存
         
         这样做的好处：
-        - 使用新浪/腾讯时：每只股票独立查询，无全量拉取问题
+        - 使用新浪/腾讯时：每 60~800 只股票一次请求，后续单只查询命中缓存
         - 使用 efinance/东财时：预取一次，后续缓存命中
         
         Args:
@@ -442,15 +791,35 @@ class DataFetcherManager:
             logger.debug("[预取] 实时行情功能已禁用，跳过预取")
             return 0
         
+        priority = config.realtime_source_priority.lower()
+        priority_list = [s.strip() for s in priority.split(',') if s.strip()]
+        
+        # 异步行情引擎：所有普通 A 股一次并发获取，写入逐代码缓存
+        engine_quotes = self._get_quotes_via_engine(stock_codes, priority_list)
+        if engine_quotes is not None:
+            logger.info(f"[预取] 异步行情引擎预取完成: {len(engine_quotes)}/{len(stock_codes)} 只股票")
+            return len(engine_quotes)
+        
+        # 新浪/腾讯排在首位：批量查询自选股（接口支持逗号分隔的代码列表）
+        fetcher_name, kwargs = self._REALTIME_SOURCE_FETCHERS.get(priority_list[0] if priority_list else '', (None, {}))
+        lite_source = kwargs.get('source')
+        if lite_source in ('sina', 'tencent'):
+            fetcher = self._find_fetcher(fetcher_name)
+            if fetcher is None or not hasattr(fetcher, 'get_realtime_quotes_batch') or len(stock_codes) < 2:
+                return 0
+            try:
+                quotes = fetcher.get_realtime_quotes_batch(stock_codes, source=lite_source)
+            except Exception as e:
+                logger.warning(f"[预取] {lite_source} 批量查询异常，将使用逐个查询模式: {e}")
+                return 0
+            logger.info(f"[预取] {lite_source} 批量预取完成: {len(quotes)}/{len(stock_codes)} 只股票")
+            return len(quotes)
+        
         # 检查优先级中是否包含全量拉取数据源
         # 注意：新增全量接口（如 tushare_realtime）时需同步更新此列表
         # 全量接口特征：一次 API 调用拉取全市场 5000+ 股票数据
-        priority = config.realtime_source_priority.lower()
         bulk_sources = ['efinance', 'akshare_em', 'tushare']  # 全量接口列表
         
-        # 如果优先级中前两个都不是全量数据源，跳过预取
-        # 因为新浪/腾讯是单股票查询，不需要预取
-        priority_list = [s.strip() for s in priority.split(',')]
         first_bulk_source_index = None
         for i, source in enumerate(priority_list):
             if source in bulk_sources:
@@ -459,7 +828,7 @@ class DataFetcherManager:
         
         # 如果没有全量数据源，或者全量数据源排在第 3 位之后，跳过预取
         if first_bulk_source_index is None or first_bulk_source_index >= 2:
-            logger.info(f"[预取] 当前优先级使用轻量级数据源(sina/tencent)，无需预取")
+            logger.info(f"[预取] 当前优先级未使用全量数据源，无需预取")
             return 0
         
         # 如果股票数量少于 5 个，不进行批量预取（逐个查询更高效）
@@ -532,8 +901,17 @@ class DataFetcherManager:
             logger.warning(f"[实时行情] 美股 {stock_code} 无可用数据源")
             return None
         
-        # 获取配置的数据源优先级
-        source_priority = config.realtime_source_priority.split(',')
+        # 获取配置的数据源优先级（按各数据源近期健康度调整顺序）
+        source_priority = [s.strip().lower() for s in config.realtime_source_priority.split(',') if s.strip()]
+        source_priority = self._ordered('realtime', source_priority, key=str)
+        
+        # 异步行情引擎：普通 A 股先走引擎（优先命中批量预取的逐代码缓存），
+        # 字段不全或引擎未取到时继续下面的逐个数据源流程
+        engine_quotes = self._get_quotes_via_engine([stock_code], source_priority)
+        quote = (engine_quotes or {}).get(stock_code)
+        if quote is not None and quote.has_basic_data() and not self._quote_needs_supplement(quote):
+            logger.info(f"[实时行情] {stock_code} 成功获取 (来源: 异步引擎/{quote.source.value})")
+            return quote
         
         errors = []
         # primary_quote holds the first successful result; we may supplement
@@ -541,52 +919,20 @@ class DataFetcherManager:
         primary_quote = None
         
         for source in source_priority:
-            source = source.strip().lower()
+            fetcher_name, kwargs = self._REALTIME_SOURCE_FETCHERS.get(source, (None, {}))
+            fetcher = self._find_fetcher(fetcher_name) if fetcher_name else None
+            if fetcher is None or not hasattr(fetcher, 'get_realtime_quote'):
+                continue
             
+            started = time.monotonic()
             try:
-                quote = None
-                
-                if source == "efinance":
-                    # 尝试 EfinanceFetcher
-                    for fetcher in self._fetchers:
-                        if fetcher.name == "EfinanceFetcher":
-                            if hasattr(fetcher, 'get_realtime_quote'):
-                                quote = fetcher.get_realtime_quote(stock_code)
-                            break
-                
-                elif source == "akshare_em":
-                    # 尝试 AkshareFetcher 东财数据源
-                    for fetcher in self._fetchers:
-                        if fetcher.name == "AkshareFetcher":
-                            if hasattr(fetcher, 'get_realtime_quote'):
-                                quote = fetcher.get_realtime_quote(stock_code, source="em")
-                            break
-                
-                elif source == "akshare_sina":
-                    # 尝试 AkshareFetcher 新浪数据源
-                    for fetcher in self._fetchers:
-                        if fetcher.name == "AkshareFetcher":
-                            if hasattr(fetcher, 'get_realtime_quote'):
-                                quote = fetcher.get_realtime_quote(stock_code, source="sina")
-                            break
-                
-                elif source in ("tencent", "akshare_qq"):
-                    # 尝试 AkshareFetcher 腾讯数据源
-                    for fetcher in self._fetchers:
-                        if fetcher.name == "AkshareFetcher":
-                            if hasattr(fetcher, 'get_realtime_quote'):
-                                quote = fetcher.get_realtime_quote(stock_code, source="tencent")
-                            break
-                
-                elif source == "tushare":
-                    # 尝试 TushareFetcher（需要 Tushare Pro 积分）
-                    for fetcher in self._fetchers:
-                        if fetcher.name == "TushareFetcher":
-                            if hasattr(fetcher, 'get_realtime_quote'):
-                                quote = fetcher.get_realtime_quote(stock_code)
-                            break
+                quote = fetcher.get_realtime_quote(stock_code, **kwargs)
+                ok = quote is not None and quote.has_basic_data()
+                self._health.record(
+                    'realtime', source, ok, time.monotonic() - started, None if ok else 'empty result'
+                )
                 
-                if quote is not None and quote.has_basic_data():
+                if ok:
                     if primary_quote is None:
                         # First successful source becomes primary
                         primary_quote = quote
@@ -611,6 +957,7 @@ class DataFetcherManager:
                             break
                     
             except Exception as e:
+                self._health.record('realtime', source, False, time.monotonic() - started, str(e))
                 error_msg = f"[{source}] 失败: {str(e)}"
                 logger.warning(error_msg)
                 errors.append(error_msg)
@@ -628,6 +975,70 @@ class DataFetcherManager:
         
         return None
 
+    def get_realtime_quotes(self, stock_codes: List[str]) -> Dict[str, Any]:
+        """
+        批量获取实时行情
+        
+        开启 ASYNC_QUOTE_ENGINE 时普通 A 股由异步引擎一次并发获取，
+        其余代码（及引擎未取到的代码）逐只走 get_realtime_quote
+        
+        Returns:
+            {stock_code: UnifiedRealtimeQuote}，获取失败的代码不出现在结果中
+        """
+        from src.config import get_config
+        
+        config = get_config()
+        if not config.enable_realtime_quote:
+            return {}
+        
+        source_priority = [s.strip().lower() for s in config.realtime_source_priority.split(',') if s.strip()]
+        quotes = dict(self._get_quotes_via_engine(stock_codes, self._ordered('realtime', source_priority, key=str)) or {})
+        for stock_code in dict.fromkeys(stock_codes):
+            if stock_code not in quotes:
+                quote = self.get_realtime_quote(stock_code)
+                if quote is not None:
+                    quotes[stock_code] = quote
+        return quotes
+    
+    def _get_quotes_via_engine(self, stock_codes: List[str], source_priority: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        通过异步行情引擎获取普通 A 股行情
+        
+        Returns:
+            行情字典；引擎未开启或优先级中没有引擎支持的数据源时返回 None
+        """
+        from src.config import get_config
+        
+        if not getattr(get_config(), 'async_quote_engine', False):
+            return None
+        from .async_quote_engine import get_async_quote_engine, resolve_engine_sources
+        
+        sources = resolve_engine_sources(source_priority)
+        if not sources:
+            return None
+        try:
+            return get_async_quote_engine().get_quotes(stock_codes, sources)
+        except Exception as e:
+            logger.warning(f"[实时行情] 异步行情引擎获取失败，回退逐个数据源: {e}")
+            return None
+    
+    # 实时行情数据源名称 -> (Fetcher 名称, get_realtime_quote 额外参数)
+    _REALTIME_SOURCE_FETCHERS: Dict[str, Tuple[str, Dict[str, str]]] = {
+        "efinance": ("EfinanceFetcher", {}),
+        "akshare_em": ("AkshareFetcher", {"source": "em"}),
+        "akshare_sina": ("AkshareFetcher", {"source": "sina"}),
+        "tencent": ("AkshareFetcher", {"source": "tencent"}),
+        "akshare_qq": ("AkshareFetcher", {"source": "tencent"}),
+        "tushare": ("TushareFetcher", {}),  # 需要 Tushare Pro 积分
+    }
+
+    def _find_fetcher(self, name: str) -> Optional[BaseFetcher]:
+        """按名称查找已注册的数据源"""
+        for fetcher in self._fetchers:
+            if fetcher.name == name:
+                return fetcher
+        return None
+
     # Fields worth supplementing from secondary sources when the primary
     # source returns None for them. Ordered by importance.
     _SUPPLEMENT_FIELDS = [
@@ -659,23 +1070,34 @@ class DataFetcherManager:
                     filled.append(f)
         return filled
 
-    def get_chip_distribution(self, stock_code: str):
+    def get_chip_distribution(
+        self,
+        stock_code: str,
+        history: Optional[pd.DataFrame] = None,
+        realtime_quote=None,
+    ):
         """
         获取筹码分布数据（带熔断和多数据源降级）
 
         策略：
         1. 检查配置开关
-        2. 检查熔断器状态
-        3. 依次尝试多个数据源：AkshareFetcher -> TushareFetcher -> EfinanceFetcher
-        4. 所有数据源失败则返回 None（降级兜底）
+        2. 查询 (代码, 最近已收盘交易日) 日缓存（内存 LRU + 数据库）
+        3. 传入本地日线时先用本地 CYQ 引擎计算（不访问网络）
+        4. 检查熔断器状态
+        5. 依次尝试多个数据源：AkshareFetcher -> TushareFetcher -> EfinanceFetcher
+        6. 所有数据源失败则返回 None（降级兜底，不写缓存）
+
+        只有基于该已收盘交易日数据计算（chip.date 相同）且不在盘中的结果才写入日缓存：
+        盘中结果由前一日日线加盘中价格算出，不能在收盘后继续复用
 
         Args:
             stock_code: 股票代码
+            history: 本地日线（按日期升序），用于本地计算
+            realtime_quote: 实时行情，用于推算流通股本和计算获利比例
 
         Returns:
             ChipDistribution 对象，失败则返回 None
         """
-        from .realtime_types import get_chip_circuit_breaker
         from src.config import get_config
 
         config = get_config()
@@ -685,6 +1107,49 @@ class DataFetcherManager:
             logger.debug(f"[筹码分布] 功能已禁用，跳过 {stock_code}")
             return None
 
+        # 筹码分布每个交易日收盘后只变化一次：按最近已收盘交易日读日缓存
+        from .snapshot_cache import get_chip_cache
+        from .trading_calendar import is_session_open_for, latest_closed_trading_day_for
+
+        chip_cache = get_chip_cache()
+        trade_date = latest_closed_trading_day_for(stock_code)
+        cached = chip_cache.get(stock_code, trade_date)
+        if cached is not None:
+            logger.debug(f"[筹码分布] {stock_code} 命中 {trade_date} 日缓存")
+            return cached
+
+        chip = self._fetch_chip_distribution(stock_code, config, history, realtime_quote)
+        if chip is not None:
+            if str(chip.date)[:10] == trade_date.isoformat() and not is_session_open_for(stock_code):
+                chip_cache.put(stock_code, trade_date, chip)
+            else:
+                logger.debug(f"[筹码分布] {stock_code} 数据日期 {chip.date} 非 {trade_date} 收盘数据，不写日缓存")
+        return chip
+
+    def _fetch_chip_distribution(self, stock_code: str, config, history, realtime_quote):
+        """按本地计算 -> 网络数据源的顺序获取筹码分布（不经过日缓存）"""
+        from .realtime_types import get_chip_circuit_breaker
+
+        if config.chip_local_engine and history is not None and not history.empty:
+            from .chip_engine import compute_chip_distribution, float_shares_from_quote
+
+            # 数据不足（日线过少/缺少流通股本）时返回 None，不计入健康统计
+            started = time.monotonic()
+            try:
+                chip = compute_chip_distribution(
+                    history,
+                    stock_code,
+                    float_shares=float_shares_from_quote(realtime_quote),
+                    current_price=getattr(realtime_quote, 'price', None),
+                )
+                if chip is not None:
+                    self._health.record('chip', 'LocalChipEngine', True, time.monotonic() - started)
+                    logger.info(f"[筹码分布] {stock_code} 本地计算完成（{len(history)} 条日线）")
+                    return chip
+            except Exception as e:
+                self._health.record('chip', 'LocalChipEngine', False, time.monotonic() - started, str(e))
+                logger.warning(f"[筹码分布] 本地计算 {stock_code} 失败: {e}")
+
         circuit_breaker = get_chip_circuit_breaker()
 
         # 定义筹码数据源优先级列表
@@ -694,26 +1159,33 @@ class DataFetcherManager:
             ("EfinanceFetcher", "efinance_chip"),
         ]
 
-        for fetcher_name, source_key in chip_sources:
-            # 检查熔断器状态
-            if not circuit_breaker.is_available(source_key):
-                logger.debug(f"[熔断] {fetcher_name} 筹码接口处于熔断状态，尝试下一个")
+        for fetcher_name, source_key in self._ordered('chip', chip_sources, key=lambda x: x[0]):
+            fetcher = self._find_fetcher(fetcher_name)
+            if fetcher is None or not hasattr(fetcher, 'get_chip_distribution'):
                 continue
 
-            try:
-                for fetcher in self._fetchers:
-                    if fetcher.name == fetcher_name:
-                        if hasattr(fetcher, 'get_chip_distribution'):
-                            chip = fetcher.get_chip_distribution(stock_code)
-                            if chip is not None:
-                                circuit_breaker.record_success(source_key)
-                                logger.info(f"[筹码分布] {stock_code} 成功获取 (来源: {fetcher_name})")
-                                return chip
-                        break
-            except Exception as e:
-                logger.warning(f"[筹码分布] {fetcher_name} 获取 {stock_code} 失败: {e}")
-                circuit_breaker.record_failure(source_key, str(e))
-                continue
+            # 检查熔断器状态（半开状态下占用试探名额，未上报结果时退出 with 即释放）
+            with circuit_breaker.probe(source_key) as allowed:
+                if not allowed:
+                    logger.debug(f"[熔断] {fetcher_name} 筹码接口处于熔断状态，尝试下一个")
+                    continue
+
+                started = time.monotonic()
+                try:
+                    chip = fetcher.get_chip_distribution(stock_code)
+                    self._health.record(
+                        'chip', fetcher_name, chip is not None, time.monotonic() - started,
+                        None if chip is not None else 'empty result'
+                    )
+                    if chip is not None:
+                        circuit_breaker.record_success(source_key)
+                        logger.info(f"[筹码分布] {stock_code} 成功获取 (来源: {fetcher_name})")
+                        return chip
+                except Exception as e:
+                    self._health.record('chip', fetcher_name, False, time.monotonic() - started, str(e))
+                    logger.warning(f"[筹码分布] {fetcher_name} 获取 {stock_code} 失败: {e}")
+                    circuit_breaker.record_failure(source_key, str(e))
+                    continue
 
         logger.warning(f"[筹码分布] {stock_code} 所有数据源均失败")
         return None
@@ -766,6 +1238,26 @@ class DataFetcherManager:
         logger.warning(f"[股票名称] 所有数据源都无法获取 {stock_code} 的名称")
         return None
 
+    def get_stock_lists(self) -> List[Tuple[str, pd.DataFrame]]:
+        """
+        从所有支持 get_stock_list 的数据源获取全量股票列表
+
+        Returns:
+            [(数据源名称, DataFrame)]，按数据源优先级排列，失败或为空的数据源不出现在结果中
+        """
+        lists = []
+        for fetcher in self._fetchers:
+            if not hasattr(fetcher, 'get_stock_list'):
+                continue
+            try:
+                df = fetcher.get_stock_list()
+            except Exception as e:
+                logger.debug(f"[股票列表] {fetcher.name} 获取失败: {e}")
+                continue
+            if df is not None and not df.empty:
+                lists.append((fetcher.name, df))
+        return lists
+
     def batch_get_stock_names(self, stock_codes: List[str]) -> Dict[str, str]:
         """
         批量获取股票中文名称
@@ -829,19 +1321,74 @@ class DataFetcherManager:
 
     def get_main_indices(self) -> List[Dict[str, Any]]:
         """获取主要指数实时行情（自动切换数据源）"""
-        for fetcher in self._fetchers:
+        for fetcher in self._ordered('indices', self._fetchers):
+            started = time.monotonic()
             try:
                 data = fetcher.get_main_indices()
+                self._health.record(
+                    'indices', fetcher.name, bool(data), time.monotonic() - started,
+                    None if data else 'empty result'
+                )
                 if data:
                     logger.info(f"[{fetcher.name}] 获取指数行情成功")
                     return data
             except Exception as e:
+                self._health.record('indices', fetcher.name, False, time.monotonic() - started, str(e))
                 logger.warning(f"[{fetcher.name}] 获取指数行情失败: {e}")
                 continue
         return []
 
+    def get_market_snapshot(self):
+        """
+        获取当前周期的全市场行情快照（MarketSnapshot）
+
+        按数据源顺序读取第一个可用的全量行情缓存（efinance/东财），
+        底层缓存未刷新时返回同一个快照对象，不会重复请求上游
+
+        Returns:
+            MarketSnapshot，所有全量数据源均不可用时返回 None
+        """
+        from .market_snapshot import build_market_snapshot
+
+        for fetcher in self._fetchers:
+            if not hasattr(fetcher, 'get_spot_snapshot'):
+                continue
+            try:
+                spot = fetcher.get_spot_snapshot()
+            except Exception as e:
+                logger.warning(f"[{fetcher.name}] 获取全量行情失败: {e}")
+                continue
+            if spot is None or spot.data is None or spot.data.empty:
+                continue
+            try:
+                return build_market_snapshot(spot, fetcher.name, industries=self._get_industry_map())
+            except Exception as e:
+                logger.warning(f"[{fetcher.name}] 构建市场快照失败: {e}")
+        return None
+
+    def _get_industry_map(self) -> Dict[str, str]:
+        """股票代码 -> 行业（取自 Tushare stock_basic，未配置 Token 时为空）"""
+        from .market_snapshot import get_industry_map
+
+        def load() -> Dict[str, str]:
+            fetcher = self._find_fetcher('TushareFetcher')
+            if fetcher is None or not fetcher.is_available():
+                return {}
+            df = fetcher.get_stock_list()
+            if df is None or df.empty or 'industry' not in df.columns:
+                return {}
+            df = df.dropna(subset=['industry'])
+            return dict(zip(df['code'].astype(str), df['industry'].astype(str)))
+
+        return get_industry_map(load)
+
     def get_market_stats(self) -> Dict[str, Any]:
-        """获取市场涨跌统计（自动切换数据源）"""
+        """获取市场涨跌统计（优先由市场快照本地计算，失败时自动切换数据源）"""
+        snapshot = self.get_market_snapshot()
+        if snapshot is not None:
+            logger.info(f"[市场快照] 本地计算市场统计（来源: {snapshot.source}）")
+            return snapshot.stats()
+
         for fetcher in self._fetchers:
             try:
                 data = fetcher.get_market_stats()
@@ -854,7 +1401,13 @@ class DataFetcherManager:
         return {}
 
     def get_sector_rankings(self, n: int = 5) -> Tuple[List[Dict], List[Dict]]:
-        """获取板块涨跌榜（自动切换数据源）"""
+        """获取板块涨跌榜（有行业映射时由市场快照本地聚合，否则自动切换数据源）"""
+        snapshot = self.get_market_snapshot()
+        rankings = snapshot.sector_rankings(n) if snapshot is not None else None
+        if rankings:
+            logger.info(f"[市场快照] 本地聚合行业涨跌榜（来源: {snapshot.source}）")
+            return rankings
+
         for fetcher in self._fetchers:
             try:
                 data = fetcher.get_sector_rankings(n)
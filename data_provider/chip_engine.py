@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+本地筹码分布引擎（CYQ 成本分布模型）
+===================================
+
+职责：
+1. 基于本地日线（OHLCV）与换手率计算筹码成本分布，不发起网络请求
+2. 输出与 ak.stock_cyq_em 同口径的获利比例、平均成本、70%/90% 成本区间与集中度
+3. 支持批量计算（每只股票毫秒级）
+
+模型（与东财/通达信 CYQ 一致）：
+- 每个交易日的成交筹码在 [最低价, 最高价] 上按三角形分布，峰值位于当日均价
+- 当日换手率 t 的旧筹码被新筹码替换：chips = chips * (1 - t) + t * 当日分布
+- 递推展开后第 i 天筹码的最终权重为 t_i * Π_{j>i}(1 - t_j)，可一次矩阵乘法求出
+- 窗口内未被换手覆盖的剩余筹码记在窗口第一天的分布上
+
+换手率取自日线的 turnover_rate 列（百分比），缺失时用 成交量 / 流通股本 计算；
+两者都没有时无法计算，返回 None 交由网络数据源处理。
+
+成交量单位：Tushare/Baostock/新浪入库时为股，东财日 K（efinance、akshare stock_zh_a_hist）为手且未换算。
+同一窗口可能混有两种来源（如按交易日同步的 Tushare 行接在 efinance 行之后），
+因此逐行用 成交额 / 成交量 与收盘价比对判断单位，统一换算为股后再计算。
+"""
+
+import logging
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .realtime_types import ChipDistribution
+
+logger = logging.getLogger(__name__)
+
+# 参与计算的最近交易日数
+DEFAULT_LOOKBACK = 120
+# 价格网格档数
+PRICE_BINS = 150
+# 最少日线条数
+MIN_BARS = 20
+# 窗口内换手覆盖的筹码比例下限（低于该值时结果主要取决于窗口起点的假设，不可信）
+MIN_COVERAGE = 0.5
+# 成交量以手为单位入库的数据源（无成交额、无法逐行判断单位时使用）
+LOT_VOLUME_SOURCES = frozenset({'EfinanceFetcher', 'AkshareFetcher'})
+# 成交额 / 成交量 超过收盘价的该倍数时，判定成交量单位为手
+_LOT_RATIO_THRESHOLD = 10.0
+
+
+def _volume_in_shares(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """逐日成交量（股），按行判断单位并把以手计的行放大 100 倍；无 volume 列时返回 None"""
+    if 'volume' not in df.columns:
+        return None
+    volume = pd.to_numeric(df['volume'], errors='coerce').to_numpy(dtype=float)
+    close = pd.to_numeric(df['close'], errors='coerce').to_numpy(dtype=float)
+    if 'amount' in df.columns:
+        amount = pd.to_numeric(df['amount'], errors='coerce').to_numpy(dtype=float)
+    else:
+        amount = np.full(len(df), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = amount / (volume * close)
+    known = np.isfinite(ratio) & (ratio > 0)
+    if 'data_source' in df.columns:
+        by_source = df['data_source'].isin(LOT_VOLUME_SOURCES).to_numpy()
+    else:
+        by_source = np.zeros(len(df), dtype=bool)
+    in_lots = np.where(known, ratio > _LOT_RATIO_THRESHOLD, by_source)
+    return np.where(in_lots, volume * 100.0, volume)
+
+
+def _turnover(df: pd.DataFrame, float_shares: Optional[float]) -> Optional[np.ndarray]:
+    """逐日换手率（0-1），无法获得时返回 None"""
+    if 'turnover_rate' in df.columns:
+        rate = pd.to_numeric(df['turnover_rate'], errors='coerce')
+        if rate.notna().all():
+            return np.clip(rate.to_numpy(dtype=float) / 100.0, 0.0, 1.0)
+    volume = _volume_in_shares(df)
+    if float_shares and float_shares > 0 and volume is not None:
+        return np.clip(np.nan_to_num(volume) / float_shares, 0.0, 1.0)
+    return None
+
+
+def _daily_distributions(low: np.ndarray, high: np.ndarray, avg: np.ndarray, grid: np.ndarray) -> np.ndarray:
+    """
+    每日三角形分布矩阵（天数 × 价格档），每行和为 1
+
+    一字板等 low == high 的交易日全部记在最近的价格档上
+    """
+    p = grid[np.newaxis, :]
+    lo, hi, mid = low[:, np.newaxis], high[:, np.newaxis], avg[:, np.newaxis]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rising = np.where(mid > lo, (p - lo) / (mid - lo), 1.0)
+        falling = np.where(hi > mid, (hi - p) / (hi - mid), 1.0)
+    weights = np.where(p <= mid, rising, falling)
+    weights = np.where((p >= lo) & (p <= hi), np.clip(weights, 0.0, None), 0.0)
+
+    totals = weights.sum(axis=1)
+    flat = totals <= 0
+    if flat.any():
+        nearest = np.abs(grid[np.newaxis, :] - avg[flat, np.newaxis]).argmin(axis=1)
+        weights[flat] = 0.0
+        weights[np.flatnonzero(flat), nearest] = 1.0
+        totals = weights.sum(axis=1)
+    return weights / totals[:, np.newaxis]
+
+
+def _cost_at(grid: np.ndarray, cumulative: np.ndarray, ratio: float) -> float:
+    """累计筹码达到 ratio 时的价格"""
+    return float(grid[min(int(np.searchsorted(cumulative, ratio)), len(grid) - 1)])
+
+
+def chip_curve(
+    df: pd.DataFrame,
+    float_shares: Optional[float] = None,
+    lookback: int = DEFAULT_LOOKBACK,
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    计算筹码分布曲线
+
+    Args:
+        df: 按日期升序的日线（需含 high/low/close，open/amount/volume/turnover_rate 可选）
+        float_shares: 流通股本（股），日线无 turnover_rate 列时用于计算换手率
+        lookback: 参与计算的最近交易日数
+
+    Returns:
+        (价格网格, 各档筹码占比)，数据不足时返回 None
+    """
+    if df is None or len(df) < MIN_BARS:
+        return None
+    df = df.tail(lookback)
+
+    turnover = _turnover(df, float_shares)
+    if turnover is None:
+        return None
+
+    high = pd.to_numeric(df['high'], errors='coerce').to_numpy(dtype=float)
+    low = pd.to_numeric(df['low'], errors='coerce').to_numpy(dtype=float)
+    close = pd.to_numeric(df['close'], errors='coerce').to_numpy(dtype=float)
+    valid = np.isfinite(high) & np.isfinite(low) & np.isfinite(close) & (high > 0) & (low > 0)
+    if valid.sum() < MIN_BARS:
+        return None
+    high, low, close, turnover = high[valid], low[valid], close[valid], turnover[valid]
+
+    # 当日均价：优先 成交额/成交量，异常时退回 (O+H+L+C)/4
+    open_ = pd.to_numeric(df['open'], errors='coerce').to_numpy(dtype=float)[valid] if 'open' in df.columns else close
+    avg = (np.where(np.isfinite(open_), open_, close) + high + low + close) / 4.0
+    if 'amount' in df.columns and 'volume' in df.columns:
+        amount = pd.to_numeric(df['amount'], errors='coerce').to_numpy(dtype=float)[valid]
+        volume = _volume_in_shares(df)[valid]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vwap = amount / volume
+        avg = np.where(np.isfinite(vwap) & (vwap >= low) & (vwap <= high), vwap, avg)
+    avg = np.clip(avg, low, high)
+
+    # 第 i 天筹码的最终权重 t_i * Π_{j>i}(1 - t_j)
+    survive = np.append(np.cumprod((1.0 - turnover)[::-1])[::-1][1:], 1.0)
+    weights = turnover * survive
+    coverage = float(weights.sum())
+    if coverage < MIN_COVERAGE:
+        logger.debug(f"[本地筹码] 窗口内换手覆盖 {coverage:.0%}，数据不足")
+        return None
+    weights[0] += 1.0 - coverage
+
+    grid = np.linspace(low.min(), high.max(), PRICE_BINS)
+    chips = weights @ _daily_distributions(low, high, avg, grid)
+    return grid, chips / chips.sum()
+
+
+def compute_chip_distribution(
+    df: pd.DataFrame,
+    stock_code: str,
+    float_shares: Optional[float] = None,
+    current_price: Optional[float] = None,
+    lookback: int = DEFAULT_LOOKBACK,
+) -> Optional[ChipDistribution]:
+    """
+    由日线计算最新一天的筹码分布
+
+    Args:
+        df: 按日期升序的日线，见 chip_curve
+        stock_code: 股票代码
+        float_shares: 流通股本（股）
+        current_price: 计算获利比例使用的价格（默认最后一天收盘价）
+        lookback: 参与计算的最近交易日数
+
+    Returns:
+        ChipDistribution（source='local'），数据不足时返回 None
+    """
+    curve = chip_curve(df, float_shares=float_shares, lookback=lookback)
+    if curve is None:
+        return None
+    grid, chips = curve
+    cumulative = np.cumsum(chips)
+
+    price = current_price if current_price and current_price > 0 else float(df['close'].iloc[-1])
+    cost_90_low, cost_90_high = _cost_at(grid, cumulative, 0.05), _cost_at(grid, cumulative, 0.95)
+    cost_70_low, cost_70_high = _cost_at(grid, cumulative, 0.15), _cost_at(grid, cumulative, 0.85)
+
+    last_date = df['date'].iloc[-1] if 'date' in df.columns else ''
+    return ChipDistribution(
+        code=stock_code,
+        date=last_date.strftime('%Y-%m-%d') if hasattr(last_date, 'strftime') else str(last_date),
+        source='local',
+        profit_ratio=float(chips[grid <= price].sum()),
+        # 与东财口径一致：平均成本取 50% 筹码对应的价格
+        avg_cost=round(_cost_at(grid, cumulative, 0.5), 2),
+        cost_90_low=round(cost_90_low, 2),
+        cost_90_high=round(cost_90_high, 2),
+        concentration_90=(cost_90_high - cost_90_low) / (cost_90_high + cost_90_low),
+        cost_70_low=round(cost_70_low, 2),
+        cost_70_high=round(cost_70_high, 2),
+        concentration_70=(cost_70_high - cost_70_low) / (cost_70_high + cost_70_low),
+    )
+
+
+def compute_chip_distribution_batch(
+    frames: Mapping[str, pd.DataFrame],
+    float_shares: Optional[Mapping[str, float]] = None,
+    lookback: int = DEFAULT_LOOKBACK,
+) -> Dict[str, ChipDistribution]:
+    """
+    批量计算筹码分布
+
+    Args:
+        frames: {股票代码: 日线 DataFrame}
+        float_shares: {股票代码: 流通股本}
+
+    Returns:
+        {股票代码: ChipDistribution}，数据不足的股票不出现在结果中
+    """
+    float_shares = float_shares or {}
+    results = {}
+    for code, df in frames.items():
+        chip = compute_chip_distribution(df, code, float_shares=float_shares.get(code), lookback=lookback)
+        if chip is not None:
+            results[code] = chip
+    return results
+
+
+def float_shares_from_quote(quote) -> Optional[float]:
+    """由实时行情推算流通股本（流通市值 / 最新价）"""
+    circ_mv = getattr(quote, 'circ_mv', None)
+    price = getattr(quote, 'price', None)
+    if circ_mv and price and circ_mv > 0 and price > 0:
+        return circ_mv / price
+    return None
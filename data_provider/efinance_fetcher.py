@@ -14,7 +14,7 @@ EfinanceFetcher - 优先数据源 (Priority 0)
 3. 更稳定的接口封装
 
 防封禁策略：
-1. 每次请求前随机休眠 1.5-3.0 秒
+1. 请求前通过进程级令牌桶限流（东财上游，与 akshare 东财接口共享）
 2. 随机轮换 User-Agent
 3. 使用 tenacity 实现指数退避重试
 4. 熔断器机制：连续失败后自动冷却
@@ -39,12 +39,15 @@ from tenacity import (
     before_sleep_log,
 )
 
-from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
+from .base import BaseFetcher, DataFetchError, UnsupportedMarketError, RateLimitError, STANDARD_COLUMNS
 from .realtime_types import (
     UnifiedRealtimeQuote, RealtimeSource,
     get_realtime_circuit_breaker,
-    safe_float, safe_int  # 使用统一的类型转换函数
+    safe_float, safe_int,  # 使用统一的类型转换函数
+    build_code_index,
 )
+from .rate_limiter import acquire_rate_limit
+from .snapshot_cache import SnapshotCache
 
 
 # 保留旧的类型别名，用于向后兼容
@@ -103,20 +106,28 @@ USER_AGENTS = [
 ]
 
 
+def _efinance_code_column(df: pd.DataFrame) -> str:
+    """efinance 返回的代码列名可能是 '股票代码' 或 'code'"""
+    return '股票代码' if df is not None and '股票代码' in df.columns else 'code'
+
+
 # 缓存实时行情数据（避免重复请求）
 # TTL 设为 10 分钟 (600秒)：批量分析场景下避免重复拉取
-_realtime_cache: Dict[str, Any] = {
-    'data': None,
-    'timestamp': 0,
-    'ttl': 600  # 10分钟缓存有效期
-}
+# 并发未命中时只有一个线程拉取；过期后的宽限期内先返回旧快照并在后台刷新
+_realtime_cache = SnapshotCache(
+    "实时行情(efinance)",
+    ttl=600,  # 10分钟缓存有效期
+    index_builder=lambda df: build_code_index(df, _efinance_code_column(df)),
+    shared_key="efinance_spot",
+)
 
 # ETF 实时行情缓存（与股票分开缓存）
-_etf_realtime_cache: Dict[str, Any] = {
-    'data': None,
-    'timestamp': 0,
-    'ttl': 600  # 10分钟缓存有效期
-}
+_etf_realtime_cache = SnapshotCache(
+    "ETF实时行情(efinance)",
+    ttl=600,  # 10分钟缓存有效期
+    index_builder=lambda df: build_code_index(df, _efinance_code_column(df), zfill=6),
+    shared_key="efinance_etf_spot",
+)
 
 
 def _is_etf_code(stock_code: str) -> bool:
@@ -163,7 +174,7 @@ class EfinanceFetcher(BaseFetcher):
     - ef.stock.get_realtime_quotes(): 获取实时行情
     
     关键策略：
-    - 每次请求前随机休眠 1.5-3.0 秒
+    - 请求前通过进程级令牌桶限流（东财上游）
     - 随机 User-Agent 轮换
     - 失败后指数退避重试（最多3次）
     """
@@ -171,18 +182,6 @@ class EfinanceFetcher(BaseFetcher):
     name = "EfinanceFetcher"
     priority = int(os.getenv("EFINANCE_PRIORITY", "0"))  # 最高优先级，排在 AkshareFetcher 之前
     
-    def __init__(self, sleep_min: float = 1.5, sleep_max: float = 3.0):
-        """
-        初始化 EfinanceFetcher
-        
-        Args:
-            sleep_min: 最小休眠时间（秒）
-            sleep_max: 最大休眠时间（秒）
-        """
-        self.sleep_min = sleep_min
-        self.sleep_max = sleep_max
-        self._last_request_time: Optional[float] = None
-    
     def _set_random_user_agent(self) -> None:
         """
         设置随机 User-Agent
@@ -199,23 +198,10 @@ class EfinanceFetcher(BaseFetcher):
     def _enforce_rate_limit(self) -> None:
         """
         强制执行速率限制
-        
-        策略：
-        1. 检查距离上次请求的时间间隔
-        2. 如果间隔不足，补充休眠时间
-        3. 然后再执行随机 jitter 休眠
-        """
-        if self._last_request_time is not None:
-            elapsed = time.time() - self._last_request_time
-            min_interval = self.sleep_min
-            if elapsed < min_interval:
-                additional_sleep = min_interval - elapsed
-                logger.debug(f"补充休眠 {additional_sleep:.2f} 秒")
-                time.sleep(additional_sleep)
-        
-        # 执行随机 jitter 休眠
-        self.random_sleep(self.sleep_min, self.sleep_max)
-        self._last_request_time = time.time()
+
+        efinance 数据均来自东方财富，与 akshare 的东财接口共用 eastmoney 令牌桶
+        """
+        acquire_rate_limit('eastmoney')
     
     @retry(
         stop=stop_after_attempt(1),  # 减少到1次，避免触发限流
@@ -241,13 +227,13 @@ class EfinanceFetcher(BaseFetcher):
         流程：
         1. 判断代码类型（美股/股票/ETF）
         2. 设置随机 User-Agent
-        3. 执行速率限制（随机休眠）
+        3. 执行速率限制（令牌桶）
         4. 调用对应的 efinance API
         5. 处理返回数据
         """
         # 美股不支持，抛出异常让 DataFetcherManager 切换到 AkshareFetcher/YfinanceFetcher
         if _is_us_code(stock_code):
-            raise DataFetchError(f"EfinanceFetcher 不支持美股 {stock_code}，请使用 AkshareFetcher 或 YfinanceFetcher")
+            raise UnsupportedMarketError(f"EfinanceFetcher 不支持美股 {stock_code}，请使用 AkshareFetcher 或 YfinanceFetcher")
         
         # 根据代码类型选择不同的获取方法
         if _is_etf_code(stock_code):
@@ -273,7 +259,7 @@ class EfinanceFetcher(BaseFetcher):
         # 防封禁策略 1: 随机 User-Agent
         self._set_random_user_agent()
         
-        # 防封禁策略 2: 强制休眠
+        # 防封禁策略 2: 令牌桶限流
         self._enforce_rate_limit()
         
         # 格式化日期（efinance 使用 YYYYMMDD 格式）
@@ -341,7 +327,7 @@ class EfinanceFetcher(BaseFetcher):
         # 防封禁策略 1: 随机 User-Agent
         self._set_random_user_agent()
         
-        # 防封禁策略 2: 强制休眠
+        # 防封禁策略 2: 令牌桶限流
         self._enforce_rate_limit()
         
         # 格式化日期
@@ -465,197 +451,186 @@ class EfinanceFetcher(BaseFetcher):
         if _is_etf_code(stock_code):
             return self._get_etf_realtime_quote(stock_code)
 
-        import efinance as ef
         circuit_breaker = get_realtime_circuit_breaker()
         source_key = "efinance"
         
-        # 检查熔断器状态
-        if not circuit_breaker.is_available(source_key):
-            logger.warning(f"[熔断] 数据源 {source_key} 处于熔断状态，跳过")
-            return None
-        
-        try:
-            # 检查缓存
-            current_time = time.time()
-            if (_realtime_cache['data'] is not None and 
-                current_time - _realtime_cache['timestamp'] < _realtime_cache['ttl']):
-                df = _realtime_cache['data']
-                cache_age = int(current_time - _realtime_cache['timestamp'])
-                logger.debug(f"[缓存命中] 实时行情(efinance) - 缓存年龄 {cache_age}s/{_realtime_cache['ttl']}s")
-            else:
-                # 触发全量刷新
-                logger.info(f"[缓存未命中] 触发全量刷新 实时行情(efinance)")
-                # 防封禁策略
-                self._set_random_user_agent()
-                self._enforce_rate_limit()
-                
-                logger.info(f"[API调用] ef.stock.get_realtime_quotes() 获取实时行情...")
-                import time as _time
-                api_start = _time.time()
-                
-                # efinance 的实时行情 API
-                df = ef.stock.get_realtime_quotes()
-                
-                api_elapsed = _time.time() - api_start
-                logger.info(f"[API返回] ef.stock.get_realtime_quotes 成功: 返回 {len(df)} 只股票, 耗时 {api_elapsed:.2f}s")
-                circuit_breaker.record_success(source_key)
-                
-                # 更新缓存
-                _realtime_cache['data'] = df
-                _realtime_cache['timestamp'] = current_time
-                logger.info(f"[缓存更新] 实时行情(efinance) 缓存已刷新，TTL={_realtime_cache['ttl']}s")
-            
-            # 查找指定股票
-            # efinance 返回的列名可能是 '股票代码' 或 'code'
-            code_col = '股票代码' if '股票代码' in df.columns else 'code'
-            row = df[df[code_col] == stock_code]
-            if row.empty:
-                logger.warning(f"[API返回] 未找到股票 {stock_code} 的实时行情")
+        with circuit_breaker.probe(source_key) as allowed:
+            if not allowed:
+                logger.warning(f"[熔断] 数据源 {source_key} 处于熔断状态，跳过")
+                return None
+            try:
+                # 读取缓存（并发未命中时只有一个线程发起全量刷新）
+                snapshot = _realtime_cache.get(self._load_stock_realtime_quotes)
+                df = snapshot.data
+            
+                # 查找指定股票（刷新时已建好代码索引）
+                row = snapshot.index.get(stock_code)
+                if row is None:
+                    logger.warning(f"[API返回] 未找到股票 {stock_code} 的实时行情")
+                    return None
+            
+                # 使用 realtime_types.py 中的统一转换函数
+                # 获取列名（可能是中文或英文）
+                name_col = '股票名称' if '股票名称' in df.columns else 'name'
+                price_col = '最新价' if '最新价' in df.columns else 'price'
+                pct_col = '涨跌幅' if '涨跌幅' in df.columns else 'pct_chg'
+                chg_col = '涨跌额' if '涨跌额' in df.columns else 'change'
+                vol_col = '成交量' if '成交量' in df.columns else 'volume'
+                amt_col = '成交额' if '成交额' in df.columns else 'amount'
+                turn_col = '换手率' if '换手率' in df.columns else 'turnover_rate'
+                amp_col = '振幅' if '振幅' in df.columns else 'amplitude'
+                high_col = '最高' if '最高' in df.columns else 'high'
+                low_col = '最低' if '最低' in df.columns else 'low'
+                open_col = '开盘' if '开盘' in df.columns else 'open'
+                # efinance 也返回量比、市盈率、市值等字段
+                vol_ratio_col = '量比' if '量比' in df.columns else 'volume_ratio'
+                pe_col = '市盈率' if '市盈率' in df.columns else 'pe_ratio'
+                total_mv_col = '总市值' if '总市值' in df.columns else 'total_mv'
+                circ_mv_col = '流通市值' if '流通市值' in df.columns else 'circ_mv'
+            
+                quote = UnifiedRealtimeQuote(
+                    code=stock_code,
+                    name=str(row.get(name_col, '')),
+                    source=RealtimeSource.EFINANCE,
+                    price=safe_float(row.get(price_col)),
+                    change_pct=safe_float(row.get(pct_col)),
+                    change_amount=safe_float(row.get(chg_col)),
+                    volume=safe_int(row.get(vol_col)),
+                    amount=safe_float(row.get(amt_col)),
+                    turnover_rate=safe_float(row.get(turn_col)),
+                    amplitude=safe_float(row.get(amp_col)),
+                    high=safe_float(row.get(high_col)),
+                    low=safe_float(row.get(low_col)),
+                    open_price=safe_float(row.get(open_col)),
+                    volume_ratio=safe_float(row.get(vol_ratio_col)),  # 量比
+                    pe_ratio=safe_float(row.get(pe_col)),  # 市盈率
+                    total_mv=safe_float(row.get(total_mv_col)),  # 总市值
+                    circ_mv=safe_float(row.get(circ_mv_col)),  # 流通市值
+                )
+            
+                logger.info(f"[实时行情-efinance] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
+                           f"量比={quote.volume_ratio}, 换手率={quote.turnover_rate}%")
+                return quote
+            
+            except Exception as e:
+                logger.error(f"[API错误] 获取 {stock_code} 实时行情(efinance)失败: {e}")
+                circuit_breaker.record_failure(source_key, str(e))
                 return None
-            
-            row = row.iloc[0]
-            
-            # 使用 realtime_types.py 中的统一转换函数
-            # 获取列名（可能是中文或英文）
-            name_col = '股票名称' if '股票名称' in df.columns else 'name'
-            price_col = '最新价' if '最新价' in df.columns else 'price'
-            pct_col = '涨跌幅' if '涨跌幅' in df.columns else 'pct_chg'
-            chg_col = '涨跌额' if '涨跌额' in df.columns else 'change'
-            vol_col = '成交量' if '成交量' in df.columns else 'volume'
-            amt_col = '成交额' if '成交额' in df.columns else 'amount'
-            turn_col = '换手率' if '换手率' in df.columns else 'turnover_rate'
-            amp_col = '振幅' if '振幅' in df.columns else 'amplitude'
-            high_col = '最高' if '最高' in df.columns else 'high'
-            low_col = '最低' if '最低' in df.columns else 'low'
-            open_col = '开盘' if '开盘' in df.columns else 'open'
-            # efinance 也返回量比、市盈率、市值等字段
-            vol_ratio_col = '量比' if '量比' in df.columns else 'volume_ratio'
-            pe_col = '市盈率' if '市盈率' in df.columns else 'pe_ratio'
-            total_mv_col = '总市值' if '总市值' in df.columns else 'total_mv'
-            circ_mv_col = '流通市值' if '流通市值' in df.columns else 'circ_mv'
-            
-            quote = UnifiedRealtimeQuote(
-                code=stock_code,
-                name=str(row.get(name_col, '')),
-                source=RealtimeSource.EFINANCE,
-                price=safe_float(row.get(price_col)),
-                change_pct=safe_float(row.get(pct_col)),
-                change_amount=safe_float(row.get(chg_col)),
-                volume=safe_int(row.get(vol_col)),
-                amount=safe_float(row.get(amt_col)),
-                turnover_rate=safe_float(row.get(turn_col)),
-                amplitude=safe_float(row.get(amp_col)),
-                high=safe_float(row.get(high_col)),
-                low=safe_float(row.get(low_col)),
-                open_price=safe_float(row.get(open_col)),
-                volume_ratio=safe_float(row.get(vol_ratio_col)),  # 量比
-                pe_ratio=safe_float(row.get(pe_col)),  # 市盈率
-                total_mv=safe_float(row.get(total_mv_col)),  # 总市值
-                circ_mv=safe_float(row.get(circ_mv_col)),  # 流通市值
-            )
-            
-            logger.info(f"[实时行情-efinance] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
-                       f"量比={quote.volume_ratio}, 换手率={quote.turnover_rate}%")
-            return quote
-            
-        except Exception as e:
-            logger.error(f"[API错误] 获取 {stock_code} 实时行情(efinance)失败: {e}")
-            circuit_breaker.record_failure(source_key, str(e))
-            return None
 
-    def _get_etf_realtime_quote(self, stock_code: str) -> Optional[UnifiedRealtimeQuote]:
+    def get_spot_snapshot(self):
+        """全量 A 股实时行情快照（读 _realtime_cache），供 MarketSnapshot 构建使用"""
+        return _realtime_cache.get(self._load_stock_realtime_quotes)
+
+    def _load_stock_realtime_quotes(self) -> pd.DataFrame:
         """
-        获取 ETF 实时行情
+        全量拉取 A 股实时行情（efinance），供 _realtime_cache 刷新使用
 
-        efinance 默认实时接口仅返回股票数据，ETF 需要显式传入 ['ETF']。
+        失败时抛出异常，不缓存失败结果
         """
         import efinance as ef
-        circuit_breaker = get_realtime_circuit_breaker()
-        source_key = "efinance_etf"
 
-        if not circuit_breaker.is_available(source_key):
-            logger.warning(f"[熔断] 数据源 {source_key} 处于熔断状态，跳过")
-            return None
+        # 防封禁策略
+        self._set_random_user_agent()
+        self._enforce_rate_limit()
 
-        try:
-            current_time = time.time()
-            if (
-                _etf_realtime_cache['data'] is not None and
-                current_time - _etf_realtime_cache['timestamp'] < _etf_realtime_cache['ttl']
-            ):
-                df = _etf_realtime_cache['data']
-                cache_age = int(current_time - _etf_realtime_cache['timestamp'])
-                logger.debug(f"[缓存命中] ETF实时行情(efinance) - 缓存年龄 {cache_age}s/{_etf_realtime_cache['ttl']}s")
-            else:
-                self._set_random_user_agent()
-                self._enforce_rate_limit()
+        logger.info(f"[API调用] ef.stock.get_realtime_quotes() 获取实时行情...")
+        api_start = time.time()
 
-                logger.info("[API调用] ef.stock.get_realtime_quotes(['ETF']) 获取ETF实时行情...")
-                import time as _time
-                api_start = _time.time()
-                df = ef.stock.get_realtime_quotes(['ETF'])
-                api_elapsed = _time.time() - api_start
+        # efinance 的实时行情 API
+        df = ef.stock.get_realtime_quotes()
 
-                if df is not None and not df.empty:
-                    logger.info(f"[API返回] ETF 实时行情成功: {len(df)} 条, 耗时 {api_elapsed:.2f}s")
-                    circuit_breaker.record_success(source_key)
-                else:
-                    logger.warning(f"[API返回] ETF 实时行情为空, 耗时 {api_elapsed:.2f}s")
-                    df = pd.DataFrame()
+        api_elapsed = time.time() - api_start
+        logger.info(f"[API返回] ef.stock.get_realtime_quotes 成功: 返回 {len(df)} 只股票, 耗时 {api_elapsed:.2f}s")
+        get_realtime_circuit_breaker().record_success("efinance")
+        return df
 
-                _etf_realtime_cache['data'] = df
-                _etf_realtime_cache['timestamp'] = current_time
+    def _load_etf_realtime_quotes(self) -> pd.DataFrame:
+        """
+        全量拉取 ETF 实时行情（efinance），供 _etf_realtime_cache 刷新使用
 
-            if df is None or df.empty:
-                logger.warning(f"[实时行情] ETF实时行情数据为空(efinance)，跳过 {stock_code}")
-                return None
+        返回为空时返回空 DataFrame（不覆盖已有快照）
+        """
+        import efinance as ef
 
-            code_col = '股票代码' if '股票代码' in df.columns else 'code'
-            code_series = df[code_col].astype(str).str.zfill(6)
-            target_code = str(stock_code).strip().zfill(6)
-            row = df[code_series == target_code]
-            if row.empty:
-                logger.warning(f"[API返回] 未找到 ETF {stock_code} 的实时行情(efinance)")
-                return None
+        self._set_random_user_agent()
+        self._enforce_rate_limit()
 
-            row = row.iloc[0]
-            name_col = '股票名称' if '股票名称' in df.columns else 'name'
-            price_col = '最新价' if '最新价' in df.columns else 'price'
-            pct_col = '涨跌幅' if '涨跌幅' in df.columns else 'pct_chg'
-            chg_col = '涨跌额' if '涨跌额' in df.columns else 'change'
-            vol_col = '成交量' if '成交量' in df.columns else 'volume'
-            amt_col = '成交额' if '成交额' in df.columns else 'amount'
-            turn_col = '换手率' if '换手率' in df.columns else 'turnover_rate'
-            amp_col = '振幅' if '振幅' in df.columns else 'amplitude'
-            high_col = '最高' if '最高' in df.columns else 'high'
-            low_col = '最低' if '最低' in df.columns else 'low'
-            open_col = '开盘' if '开盘' in df.columns else 'open'
-
-            quote = UnifiedRealtimeQuote(
-                code=target_code,
-                name=str(row.get(name_col, '')),
-                source=RealtimeSource.EFINANCE,
-                price=safe_float(row.get(price_col)),
-                change_pct=safe_float(row.get(pct_col)),
-                change_amount=safe_float(row.get(chg_col)),
-                volume=safe_int(row.get(vol_col)),
-                amount=safe_float(row.get(amt_col)),
-                turnover_rate=safe_float(row.get(turn_col)),
-                amplitude=safe_float(row.get(amp_col)),
-                high=safe_float(row.get(high_col)),
-                low=safe_float(row.get(low_col)),
-                open_price=safe_float(row.get(open_col)),
-            )
+        logger.info("[API调用] ef.stock.get_realtime_quotes(['ETF']) 获取ETF实时行情...")
+        api_start = time.time()
+        df = ef.stock.get_realtime_quotes(['ETF'])
+        api_elapsed = time.time() - api_start
 
-            logger.info(
-                f"[ETF实时行情-efinance] {target_code} {quote.name}: "
-                f"价格={quote.price}, 涨跌={quote.change_pct}%, 换手率={quote.turnover_rate}%"
-            )
-            return quote
-        except Exception as e:
-            logger.error(f"[API错误] 获取 ETF {stock_code} 实时行情(efinance)失败: {e}")
-            circuit_breaker.record_failure(source_key, str(e))
-            return None
+        if df is not None and not df.empty:
+            logger.info(f"[API返回] ETF 实时行情成功: {len(df)} 条, 耗时 {api_elapsed:.2f}s")
+            get_realtime_circuit_breaker().record_success("efinance_etf")
+            return df
+
+        logger.warning(f"[API返回] ETF 实时行情为空, 耗时 {api_elapsed:.2f}s")
+        return pd.DataFrame()
+
+    def _get_etf_realtime_quote(self, stock_code: str) -> Optional[UnifiedRealtimeQuote]:
+        """
+        获取 ETF 实时行情
+
+        efinance 默认实时接口仅返回股票数据，ETF 需要显式传入 ['ETF']。
+        """
+        circuit_breaker = get_realtime_circuit_breaker()
+        source_key = "efinance_etf"
+
+        with circuit_breaker.probe(source_key) as allowed:
+            if not allowed:
+                logger.warning(f"[熔断] 数据源 {source_key} 处于熔断状态，跳过")
+                return None
+            try:
+                snapshot = _etf_realtime_cache.get(self._load_etf_realtime_quotes)
+                df = snapshot.data
+                if df.empty:
+                    logger.warning(f"[实时行情] ETF实时行情数据为空(efinance)，跳过 {stock_code}")
+                    return None
+
+                target_code = str(stock_code).strip().zfill(6)
+                row = snapshot.index.get(target_code)
+                if row is None:
+                    logger.warning(f"[API返回] 未找到 ETF {stock_code} 的实时行情(efinance)")
+                    return None
+
+                name_col = '股票名称' if '股票名称' in df.columns else 'name'
+                price_col = '最新价' if '最新价' in df.columns else 'price'
+                pct_col = '涨跌幅' if '涨跌幅' in df.columns else 'pct_chg'
+                chg_col = '涨跌额' if '涨跌额' in df.columns else 'change'
+                vol_col = '成交量' if '成交量' in df.columns else 'volume'
+                amt_col = '成交额' if '成交额' in df.columns else 'amount'
+                turn_col = '换手率' if '换手率' in df.columns else 'turnover_rate'
+                amp_col = '振幅' if '振幅' in df.columns else 'amplitude'
+                high_col = '最高' if '最高' in df.columns else 'high'
+                low_col = '最低' if '最低' in df.columns else 'low'
+                open_col = '开盘' if '开盘' in df.columns else 'open'
+
+                quote = UnifiedRealtimeQuote(
+                    code=target_code,
+                    name=str(row.get(name_col, '')),
+                    source=RealtimeSource.EFINANCE,
+                    price=safe_float(row.get(price_col)),
+                    change_pct=safe_float(row.get(pct_col)),
+                    change_amount=safe_float(row.get(chg_col)),
+                    volume=safe_int(row.get(vol_col)),
+                    amount=safe_float(row.get(amt_col)),
+                    turnover_rate=safe_float(row.get(turn_col)),
+                    amplitude=safe_float(row.get(amp_col)),
+                    high=safe_float(row.get(high_col)),
+                    low=safe_float(row.get(low_col)),
+                    open_price=safe_float(row.get(open_col)),
+                )
+
+                logger.info(
+                    f"[ETF实时行情-efinance] {target_code} {quote.name}: "
+                    f"价格={quote.price}, 涨跌={quote.change_pct}%, 换手率={quote.turnover_rate}%"
+                )
+                return quote
+            except Exception as e:
+                logger.error(f"[API错误] 获取 ETF {stock_code} 实时行情(efinance)失败: {e}")
+                circuit_breaker.record_failure(source_key, str(e))
+                return None
 
     def get_main_indices(self) -> Optional[List[Dict[str, Any]]]:
         """
@@ -736,23 +711,9 @@ class EfinanceFetcher(BaseFetcher):
         """
         获取市场涨跌统计 (efinance)
         """
-        import efinance as ef
-
         try:
-            self._set_random_user_agent()
-            self._enforce_rate_limit()
-
-            current_time = time.time()
-            if (
-                _realtime_cache['data'] is not None and
-                current_time - _realtime_cache['timestamp'] < _realtime_cache['ttl']
-            ):
-                df = _realtime_cache['data']
-            else:
-                logger.info("[API调用] ef.stock.get_realtime_quotes() 获取市场统计...")
-                df = ef.stock.get_realtime_quotes()
-                _realtime_cache['data'] = df
-                _realtime_cache['timestamp'] = current_time
+            # 与实时行情共用全量快照缓存
+            df = self.get_spot_snapshot().data
 
             if df is None or df.empty:
                 logger.warning("[API返回] 市场统计数据为空")
@@ -763,18 +724,18 @@ class EfinanceFetcher(BaseFetcher):
             if change_col not in df.columns:
                 return None
 
-            df[change_col] = pd.to_numeric(df[change_col], errors='coerce')
+            # 快照在多线程间共享，不能原地修改列
+            change = pd.to_numeric(df[change_col], errors='coerce')
             stats = {
-                'up_count': len(df[df[change_col] > 0]),
-                'down_count': len(df[df[change_col] < 0]),
-                'flat_count': len(df[df[change_col] == 0]),
-                'limit_up_count': len(df[df[change_col] >= 9.9]),
-                'limit_down_count': len(df[df[change_col] <= -9.9]),
+                'up_count': int((change > 0).sum()),
+                'down_count': int((change < 0).sum()),
+                'flat_count': int((change == 0).sum()),
+                'limit_up_count': int((change >= 9.9).sum()),
+                'limit_down_count': int((change <= -9.9).sum()),
                 'total_amount': 0.0,
             }
             if amount_col in df.columns:
-                df[amount_col] = pd.to_numeric(df[amount_col], errors='coerce')
-                stats['total_amount'] = df[amount_col].sum() / 1e8
+                stats['total_amount'] = pd.to_numeric(df[amount_col], errors='coerce').sum() / 1e8
             return stats
         except Exception as e:
             logger.error(f"[efinance] 获取市场统计失败: {e}")
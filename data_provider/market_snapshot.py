@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+全市场行情快照（MarketSnapshot）
+===================================
+
+职责：
+1. 基于一次全量行情拉取（东财/efinance 的 _realtime_cache）构建标准化快照
+2. 在本地用向量化 pandas 计算涨跌家数、涨跌停家数、两市成交额
+3. 结合行业映射在本地聚合行业涨跌幅，生成板块涨跌榜
+
+背景：
+大盘复盘分别调用 get_market_stats / get_sector_rankings，各数据源会再次请求上游，
+而个股分析阶段已经把全市场行情放进了 _realtime_cache。
+快照按底层缓存的刷新周期构建一次；个股实时行情同样读取该全量缓存，
+大盘复盘与个股分析共享同一次网络请求。
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 标准列 -> 各数据源的候选列名（东财 akshare / efinance）
+_COLUMN_ALIASES: Dict[str, Tuple[str, ...]] = {
+    'code': ('代码', '股票代码', 'code'),
+    'name': ('名称', '股票名称', 'name'),
+    'price': ('最新价', 'price'),
+    'change_pct': ('涨跌幅', 'pct_chg'),
+    'change_amount': ('涨跌额', 'change'),
+    'volume': ('成交量', 'volume'),
+    'amount': ('成交额', 'amount'),
+    'turnover_rate': ('换手率', 'turnover_rate'),
+    'amplitude': ('振幅', 'amplitude'),
+    'high': ('最高', 'high'),
+    'low': ('最低', 'low'),
+    'open': ('今开', '开盘', 'open'),
+    'pre_close': ('昨收', '昨日收盘', 'pre_close'),
+    'volume_ratio': ('量比', 'volume_ratio'),
+    'pe_ratio': ('市盈率-动态', '动态市盈率', '市盈率', 'pe_ratio'),
+    'pb_ratio': ('市净率', 'pb_ratio'),
+    'total_mv': ('总市值', 'total_mv'),
+    'circ_mv': ('流通市值', 'circ_mv'),
+}
+_TEXT_COLUMNS = ('code', 'name')
+
+# 判定涨跌停时允许的涨跌幅误差（百分点，价格按分取整导致）
+_LIMIT_TOLERANCE = 0.1
+
+
+def _limit_pct(codes: pd.Series, names: pd.Series) -> pd.Series:
+    """按板块计算涨跌停幅度：主板 10%、主板 ST 5%、创业板/科创板 20%、北交所 30%"""
+    limit = pd.Series(10.0, index=codes.index)
+    limit[names.str.contains('ST', na=False)] = 5.0
+    limit[codes.str.startswith(('300', '301', '688', '689'))] = 20.0
+    limit[codes.str.startswith(('8', '4', '92'))] = 30.0
+    # 新股上市首日（N/C 开头）不设涨跌幅限制
+    limit[names.str.match(r'^[NC]', na=False)] = np.inf
+    return limit
+
+
+class MarketSnapshot:
+    """
+    一次全量行情拉取的只读视图（线程间共享，构建后不再修改）
+
+    Args:
+        data: 标准化后的行情 DataFrame（index 为股票代码）
+        industries: 股票代码 -> 行业名称（为空时无法在本地聚合板块）
+        source: 数据来源名称
+        timestamp: 底层全量行情的拉取时间
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        industries: Optional[Dict[str, str]] = None,
+        source: str = '',
+        timestamp: Optional[float] = None,
+    ):
+        self.data = data
+        self.industries = industries or {}
+        self.source = source
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self._stats: Optional[Dict[str, Any]] = None
+        self._industry_frame: Optional[pd.DataFrame] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_spot_frame(
+        cls,
+        df: pd.DataFrame,
+        industries: Optional[Dict[str, str]] = None,
+        source: str = '',
+        timestamp: Optional[float] = None,
+    ) -> 'MarketSnapshot':
+        """从全量行情 DataFrame 构建快照（不修改传入的 DataFrame）"""
+        columns = {}
+        for target, aliases in _COLUMN_ALIASES.items():
+            col = next((c for c in aliases if c in df.columns), None)
+            if col is None:
+                continue
+            if target in _TEXT_COLUMNS:
+                columns[target] = df[col].astype(str).str.strip()
+            else:
+                columns[target] = pd.to_numeric(df[col], errors='coerce')
+        if 'code' not in columns:
+            raise ValueError("全量行情缺少代码列")
+
+        data = pd.DataFrame(columns, index=df.index)
+        if 'name' not in data.columns:
+            data['name'] = ''
+        data = data.drop_duplicates(subset='code').set_index('code')
+        return cls(data, industries=industries, source=source, timestamp=timestamp)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    # ---------- 市场统计 ----------
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        涨跌统计（与 get_market_stats 返回格式一致）
+
+        Returns:
+            up_count / down_count / flat_count / limit_up_count / limit_down_count / total_amount（亿元）
+        """
+        with self._lock:
+            if self._stats is None:
+                self._stats = self._compute_stats()
+            return dict(self._stats)
+
+    def _compute_stats(self) -> Dict[str, Any]:
+        data = self.data
+        change = data['change_pct'] if 'change_pct' in data.columns else pd.Series(dtype=float)
+        traded = change.notna()
+        limit = _limit_pct(data.index.to_series(), data['name'])
+        stats = {
+            'up_count': int((change > 0).sum()),
+            'down_count': int((change < 0).sum()),
+            'flat_count': int((change == 0).sum()),
+            'limit_up_count': int((traded & (change >= limit - _LIMIT_TOLERANCE)).sum()),
+            'limit_down_count': int((traded & (change <= -(limit - _LIMIT_TOLERANCE))).sum()),
+            'total_amount': 0.0,
+        }
+        if 'amount' in data.columns:
+            stats['total_amount'] = float(data['amount'].sum()) / 1e8
+        return stats
+
+    # ---------- 行业聚合 ----------
+
+    def industry_frame(self) -> pd.DataFrame:
+        """
+        行业聚合：流通市值加权涨跌幅、成交额（亿元）、成分股数、上涨家数
+
+        无行业映射时返回空 DataFrame
+        """
+        with self._lock:
+            if self._industry_frame is None:
+                self._industry_frame = self._compute_industry_frame()
+            return self._industry_frame
+
+    def _compute_industry_frame(self) -> pd.DataFrame:
+        if not self.industries or 'change_pct' not in self.data.columns:
+            return pd.DataFrame()
+
+        data = self.data.assign(industry=self.data.index.map(self.industries))
+        data = data[data['industry'].notna() & data['change_pct'].notna()]
+        if data.empty:
+            return pd.DataFrame()
+
+        grouped = data.groupby('industry')
+        frame = pd.DataFrame({
+            'change_pct': grouped['change_pct'].mean(),
+            'stock_count': grouped.size(),
+            'up_count': (data['change_pct'] > 0).groupby(data['industry']).sum().astype(int),
+        })
+        if 'circ_mv' in data.columns:
+            weight = data['circ_mv'].where(data['circ_mv'] > 0)
+            weight_sum = weight.groupby(data['industry']).sum()
+            weighted = (data['change_pct'] * weight).groupby(data['industry']).sum() / weight_sum
+            # 缺少市值数据的行业退回简单平均
+            frame['change_pct'] = weighted.where(weight_sum > 0, frame['change_pct'])
+        if 'amount' in data.columns:
+            frame['amount'] = grouped['amount'].sum() / 1e8
+        return frame.sort_values('change_pct', ascending=False)
+
+    def sector_rankings(self, n: int = 5) -> Optional[Tuple[List[Dict], List[Dict]]]:
+        """行业涨跌榜（与 get_sector_rankings 返回格式一致），无行业映射时返回 None"""
+        frame = self.industry_frame()
+        if frame.empty:
+            return None
+        top = frame.head(n)
+        bottom = frame.tail(n).iloc[::-1]
+        return (
+            [{'name': name, 'change_pct': round(float(pct), 2)} for name, pct in top['change_pct'].items()],
+            [{'name': name, 'change_pct': round(float(pct), 2)} for name, pct in bottom['change_pct'].items()],
+        )
+
+
+# 当前周期的快照：底层全量行情快照对象不变时直接复用
+_current: Optional[Tuple[Any, MarketSnapshot]] = None
+_current_lock = threading.Lock()
+
+# 行业映射（极少变化，进程内缓存一天）
+_INDUSTRY_TTL = 24 * 3600
+# 加载失败或为空（Tushare 临时故障、Token 尚未配置）时只缓存几分钟，之后重新加载
+_INDUSTRY_EMPTY_TTL = 300
+_industries: Optional[Tuple[float, Dict[str, str]]] = None
+_industries_lock = threading.Lock()
+
+
+def build_market_snapshot(spot: Any, source: str, industries: Optional[Dict[str, str]] = None) -> MarketSnapshot:
+    """
+    由全量行情缓存快照（snapshot_cache.Snapshot）构建 MarketSnapshot
+
+    同一个底层快照只构建一次；底层缓存刷新（对象变化）后才重新构建
+    """
+    global _current
+    with _current_lock:
+        if _current is not None and _current[0] is spot:
+            return _current[1]
+        snapshot = MarketSnapshot.from_spot_frame(
+            spot.data, industries=industries, source=source, timestamp=getattr(spot, 'timestamp', None),
+        )
+        _current = (spot, snapshot)
+    logger.info(f"[市场快照] 基于 {source} 全量行情构建快照: {len(snapshot)} 只股票, "
+                f"行业映射 {len(snapshot.industries)} 条")
+    return snapshot
+
+
+def get_industry_map(loader: Callable[[], Optional[Dict[str, str]]]) -> Dict[str, str]:
+    """获取行业映射（进程内缓存，过期后调用 loader 重新加载；加载失败时空映射只缓存几分钟）"""
+    global _industries
+    with _industries_lock:
+        if _industries is not None:
+            loaded_at, cached = _industries
+            ttl = _INDUSTRY_TTL if cached else _INDUSTRY_EMPTY_TTL
+            if time.time() - loaded_at < ttl:
+                return cached
+        try:
+            mapping = loader() or {}
+        except Exception as e:
+            logger.warning(f"[市场快照] 加载行业映射失败: {e}")
+            mapping = {}
+        _industries = (time.time(), mapping)
+        return mapping
+
+
+def reset_market_snapshot() -> None:
+    """清空当前快照与行业映射（用于测试）"""
+    global _current, _industries
+    with _current_lock:
+        _current = None
+    with _industries_lock:
+        _industries = None
@@ -9,16 +9,17 @@ PytdxFetcher - 通达信数据源 (Priority 2)
 优点：实时数据、稳定、无配额限制
 
 关键策略：
-1. 多服务器自动切换
-2. 连接超时自动重连
-3. 失败后指数退避重试
+1. 进程级长连接池，启动时按服务器测速结果排序
+2. 连接心跳检测，失效时透明切换服务器重连
+3. 实时行情批量查询（单次最多 80 只）
+4. 失败后指数退避重试
 """
 
 import logging
 import re
 from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Generator, List, Tuple
+from typing import Dict, Optional, Generator, List, Tuple
 
 import pandas as pd
 from tenacity import (
@@ -29,7 +30,9 @@ from tenacity import (
     before_sleep_log,
 )
 
-from .base import BaseFetcher, DataFetchError, STANDARD_COLUMNS
+from .base import BaseFetcher, DataFetchError, UnsupportedMarketError, STANDARD_COLUMNS
+from .rate_limiter import acquire_rate_limit
+from .tdx_pool import TdxConnectionPool, get_tdx_pool
 import os
 
 logger = logging.getLogger(__name__)
@@ -55,7 +58,7 @@ class PytdxFetcher(BaseFetcher):
     数据来源：通达信行情服务器
     
     关键策略：
-    - 自动选择最优服务器
+    - 长连接池复用连接，按测速结果选择最优服务器
     - 连接失败自动切换服务器
     - 失败后指数退避重试
     
@@ -81,6 +84,9 @@ class PytdxFetcher(BaseFetcher):
         ("180.153.39.51", 7709),   # 杭州
     ]
     
+    # get_security_quotes 单次请求的最大代码数（服务器限制）
+    MAX_QUOTES_PER_REQUEST = 80
+    
     def __init__(self, hosts: Optional[List[Tuple[str, int]]] = None):
         """
         初始化 PytdxFetcher
@@ -89,9 +95,7 @@ class PytdxFetcher(BaseFetcher):
             hosts: 服务器列表 [(host, port), ...]，默认使用内置列表
         """
         self._hosts = hosts or self.DEFAULT_HOSTS
-        self._api = None
-        self._connected = False
-        self._current_host_idx = 0
+        self._pool: Optional[TdxConnectionPool] = None
         self._stock_list_cache = None  # 股票列表缓存
         self._stock_name_cache = {}    # 股票名称缓存 {code: name}
     
@@ -108,55 +112,37 @@ class PytdxFetcher(BaseFetcher):
             logger.warning("pytdx 未安装，请运行: pip install pytdx")
             return None
     
+    @property
+    def pool(self) -> TdxConnectionPool:
+        """进程级长连接池（同一服务器列表的所有实例共享）"""
+        if self._pool is None:
+            if self._get_pytdx() is None:
+                raise DataFetchError("pytdx 库未安装")
+            self._pool = get_tdx_pool(self._hosts)
+        return self._pool
+    
+    def _query(self, func):
+        """在池化连接上执行一次查询（进程级限流 + 失败自动切换服务器）"""
+        acquire_rate_limit('tdx')
+        return self.pool.call(func)
+    
     @contextmanager
     def _pytdx_session(self) -> Generator:
         """
         Pytdx 连接上下文管理器
         
-        确保：
-        1. 进入上下文时自动连接
-        2. 退出上下文时自动断开
-        3. 异常时也能正确断开
+        从长连接池借出一个连接，退出上下文时归还；
+        上下文内抛出异常时该连接被丢弃，下次借出时自动重连
         
         使用示例：
             with self._pytdx_session() as api:
                 # 在这里执行数据查询
         """
-        TdxHq_API = self._get_pytdx()
-        if TdxHq_API is None:
-            raise DataFetchError("pytdx 库未安装")
+        # 进程级限流（每个会话对应一次查询）
+        acquire_rate_limit('tdx')
         
-        api = TdxHq_API()
-        connected = False
-        
-        try:
-            # 尝试连接服务器（自动选择最优）
-            for i in range(len(self._hosts)):
-                host_idx = (self._current_host_idx + i) % len(self._hosts)
-                host, port = self._hosts[host_idx]
-                
-                try:
-                    if api.connect(host, port, time_out=5):
-                        connected = True
-                        self._current_host_idx = host_idx
-                        logger.debug(f"Pytdx 连接成功: {host}:{port}")
-                        break
-                except Exception as e:
-                    logger.debug(f"Pytdx 连接 {host}:{port} 失败: {e}")
-                    continue
-            
-            if not connected:
-                raise DataFetchError("Pytdx 无法连接任何服务器")
-            
+        with self.pool.connection() as api:
             yield api
-            
-        finally:
-            # 确保断开连接
-            try:
-                api.disconnect()
-                logger.debug("Pytdx 连接已断开")
-            except Exception as e:
-                logger.warning(f"Pytdx 断开连接时出错: {e}")
     
     def _get_market_code(self, stock_code: str) -> Tuple[int, str]:
         """
@@ -207,7 +193,7 @@ class PytdxFetcher(BaseFetcher):
         """
         # 美股不支持，抛出异常让 DataFetcherManager 切换到其他数据源
         if _is_us_code(stock_code):
-            raise DataFetchError(f"PytdxFetcher 不支持美股 {stock_code}，请使用 AkshareFetcher 或 YfinanceFetcher")
+            raise UnsupportedMarketError(f"PytdxFetcher 不支持美股 {stock_code}，请使用 AkshareFetcher 或 YfinanceFetcher")
         
         market, code = self._get_market_code(stock_code)
         
@@ -220,34 +206,32 @@ class PytdxFetcher(BaseFetcher):
         
         logger.debug(f"调用 Pytdx get_security_bars(market={market}, code={code}, count={count})")
         
-        with self._pytdx_session() as api:
-            try:
-                # 获取日 K 线数据
-                # category: 9-日线, 0-5分钟, 1-15分钟, 2-30分钟, 3-1小时
-                data = api.get_security_bars(
-                    category=9,  # 日线
-                    market=market,
-                    code=code,
-                    start=0,  # 从最新开始
-                    count=count
-                )
-                
-                if data is None or len(data) == 0:
-                    raise DataFetchError(f"Pytdx 未查询到 {stock_code} 的数据")
-                
-                # 转换为 DataFrame
-                df = api.to_df(data)
-                
-                # 过滤日期范围
-                df['datetime'] = pd.to_datetime(df['datetime'])
-                df = df[(df['datetime'] >= start_date) & (df['datetime'] <= end_date)]
-                
-                return df
-                
-            except Exception as e:
-                if isinstance(e, DataFetchError):
-                    raise
-                raise DataFetchError(f"Pytdx 获取数据失败: {e}") from e
+        try:
+            # 获取日 K 线数据
+            # category: 9-日线, 0-5分钟, 1-15分钟, 2-30分钟, 3-1小时
+            data = self._query(lambda api: api.get_security_bars(
+                category=9,  # 日线
+                market=market,
+                code=code,
+                start=0,  # 从最新开始
+                count=count
+            ))
+        except DataFetchError:
+            raise
+        except Exception as e:
+            raise DataFetchError(f"Pytdx 获取数据失败: {e}") from e
+        
+        if data is None or len(data) == 0:
+            raise DataFetchError(f"Pytdx 未查询到 {stock_code} 的数据")
+        
+        # 转换为 DataFrame
+        df = pd.DataFrame(data)
+        
+        # 过滤日期范围
+        df['datetime'] = pd.to_datetime(df['datetime'])
+        df = df[(df['datetime'] >= start_date) & (df['datetime'] <= end_date)]
+        
+        return df
     
     def _normalize_data(self, df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
         """
@@ -330,6 +314,22 @@ class PytdxFetcher(BaseFetcher):
         
         return None
     
+    @staticmethod
+    def _format_quote(stock_code: str, quote: dict) -> dict:
+        return {
+            'code': stock_code,
+            'name': quote.get('name', ''),
+            'price': quote.get('price', 0),
+            'open': quote.get('open', 0),
+            'high': quote.get('high', 0),
+            'low': quote.get('low', 0),
+            'pre_close': quote.get('last_close', 0),
+            'volume': quote.get('vol', 0),
+            'amount': quote.get('amount', 0),
+            'bid_prices': [quote.get(f'bid{i}', 0) for i in range(1, 6)],
+            'ask_prices': [quote.get(f'ask{i}', 0) for i in range(1, 6)],
+        }
+    
     def get_realtime_quote(self, stock_code: str) -> Optional[dict]:
         """
         获取实时行情
@@ -340,32 +340,44 @@ class PytdxFetcher(BaseFetcher):
         Returns:
             实时行情数据字典，失败返回 None
         """
-        try:
-            market, code = self._get_market_code(stock_code)
-            
-            with self._pytdx_session() as api:
-                data = api.get_security_quotes([(market, code)])
-                
-                if data and len(data) > 0:
-                    quote = data[0]
-                    return {
-                        'code': stock_code,
-                        'name': quote.get('name', ''),
-                        'price': quote.get('price', 0),
-                        'open': quote.get('open', 0),
-                        'high': quote.get('high', 0),
-                        'low': quote.get('low', 0),
-                        'pre_close': quote.get('last_close', 0),
-                        'volume': quote.get('vol', 0),
-                        'amount': quote.get('amount', 0),
-                        'bid_prices': [quote.get(f'bid{i}', 0) for i in range(1, 6)],
-                        'ask_prices': [quote.get(f'ask{i}', 0) for i in range(1, 6)],
-                    }
-        except Exception as e:
-            logger.warning(f"Pytdx 获取实时行情失败 {stock_code}: {e}")
+        return self.get_realtime_quotes_batch([stock_code]).get(stock_code)
+    
+    def get_realtime_quotes_batch(self, stock_codes: List[str]) -> Dict[str, dict]:
+        """
+        批量获取实时行情
         
-        return None
-
+        每 MAX_QUOTES_PER_REQUEST（80）只股票合并为一次 get_security_quotes 请求，
+        复用池化长连接
+        
+        Args:
+            stock_codes: 股票代码列表（美股会被忽略）
+            
+        Returns:
+            {stock_code: 实时行情数据字典}，获取失败的代码不出现在结果中
+        """
+        targets = {}
+        for stock_code in dict.fromkeys(stock_codes):
+            if _is_us_code(stock_code):
+                continue
+            targets[self._get_market_code(stock_code)] = stock_code
+        
+        quotes: Dict[str, dict] = {}
+        keys = list(targets)
+        for i in range(0, len(keys), self.MAX_QUOTES_PER_REQUEST):
+            chunk = keys[i:i + self.MAX_QUOTES_PER_REQUEST]
+            try:
+                data = self._query(lambda api: api.get_security_quotes(chunk))
+            except Exception as e:
+                logger.warning(f"Pytdx 批量获取实时行情失败 ({len(chunk)} 只): {e}")
+                continue
+            for quote in data or []:
+                stock_code = targets.get((quote.get('market'), quote.get('code')))
+                if stock_code is not None:
+                    quotes[stock_code] = self._format_quote(stock_code, quote)
+        
+        if len(quotes) < len(targets):
+            logger.debug(f"Pytdx 批量实时行情: 请求 {len(targets)} 只, 返回 {len(quotes)} 只")
+        return quotes
 
 if __name__ == "__main__":
     # 测试代码
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+进程级令牌桶限流器（按上游数据源）
+===================================
+
+职责：
+1. 为每个上游（东财、新浪、腾讯、Tushare、Baostock、通达信、Yahoo）维护一个令牌桶
+2. 所有 Fetcher 实例、所有线程共享同一个桶，限流在进程内真正生效
+3. 令牌充足时立即放行，只有超出速率时才等待
+
+背景：
+原先每个 Fetcher 实例各自记录 _last_request_time 并在每次请求前随机休眠 1.5-5 秒。
+DataFetcherManager 会在多处被重复创建，多线程下限流并不成立，
+同时单线程场景又白白浪费了大量等待时间。
+
+配置（可选）：
+    RATE_LIMITS=eastmoney=30/3,tushare=75/5
+    格式为 上游=每分钟请求数/突发容量，未配置的上游使用 DEFAULT_RATE_LIMITS
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# 默认限流参数：上游 -> (每分钟请求数, 突发容量)
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    'eastmoney': (20, 2),   # 东财（akshare _em 接口 / efinance），全量接口易被封，保守配置
+    'sina': (60, 3),        # 新浪财经
+    'tencent': (60, 3),     # 腾讯财经
+    'tushare': (75, 5),     # Tushare Pro 免费配额 80 次/分钟（速率 + 突发不超过配额）
+    'baostock': (120, 5),   # Baostock
+    'tdx': (300, 10),       # 通达信行情服务器（直连 TCP，限制较宽松）
+    'yahoo': (60, 5),       # Yahoo Finance
+}
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶
+
+    - rate: 每秒补充的令牌数
+    - burst: 桶容量（允许的最大突发请求数）
+
+    acquire 采用"预约"方式：令牌不足时先扣减（允许为负），
+    再在锁外休眠到预约时刻，保证多个线程按到达顺序均匀放行
+    """
+
+    def __init__(self, name: str, rate: float, burst: int):
+        if rate <= 0:
+            raise ValueError(f"限流速率必须大于 0: {name}={rate}")
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        # 统计信息
+        self.acquired = 0
+        self.total_wait = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        获取令牌，必要时阻塞等待
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            实际等待的秒数
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            logger.debug(f"[限流] {self.name} 等待 {wait:.2f}s")
+            time.sleep(wait)
+        return wait
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        预约令牌但不休眠，返回调用方需要等待的秒数
+
+        供 asyncio 调用方使用（await asyncio.sleep(wait)，不阻塞事件循环）
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.acquired += 1
+            self.total_wait += wait
+        return wait
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """非阻塞获取令牌，令牌不足返回 False"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                self.acquired += 1
+                return True
+            return False
+
+    def refund(self, tokens: float) -> None:
+        """归还预约多扣的令牌（tokens 为负时补扣），用于按实际用量校正预估"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.burst, self._tokens + tokens)
+
+    def stats(self) -> Dict[str, float]:
+        """返回限流统计"""
+        with self._lock:
+            return {
+                'rate_per_minute': self.rate * 60,
+                'burst': self.burst,
+                'acquired': self.acquired,
+                'total_wait': round(self.total_wait, 3),
+            }
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[float, int]]:
+    """
+    解析限流配置字符串
+
+    Args:
+        spec: 如 "eastmoney=30/3,tushare=80"（突发容量可省略，默认 1）
+
+    Returns:
+        {上游: (每分钟请求数, 突发容量)}，格式错误的项会被忽略并记录警告
+    """
+    limits: Dict[str, Tuple[float, int]] = {}
+    for item in (spec or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            name, value = item.split('=', 1)
+            per_minute, _, burst = value.partition('/')
+            limits[name.strip().lower()] = (float(per_minute), int(burst) if burst else 1)
+        except ValueError:
+            logger.warning(f"[限流] 忽略无法解析的配置项: {item}")
+    return limits
+
+
+class RateLimiterRegistry:
+    """
+    令牌桶注册表（进程内单例）
+
+    首次访问某个上游时按 配置 > 默认值 创建令牌桶，之后所有调用共享该桶
+    """
+
+    def __init__(self, overrides: Optional[Dict[str, Tuple[float, int]]] = None):
+        self._overrides = overrides
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _load_overrides(self) -> Dict[str, Tuple[float, int]]:
+        if self._overrides is None:
+            try:
+                from src.config import get_config
+                self._overrides = parse_rate_limits(get_config().rate_limits)
+            except Exception as e:
+                logger.debug(f"[限流] 读取 RATE_LIMITS 配置失败，使用默认值: {e}")
+                self._overrides = {}
+        return self._overrides
+
+    def get(self, upstream: str) -> TokenBucket:
+        """获取（必要时创建）上游对应的令牌桶"""
+        key = upstream.lower()
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            return bucket
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                per_minute, burst = self._load_overrides().get(key) or DEFAULT_RATE_LIMITS.get(key, (60, 1))
+                bucket = TokenBucket(key, rate=per_minute / 60.0, burst=burst)
+                self._buckets[key] = bucket
+                logger.debug(f"[限流] 创建令牌桶 {key}: {per_minute}/min, burst={burst}")
+            return bucket
+
+    def acquire(self, upstream: str, tokens: float = 1.0) -> float:
+        """在指定上游的令牌桶上获取令牌，返回等待秒数"""
+        return self.get(upstream).acquire(tokens)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """所有已创建令牌桶的统计"""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {name: bucket.stats() for name, bucket in buckets.items()}
+
+    def reset(self) -> None:
+        """清空所有令牌桶并重新读取配置（用于测试）"""
+        with self._lock:
+            self._buckets.clear()
+            self._overrides = None
+
+
+# 全局注册表
+_rate_limiter_registry = RateLimiterRegistry()
+
+
+def get_rate_limiter_registry() -> RateLimiterRegistry:
+    """获取全局限流注册表"""
+    return _rate_limiter_registry
+
+
+def acquire_rate_limit(upstream: str, tokens: float = 1.0) -> float:
+    """在全局注册表中为指定上游获取令牌"""
+    return _rate_limiter_registry.acquire(upstream, tokens)
+
+
+async def acquire_rate_limit_async(upstream: str, tokens: float = 1.0) -> float:
+    """acquire_rate_limit 的异步版本：在事件循环中等待，不阻塞其他协程"""
+    wait = _rate_limiter_registry.get(upstream).reserve(tokens)
+    if wait > 0:
+        await asyncio.sleep(wait)
+    return wait
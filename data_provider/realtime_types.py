@@ -14,10 +14,15 @@
 - CircuitBreaker 管理各数据源的熔断状态
 """
 
+import json
 import logging
+import os
+import tempfile
+import threading
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Iterator, Union
 from enum import Enum
 
 logger = logging.getLogger(__name__)
@@ -90,6 +95,34 @@ def safe_int(val: Any, default: Optional[int] = None) -> Optional[int]:
     return default
 
 
+def build_code_index(df: Any, code_column: str, zfill: int = 0) -> Dict[str, Dict[str, Any]]:
+    """
+    构建 代码 -> 行数据 的索引
+
+    全量行情（5000+ 行）刷新缓存时调用一次，之后每只股票的查找都是字典命中，
+    避免每次都对整张表做 df[df['代码'] == code] 的布尔扫描
+
+    Args:
+        df: 全量行情 DataFrame
+        code_column: 代码列名
+        zfill: 代码补零位数（0 表示不补零）
+
+    Returns:
+        {代码: 行字典}，代码重复时保留第一条；df 为空或缺少代码列时返回空字典
+    """
+    if df is None or df.empty or code_column not in df.columns:
+        return {}
+
+    codes = df[code_column].astype(str).str.strip()
+    if zfill:
+        codes = codes.str.zfill(zfill)
+
+    index: Dict[str, Dict[str, Any]] = {}
+    for code, record in zip(codes, df.to_dict('records')):
+        index.setdefault(code, record)
+    return index
+
+
 class RealtimeSource(Enum):
     """实时行情数据源"""
     EFINANCE = "efinance"           # 东方财富（efinance库）
@@ -264,18 +297,30 @@ class ChipDistribution:
 
 class CircuitBreaker:
     """
-    熔断器 - 管理数据源的熔断/冷却状态
+    熔断器 - 管理数据源的熔断/冷却状态（线程安全）
     
     策略：
     - 连续失败 N 次后进入熔断状态
     - 熔断期间跳过该数据源
     - 冷却时间后自动恢复半开状态
-    - 半开状态下单次成功则完全恢复，失败则继续熔断
+    - 半开状态下最多放行 half_open_max_calls 个试探请求，成功则完全恢复，失败则继续熔断
     
     状态机：
     CLOSED（正常） --失败N次--> OPEN（熔断）--冷却时间到--> HALF_OPEN（半开）
     HALF_OPEN --成功--> CLOSED
     HALF_OPEN --失败--> OPEN
+    
+    并发说明：
+    - 所有状态读写都在锁内完成
+    - is_available 只读，不占用半开试探名额；结果由缓存加载函数等其他路径上报时使用它
+    - 直接发请求并上报结果的调用方使用 probe() / try_acquire_probe()，
+      半开状态下只有拿到名额的线程放行，未上报结果退出时名额随即释放
+    - 试探请求超过 probe_timeout 秒仍未上报结果（调用方异常退出等），名额自动释放
+    
+    持久化（可选）：
+    - 配置 state_file 后，熔断/恢复等状态切换时将状态写入本地 JSON 文件（文件锁保护），
+      短生命周期的 CLI/定时任务进程启动时继承上一次运行中已熔断的数据源
+    - 同一文件可被多个熔断器共享（按 name 分区）
     """
     
     # 状态常量
@@ -287,120 +332,338 @@ class CircuitBreaker:
         self,
         failure_threshold: int = 3,       # 连续失败次数阈值
         cooldown_seconds: float = 300.0,  # 冷却时间（秒），默认5分钟
-        half_open_max_calls: int = 1      # 半开状态最大尝试次数
+        half_open_max_calls: int = 1,     # 半开状态最大尝试次数
+        name: str = "default",            # 熔断器名称（持久化分区）
+        state_file: Optional[str] = None,  # 状态文件路径，None 表示读取配置 CIRCUIT_BREAKER_STATE_FILE
+        probe_timeout: float = 60.0       # 半开试探名额的最长占用时间（秒）
     ):
         self.failure_threshold = failure_threshold
         self.cooldown_seconds = cooldown_seconds
         self.half_open_max_calls = half_open_max_calls
+        self.name = name
+        self.probe_timeout = probe_timeout
         
-        # 各数据源状态 {source_name: {state, failures, last_failure_time, half_open_calls}}
+        # 各数据源状态 {source_name: {state, failures, last_failure_time, half_open_calls, ...}}
         self._states: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._state_file = state_file
+        self._state_file_resolved = state_file is not None
+        self._loaded = False
+    
+    # ---------- 持久化 ----------
+    
+    def _resolve_state_file(self) -> Optional[str]:
+        if not self._state_file_resolved:
+            self._state_file_resolved = True
+            try:
+                from src.config import get_config
+                self._state_file = get_config().circuit_breaker_state_file or None
+            except Exception as e:
+                logger.debug(f"[熔断器] 读取 CIRCUIT_BREAKER_STATE_FILE 配置失败，不持久化: {e}")
+                self._state_file = None
+        return self._state_file or None
+    
+    def _ensure_loaded(self) -> None:
+        """首次访问时从状态文件恢复未关闭的熔断状态（需持有锁）"""
+        if self._loaded:
+            return
+        self._loaded = True
+        path = self._resolve_state_file()
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f).get(self.name, {})
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"[熔断器] 读取状态文件失败 {path}: {e}")
+            return
+        
+        now = time.time()
+        for source, info in saved.items():
+            try:
+                last_failure_time = float(info['last_failure_time'])
+                failures = int(info['failures'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            # 冷却早已结束的记录无需继承；半开状态的试探进程已退出，按熔断处理
+            if now - last_failure_time >= self.cooldown_seconds:
+                continue
+            state = self._new_state()
+            state.update(
+                state=self.OPEN,
+                failures=failures,
+                last_failure_time=last_failure_time,
+                opened_at=last_failure_time,
+            )
+            self._states[source] = state
+            logger.info(f"[熔断器] {self.name}/{source} 从状态文件恢复熔断状态，"
+                        f"剩余冷却 {self.cooldown_seconds - (now - last_failure_time):.0f}s")
+    
+    def _persist(self) -> None:
+        """将未关闭的熔断状态写入状态文件（需持有锁）"""
+        path = self._resolve_state_file()
+        if not path:
+            return
+        section = {
+            source: {
+                'state': info['state'],
+                'failures': info['failures'],
+                'last_failure_time': info['last_failure_time'],
+            }
+            for source, info in self._states.items()
+            if info['state'] != self.CLOSED
+        }
+        from .shared_snapshot_store import _file_lock
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            # 同一文件被多个熔断器/进程共享，读-改-写需在文件锁内完成
+            with _file_lock(path + '.lock', timeout=5.0) as acquired:
+                if not acquired:
+                    logger.debug(f"[熔断器] 等待状态文件锁超时，仍然写入 {path}")
+                self._write_section(path, directory, section)
+        except OSError as e:
+            logger.warning(f"[熔断器] 写入状态文件失败 {path}: {e}")
+    
+    def _write_section(self, path: str, directory: str, section: Dict[str, Any]) -> None:
+        """合并本熔断器分区后原子替换状态文件（需持有文件锁）"""
+        data: Dict[str, Any] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    data = {}
+            except (OSError, ValueError):
+                data = {}
+        data[self.name] = section
+        
+        fd, tmp_path = tempfile.mkstemp(prefix='.circuit_breaker_', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    # ---------- 状态机 ----------
+    
+    def _new_state(self) -> Dict[str, Any]:
+        return {
+            'state': self.CLOSED,
+            'failures': 0,
+            'last_failure_time': 0.0,
+            'half_open_calls': 0,
+            'probe_started_at': 0.0,
+            # 统计信息
+            'transitions': {},
+            'opened_at': None,
+            'open_seconds': 0.0,
+            'rejected': 0,
+        }
     
     def _get_state(self, source: str) -> Dict[str, Any]:
-        """获取或初始化数据源状态"""
+        """获取或初始化数据源状态（需持有锁）"""
+        self._ensure_loaded()
         if source not in self._states:
-            self._states[source] = {
-                'state': self.CLOSED,
-                'failures': 0,
-                'last_failure_time': 0.0,
-                'half_open_calls': 0
-            }
+            self._states[source] = self._new_state()
         return self._states[source]
     
+    def _transition(self, source: str, state: Dict[str, Any], new_state: str, now: float) -> None:
+        """切换状态并记录统计（需持有锁）"""
+        old_state = state['state']
+        if old_state == new_state:
+            return
+        key = f"{old_state}->{new_state}"
+        state['transitions'][key] = state['transitions'].get(key, 0) + 1
+        state['state'] = new_state
+        if old_state == self.CLOSED:
+            state['opened_at'] = now
+        elif new_state == self.CLOSED and state['opened_at'] is not None:
+            state['open_seconds'] += now - state['opened_at']
+            state['opened_at'] = None
+    
+    def _refresh_state(self, source: str, state: Dict[str, Any], current_time: float) -> None:
+        """冷却完成时进入半开状态，并释放超时未上报的试探名额（需持有锁）"""
+        if (state['state'] == self.OPEN
+                and current_time - state['last_failure_time'] >= self.cooldown_seconds):
+            self._transition(source, state, self.HALF_OPEN, current_time)
+            state['half_open_calls'] = 0
+            logger.info(f"[熔断器] {source} 冷却完成，进入半开状态")
+        if (state['state'] == self.HALF_OPEN
+                and state['half_open_calls'] >= self.half_open_max_calls
+                and current_time - state['probe_started_at'] >= self.probe_timeout):
+            logger.info(f"[熔断器] {source} 半开试探超时未上报结果，释放试探名额")
+            state['half_open_calls'] = 0
+    
     def is_available(self, source: str) -> bool:
         """
-        检查数据源是否可用
+        检查数据源是否可用（不占用半开试探名额）
         
         返回 True 表示可以尝试请求
         返回 False 表示应跳过该数据源
         """
-        state = self._get_state(source)
-        current_time = time.time()
-        
-        if state['state'] == self.CLOSED:
-            return True
-        
-        if state['state'] == self.OPEN:
-            # 检查冷却时间
-            time_since_failure = current_time - state['last_failure_time']
-            if time_since_failure >= self.cooldown_seconds:
-                # 冷却完成，进入半开状态
-                state['state'] = self.HALF_OPEN
-                state['half_open_calls'] = 0
-                logger.info(f"[熔断器] {source} 冷却完成，进入半开状态")
+        with self._lock:
+            state = self._get_state(source)
+            current_time = time.time()
+            self._refresh_state(source, state, current_time)
+            
+            if state['state'] == self.CLOSED:
                 return True
-            else:
-                remaining = self.cooldown_seconds - time_since_failure
+            if state['state'] == self.OPEN:
+                remaining = self.cooldown_seconds - (current_time - state['last_failure_time'])
+                state['rejected'] += 1
                 logger.debug(f"[熔断器] {source} 处于熔断状态，剩余冷却时间: {remaining:.0f}s")
                 return False
-        
-        if state['state'] == self.HALF_OPEN:
-            # 半开状态下限制请求次数
             if state['half_open_calls'] < self.half_open_max_calls:
                 return True
+            state['rejected'] += 1
             return False
+    
+    def try_acquire_probe(self, source: str) -> bool:
+        """
+        检查数据源是否可用，半开状态下同时占用一个试探名额
+        
+        返回 True 时调用方须上报结果（record_success / record_failure），
+        或在未上报时调用 release_probe 释放名额；推荐使用 probe() 上下文管理器
+        """
+        with self._lock:
+            if not self.is_available(source):
+                return False
+            state = self._states[source]
+            if state['state'] == self.HALF_OPEN:
+                state['half_open_calls'] += 1
+                state['probe_started_at'] = time.time()
+            return True
+    
+    def release_probe(self, source: str) -> None:
+        """释放未上报结果的半开试探名额（已上报或非半开状态时无操作）"""
+        with self._lock:
+            state = self._get_state(source)
+            if state['state'] == self.HALF_OPEN and state['half_open_calls'] > 0:
+                state['half_open_calls'] -= 1
+    
+    @contextmanager
+    def probe(self, source: str) -> Iterator[bool]:
+        """
+        试探上下文：进入时 try_acquire_probe，退出时释放未上报结果的名额
         
-        return True
+        使用示例：
+            with circuit_breaker.probe(source_key) as allowed:
+                if not allowed:
+                    return None
+                ...  # 发起请求并 record_success / record_failure
+        """
+        acquired = self.try_acquire_probe(source)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.release_probe(source)
     
     def record_success(self, source: str) -> None:
         """记录成功请求"""
-        state = self._get_state(source)
-        
-        if state['state'] == self.HALF_OPEN:
-            # 半开状态下成功，完全恢复
-            logger.info(f"[熔断器] {source} 半开状态请求成功，恢复正常")
-        
-        # 重置状态
-        state['state'] = self.CLOSED
-        state['failures'] = 0
-        state['half_open_calls'] = 0
+        with self._lock:
+            state = self._get_state(source)
+            previous = state['state']
+            
+            if previous == self.HALF_OPEN:
+                # 半开状态下成功，完全恢复
+                logger.info(f"[熔断器] {source} 半开状态请求成功，恢复正常")
+            
+            # 重置状态
+            self._transition(source, state, self.CLOSED, time.time())
+            state['failures'] = 0
+            state['half_open_calls'] = 0
+            if previous != self.CLOSED:
+                self._persist()
     
     def record_failure(self, source: str, error: Optional[str] = None) -> None:
         """记录失败请求"""
-        state = self._get_state(source)
-        current_time = time.time()
-        
-        state['failures'] += 1
-        state['last_failure_time'] = current_time
-        
-        if state['state'] == self.HALF_OPEN:
-            # 半开状态下失败，继续熔断
-            state['state'] = self.OPEN
-            state['half_open_calls'] = 0
-            logger.warning(f"[熔断器] {source} 半开状态请求失败，继续熔断 {self.cooldown_seconds}s")
-        elif state['failures'] >= self.failure_threshold:
-            # 达到阈值，进入熔断
-            state['state'] = self.OPEN
-            logger.warning(f"[熔断器] {source} 连续失败 {state['failures']} 次，进入熔断状态 "
-                          f"(冷却 {self.cooldown_seconds}s)")
-            if error:
-                logger.warning(f"[熔断器] 最后错误: {error}")
+        with self._lock:
+            state = self._get_state(source)
+            current_time = time.time()
+            
+            state['failures'] += 1
+            state['last_failure_time'] = current_time
+            
+            if state['state'] == self.HALF_OPEN:
+                # 半开状态下失败，继续熔断
+                self._transition(source, state, self.OPEN, current_time)
+                state['half_open_calls'] = 0
+                logger.warning(f"[熔断器] {source} 半开状态请求失败，继续熔断 {self.cooldown_seconds}s")
+                self._persist()
+            elif state['state'] == self.OPEN:
+                # 熔断前已发出的请求陆续失败，仅顺延冷却时间（非状态切换，不写状态文件）
+                pass
+            elif state['failures'] >= self.failure_threshold:
+                # 达到阈值，进入熔断
+                self._transition(source, state, self.OPEN, current_time)
+                logger.warning(f"[熔断器] {source} 连续失败 {state['failures']} 次，进入熔断状态 "
+                              f"(冷却 {self.cooldown_seconds}s)")
+                if error:
+                    logger.warning(f"[熔断器] 最后错误: {error}")
+                self._persist()
     
     def get_status(self) -> Dict[str, str]:
         """获取所有数据源状态"""
-        return {source: info['state'] for source, info in self._states.items()}
+        with self._lock:
+            self._ensure_loaded()
+            return {source: info['state'] for source, info in self._states.items()}
+    
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各数据源的熔断统计
+        
+        Returns:
+            {source: {state, failures, transitions, open_seconds, rejected}}
+            open_seconds 为累计非 CLOSED 时长（含当前仍在熔断中的时间）
+        """
+        now = time.time()
+        with self._lock:
+            self._ensure_loaded()
+            metrics = {}
+            for source, info in self._states.items():
+                open_seconds = info['open_seconds']
+                if info['opened_at'] is not None:
+                    open_seconds += now - info['opened_at']
+                metrics[source] = {
+                    'state': info['state'],
+                    'failures': info['failures'],
+                    'transitions': dict(info['transitions']),
+                    'open_seconds': round(open_seconds, 3),
+                    'rejected': info['rejected'],
+                }
+            return metrics
     
     def reset(self, source: Optional[str] = None) -> None:
         """重置熔断器状态"""
-        if source:
-            if source in self._states:
-                del self._states[source]
-        else:
-            self._states.clear()
+        with self._lock:
+            self._ensure_loaded()
+            if source:
+                if source in self._states:
+                    del self._states[source]
+            else:
+                self._states.clear()
+            self._persist()
 
 
 # 全局熔断器实例（实时行情专用）
 _realtime_circuit_breaker = CircuitBreaker(
     failure_threshold=3,      # 连续失败3次熔断
     cooldown_seconds=300.0,   # 冷却5分钟
-    half_open_max_calls=1
+    half_open_max_calls=1,
+    name="realtime"
 )
 
 # 筹码接口熔断器（更保守的策略，因为该接口更不稳定）
 _chip_circuit_breaker = CircuitBreaker(
     failure_threshold=2,      # 连续失败2次熔断
     cooldown_seconds=600.0,   # 冷却10分钟
-    half_open_max_calls=1
+    half_open_max_calls=1,
+    name="chip"
 )
 
 
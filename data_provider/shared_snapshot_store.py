@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+跨进程共享的全量行情快照存储（磁盘）
+===================================
+
+职责：
+1. 将全量行情 DataFrame 写入数据目录（Feather，未安装 pyarrow 时退回 pickle）
+2. 写入采用临时文件 + os.replace 原子替换，读进程不会读到半个文件
+3. 刷新前获取文件锁：同一时刻只有一个进程请求上游，其余进程等待后直接读取其结果
+4. 以文件修改时间作为快照时间，按 TTL 判断是否新鲜
+
+背景：
+CLI（main.py）、API 服务（server.py）、定时任务和机器人各自维护模块级 _realtime_cache，
+同一台机器上多个入口同时运行时，每个进程都会单独拉取一遍全市场行情。
+
+配置：
+    SHARED_SNAPSHOT_DIR=./data/snapshots   # 为空则不启用
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Generator, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+@contextmanager
+def _file_lock(path: str, timeout: float) -> Generator[bool, None, None]:
+    """
+    跨进程排他文件锁（POSIX 使用 fcntl.flock，Windows 使用 msvcrt.locking）
+
+    Yields:
+        是否成功获得锁（超时后仍进入 with 块，由调用方决定是否继续）
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    acquired = False
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if os.name == 'nt':
+                    import msvcrt
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                acquired = True
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(0.1)
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                if os.name == 'nt':
+                    import msvcrt
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+            except OSError:
+                pass
+        os.close(fd)
+
+
+class SharedSnapshotStore:
+    """
+    磁盘快照存储
+
+    Args:
+        directory: 存储目录
+        lock_timeout: 等待其他进程刷新的最长秒数（超时后本进程自行拉取）
+        use_feather: 是否使用 Feather 格式（默认 pyarrow 可用时启用）
+    """
+
+    def __init__(self, directory: str, lock_timeout: float = 120.0, use_feather: Optional[bool] = None):
+        self.directory = directory
+        self.lock_timeout = lock_timeout
+        self.use_feather = _has_pyarrow() if use_feather is None else use_feather
+        os.makedirs(directory, exist_ok=True)
+        # 统计信息
+        self.hits = 0
+        self.refreshes = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.{'feather' if self.use_feather else 'pkl'}")
+
+    def load(self, key: str, max_age: float) -> Optional[Tuple[pd.DataFrame, float]]:
+        """
+        读取未超过 max_age 秒的快照
+
+        Returns:
+            (DataFrame, 快照时间戳)；不存在、已过期或读取失败返回 None
+        """
+        path = self._path(key)
+        try:
+            timestamp = os.path.getmtime(path)
+        except OSError:
+            return None
+        if time.time() - timestamp >= max_age:
+            return None
+        try:
+            if self.use_feather:
+                from pyarrow import feather
+                # 内存映射读取，避免整文件复制到 Python 堆
+                df = feather.read_table(path, memory_map=True).to_pandas()
+            else:
+                df = pd.read_pickle(path)
+        except Exception as e:
+            logger.warning(f"[共享快照] 读取 {path} 失败: {e}")
+            return None
+        return df, timestamp
+
+    def save(self, key: str, df: pd.DataFrame) -> bool:
+        """原子写入快照（先写同目录临时文件，再 os.replace）"""
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{key}.", suffix='.tmp', dir=self.directory)
+        os.close(fd)
+        try:
+            if self.use_feather:
+                df.reset_index(drop=True).to_feather(tmp_path)
+            else:
+                df.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logger.warning(f"[共享快照] 写入 {path} 失败: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+
+    def get_or_refresh(
+        self,
+        key: str,
+        loader: Callable[[], Optional[pd.DataFrame]],
+        ttl: float,
+    ) -> Tuple[Optional[pd.DataFrame], float]:
+        """
+        读取新鲜快照，必要时在文件锁保护下调用 loader 刷新
+
+        多个进程同时未命中时，只有拿到锁的进程请求上游；
+        其余进程拿到锁后发现文件已被刷新，直接读取
+
+        Returns:
+            (DataFrame, 快照时间戳)；loader 返回空数据时不写入磁盘
+        """
+        cached = self.load(key, ttl)
+        if cached is not None:
+            self.hits += 1
+            logger.info(f"[共享快照] 命中磁盘快照 {key}（{int(time.time() - cached[1])}s）")
+            return cached
+
+        lock_path = os.path.join(self.directory, f"{key}.lock")
+        with _file_lock(lock_path, self.lock_timeout) as acquired:
+            if not acquired:
+                logger.warning(f"[共享快照] 等待 {key} 文件锁超时，本进程自行拉取")
+            else:
+                cached = self.load(key, ttl)
+                if cached is not None:
+                    self.hits += 1
+                    logger.info(f"[共享快照] 其他进程已刷新 {key}，直接读取")
+                    return cached
+
+            df = loader()
+            timestamp = time.time()
+            self.refreshes += 1
+            if df is not None and not df.empty and self.save(key, df):
+                logger.info(f"[共享快照] 已写入 {key}: {len(df)} 行")
+            return df, timestamp
+
+
+_store: Optional[SharedSnapshotStore] = None
+_store_resolved = False
+_store_lock = threading.Lock()
+
+
+def get_shared_snapshot_store() -> Optional[SharedSnapshotStore]:
+    """获取进程级共享快照存储（读取配置 SHARED_SNAPSHOT_DIR，未配置返回 None）"""
+    global _store, _store_resolved
+    if not _store_resolved:
+        with _store_lock:
+            if not _store_resolved:
+                try:
+                    from src.config import get_config
+                    directory = get_config().shared_snapshot_dir
+                    if directory:
+                        _store = SharedSnapshotStore(directory)
+                        logger.info(f"[共享快照] 启用磁盘快照目录 {directory}"
+                                    f"（格式: {'feather' if _store.use_feather else 'pickle'}）")
+                except Exception as e:
+                    logger.warning(f"[共享快照] 初始化失败，仅使用进程内缓存: {e}")
+                    _store = None
+                _store_resolved = True
+    return _store
+
+
+def reset_shared_snapshot_store() -> None:
+    """重新读取配置（用于测试）"""
+    global _store, _store_resolved
+    with _store_lock:
+        _store = None
+        _store_resolved = False
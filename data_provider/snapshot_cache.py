@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+全量行情快照缓存（Single-Flight + Stale-While-Revalidate）
+===================================
+
+职责：
+1. 缓存全量实时行情 DataFrame 及其 代码 -> 行数据 索引
+2. Single-Flight：缓存失效时只有一个线程发起全量拉取，其余线程等待其结果
+3. Stale-While-Revalidate：缓存刚过期时直接返回旧快照，同时在后台线程刷新
+4. QuoteCache：按代码缓存批量查询接口（新浪/腾讯）返回的行情
+5. 可选的跨进程磁盘共享（shared_key + SHARED_SNAPSHOT_DIR，见 shared_snapshot_store）
+6. ChipCache：按 (代码, 交易日) 缓存筹码分布（每个交易日只变化一次），内存 LRU + 可选持久化
+
+背景：
+流水线的多个工作线程常在 TTL 过期的同一时刻未命中缓存，
+若各自发起 ak.stock_zh_a_spot_em() 等数 MB 的全量请求，极易触发东财限流。
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    一次全量拉取的不可变快照
+
+    data 与 index 总是成对替换，读线程拿到的快照内部始终一致
+    """
+    data: pd.DataFrame
+    index: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    timestamp: float = 0.0
+
+    @property
+    def age(self) -> float:
+        """快照年龄（秒）"""
+        return time.time() - self.timestamp
+
+
+class _Flight:
+    """一次进行中的刷新，等待者通过 event 获取结果"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.snapshot: Optional[Snapshot] = None
+        self.error: Optional[BaseException] = None
+
+
+class SnapshotCache:
+    """
+    全量行情快照缓存
+
+    状态划分（age 为当前快照年龄）：
+    - age < ttl：新鲜，直接返回
+    - ttl <= age < ttl + stale_ttl：陈旧，返回旧快照并触发后台刷新（同一时刻最多一个）
+    - 无快照或 age >= ttl + stale_ttl：过期，同步刷新；并发调用者等待同一次刷新结果
+
+    使用示例：
+        _realtime_cache = SnapshotCache("A股实时行情(东财)", ttl=1200,
+                                        index_builder=lambda df: build_code_index(df, '代码'))
+        snapshot = _realtime_cache.get(loader)
+        row = snapshot.index.get('600519')
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        stale_ttl: Optional[float] = None,
+        index_builder: Optional[Callable[[pd.DataFrame], Dict[str, Dict[str, Any]]]] = None,
+        shared_key: Optional[str] = None,
+    ):
+        """
+        Args:
+            name: 缓存名称（用于日志）
+            ttl: 新鲜期（秒）
+            stale_ttl: 过期后仍可返回旧快照的宽限期（秒），默认与 ttl 相同，0 表示关闭
+            index_builder: 刷新时构建代码索引的函数
+            shared_key: 磁盘共享快照的键名；配置 SHARED_SNAPSHOT_DIR 后，
+                刷新时先读取其他进程写入的快照，未命中才调用 loader
+        """
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = ttl if stale_ttl is None else stale_ttl
+        self._index_builder = index_builder
+        self.shared_key = shared_key
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Snapshot] = None
+        self._flight: Optional[_Flight] = None
+
+    @property
+    def snapshot(self) -> Optional[Snapshot]:
+        """当前快照（不触发刷新）"""
+        return self._snapshot
+
+    def peek(self) -> Optional[Snapshot]:
+        """返回未过期（含宽限期）的快照，不触发刷新"""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.age < self.ttl + self.stale_ttl:
+            return snapshot
+        return None
+
+    def get(self, loader: Callable[[], Optional[pd.DataFrame]]) -> Snapshot:
+        """
+        获取快照，必要时调用 loader 刷新
+
+        Args:
+            loader: 全量拉取函数，返回 DataFrame（失败可返回空 DataFrame 或抛出异常）
+
+        Returns:
+            Snapshot 快照
+
+        Raises:
+            loader 抛出的异常（同步刷新时，所有等待该次刷新的线程都会收到）
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None:
+                age = snapshot.age
+                if age < self.ttl:
+                    logger.debug(f"[缓存命中] {self.name} - 缓存年龄 {int(age)}s/{self.ttl}s")
+                    return snapshot
+                if age < self.ttl + self.stale_ttl:
+                    if self._flight is None:
+                        self._flight = _Flight()
+                        logger.info(f"[缓存陈旧] {self.name} 返回旧快照({int(age)}s)，后台刷新中")
+                        threading.Thread(
+                            target=self._refresh,
+                            args=(loader, self._flight),
+                            name=f"snapshot-refresh-{self.name}",
+                            daemon=True,
+                        ).start()
+                    return snapshot
+
+            flight = self._flight
+            leader = flight is None
+            if leader:
+                flight = self._flight = _Flight()
+
+        if leader:
+            logger.info(f"[缓存未命中] 触发全量刷新 {self.name}")
+            self._refresh(loader, flight)
+        else:
+            logger.debug(f"[缓存等待] {self.name} 已有线程在刷新，等待其结果")
+            flight.event.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.snapshot
+
+    def set(self, df: Optional[pd.DataFrame]) -> Snapshot:
+        """直接写入新快照（用于其他路径已经拉到全量数据的场景）"""
+        snapshot = self._build(df)
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        """清空快照（用于测试或强制刷新）"""
+        with self._lock:
+            self._snapshot = None
+
+    def _build(self, df: Optional[pd.DataFrame], timestamp: Optional[float] = None) -> Snapshot:
+        if df is None:
+            df = pd.DataFrame()
+        index = self._index_builder(df) if self._index_builder else {}
+        return Snapshot(data=df, index=index, timestamp=time.time() if timestamp is None else timestamp)
+
+    def _load(self, loader: Callable[[], Optional[pd.DataFrame]]) -> Tuple[Optional[pd.DataFrame], Optional[float]]:
+        """调用 loader；启用磁盘共享快照时优先读取其他进程写入的快照（沿用其拉取时间）"""
+        if self.shared_key:
+            from .shared_snapshot_store import get_shared_snapshot_store
+            store = get_shared_snapshot_store()
+            if store is not None:
+                return store.get_or_refresh(self.shared_key, loader, self.ttl)
+        return loader(), None
+
+    def _refresh(self, loader: Callable[[], Optional[pd.DataFrame]], flight: _Flight) -> None:
+        """
+        执行一次刷新并唤醒所有等待者
+
+        loader 失败时通常返回空 DataFrame：此时视为刷新失败，保留原快照及其时间戳，
+        下一次调用会重新尝试；等待者拿到仍在宽限期内的旧快照，否则拿到不入缓存的空快照
+        """
+        try:
+            df, timestamp = self._load(loader)
+            if df is None or df.empty:
+                with self._lock:
+                    previous = self._snapshot
+                if previous is not None and previous.age < self.ttl + self.stale_ttl:
+                    flight.snapshot = previous
+                else:
+                    flight.snapshot = self._build(None)
+                logger.warning(f"[缓存刷新失败] {self.name}: 返回空数据，保留原快照")
+                return
+            snapshot = self._build(df, timestamp)
+            with self._lock:
+                self._snapshot = snapshot
+            flight.snapshot = snapshot
+            logger.info(f"[缓存更新] {self.name} 缓存已刷新，TTL={self.ttl}s")
+        except BaseException as e:
+            flight.error = e
+            logger.warning(f"[缓存刷新失败] {self.name}: {e}")
+        finally:
+            with self._lock:
+                if self._flight is flight:
+                    self._flight = None
+            flight.event.set()
+
+
+class QuoteCache:
+    """
+    逐代码行情缓存
+
+    用于新浪/腾讯等按代码列表查询的接口：批量拉取的结果按代码写入，
+    之后的单只查询直接命中，不再逐只发起 HTTP 请求
+
+    Args:
+        name: 缓存名称（日志用）
+        ttl: 有效期（秒），None 表示首次使用时读取配置 REALTIME_CACHE_TTL
+    """
+
+    _DEFAULT_TTL = 600.0
+
+    def __init__(self, name: str, ttl: Optional[float] = None):
+        self.name = name
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._items: Dict[str, Tuple[float, Any]] = {}
+
+    @property
+    def ttl(self) -> float:
+        if self._ttl is None:
+            try:
+                from src.config import get_config
+                self._ttl = float(get_config().realtime_cache_ttl)
+            except Exception as e:
+                logger.debug(f"[{self.name}] 读取 REALTIME_CACHE_TTL 配置失败，使用默认值: {e}")
+                self._ttl = self._DEFAULT_TTL
+        return self._ttl
+
+    def get(self, code: str) -> Optional[Any]:
+        """返回未过期的缓存值，不存在或已过期返回 None"""
+        with self._lock:
+            item = self._items.get(code)
+        if item is None or time.time() - item[0] >= self.ttl:
+            return None
+        return item[1]
+
+    def get_many(self, codes: Iterable[str]) -> Dict[str, Any]:
+        """批量读取，只返回命中的代码"""
+        now = time.time()
+        with self._lock:
+            items = {code: self._items.get(code) for code in codes}
+        return {code: item[1] for code, item in items.items() if item is not None and now - item[0] < self.ttl}
+
+    def put_many(self, values: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            for code, value in values.items():
+                self._items[code] = (now, value)
+
+    def invalidate(self) -> None:
+        """清空缓存（用于测试或强制刷新）"""
+        with self._lock:
+            self._items.clear()
+
+
+class ChipCache:
+    """
+    按 (代码, 交易日) 缓存的筹码分布：内存 LRU 在前，可选持久化存储在后
+
+    持久化存储需提供 load_chip_distribution(code, trade_date) -> Optional[dict]
+    与 save_chip_distribution(dict, trade_date)（DatabaseManager 已实现），
+    由上层在启动时通过 set_store 注入，未注入时只使用内存
+
+    Args:
+        name: 缓存名称（日志用）
+        maxsize: 内存中最多保留的条目数
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024):
+        self.name = name
+        self.maxsize = maxsize
+        self._store = None
+        self._lock = threading.Lock()
+        self._items: 'OrderedDict[Tuple[str, date], Any]' = OrderedDict()
+        # 统计信息
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def set_store(self, store) -> None:
+        self._store = store
+
+    def _remember(self, key: Tuple[str, date], value: Any) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def get(self, code: str, trade_date: date) -> Optional[Any]:
+        """读取缓存：先查内存，再查持久化存储（命中后回填内存）"""
+        key = (code, trade_date)
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return value
+
+        if self._store is not None:
+            try:
+                data = self._store.load_chip_distribution(code, trade_date)
+            except Exception as e:
+                logger.debug(f"[{self.name}] 读取持久化缓存失败 {code}: {e}")
+                data = None
+            if data is not None:
+                from .realtime_types import ChipDistribution
+                value = ChipDistribution(**data)
+                self._remember(key, value)
+                self.store_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def put(self, code: str, trade_date: date, value: Any) -> None:
+        """写入内存与持久化存储"""
+        self._remember((code, trade_date), value)
+        if self._store is not None:
+            try:
+                self._store.save_chip_distribution(asdict(value), trade_date)
+            except Exception as e:
+                logger.debug(f"[{self.name}] 写入持久化缓存失败 {code}: {e}")
+
+    def invalidate(self) -> None:
+        """清空内存缓存（用于测试）"""
+        with self._lock:
+            self._items.clear()
+
+
+_chip_cache = ChipCache("筹码分布")
+
+
+def get_chip_cache() -> ChipCache:
+    """进程级筹码分布日缓存"""
+    return _chip_cache
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+数据源健康度统计与自适应排序
+===================================
+
+职责：
+1. 按 (操作, 数据源) 维护 EWMA 延迟与 EWMA 成功率
+2. 根据统计结果动态调整数据源尝试顺序：表现退化的数据源自动降级
+3. 提供状态视图（API / CLI）
+4. 保留近期成功请求的耗时窗口，供对冲拉取计算 p90 延迟预算
+
+操作类型：
+- daily:    日线数据（DataFetcherManager.get_daily_data）
+- realtime: 实时行情（按 REALTIME_SOURCE_PRIORITY 中的数据源名称统计）
+- chip:     筹码分布
+- indices:  主要指数行情
+
+排序规则：
+- 健康数据源保持静态优先级顺序（尊重用户配置，如 TUSHARE/YFINANCE 优先级）
+- 样本充足且成功率低于阈值，或延迟远高于同操作最快数据源的，视为退化，移到队尾
+- 退化数据源超过 recovery_after 秒无新样本时恢复原位重新探测
+- 退化数据源之间按"期望耗时 = EWMA 延迟 / EWMA 成功率"升序排列
+
+统计为进程级（DataFetcherManager 会在多处重复创建，统计需跨实例共享）
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from .tracing import record_span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+@dataclass
+class SourceStats:
+    """单个 (操作, 数据源) 的滚动统计"""
+    operation: str
+    source: str
+    latency_ewma: Optional[float] = None  # 秒
+    success_ewma: float = 1.0
+    samples: int = 0
+    successes: int = 0
+    failures: int = 0
+    last_error: Optional[str] = None
+    updated_at: float = field(default_factory=time.time)
+    recent_latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=50), repr=False)
+
+    @property
+    def expected_cost(self) -> float:
+        """期望获得一次成功结果的耗时（越小越好）"""
+        latency = self.latency_ewma if self.latency_ewma is not None else 0.0
+        return latency / max(self.success_ewma, 0.05)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'operation': self.operation,
+            'source': self.source,
+            'latency_ewma': round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            'success_rate': round(self.success_ewma, 3),
+            'samples': self.samples,
+            'successes': self.successes,
+            'failures': self.failures,
+            'expected_cost': round(self.expected_cost, 3),
+            'last_error': self.last_error,
+            'updated_at': self.updated_at,
+        }
+
+
+class SourceHealthTracker:
+    """
+    数据源健康度统计（线程安全）
+
+    Args:
+        alpha: EWMA 平滑系数（越大越看重最近的样本）
+        min_samples: 参与降级判断的最少样本数
+        min_success_rate: 成功率低于该值视为退化
+        slow_factor: 延迟超过同操作最快健康数据源的倍数视为退化
+        recovery_after: 退化数据源超过该秒数没有新样本时恢复原优先级重新探测
+            （降级后通常不会再被调用，否则永远没有机会恢复）
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        min_samples: int = 3,
+        min_success_rate: float = 0.5,
+        slow_factor: float = 5.0,
+        recovery_after: float = 300.0,
+    ):
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.min_success_rate = min_success_rate
+        self.slow_factor = slow_factor
+        self.recovery_after = recovery_after
+        self._stats: Dict[Tuple[str, str], SourceStats] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        operation: str,
+        source: str,
+        success: bool,
+        latency: float,
+        error: Optional[str] = None,
+    ) -> None:
+        """记录一次调用结果"""
+        with self._lock:
+            stats = self._stats.get((operation, source))
+            if stats is None:
+                stats = self._stats[(operation, source)] = SourceStats(operation, source)
+            a = self.alpha
+            stats.latency_ewma = latency if stats.latency_ewma is None else (1 - a) * stats.latency_ewma + a * latency
+            stats.success_ewma = (1 - a) * stats.success_ewma + a * (1.0 if success else 0.0)
+            stats.samples += 1
+            if success:
+                stats.successes += 1
+                stats.recent_latencies.append(latency)
+            else:
+                stats.failures += 1
+                stats.last_error = (error or '')[:200] or None
+            stats.updated_at = time.time()
+        record_span('data', operation, latency, source=source, ok=success, error=error)
+
+    def measure(self, operation: str, source: str, func: Callable[[], T], is_success: Callable[[T], bool] = None) -> T:
+        """
+        执行 func 并记录耗时与结果
+
+        Args:
+            is_success: 判断返回值是否算成功（默认非 None 即成功）；func 抛出异常时记为失败并重新抛出
+        """
+        started = time.monotonic()
+        try:
+            result = func()
+        except Exception as e:
+            self.record(operation, source, False, time.monotonic() - started, str(e))
+            raise
+        ok = is_success(result) if is_success else result is not None
+        self.record(operation, source, ok, time.monotonic() - started, None if ok else 'empty result')
+        return result
+
+    def get(self, operation: str, source: str) -> Optional[SourceStats]:
+        with self._lock:
+            return self._stats.get((operation, source))
+
+    def latency_percentile(self, operation: str, source: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """
+        近期成功请求耗时的分位数（秒）
+
+        Args:
+            q: 分位数（0-100）
+            min_samples: 最少成功样本数，不足时返回 None
+        """
+        with self._lock:
+            stats = self._stats.get((operation, source))
+            samples = list(stats.recent_latencies) if stats is not None else []
+        if not samples or len(samples) < min_samples:
+            return None
+        return float(np.percentile(samples, q))
+
+    def is_degraded(self, operation: str, source: str) -> bool:
+        """判断数据源在该操作上是否退化"""
+        with self._lock:
+            return self._is_degraded_locked(operation, source)
+
+    def _is_degraded_locked(self, operation: str, source: str) -> bool:
+        stats = self._stats.get((operation, source))
+        if stats is None or stats.samples < self.min_samples:
+            return False
+        if time.time() - stats.updated_at > self.recovery_after:
+            return False
+        if stats.success_ewma < self.min_success_rate:
+            return True
+        best = min(
+            (s.latency_ewma for (op, _), s in self._stats.items()
+             if op == operation and s.latency_ewma is not None and s.samples >= self.min_samples
+             and s.success_ewma >= self.min_success_rate),
+            default=None,
+        )
+        return bool(best and stats.latency_ewma is not None and stats.latency_ewma > best * self.slow_factor)
+
+    def rank(self, operation: str, items: Sequence[T], key: Callable[[T], str] = None) -> List[T]:
+        """
+        按健康度对候选数据源重新排序
+
+        Args:
+            items: 按静态优先级排好序的候选项
+            key: 从候选项取数据源名称的函数（默认 str）
+
+        Returns:
+            健康数据源（保持原顺序）+ 退化数据源（按期望耗时升序）
+        """
+        key = key or str
+        with self._lock:
+            healthy: List[T] = []
+            degraded: List[Tuple[float, int, T]] = []
+            for i, item in enumerate(items):
+                name = key(item)
+                if self._is_degraded_locked(operation, name):
+                    degraded.append((self._stats[(operation, name)].expected_cost, i, item))
+                else:
+                    healthy.append(item)
+        if degraded:
+            degraded.sort(key=lambda x: (x[0], x[1]))
+            logger.debug(f"[数据源排序] {operation} 降级: {[key(x[2]) for x in degraded]}")
+        return healthy + [item for _, _, item in degraded]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """返回所有统计（按操作、期望耗时排序）"""
+        with self._lock:
+            rows = []
+            for (operation, source), stats in self._stats.items():
+                row = stats.to_dict()
+                row['degraded'] = self._is_degraded_locked(operation, source)
+                rows.append(row)
+        rows.sort(key=lambda r: (r['operation'], r['degraded'], r['expected_cost']))
+        return rows
+
+    def reset(self) -> None:
+        """清空统计（用于测试）"""
+        with self._lock:
+            self._stats.clear()
+
+
+def format_source_health_table(rows: List[Dict[str, Any]]) -> str:
+    """将健康度统计格式化为文本表格（CLI 状态视图）"""
+    if not rows:
+        return "暂无数据源统计（本进程尚未发起数据请求）"
+
+    header = f"{'操作':<10}{'数据源':<18}{'延迟EWMA':>10}{'成功率':>8}{'样本':>6}{'状态':>6}  最近错误"
+    lines = [header, '-' * len(header)]
+    for r in rows:
+        latency = f"{r['latency_ewma']:.2f}s" if r['latency_ewma'] is not None else '-'
+        status = '降级' if r['degraded'] else '正常'
+        lines.append(
+            f"{r['operation']:<10}{r['source']:<18}{latency:>10}{r['success_rate']:>8.0%}"
+            f"{r['samples']:>6}{status:>6}  {r['last_error'] or ''}"
+        )
+    return "\n".join(lines)
+
+
+# 全局统计实例
+_source_health_tracker = SourceHealthTracker()
+
+
+def get_source_health_tracker() -> SourceHealthTracker:
+    """获取全局数据源健康度统计"""
+    return _source_health_tracker
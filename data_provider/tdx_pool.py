@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+通达信长连接池
+===================================
+
+职责：
+1. 启动时并行测量各行情服务器的连接耗时与往返延迟，按总耗时排序
+2. 维护少量长连接，借出时对空闲过久的连接发送心跳，失效则透明重连
+3. 查询失败时丢弃该连接并在下一台服务器上重试一次
+
+背景：
+原先每次查询都新建 TdxHq_API、依次尝试服务器（每台 5 秒超时）、查询后断开，
+单次查询的大部分耗时花在建连上。
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
+
+from .base import DataFetchError
+
+logger = logging.getLogger(__name__)
+
+Host = Tuple[str, int]
+
+
+@dataclass
+class HostLatency:
+    """单台服务器的测速结果"""
+    host: str
+    port: int
+    connect_ms: Optional[float] = None
+    rtt_ms: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def total_ms(self) -> float:
+        if not self.ok:
+            return float('inf')
+        return (self.connect_ms or 0.0) + (self.rtt_ms or 0.0)
+
+
+class _PooledConnection:
+    """借出单位：一个已连接的 TdxHq_API 及其服务器"""
+
+    __slots__ = ('api', 'host', 'last_used')
+
+    def __init__(self, api: Any, host: Host):
+        self.api = api
+        self.host = host
+        self.last_used = time.monotonic()
+
+
+def _default_api_factory():
+    try:
+        from pytdx.hq import TdxHq_API
+    except ImportError:
+        raise DataFetchError("pytdx 库未安装")
+    return TdxHq_API()
+
+
+def _ping(api: Any) -> None:
+    """心跳：查询深市证券数量（最轻量的请求）"""
+    if api.get_security_count(0) is None:
+        raise ConnectionError("心跳无响应")
+
+
+class TdxConnectionPool:
+    """
+    通达信长连接池（线程安全）
+
+    Args:
+        hosts: 服务器列表
+        size: 最大连接数
+        connect_timeout: 单台服务器连接超时（秒）
+        heartbeat_interval: 连接空闲超过该秒数时，借出前先发送心跳
+        api_factory: 创建 TdxHq_API 的工厂函数（测试注入）
+    """
+
+    # 连接数已满时等待空闲连接的轮询间隔（秒）
+    _WAIT_POLL_SECONDS = 0.2
+
+    def __init__(
+        self,
+        hosts: List[Host],
+        size: int = 2,
+        connect_timeout: float = 3.0,
+        heartbeat_interval: float = 30.0,
+        api_factory: Optional[Callable[[], Any]] = None,
+    ):
+        if not hosts:
+            raise ValueError("通达信服务器列表不能为空")
+        self._hosts: List[Host] = list(hosts)
+        self.size = max(1, int(size))
+        self.connect_timeout = connect_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self._api_factory = api_factory or _default_api_factory
+
+        self._idle: "queue.LifoQueue[_PooledConnection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._ranked = False
+        self._rank_lock = threading.Lock()
+        self._latencies: List[HostLatency] = []
+        self._next_host = 0
+        # 统计信息
+        self.connects = 0
+        self.reconnects = 0
+
+    # ---------- 服务器测速 ----------
+
+    def _measure(self, host: Host) -> HostLatency:
+        result = HostLatency(host=host[0], port=host[1])
+        api = self._api_factory()
+        try:
+            started = time.monotonic()
+            if not api.connect(host[0], host[1], time_out=self.connect_timeout):
+                result.error = "连接失败"
+                return result
+            result.connect_ms = (time.monotonic() - started) * 1000
+            started = time.monotonic()
+            _ping(api)
+            result.rtt_ms = (time.monotonic() - started) * 1000
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+        finally:
+            try:
+                api.disconnect()
+            except Exception:
+                pass
+        return result
+
+    def rank_hosts(self) -> List[HostLatency]:
+        """并行测速所有服务器，按 连接耗时 + 往返延迟 升序重排（不可用的排在最后）"""
+        with ThreadPoolExecutor(max_workers=min(8, len(self._hosts))) as pool:
+            results = list(pool.map(self._measure, self._hosts))
+        results.sort(key=lambda r: r.total_ms)
+        with self._lock:
+            self._latencies = results
+            self._hosts = [(r.host, r.port) for r in results]
+            self._next_host = 0
+        self._ranked = True
+        best = results[0]
+        if best.ok:
+            logger.info(f"[通达信] 服务器测速完成，最优 {best.host}:{best.port} "
+                        f"(连接 {best.connect_ms:.0f}ms, 往返 {best.rtt_ms:.0f}ms)")
+        else:
+            logger.warning("[通达信] 服务器测速全部失败，保持默认顺序")
+        return results
+
+    def _ensure_ranked(self) -> None:
+        if self._ranked:
+            return
+        with self._rank_lock:
+            if not self._ranked:
+                self.rank_hosts()
+
+    @property
+    def hosts(self) -> List[Host]:
+        with self._lock:
+            return list(self._hosts)
+
+    @property
+    def latencies(self) -> List[HostLatency]:
+        with self._lock:
+            return list(self._latencies)
+
+    # ---------- 连接管理 ----------
+
+    def _connect(self) -> _PooledConnection:
+        """按测速顺序连接服务器；同一连接失效后从下一台开始尝试"""
+        hosts = self.hosts
+        with self._lock:
+            start = self._next_host
+        last_error: Optional[str] = None
+        for i in range(len(hosts)):
+            host = hosts[(start + i) % len(hosts)]
+            api = self._api_factory()
+            try:
+                if api.connect(host[0], host[1], time_out=self.connect_timeout):
+                    self.connects += 1
+                    logger.debug(f"[通达信] 建立长连接 {host[0]}:{host[1]}")
+                    return _PooledConnection(api, host)
+                last_error = "连接失败"
+            except Exception as e:
+                last_error = str(e)
+            logger.debug(f"[通达信] 连接 {host[0]}:{host[1]} 失败: {last_error}")
+        raise DataFetchError(f"通达信无法连接任何服务器: {last_error}")
+
+    def _discard(self, conn: _PooledConnection) -> None:
+        """丢弃失效连接，下次从下一台服务器开始连接"""
+        try:
+            conn.api.disconnect()
+        except Exception:
+            pass
+        hosts = self.hosts
+        with self._lock:
+            self._created -= 1
+            if conn.host in hosts:
+                self._next_host = (hosts.index(conn.host) + 1) % len(hosts)
+
+    def _checkout(self) -> _PooledConnection:
+        self._ensure_ranked()
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return self._connect()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                try:
+                    conn = self._idle.get(timeout=self._WAIT_POLL_SECONDS)
+                except queue.Empty:
+                    # 持有者丢弃失效连接时不会放回队列，需重新检查能否新建连接
+                    continue
+
+            if time.monotonic() - conn.last_used < self.heartbeat_interval:
+                return conn
+            try:
+                _ping(conn.api)
+                return conn
+            except Exception as e:
+                logger.info(f"[通达信] 连接 {conn.host[0]}:{conn.host[1]} 心跳失败，重新连接: {e}")
+                self.reconnects += 1
+                self._discard(conn)
+
+    def _checkin(self, conn: _PooledConnection) -> None:
+        conn.last_used = time.monotonic()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Generator[Any, None, None]:
+        """
+        借出一个连接（独占使用）
+
+        with 块内抛出异常时连接被丢弃，不会放回池中
+        """
+        conn = self._checkout()
+        try:
+            yield conn.api
+        except BaseException:
+            self._discard(conn)
+            raise
+        self._checkin(conn)
+
+    def call(self, func: Callable[[Any], Any]) -> Any:
+        """
+        在池化连接上执行查询；连接异常或返回 None（pytdx 在连接断开时返回 None）
+        时丢弃连接，在下一台服务器上重试一次
+        """
+        for attempt in range(2):
+            conn = self._checkout()
+            try:
+                result = func(conn.api)
+            except Exception as e:
+                self._discard(conn)
+                if attempt == 0:
+                    self.reconnects += 1
+                    logger.info(f"[通达信] {conn.host[0]}:{conn.host[1]} 查询失败，切换服务器重试: {e}")
+                    continue
+                raise
+            if result is None and attempt == 0:
+                self._discard(conn)
+                self.reconnects += 1
+                logger.info(f"[通达信] {conn.host[0]}:{conn.host[1]} 返回空响应，切换服务器重试")
+                continue
+            self._checkin(conn)
+            return result
+        return None
+
+    def close(self) -> None:
+        """断开所有空闲连接"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            created = self._created
+        return {
+            'size': self.size,
+            'open_connections': created,
+            'idle_connections': self._idle.qsize(),
+            'connects': self.connects,
+            'reconnects': self.reconnects,
+            'hosts': [
+                {'host': r.host, 'port': r.port, 'connect_ms': r.connect_ms, 'rtt_ms': r.rtt_ms, 'error': r.error}
+                for r in self.latencies
+            ],
+        }
+
+
+# 进程级连接池（按服务器列表区分）
+_pools: Dict[Tuple[Host, ...], TdxConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_tdx_pool(hosts: List[Host], size: Optional[int] = None) -> TdxConnectionPool:
+    """获取（必要时创建）服务器列表对应的进程级连接池"""
+    key = tuple(hosts)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            if size is None:
+                try:
+                    from src.config import get_config
+                    size = get_config().pytdx_pool_size
+                except Exception:
+                    size = 2
+            pool = TdxConnectionPool(list(hosts), size=size)
+            _pools[key] = pool
+        return pool
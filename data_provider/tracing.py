@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+轻量级耗时追踪（Span）与运行时间线导出
+===================================
+
+职责：
+1. 记录 (阶段, 名称, 来源, 股票代码, 耗时, 是否成功) 形式的 span
+2. 每次批量运行导出 Chrome Trace 格式的 JSON 时间线（chrome://tracing / Perfetto 可直接打开）
+3. 按 (阶段, 来源) 汇总 p50 / p95 / 最大耗时，定位慢在东财、博查、Gemini 还是 SQLite
+
+阶段约定：
+- pipeline:     流水线阶段（market_data / news_search / llm_analysis / persistence / notification）
+- data:         数据源调用（经 SourceHealthTracker 统一记录，来源为数据源名称）
+- search:       搜索引擎调用（来源为 Bocha / Tavily / Brave / SerpAPI）
+- llm:          LLM 请求（来源为模型名）；llm_wait 为节流排队时间
+- storage:      数据库读写
+- notification: 推送渠道
+
+未开启追踪时 span 只做一次列表判空，开销可忽略。
+股票代码默认取当前线程通过 bind() 绑定的代码，调用方无需层层传递。
+span 只写入当前线程绑定的运行（start_trace 绑定调用线程，StagedPipeline 工作线程通过
+bind_trace 继承），多个运行并发时互不串写；未绑定运行的线程不记录 span。
+
+放在 data_provider 下是为了让数据源模块无需反向依赖 src。
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SpanRecord:
+    """一次被追踪的调用"""
+    stage: str
+    name: str
+    start: float  # time.perf_counter()
+    duration: float = 0.0  # 秒
+    source: Optional[str] = None
+    code: Optional[str] = None
+    ok: bool = True
+    error: Optional[str] = None
+    thread_id: int = field(default_factory=threading.get_ident)
+    thread_name: str = field(default_factory=lambda: threading.current_thread().name)
+
+    def fail(self, error: Any = None) -> None:
+        """标记为失败（用于不抛异常、以返回值表示失败的调用）"""
+        self.ok = False
+        if error is not None:
+            self.error = str(error)[:200]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """最近秩百分位（values 已升序）"""
+    if not values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(values) + 0.4999)))
+    return values[min(rank, len(values)) - 1]
+
+
+class RunTrace:
+    """
+    单次运行的 span 集合（线程安全）
+
+    Args:
+        run_id: 运行编号（用于导出文件名）
+    """
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.origin = time.perf_counter()
+        self.started_at = datetime.now()
+        self._spans: List[SpanRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: SpanRecord) -> None:
+        with self._lock:
+            self._spans.append(record)
+
+    @property
+    def spans(self) -> List[SpanRecord]:
+        with self._lock:
+            return list(self._spans)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """按 (阶段, 来源) 汇总耗时，按总耗时降序"""
+        groups: Dict[tuple, List[SpanRecord]] = {}
+        for record in self.spans:
+            groups.setdefault((record.stage, record.source or record.name), []).append(record)
+
+        rows = []
+        for (stage, source), records in groups.items():
+            durations = sorted(r.duration for r in records)
+            rows.append({
+                'stage': stage,
+                'source': source,
+                'count': len(records),
+                'errors': sum(1 for r in records if not r.ok),
+                'p50': round(_percentile(durations, 50), 4),
+                'p95': round(_percentile(durations, 95), 4),
+                'max': round(durations[-1], 4),
+                'total': round(sum(durations), 4),
+            })
+        rows.sort(key=lambda r: (r['stage'], -r['total']))
+        return rows
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """导出 Chrome Trace Event 格式（完整事件 ph=X，时间单位微秒）"""
+        pid = os.getpid()
+        thread_ids: Dict[int, int] = {}
+        events: List[Dict[str, Any]] = []
+        for record in sorted(self.spans, key=lambda r: r.start):
+            if record.thread_id not in thread_ids:
+                thread_ids[record.thread_id] = len(thread_ids) + 1
+                events.append({
+                    'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_ids[record.thread_id],
+                    'args': {'name': record.thread_name},
+                })
+            args = {'ok': record.ok}
+            for key in ('code', 'source', 'error'):
+                value = getattr(record, key)
+                if value:
+                    args[key] = value
+            events.append({
+                'name': f"{record.name}:{record.source}" if record.source else record.name,
+                'cat': record.stage,
+                'ph': 'X',
+                'ts': round((record.start - self.origin) * 1e6, 1),
+                'dur': round(record.duration * 1e6, 1),
+                'pid': pid,
+                'tid': thread_ids[record.thread_id],
+                'args': args,
+            })
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'run_id': self.run_id,
+                'started_at': self.started_at.isoformat(timespec='seconds'),
+                'summary': self.summary(),
+            },
+        }
+
+    def export(self, directory: str) -> str:
+        """写入 <directory>/trace_<run_id>.json，返回文件路径"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"trace_{self.run_id}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+        return path
+
+
+def format_trace_summary(rows: List[Dict[str, Any]]) -> str:
+    """将耗时汇总格式化为文本表格"""
+    if not rows:
+        return "暂无耗时记录"
+
+    header = f"{'阶段':<14}{'来源':<22}{'次数':>6}{'失败':>6}{'p50':>9}{'p95':>9}{'最大':>9}{'合计':>10}"
+    lines = [header, '-' * len(header)]
+    for r in rows:
+        lines.append(
+            f"{r['stage']:<14}{str(r['source'])[:21]:<22}{r['count']:>6}{r['errors']:>6}"
+            f"{r['p50']:>8.2f}s{r['p95']:>8.2f}s{r['max']:>8.2f}s{r['total']:>9.1f}s"
+        )
+    return "\n".join(lines)
+
+
+# 正在采集的运行
+_active: List[RunTrace] = []
+_active_lock = threading.Lock()
+_local = threading.local()
+
+
+def start_trace(run_id: str) -> RunTrace:
+    """开始采集一次运行的 span，并将当前线程绑定到该运行"""
+    trace = RunTrace(run_id)
+    with _active_lock:
+        _active.append(trace)
+    _local.trace = trace
+    return trace
+
+
+def stop_trace(trace: RunTrace) -> None:
+    """停止采集（trace 对象仍可导出）"""
+    with _active_lock:
+        if trace in _active:
+            _active.remove(trace)
+    if getattr(_local, 'trace', None) is trace:
+        _local.trace = None
+
+
+def is_tracing() -> bool:
+    return bool(_active)
+
+
+def current_code() -> Optional[str]:
+    """当前线程绑定的股票代码"""
+    return getattr(_local, 'code', None)
+
+
+def current_trace() -> Optional[RunTrace]:
+    """当前线程绑定的运行"""
+    return getattr(_local, 'trace', None)
+
+
+@contextmanager
+def bind(code: Optional[str]) -> Iterator[None]:
+    """在当前线程绑定股票代码，期间未显式指定 code 的 span 归属到该股票"""
+    previous = getattr(_local, 'code', None)
+    _local.code = code
+    try:
+        yield
+    finally:
+        _local.code = previous
+
+
+@contextmanager
+def bind_trace(trace: Optional[RunTrace]) -> Iterator[None]:
+    """在当前线程绑定运行（用于运行派生的工作线程），期间的 span 只写入该运行"""
+    previous = getattr(_local, 'trace', None)
+    _local.trace = trace
+    try:
+        yield
+    finally:
+        _local.trace = previous
+
+
+def _emit(record: SpanRecord) -> None:
+    trace = current_trace()
+    if trace is None or trace not in _active:
+        return
+    if record.code is None:
+        record.code = current_code()
+    trace.add(record)
+
+
+@contextmanager
+def span(
+    stage: str,
+    name: str,
+    source: Optional[str] = None,
+    code: Optional[str] = None,
+) -> Iterator[SpanRecord]:
+    """
+    追踪一段代码的耗时（抛出异常时记为失败并重新抛出）
+
+    用法：
+        with span('search', 'search', source='Bocha') as s:
+            response = ...
+            if not response.success:
+                s.fail(response.error_message)
+    """
+    record = SpanRecord(stage=stage, name=name, start=time.perf_counter(), source=source, code=code)
+    try:
+        yield record
+    except BaseException as e:
+        record.fail(e)
+        raise
+    finally:
+        if _active:
+            record.duration = time.perf_counter() - record.start
+            _emit(record)
+
+
+def record_span(
+    stage: str,
+    name: str,
+    duration: float,
+    source: Optional[str] = None,
+    code: Optional[str] = None,
+    ok: bool = True,
+    error: Optional[str] = None,
+) -> None:
+    """记录一段已测量的耗时（结束时刻为当前时间）"""
+    if not _active:
+        return
+    record = SpanRecord(
+        stage=stage, name=name, start=time.perf_counter() - duration, duration=duration,
+        source=source, code=code, ok=ok, error=(error or '')[:200] or None,
+    )
+    _emit(record)
+
+
+def traced(stage: str, name: Optional[str] = None, source: Optional[str] = None, code_arg: str = 'code'):
+    """
+    装饰器：追踪函数耗时
+
+    Args:
+        stage: 阶段
+        name: span 名称（默认函数名）
+        source: 来源
+        code_arg: 股票代码参数名（不存在时使用线程绑定的代码）
+    """
+    def decorator(func: Callable) -> Callable:
+        params = list(inspect.signature(func).parameters)
+        code_index = params.index(code_arg) if code_arg in params else None
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _active:
+                return func(*args, **kwargs)
+            code = kwargs.get(code_arg)
+            if code is None and code_index is not None and code_index < len(args):
+                code = args[code_index]
+            with span(stage, span_name, source=source, code=code if isinstance(code, str) else None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
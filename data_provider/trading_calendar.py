@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+交易日历（A 股 / 港股 / 美股）
+===================================
+
+职责：
+1. 判断某天是否为交易日，解析各市场"最近一个应有日线的交易日"
+2. 内置近年休市日表，覆盖范围内不发起任何网络请求
+3. 内置表未覆盖的年份，从 Tushare / Baostock 拉取当年交易日并缓存；均不可用时仅排除周末
+
+背景：
+断点续传以自然日判断"今日数据是否已存在"，周末和节假日永远不存在，
+定时任务与机器人每次运行都会把所有股票重新拉取一遍，却拿不到任何新数据。
+
+内置表只收录已确认的休市日：漏收某个休市日只会多一次无效拉取（与原行为一致），
+错收则会跳过应有的拉取，因此宁缺毋滥。
+"""
+
+import logging
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+MARKET_CN = 'cn'
+MARKET_HK = 'hk'
+MARKET_US = 'us'
+
+# 各市场所在时区（判断"今天"时使用当地日期）
+_MARKET_TIMEZONES = {
+    MARKET_CN: 'Asia/Shanghai',
+    MARKET_HK: 'Asia/Hong_Kong',
+    MARKET_US: 'America/New_York',
+}
+
+# 各市场连续交易时段（当地时间，开盘, 收盘），午休不单独处理
+_MARKET_SESSIONS = {
+    MARKET_CN: (time(9, 15), time(15, 0)),
+    MARKET_HK: (time(9, 30), time(16, 10)),
+    MARKET_US: (time(9, 30), time(16, 0)),
+}
+
+
+def _dates(*values: str) -> Set[date]:
+    return {date.fromisoformat(v) for v in values}
+
+
+# 内置休市日（仅工作日；周末默认休市）
+_BUNDLED_HOLIDAYS: Dict[str, Dict[int, Set[date]]] = {
+    MARKET_CN: {
+        2025: _dates(
+            '2025-01-01',
+            '2025-01-28', '2025-01-29', '2025-01-30', '2025-01-31', '2025-02-03', '2025-02-04',
+            '2025-04-04',
+            '2025-05-01', '2025-05-02', '2025-05-05',
+            '2025-06-02',
+            '2025-10-01', '2025-10-02', '2025-10-03', '2025-10-06', '2025-10-07', '2025-10-08',
+        ),
+        2026: _dates(
+            '2026-01-01', '2026-01-02',
+            '2026-02-16', '2026-02-17', '2026-02-18', '2026-02-19', '2026-02-20', '2026-02-23',
+            '2026-04-06',
+            '2026-05-01', '2026-05-04', '2026-05-05',
+            '2026-06-19',
+            '2026-09-25',
+            '2026-10-01', '2026-10-02', '2026-10-05', '2026-10-06', '2026-10-07',
+        ),
+    },
+    MARKET_HK: {
+        2025: _dates(
+            '2025-01-01', '2025-01-29', '2025-01-30', '2025-01-31',
+            '2025-04-04', '2025-04-18', '2025-04-21',
+            '2025-05-01', '2025-05-05',
+            '2025-07-01', '2025-10-01', '2025-10-07', '2025-10-29',
+            '2025-12-25', '2025-12-26',
+        ),
+        2026: _dates(
+            '2026-01-01', '2026-02-17', '2026-02-18', '2026-02-19',
+            '2026-04-03', '2026-04-06', '2026-04-07',
+            '2026-05-01', '2026-05-25', '2026-06-19',
+            '2026-07-01', '2026-10-01', '2026-10-19',
+            '2026-12-25',
+        ),
+    },
+    MARKET_US: {
+        2025: _dates(
+            '2025-01-01', '2025-01-09', '2025-01-20', '2025-02-17', '2025-04-18', '2025-05-26',
+            '2025-06-19', '2025-07-04', '2025-09-01', '2025-11-27', '2025-12-25',
+        ),
+        2026: _dates(
+            '2026-01-01', '2026-01-19', '2026-02-16', '2026-04-03', '2026-05-25',
+            '2026-06-19', '2026-07-03', '2026-09-07', '2026-11-26', '2026-12-25',
+        ),
+    },
+}
+
+# 远程加载函数：(market, year) -> 当年交易日集合，不可用时返回 None
+YearLoader = Callable[[str, int], Optional[Set[date]]]
+
+
+def market_of(stock_code: str) -> str:
+    """根据股票代码判断所属市场"""
+    from .akshare_fetcher import _is_hk_code, _is_us_code
+
+    if _is_us_code(stock_code):
+        return MARKET_US
+    if _is_hk_code(stock_code):
+        return MARKET_HK
+    return MARKET_CN
+
+
+def _market_now(market: str, now: Optional[datetime] = None) -> datetime:
+    """市场当地时间"""
+    try:
+        from zoneinfo import ZoneInfo
+        tz = ZoneInfo(_MARKET_TIMEZONES[market])
+        return now.astimezone(tz) if now is not None else datetime.now(tz)
+    except Exception:
+        return now or datetime.now()
+
+
+def _market_today(market: str, now: Optional[datetime] = None) -> date:
+    """市场当地日期"""
+    return _market_now(market, now).date()
+
+
+def _default_year_loader(market: str, year: int) -> Optional[Set[date]]:
+    """依次尝试 Tushare（A/港/美）与 Baostock（仅 A 股）获取全年交易日"""
+    start, end = f"{year}-01-01", f"{year}-12-31"
+    try:
+        from .tushare_fetcher import TushareFetcher
+        fetcher = TushareFetcher()
+        if fetcher.is_available():
+            days = fetcher.get_trade_dates(start, end, market=market)
+            if days:
+                return {date.fromisoformat(d) for d in days}
+    except Exception as e:
+        logger.debug(f"[交易日历] Tushare 获取 {market} {year} 交易日失败: {e}")
+
+    if market == MARKET_CN:
+        try:
+            from .baostock_session import get_baostock_session
+            df = get_baostock_session().query('query_trade_dates', start_date=start, end_date=end)
+            if not df.empty:
+                open_days = df.loc[df['is_trading_day'] == '1', 'calendar_date']
+                return {date.fromisoformat(d) for d in open_days}
+        except Exception as e:
+            logger.debug(f"[交易日历] Baostock 获取 {year} 交易日失败: {e}")
+    return None
+
+
+class TradingCalendar:
+    """
+    交易日历（线程安全）
+
+    Args:
+        holidays: 市场 -> 年份 -> 工作日休市日（默认内置表）
+        loader: 内置表未覆盖的年份的远程加载函数（None 表示不加载，仅排除周末）
+    """
+
+    def __init__(
+        self,
+        holidays: Optional[Dict[str, Dict[int, Set[date]]]] = None,
+        loader: Optional[YearLoader] = _default_year_loader,
+    ):
+        source = _BUNDLED_HOLIDAYS if holidays is None else holidays
+        self._holidays: Dict[str, Dict[int, Set[date]]] = {m: dict(years) for m, years in source.items()}
+        self._loader = loader
+        # 远程加载失败的 (市场, 年份)，本进程内不再重试
+        self._unavailable: Set[tuple] = set()
+        self._lock = threading.Lock()
+
+    def _year_holidays(self, market: str, year: int) -> Set[date]:
+        with self._lock:
+            years = self._holidays.setdefault(market, {})
+            if year in years:
+                return years[year]
+            if self._loader is None or (market, year) in self._unavailable:
+                return set()
+
+            open_days = self._loader(market, year)
+            if not open_days:
+                logger.info(f"[交易日历] {market} {year} 年无可用日历数据源，仅按周末判断")
+                self._unavailable.add((market, year))
+                return set()
+            # 远程数据转为工作日休市日，与内置表同一口径
+            day = date(year, 1, 1)
+            holidays = set()
+            while day.year == year:
+                if day.weekday() < 5 and day not in open_days:
+                    holidays.add(day)
+                day += timedelta(days=1)
+            years[year] = holidays
+            logger.info(f"[交易日历] 已加载 {market} {year} 年交易日历（休市 {len(holidays)} 个工作日）")
+            return holidays
+
+    def is_trading_day(self, market: str, day: date) -> bool:
+        if day.weekday() >= 5:
+            return False
+        return day not in self._year_holidays(market, day.year)
+
+    def previous_trading_day(self, market: str, day: date) -> date:
+        """day 之前（不含）最近的交易日"""
+        day -= timedelta(days=1)
+        while not self.is_trading_day(market, day):
+            day -= timedelta(days=1)
+        return day
+
+    def latest_trading_day(self, market: str, on_or_before: Optional[date] = None) -> date:
+        """
+        最近一个应有日线的交易日（含当天）
+
+        Args:
+            on_or_before: 截止日期，默认市场当地的今天
+        """
+        day = on_or_before or _market_today(market)
+        return day if self.is_trading_day(market, day) else self.previous_trading_day(market, day)
+
+    def latest_closed_trading_day(self, market: str, now: Optional[datetime] = None) -> date:
+        """最近一个已收盘的交易日（当天收盘前返回上一个交易日）"""
+        local = _market_now(market, now)
+        day = local.date()
+        if self.is_trading_day(market, day) and local.time() >= _MARKET_SESSIONS[market][1]:
+            return day
+        return self.previous_trading_day(market, day)
+
+    def is_session_open(self, market: str, now: Optional[datetime] = None) -> bool:
+        """当前是否处于交易时段（盘中数据仍在变化）"""
+        local = _market_now(market, now)
+        open_time, close_time = _MARKET_SESSIONS[market]
+        return self.is_trading_day(market, local.date()) and open_time <= local.time() < close_time
+
+    def trading_days(self, market: str, start: date, end: date) -> List[date]:
+        """区间内的交易日（含首尾）"""
+        days = []
+        day = start
+        while day <= end:
+            if self.is_trading_day(market, day):
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def is_trading_day_today(self, markets: Iterable[str]) -> bool:
+        """任一市场今天（当地日期）开市即返回 True"""
+        return any(self.is_trading_day(m, _market_today(m)) for m in set(markets))
+
+
+_calendar: Optional[TradingCalendar] = None
+_calendar_lock = threading.Lock()
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """获取进程级交易日历"""
+    global _calendar
+    if _calendar is None:
+        with _calendar_lock:
+            if _calendar is None:
+                _calendar = TradingCalendar()
+    return _calendar
+
+
+def latest_trading_day_for(stock_code: str) -> date:
+    """股票所属市场最近一个应有日线的交易日"""
+    return get_trading_calendar().latest_trading_day(market_of(stock_code))
+
+
+def latest_closed_trading_day_for(stock_code: str) -> date:
+    """股票所属市场最近一个已收盘的交易日"""
+    return get_trading_calendar().latest_closed_trading_day(market_of(stock_code))
+
+
+def is_session_open_for(stock_code: str) -> bool:
+    """股票所属市场当前是否处于交易时段"""
+    return get_trading_calendar().is_session_open(market_of(stock_code))
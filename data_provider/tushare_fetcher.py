@@ -9,15 +9,14 @@ TushareFetcher - 备用数据源 1 (Priority 2)
 优点：数据质量高、接口稳定
 
 流控策略：
-1. 实现"每分钟调用计数器"
-2. 超过免费配额（80次/分）时，强制休眠到下一分钟
+1. 使用进程级 tushare 令牌桶（默认 75 次/分 + 突发 5 次，不超过 80 次/分配额，所有实例和线程共享）
+2. 配额内立即放行，超出时按速率排队等待
 3. 使用 tenacity 实现指数退避重试
 """
 
 import json as _json
 import logging
 import re
-import time
 from datetime import datetime
 from typing import Optional, Tuple, List, Dict, Any
 
@@ -31,7 +30,8 @@ from tenacity import (
     before_sleep_log,
 )
 
-from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
+from .base import BaseFetcher, DataFetchError, UnsupportedMarketError, RateLimitError, STANDARD_COLUMNS
+from .rate_limiter import acquire_rate_limit
 from .realtime_types import UnifiedRealtimeQuote
 from src.config import get_config
 import os
@@ -59,8 +59,8 @@ class TushareFetcher(BaseFetcher):
     数据来源：Tushare Pro API
     
     关键策略：
-    - 每分钟调用计数器，防止超出配额
-    - 超过 80 次/分钟时强制等待
+    - 进程级令牌桶限流，防止超出配额
+    - 超出令牌桶速率时排队等待
     - 失败后指数退避重试
     
     配额说明（Tushare 免费用户）：
@@ -71,16 +71,12 @@ class TushareFetcher(BaseFetcher):
     name = "TushareFetcher"
     priority = int(os.getenv("TUSHARE_PRIORITY", "2"))  # 默认优先级，会在 __init__ 中根据配置动态调整
 
-    def __init__(self, rate_limit_per_minute: int = 80):
+    def __init__(self):
         """
         初始化 TushareFetcher
 
-        Args:
-            rate_limit_per_minute: 每分钟最大请求数（默认80，Tushare免费配额）
+        限流由进程级 tushare 令牌桶负责（可通过 RATE_LIMITS 调整配额）
         """
-        self.rate_limit_per_minute = rate_limit_per_minute
-        self._call_count = 0  # 当前分钟内的调用次数
-        self._minute_start: Optional[float] = None  # 当前计数周期开始时间
         self._api: Optional[object] = None  # Tushare API 实例
 
         # 尝试初始化 API
@@ -190,44 +186,11 @@ class TushareFetcher(BaseFetcher):
     def _check_rate_limit(self) -> None:
         """
         检查并执行速率限制
-        
-        流控策略：
-        1. 检查是否进入新的一分钟
-        2. 如果是，重置计数器
-        3. 如果当前分钟调用次数超过限制，强制休眠
-        """
-        current_time = time.time()
-        
-        # 检查是否需要重置计数器（新的一分钟）
-        if self._minute_start is None:
-            self._minute_start = current_time
-            self._call_count = 0
-        elif current_time - self._minute_start >= 60:
-            # 已经过了一分钟，重置计数器
-            self._minute_start = current_time
-            self._call_count = 0
-            logger.debug("速率限制计数器已重置")
-        
-        # 检查是否超过配额
-        if self._call_count >= self.rate_limit_per_minute:
-            # 计算需要等待的时间（到下一分钟）
-            elapsed = current_time - self._minute_start
-            sleep_time = max(0, 60 - elapsed) + 1  # +1 秒缓冲
-            
-            logger.warning(
-                f"Tushare 达到速率限制 ({self._call_count}/{self.rate_limit_per_minute} 次/分钟)，"
-                f"等待 {sleep_time:.1f} 秒..."
-            )
-            
-            time.sleep(sleep_time)
-            
-            # 重置计数器
-            self._minute_start = time.time()
-            self._call_count = 0
-        
-        # 增加调用计数
-        self._call_count += 1
-        logger.debug(f"Tushare 当前分钟调用次数: {self._call_count}/{self.rate_limit_per_minute}")
+
+        在进程级 tushare 令牌桶上取令牌：配额内立即放行，超出时按速率排队，
+        多个 TushareFetcher 实例与线程共享同一配额
+        """
+        acquire_rate_limit('tushare')
     
     def _convert_stock_code(self, stock_code: str) -> str:
         """
@@ -285,7 +248,7 @@ class TushareFetcher(BaseFetcher):
         
         # 美股不支持，抛出异常让 DataFetcherManager 切换到其他数据源
         if _is_us_code(stock_code):
-            raise DataFetchError(f"TushareFetcher 不支持美股 {stock_code}，请使用 AkshareFetcher 或 YfinanceFetcher")
+            raise UnsupportedMarketError(f"TushareFetcher 不支持美股 {stock_code}，请使用 AkshareFetcher 或 YfinanceFetcher")
         
         # 速率限制检查
         self._check_rate_limit()
@@ -362,6 +325,86 @@ class TushareFetcher(BaseFetcher):
         
         return df
 
+    def get_trade_dates(self, start_date: str, end_date: str, market: str = 'cn') -> List[str]:
+        """
+        获取区间内的交易日
+
+        Args:
+            start_date: 开始日期（YYYY-MM-DD）
+            end_date: 结束日期（YYYY-MM-DD）
+            market: 市场（cn: A 股 trade_cal / hk: 港股 hk_tradecal / us: 美股 us_tradecal）
+
+        Returns:
+            升序排列的交易日列表（YYYY-MM-DD）
+        """
+        if self._api is None:
+            raise DataFetchError("Tushare API 未初始化，请检查 Token 配置")
+
+        self._check_rate_limit()
+        params = dict(
+            start_date=start_date.replace('-', ''),
+            end_date=end_date.replace('-', ''),
+            is_open='1',
+        )
+        if market == 'hk':
+            df = self._api.hk_tradecal(**params)
+        elif market == 'us':
+            df = self._api.us_tradecal(**params)
+        else:
+            df = self._api.trade_cal(exchange='', **params)
+        if df is None or df.empty:
+            return []
+        if 'is_open' in df.columns:
+            df = df[df['is_open'].astype(str) == '1']
+        return sorted(pd.to_datetime(df['cal_date'], format='%Y%m%d').dt.strftime('%Y-%m-%d').unique())
+
+    def get_daily_by_trade_date(
+        self,
+        trade_date: str,
+        stock_codes: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        按交易日一次性获取全市场 A 股日线（daily(trade_date=...)，单次请求）
+
+        相比按 ts_code 逐只拉取，N 只股票补齐一个交易日只消耗 1 次配额。
+        返回数据未计算均线/量比，需要结合本地历史重算。
+
+        Args:
+            trade_date: 交易日（YYYY-MM-DD）
+            stock_codes: 只保留这些代码（6 位代码），None 表示全市场
+
+        Returns:
+            含 code + STANDARD_COLUMNS + pre_close（昨收，除权日为除权参考价）的 DataFrame；
+            当日数据尚未发布时返回空 DataFrame
+        """
+        if self._api is None:
+            raise DataFetchError("Tushare API 未初始化，请检查 Token 配置")
+
+        self._check_rate_limit()
+        try:
+            df = self._api.daily(trade_date=trade_date.replace('-', ''))
+        except Exception as e:
+            error_msg = str(e).lower()
+            if any(keyword in error_msg for keyword in ['quota', '配额', 'limit', '权限']):
+                raise RateLimitError(f"Tushare 配额超限: {e}") from e
+            raise DataFetchError(f"Tushare 按交易日获取 {trade_date} 失败: {e}") from e
+
+        if df is None or df.empty:
+            return pd.DataFrame(columns=['code'] + STANDARD_COLUMNS)
+
+        codes = df['ts_code'].str.split('.').str[0]
+        if stock_codes is not None:
+            df = df[codes.isin(set(stock_codes))]
+            codes = codes[df.index]
+
+        pre_close = df['pre_close'].values if 'pre_close' in df.columns else None
+        df = self._normalize_data(df, '')
+        df['code'] = codes.values
+        if pre_close is not None:
+            df['pre_close'] = pre_close
+        logger.info(f"[Tushare] 按交易日 {trade_date} 获取 {len(df)} 只股票日线")
+        return df.reset_index(drop=True)
+
     def get_stock_name(self, stock_code: str) -> Optional[str]:
         """
         获取股票名称
@@ -11,7 +11,8 @@ YfinanceFetcher - 兜底数据源 (Priority 4)
 关键策略：
 1. 自动将 A 股代码转换为 yfinance 格式（.SS / .SZ）
 2. 处理 Yahoo Finance 的数据格式差异
-3. 失败后指数退避重试
+3. 多只股票合并为一次 yf.download（多线程）批量下载
+4. 失败后指数退避重试
 """
 
 import logging
@@ -29,6 +30,7 @@ from tenacity import (
 )
 
 from .base import BaseFetcher, DataFetchError, STANDARD_COLUMNS
+from .rate_limiter import acquire_rate_limit
 from .realtime_types import UnifiedRealtimeQuote, RealtimeSource
 import os
 
@@ -142,6 +144,7 @@ class YfinanceFetcher(BaseFetcher):
         
         try:
             # 使用 yfinance 下载数据
+            acquire_rate_limit('yahoo')
             df = yf.download(
                 tickers=yf_code,
                 start=start_date,
@@ -219,6 +222,69 @@ class YfinanceFetcher(BaseFetcher):
         
         return df
 
+    def get_daily_data_batch(
+        self,
+        stock_codes: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        days: int = 30
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取多只股票的日线数据
+
+        所有代码合并为一次 yf.download(group_by='ticker', threads=True) 调用，
+        N 只美股/港股只需约一次往返
+
+        Returns:
+            {stock_code: 标准化 DataFrame}，无数据的代码不出现在结果中
+        """
+        import yfinance as yf
+
+        start_date, end_date = self._resolve_date_range(start_date, end_date, days)
+        tickers: Dict[str, str] = {}
+        for stock_code in dict.fromkeys(stock_codes):
+            tickers.setdefault(self._convert_stock_code(stock_code), stock_code)
+        if not tickers:
+            return {}
+
+        logger.info(f"[{self.name}] 批量下载 {len(tickers)} 只股票日线: {start_date} ~ {end_date}")
+        try:
+            acquire_rate_limit('yahoo')
+            raw = yf.download(
+                tickers=list(tickers),
+                start=start_date,
+                end=end_date,
+                group_by='ticker',
+                threads=True,
+                progress=False,
+                auto_adjust=True,
+            )
+        except Exception as e:
+            raise DataFetchError(f"Yahoo Finance 批量下载失败: {e}") from e
+
+        results: Dict[str, pd.DataFrame] = {}
+        if raw is None or raw.empty:
+            return results
+
+        for yf_code, stock_code in tickers.items():
+            if isinstance(raw.columns, pd.MultiIndex):
+                if yf_code not in raw.columns.get_level_values(0):
+                    continue
+                sub = raw[yf_code]
+            else:
+                sub = raw
+            # 不同市场交易日不同，合并下载后缺失的日期整行为 NaN
+            sub = sub.dropna(how='all')
+            if sub.empty:
+                continue
+            try:
+                results[stock_code] = self._process_raw_data(sub, stock_code)
+            except Exception as e:
+                logger.warning(f"[{self.name}] 批量下载 {stock_code} 数据处理失败: {e}")
+
+        logger.info(f"[{self.name}] 批量下载完成: 成功 {len(results)}/{len(tickers)}")
+        return results
+
     def get_main_indices(self) -> Optional[List[Dict[str, Any]]]:
         """
         获取主要指数行情 (Yahoo Finance)
@@ -239,6 +305,7 @@ class YfinanceFetcher(BaseFetcher):
         try:
             for ak_code, (yf_code, name) in yf_mapping.items():
                 try:
+                    acquire_rate_limit('yahoo')
                     ticker = yf.Ticker(yf_code)
                     # 获取最近2天数据以计算涨跌
                     hist = ticker.history(period='2d')
@@ -321,6 +388,7 @@ class YfinanceFetcher(BaseFetcher):
             symbol = stock_code.strip().upper()
             logger.debug(f"[Yfinance] 获取美股 {symbol} 实时行情")
             
+            acquire_rate_limit('yahoo')
             ticker = yf.Ticker(symbol)
             
             # 尝试获取 fast_info（更快，但字段较少）
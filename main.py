@@ -66,6 +66,8 @@ def parse_arguments() -> argparse.Namespace:
   python main.py --single-notify    # 启用单股推送模式（每分析完一只立即推送）
   python main.py --schedule         # 启用定时任务模式
   python main.py --market-review    # 仅运行大盘复盘
+  python main.py --source-status    # 运行结束后输出数据源健康度统计
+  python main.py --resume latest    # 续跑最近一次中断的批量分析（或指定运行编号）
         '''
     )
 
@@ -99,6 +101,14 @@ def parse_arguments() -> argparse.Namespace:
         help='启用单股推送模式：每分析完一只股票立即推送，而不是汇总推送'
     )
 
+    parser.add_argument(
+        '--resume',
+        type=str,
+        default=None,
+        metavar='RUN_ID',
+        help='续跑指定运行编号的批量分析（latest 表示最近一次），只执行未完成的阶段'
+    )
+
     parser.add_argument(
         '--workers',
         type=int,
@@ -195,6 +205,12 @@ def parse_arguments() -> argparse.Namespace:
         help='强制回测（即使已有回测结果也重新计算）'
     )
 
+    parser.add_argument(
+        '--source-status',
+        action='store_true',
+        help='运行结束后输出数据源健康度统计（EWMA 延迟、成功率、降级状态）'
+    )
+
     return parser.parse_args()
 
 
@@ -233,7 +249,8 @@ def run_full_analysis(
         results = pipeline.run(
             stock_codes=stock_codes,
             dry_run=args.dry_run,
-            send_notification=not args.no_notify
+            send_notification=not args.no_notify,
+            resume_run_id=getattr(args, 'resume', None)
         )
 
         # Issue #128: 分析间隔 - 在个股分析和大盘分析之间添加延迟
@@ -388,6 +405,13 @@ def start_bot_stream_clients(config: Config) -> None:
             logger.error(f"[Main] Failed to start Feishu Stream client: {exc}")
 
 
+def print_source_status() -> None:
+    """输出本进程内的数据源健康度统计"""
+    from data_provider.source_health import format_source_health_table, get_source_health_tracker
+
+    logger.info("数据源健康度统计:\n" + format_source_health_table(get_source_health_tracker().snapshot()))
+
+
 def main() -> int:
     """
     主入口函数
@@ -529,7 +553,17 @@ def main() -> int:
             from src.scheduler import run_with_schedule
             
             def scheduled_task():
+                if config.schedule_skip_non_trading_days:
+                    from data_provider.trading_calendar import get_trading_calendar, market_of
+                    markets = {market_of(code) for code in (stock_codes or config.stock_list)}
+                    if markets and not get_trading_calendar().is_trading_day_today(markets):
+                        logger.info(f"今日为非交易日（{', '.join(sorted(markets))}），跳过定时分析")
+                        return
                 run_full_analysis(config, args, stock_codes)
+                # --resume 只作用于启动时的第一次执行，之后每日运行使用新的运行编号
+                args.resume = None
+                if getattr(args, 'source_status', False):
+                    print_source_status()
             
             run_with_schedule(
                 task=scheduled_task,
@@ -540,6 +574,9 @@ def main() -> int:
         
         # 模式3: 正常单次运行
         run_full_analysis(config, args, stock_codes)
+
+        if getattr(args, 'source_status', False):
+            print_source_status()
         
         logger.info("\n程序执行完成")
         
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+日线写入性能基准：逐行 UPSERT vs 批量 UPSERT
+===================================
+
+模拟回测前的历史回填场景：多只股票各写入约 1000 根日线，
+分别测量首次写入（全部插入）与重复写入（全部更新）的耗时。
+
+用法：
+    python scripts/benchmark_save_daily_data.py
+    python scripts/benchmark_save_daily_data.py --sizes 1000 10000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.storage import DatabaseManager
+
+BARS_PER_CODE = 1000
+
+
+def _make_frames(total_rows: int) -> List[pd.DataFrame]:
+    """按每只股票 BARS_PER_CODE 根 K 线切分，生成 total_rows 行测试数据"""
+    rng = np.random.default_rng(42)
+    frames = []
+    remaining = total_rows
+    idx = 0
+    while remaining > 0:
+        periods = min(BARS_PER_CODE, remaining)
+        close = 10 + rng.random(periods).cumsum()
+        frames.append(pd.DataFrame({
+            'code': f"{600000 + idx:06d}",
+            'date': pd.bdate_range('2020-01-01', periods=periods),
+            'open': close,
+            'high': close + 0.5,
+            'low': close - 0.5,
+            'close': close,
+            'volume': rng.integers(1_000, 1_000_000, periods),
+            'amount': close * 1e6,
+            'pct_chg': rng.normal(0, 2, periods).round(2),
+            'ma5': close,
+            'ma10': close,
+            'ma20': close,
+            'volume_ratio': 1.0,
+        }))
+        remaining -= periods
+        idx += 1
+    return frames
+
+
+def _run(save: Callable[[pd.DataFrame, str, str], int], frames: List[pd.DataFrame]) -> float:
+    start = time.perf_counter()
+    for df in frames:
+        save(df, df['code'].iloc[0], 'Benchmark')
+    return time.perf_counter() - start
+
+
+def _bench_path(name: str, total_rows: int, frames: List[pd.DataFrame]) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        DatabaseManager.reset_instance()
+        db = DatabaseManager(db_url=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        save = db.save_daily_data if name == 'bulk' else db._save_daily_data_rowwise
+        insert_secs = _run(save, frames)
+        update_secs = _run(save, frames)
+        DatabaseManager.reset_instance()
+    return {'path': name, 'rows': total_rows, 'insert_s': insert_secs, 'update_s': update_secs}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="save_daily_data 写入性能基准")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help="测试的总行数（默认 1000 10000 100000）")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    results = []
+    for size in args.sizes:
+        frames = _make_frames(size)
+        for path in ('rowwise', 'bulk'):
+            results.append(_bench_path(path, size, frames))
+            r = results[-1]
+            print(f"{r['path']:>8} {r['rows']:>8} 行: 插入 {r['insert_s']:.2f}s, 更新 {r['update_s']:.2f}s")
+
+    print()
+    print(f"{'rows':>8} | {'rowwise insert':>14} | {'bulk insert':>11} | {'speedup':>7} | "
+          f"{'rowwise update':>14} | {'bulk update':>11} | {'speedup':>7}")
+    for size in args.sizes:
+        row = next(r for r in results if r['rows'] == size and r['path'] == 'rowwise')
+        bulk = next(r for r in results if r['rows'] == size and r['path'] == 'bulk')
+        print(f"{size:>8} | {row['insert_s']:>13.2f}s | {bulk['insert_s']:>10.2f}s | "
+              f"{row['insert_s'] / bulk['insert_s']:>6.1f}x | {row['update_s']:>13.2f}s | "
+              f"{bulk['update_s']:>10.2f}s | {row['update_s'] / bulk['update_s']:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -17,7 +17,9 @@ from dataclasses import dataclass
 from typing import Optional, Dict, Any, List
 from json_repair import repair_json
 
+from data_provider.tracing import span
 from src.config import get_config
+from src.llm_governor import estimate_tokens, get_llm_governor, is_rate_limit_error
 
 logger = logging.getLogger(__name__)
 
@@ -90,8 +92,8 @@ def get_stock_name_multi_source(
 
     获取策略（按优先级）：
     1. 从传入的 context 中获取（realtime 数据）
-    2. 从静态映射表 STOCK_NAME_MAP 获取
-    3. 从 DataFetcherManager 获取（各数据源）
+    2. 从股票基础信息索引（stock_meta，内存）或静态映射表 STOCK_NAME_MAP 获取
+    3. 从 DataFetcherManager 获取（各数据源），结果回写到股票基础信息索引
     4. 返回默认名称（股票+代码）
 
     Args:
@@ -114,7 +116,12 @@ def get_stock_name_multi_source(
         if 'realtime' in context and context['realtime'].get('name'):
             return context['realtime']['name']
 
-    # 2. 从静态映射表获取
+    # 2. 从股票基础信息索引 / 静态映射表获取
+    from src.services.stock_meta_service import lookup_stock_name, remember_stock_name
+
+    name = lookup_stock_name(stock_code)
+    if name:
+        return name
     if stock_code in STOCK_NAME_MAP:
         return STOCK_NAME_MAP[stock_code]
 
@@ -132,6 +139,7 @@ def get_stock_name_multi_source(
             if name:
                 # 更新缓存
                 STOCK_NAME_MAP[stock_code] = name
+                remember_stock_name(stock_code, name)
                 return name
         except Exception as e:
             logger.debug(f"从数据源获取股票名称失败: {e}")
@@ -714,28 +722,36 @@ class GeminiAnalyzer:
                 kwargs[mode_value] = max_output_tokens
             return kwargs
 
+        governor = get_llm_governor()
+        estimated_tokens = estimate_tokens(prompt, max_output_tokens)
+        rate_limited = False
+
         for attempt in range(max_retries):
             try:
-                if attempt > 0:
+                # 限流后由节流器统一暂停，其他错误按指数退避
+                if attempt > 0 and not rate_limited:
                     delay = base_delay * (2 ** (attempt - 1))
                     delay = min(delay, 60)
                     logger.info(f"[OpenAI] 第 {attempt + 1} 次重试，等待 {delay:.1f} 秒...")
                     time.sleep(delay)
+                rate_limited = False
 
-                try:
-                    response = self._openai_client.chat.completions.create(**_kwargs_with_mode(mode))
-                except Exception as e:
-                    error_str = str(e)
-                    if mode == "max_tokens" and _is_unsupported_param_error(error_str, "max_tokens"):
-                        mode = "max_completion_tokens"
-                        self._token_param_mode[model_name] = mode
+                with governor.request(estimated_tokens) as slot, span('llm', 'chat', source=model_name):
+                    try:
                         response = self._openai_client.chat.completions.create(**_kwargs_with_mode(mode))
-                    elif mode == "max_completion_tokens" and _is_unsupported_param_error(error_str, "max_completion_tokens"):
-                        mode = None
-                        self._token_param_mode[model_name] = mode
-                        response = self._openai_client.chat.completions.create(**_kwargs_with_mode(mode))
-                    else:
-                        raise
+                    except Exception as e:
+                        error_str = str(e)
+                        if mode == "max_tokens" and _is_unsupported_param_error(error_str, "max_tokens"):
+                            mode = "max_completion_tokens"
+                            self._token_param_mode[model_name] = mode
+                            response = self._openai_client.chat.completions.create(**_kwargs_with_mode(mode))
+                        elif mode == "max_completion_tokens" and _is_unsupported_param_error(error_str, "max_completion_tokens"):
+                            mode = None
+                            self._token_param_mode[model_name] = mode
+                            response = self._openai_client.chat.completions.create(**_kwargs_with_mode(mode))
+                        else:
+                            raise
+                    slot.record_usage(response)
 
                 if response and response.choices and response.choices[0].message.content:
                     return response.choices[0].message.content
@@ -744,10 +760,11 @@ class GeminiAnalyzer:
                     
             except Exception as e:
                 error_str = str(e)
-                is_rate_limit = '429' in error_str or 'rate' in error_str.lower() or 'quota' in error_str.lower()
                 
-                if is_rate_limit:
+                if is_rate_limit_error(e):
                     logger.warning(f"[OpenAI] API 限流，第 {attempt + 1}/{max_retries} 次尝试: {error_str[:100]}")
+                    rate_limited = True
+                    governor.on_rate_limited(e, default_delay=min(base_delay * (2 ** attempt), 60))
                 else:
                     logger.warning(f"[OpenAI] API 调用失败，第 {attempt + 1}/{max_retries} 次尝试: {error_str[:100]}")
                 
@@ -784,21 +801,28 @@ class GeminiAnalyzer:
         
         last_error = None
         tried_fallback = getattr(self, '_using_fallback', False)
+        governor = get_llm_governor()
+        estimated_tokens = estimate_tokens(prompt, generation_config.get('max_output_tokens'))
+        rate_limited = False
         
         for attempt in range(max_retries):
             try:
-                # 请求前增加延时（防止请求过快触发限流）
-                if attempt > 0:
+                # 非限流错误按指数退避；限流后由节流器统一暂停（所有线程共享）
+                if attempt > 0 and not rate_limited:
                     delay = base_delay * (2 ** (attempt - 1))  # 指数退避: 5, 10, 20, 40...
                     delay = min(delay, 60)  # 最大60秒
                     logger.info(f"[Gemini] 第 {attempt + 1} 次重试，等待 {delay:.1f} 秒...")
                     time.sleep(delay)
+                rate_limited = False
                 
-                response = self._model.generate_content(
-                    prompt,
-                    generation_config=generation_config,
-                    request_options={"timeout": 120}
-                )
+                with governor.request(estimated_tokens) as slot, \
+                        span('llm', 'generate', source=getattr(self, '_current_model_name', None)):
+                    response = self._model.generate_content(
+                        prompt,
+                        generation_config=generation_config,
+                        request_options={"timeout": 120}
+                    )
+                    slot.record_usage(response)
                 
                 if response and response.text:
                     return response.text
@@ -810,10 +834,10 @@ class GeminiAnalyzer:
                 error_str = str(e)
                 
                 # 检查是否是 429 限流错误
-                is_rate_limit = '429' in error_str or 'quota' in error_str.lower() or 'rate' in error_str.lower()
-                
-                if is_rate_limit:
+                if is_rate_limit_error(e):
                     logger.warning(f"[Gemini] API 限流 (429)，第 {attempt + 1}/{max_retries} 次尝试: {error_str[:100]}")
+                    rate_limited = True
+                    governor.on_rate_limited(e, default_delay=min(base_delay * (2 ** attempt), 60))
                     
                     # 如果已经重试了一半次数且还没切换过备选模型，尝试切换
                     if attempt >= max_retries // 2 and not tried_fallback:
@@ -870,13 +894,8 @@ class GeminiAnalyzer:
             AnalysisResult 对象
         """
         code = context.get('code', 'Unknown')
-        config = get_config()
         
-        # 请求前增加延时（防止连续请求触发限流）
-        request_delay = config.gemini_request_delay
-        if request_delay > 0:
-            logger.debug(f"[LLM] 请求前等待 {request_delay:.1f} 秒...")
-            time.sleep(request_delay)
+        # 请求间隔由全局 LLM 节流器控制（见 _call_api_with_retry / _call_openai_api）
         
         # 优先从上下文获取股票名称（由 main.py 传入）
         name = context.get('stock_name')
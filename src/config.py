@@ -69,6 +69,11 @@ class Config:
     gemini_max_retries: int = 5  # 最大重试次数
     gemini_retry_delay: float = 5.0  # 重试基础延时（秒）
 
+    # LLM 全局节流（进程内所有 LLM 请求共享，0 表示不限；未配置 RPM 时按 60 / gemini_request_delay 推算）
+    llm_rpm: float = 0  # 每分钟请求数
+    llm_tpm: float = 0  # 每分钟 Token 数
+    llm_max_inflight: int = 0  # 同时进行中的请求数
+
     # OpenAI 兼容 API（备选，当 Gemini 不可用时使用）
     openai_api_key: Optional[str] = None
     openai_base_url: Optional[str] = None  # 如: https://api.openai.com/v1
@@ -157,6 +162,13 @@ class Config:
     
     # === 系统配置 ===
     max_workers: int = 3  # 低并发防封禁
+    # 分阶段流水线各阶段并发数（0 表示与 max_workers 一致；入库与单股推送固定单线程）
+    pipeline_fetch_workers: int = 0   # 行情/筹码/技术面数据
+    pipeline_search_workers: int = 0  # 新闻情报搜索
+    pipeline_llm_workers: int = 0     # LLM 分析
+    pipeline_queue_size: int = 0      # 阶段间队列容量（0 表示下一阶段并发数的 2 倍）
+    trace_enabled: bool = True        # 记录各阶段耗时并导出运行时间线
+    trace_dir: str = "./logs/traces"  # 时间线导出目录
     debug: bool = False
     http_proxy: Optional[str] = None  # HTTP 代理 (例如: http://127.0.0.1:10809)
     https_proxy: Optional[str] = None # HTTPS 代理
@@ -164,6 +176,7 @@ class Config:
     # === 定时任务配置 ===
     schedule_enabled: bool = False            # 是否启用定时任务
     schedule_time: str = "18:00"              # 每日推送时间（HH:MM 格式）
+    schedule_skip_non_trading_days: bool = True  # 自选股所属市场均休市时跳过定时任务
     market_review_enabled: bool = True        # 是否启用大盘复盘
 
     # === 实时行情增强数据配置 ===
@@ -171,6 +184,8 @@ class Config:
     enable_realtime_quote: bool = True
     # 筹码分布开关（该接口不稳定，云端部署建议关闭）
     enable_chip_distribution: bool = True
+    # 本地筹码计算（基于本地日线 + 换手率，不访问网络；数据不足时回退到网络数据源）
+    chip_local_engine: bool = True
     # 实时行情数据源优先级（逗号分隔）
     # 推荐顺序：tencent > akshare_sina > efinance > akshare_em > tushare
     # - tencent: 腾讯财经，有量比/换手率/市盈率等，单股查询稳定（推荐）
@@ -182,17 +197,44 @@ class Config:
     realtime_cache_ttl: int = 600
     # 熔断器冷却时间（秒）
     circuit_breaker_cooldown: int = 300
+    # 熔断状态文件（为空则不持久化），短生命周期的 CLI/定时任务可继承上次运行的熔断状态
+    circuit_breaker_state_file: str = ""
+    # 跨进程共享全量行情快照的目录（为空则不启用），同机多个入口共用一次全市场拉取
+    shared_snapshot_dir: str = ""
+    # 异步行情引擎：普通 A 股的新浪/腾讯/东财行情改由单线程 httpx 协程并发请求
+    async_quote_engine: bool = False
+    # 异步行情引擎对单个主机的最大并发请求数
+    async_quote_per_host_limit: int = 8
+
+    # === 日线增量拉取配置 ===
+    # 开启后仅拉取本地最新日期之后的缺口数据（首次运行仍全量拉取）
+    incremental_fetch_enabled: bool = True
+    # 与本地数据重叠校验的 K 线数量（用于发现除权等导致的历史价格变动）
+    incremental_overlap_bars: int = 2
+    # 运行前按交易日批量补齐自选股日线（Tushare daily(trade_date)，每个交易日 1 次请求）
+    tushare_by_date_sync: bool = False
+    # 按交易日同步范围：watchlist（仅自选股）/ all（全市场）
+    tushare_by_date_scope: str = "watchlist"
+
+    # === 日线对冲拉取配置 ===
+    # 开启后主数据源超出延迟预算仍未返回时，并行启动下一个数据源，先返回有效数据者胜出
+    hedged_fetch_enabled: bool = False
+    # 对冲延迟预算上限（秒）；数据源积累足够样本后取其近期 p90 耗时（不超过该值）
+    hedged_fetch_delay: float = 8.0
+
+    # 按数据源近期 EWMA 延迟/成功率动态调整尝试顺序（退化的数据源自动降级到队尾）
+    adaptive_source_order: bool = True
 
     # Discord 机器人状态
     discord_bot_status: str = "A股智能分析 | /help"
 
     # === 流控配置（防封禁关键参数）===
-    # Akshare 请求间隔范围（秒）
-    akshare_sleep_min: float = 2.0
-    akshare_sleep_max: float = 5.0
-    
-    # Tushare 每分钟最大请求数（免费配额）
-    tushare_rate_limit_per_minute: int = 80
+    # 按上游的进程级令牌桶限流覆盖配置，格式：上游=每分钟请求数/突发容量
+    # 上游：eastmoney, sina, tencent, tushare, baostock, tdx, yahoo（未配置的使用内置默认值）
+    rate_limits: str = ""
+
+    # 通达信长连接池大小
+    pytdx_pool_size: int = 2
     
     # 重试配置
     max_retries: int = 3
@@ -353,6 +395,9 @@ class Config:
             gemini_request_delay=float(os.getenv('GEMINI_REQUEST_DELAY', '2.0')),
             gemini_max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '5')),
             gemini_retry_delay=float(os.getenv('GEMINI_RETRY_DELAY', '5.0')),
+            llm_rpm=float(os.getenv('LLM_RPM', '0')),
+            llm_tpm=float(os.getenv('LLM_TPM', '0')),
+            llm_max_inflight=int(os.getenv('LLM_MAX_INFLIGHT', '0')),
             openai_api_key=os.getenv('OPENAI_API_KEY'),
             openai_base_url=os.getenv('OPENAI_BASE_URL'),
             openai_model=os.getenv('OPENAI_MODEL', 'gpt-4o-mini'),
@@ -397,11 +442,18 @@ class Config:
             log_dir=os.getenv('LOG_DIR', './logs'),
             log_level=os.getenv('LOG_LEVEL', 'INFO'),
             max_workers=int(os.getenv('MAX_WORKERS', '3')),
+            pipeline_fetch_workers=int(os.getenv('PIPELINE_FETCH_WORKERS', '0')),
+            pipeline_search_workers=int(os.getenv('PIPELINE_SEARCH_WORKERS', '0')),
+            pipeline_llm_workers=int(os.getenv('PIPELINE_LLM_WORKERS', '0')),
+            pipeline_queue_size=int(os.getenv('PIPELINE_QUEUE_SIZE', '0')),
+            trace_enabled=os.getenv('TRACE_ENABLED', 'true').lower() == 'true',
+            trace_dir=os.getenv('TRACE_DIR', os.path.join(os.getenv('LOG_DIR', './logs'), 'traces')),
             debug=os.getenv('DEBUG', 'false').lower() == 'true',
             http_proxy=os.getenv('HTTP_PROXY'),
             https_proxy=os.getenv('HTTPS_PROXY'),
             schedule_enabled=os.getenv('SCHEDULE_ENABLED', 'false').lower() == 'true',
             schedule_time=os.getenv('SCHEDULE_TIME', '18:00'),
+            schedule_skip_non_trading_days=os.getenv('SCHEDULE_SKIP_NON_TRADING_DAYS', 'true').lower() == 'true',
             market_review_enabled=os.getenv('MARKET_REVIEW_ENABLED', 'true').lower() == 'true',
             webui_enabled=os.getenv('WEBUI_ENABLED', 'false').lower() == 'true',
             webui_host=os.getenv('WEBUI_HOST', '127.0.0.1'),
@@ -432,6 +484,7 @@ class Config:
             # 实时行情增强数据配置
             enable_realtime_quote=os.getenv('ENABLE_REALTIME_QUOTE', 'true').lower() == 'true',
             enable_chip_distribution=os.getenv('ENABLE_CHIP_DISTRIBUTION', 'true').lower() == 'true',
+            chip_local_engine=os.getenv('CHIP_LOCAL_ENGINE', 'true').lower() == 'true',
             # 实时行情数据源优先级：
             # - tencent: 腾讯财经，有量比/换手率/PE/PB等，单股查询稳定（推荐）
             # - akshare_sina: 新浪财经，基本行情稳定，但无量比
@@ -439,7 +492,20 @@ class Config:
             # - tushare: Tushare Pro，需要2000积分，数据全面
             realtime_source_priority=cls._resolve_realtime_source_priority(),
             realtime_cache_ttl=int(os.getenv('REALTIME_CACHE_TTL', '600')),
-            circuit_breaker_cooldown=int(os.getenv('CIRCUIT_BREAKER_COOLDOWN', '300'))
+            circuit_breaker_cooldown=int(os.getenv('CIRCUIT_BREAKER_COOLDOWN', '300')),
+            circuit_breaker_state_file=os.getenv('CIRCUIT_BREAKER_STATE_FILE', ''),
+            shared_snapshot_dir=os.getenv('SHARED_SNAPSHOT_DIR', '').strip(),
+            async_quote_engine=os.getenv('ASYNC_QUOTE_ENGINE', 'false').lower() == 'true',
+            async_quote_per_host_limit=int(os.getenv('ASYNC_QUOTE_PER_HOST_LIMIT', '8')),
+            incremental_fetch_enabled=os.getenv('INCREMENTAL_FETCH_ENABLED', 'true').lower() == 'true',
+            incremental_overlap_bars=int(os.getenv('INCREMENTAL_OVERLAP_BARS', '2')),
+            tushare_by_date_sync=os.getenv('TUSHARE_BY_DATE_SYNC', 'false').lower() == 'true',
+            tushare_by_date_scope=os.getenv('TUSHARE_BY_DATE_SCOPE', 'watchlist').strip().lower(),
+            hedged_fetch_enabled=os.getenv('HEDGED_FETCH_ENABLED', 'false').lower() == 'true',
+            hedged_fetch_delay=float(os.getenv('HEDGED_FETCH_DELAY', '8')),
+            adaptive_source_order=os.getenv('ADAPTIVE_SOURCE_ORDER', 'true').lower() == 'true',
+            rate_limits=os.getenv('RATE_LIMITS', ''),
+            pytdx_pool_size=int(os.getenv('PYTDX_POOL_SIZE', '2')),
         )
     
     @classmethod
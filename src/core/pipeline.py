@@ -13,17 +13,34 @@ A股自选股智能分析系统 - 核心分析流水线
 
 import logging
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import date
+from dataclasses import dataclass
+from datetime import date, datetime
 from typing import List, Dict, Any, Optional, Tuple
 
 from src.config import get_config, Config
+from src.core.run_ledger import (
+    RUN_SCOPE,
+    STAGE_LLM_ANALYSIS,
+    STAGE_MARKET_DATA,
+    STAGE_NEWS_SEARCH,
+    STAGE_NOTIFICATION,
+    STAGE_PERSISTENCE,
+    STAGE_SUMMARY,
+    STATUS_FAILED,
+    RunLedger,
+)
+from src.core.staged_pipeline import Stage, StagedPipeline
+from src.core.stock_context import StockHistoryContext
 from src.storage import get_db
 from data_provider import DataFetcherManager
 from data_provider.realtime_types import ChipDistribution
+from data_provider.snapshot_cache import get_chip_cache
+from data_provider.tracing import RunTrace, format_trace_summary, start_trace, stop_trace
+from data_provider.trading_calendar import latest_trading_day_for
 from src.analyzer import GeminiAnalyzer, AnalysisResult, STOCK_NAME_MAP
 from src.notification import NotificationService, NotificationChannel
 from src.search_service import SearchService
+from src.services.stock_meta_service import get_stock_meta_service, lookup_stock_name
 from src.enums import ReportType
 from src.stock_analyzer import StockTrendAnalyzer, TrendAnalysisResult
 from bot.models import BotMessage
@@ -32,6 +49,21 @@ from bot.models import BotMessage
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class StockWorkItem:
+    """单只股票在流水线各阶段之间传递的中间结果"""
+    code: str
+    stock_name: str = ''
+    history: Optional[StockHistoryContext] = None
+    realtime_quote: Any = None
+    chip_data: Optional[ChipDistribution] = None
+    trend_result: Optional[TrendAnalysisResult] = None
+    context: Optional[Dict[str, Any]] = None
+    news_context: Optional[str] = None
+    enhanced_context: Optional[Dict[str, Any]] = None
+    result: Optional[AnalysisResult] = None
+
+
 class StockAnalysisPipeline:
     """
     股票分析主流程调度器
@@ -70,6 +102,10 @@ class StockAnalysisPipeline:
         # 初始化各模块
         self.db = get_db()
         self.fetcher_manager = DataFetcherManager()
+        # 筹码分布日缓存持久化到数据库，跨进程/重启后同一交易日的重复分析不再请求
+        get_chip_cache().set_store(self.db)
+        # 本轮已通过批量接口（按交易日同步 / 美股港股批量下载）写入最新日线的代码，跳过逐只拉取
+        self._prefetched_daily_codes: set = set()
         # 不再单独创建 akshare_fetcher，统一使用 fetcher_manager 获取增强数据
         self.trend_analyzer = StockTrendAnalyzer()  # 趋势分析器
         self.analyzer = GeminiAnalyzer()
@@ -99,6 +135,13 @@ class StockAnalysisPipeline:
         else:
             logger.warning("搜索服务未启用（未配置 API Key）")
     
+    def warmup_stock_meta(self) -> None:
+        """载入股票基础信息索引，超过一天未刷新时批量刷新"""
+        try:
+            get_stock_meta_service().warmup(fetcher_manager=self.fetcher_manager)
+        except Exception as e:
+            logger.warning(f"股票基础信息预热失败: {e}")
+
     def fetch_and_save_stock_data(
         self, 
         code: str,
@@ -108,9 +151,9 @@ class StockAnalysisPipeline:
         获取并保存单只股票数据
         
         断点续传逻辑：
-        1. 检查数据库是否已有今日数据
+        1. 检查数据库是否已有该市场最近一个交易日的数据（周末/节假日不会再重复拉取）
         2. 如果有且不强制刷新，则跳过网络请求
-        3. 否则从数据源获取并保存
+        3. 否则从数据源获取并保存（开启增量模式时仅拉取缺失的尾部数据）
         
         Args:
             code: 股票代码
@@ -120,16 +163,31 @@ class StockAnalysisPipeline:
             Tuple[是否成功, 错误信息]
         """
         try:
-            today = date.today()
-            
-            # 断点续传检查：如果今日数据已存在，跳过
-            if not force_refresh and self.db.has_today_data(code, today):
-                logger.info(f"[{code}] 今日数据已存在，跳过获取（断点续传）")
+            # 断点续传检查：最近一个交易日的数据已存在则跳过
+            target_date = latest_trading_day_for(code)
+            if not force_refresh and self.db.has_today_data(code, target_date):
+                if target_date == date.today():
+                    logger.info(f"[{code}] 今日数据已存在，跳过获取（断点续传）")
+                else:
+                    logger.info(f"[{code}] 最近交易日 {target_date} 数据已存在，跳过获取（非交易日）")
+                return True, None
+
+            if not force_refresh and code in self._prefetched_daily_codes:
+                logger.info(f"[{code}] 本轮已批量获取最新日线，跳过获取")
                 return True, None
             
-            # 从数据源获取数据
+            # 从数据源获取数据（增量模式下仅拉取本地最新日期之后的缺口）
             logger.info(f"[{code}] 开始从数据源获取数据...")
-            df, source_name = self.fetcher_manager.get_daily_data(code, days=30)
+            if self.config.incremental_fetch_enabled and not force_refresh:
+                history = self.db.get_daily_history_df(code, days=30)
+                df, source_name = self.fetcher_manager.get_daily_data_incremental(
+                    code,
+                    history=history,
+                    days=30,
+                    overlap_bars=self.config.incremental_overlap_bars,
+                )
+            else:
+                df, source_name = self.fetcher_manager.get_daily_data(code, days=30)
             
             if df is None or df.empty:
                 return False, "获取数据为空"
@@ -145,17 +203,68 @@ class StockAnalysisPipeline:
             logger.error(f"[{code}] {error_msg}")
             return False, error_msg
     
+    def sync_daily_by_trade_date(self, stock_codes: List[str]) -> None:
+        """
+        按交易日批量补齐日线（Tushare），补齐到最新交易日的股票后续跳过逐只拉取
+
+        失败时仅记录日志，回退到逐只拉取
+        """
+        from src.services.daily_sync_service import DailySyncService
+
+        try:
+            service = DailySyncService(db_manager=self.db)
+            if not service.is_available():
+                logger.info("按交易日同步需要 Tushare Token，已跳过")
+                return
+            scope_all = self.config.tushare_by_date_scope == 'all'
+            stats = service.sync_by_trade_date(None if scope_all else stock_codes)
+        except Exception as e:
+            logger.warning(f"按交易日批量同步失败，回退到逐只拉取: {e}")
+            return
+
+        synced = set(stats['synced_codes']) & set(stock_codes) if stats['up_to_date'] else set()
+        self._prefetched_daily_codes.update(synced)
+        logger.info(
+            f"按交易日同步完成：请求 {stats['api_calls']} 次，新增 {stats['saved']} 条，"
+            f"{len(synced)} 只股票无需逐只拉取"
+        )
+
+    def prefetch_overseas_daily(self, stock_codes: List[str]) -> None:
+        """
+        美股/港股日线批量下载（一次 yfinance 往返代替 N 次），写入成功的代码后续跳过逐只拉取
+        """
+        from data_provider.akshare_fetcher import _is_hk_code, _is_us_code
+
+        overseas = [
+            code for code in stock_codes
+            if (_is_us_code(code) or _is_hk_code(code)) and code not in self._prefetched_daily_codes
+        ]
+        if len(overseas) < 2:
+            return
+
+        try:
+            frames = self.fetcher_manager.get_daily_data_batch(overseas, days=30, fallback=False)
+        except Exception as e:
+            logger.warning(f"美股/港股日线批量获取失败，回退到逐只拉取: {e}")
+            return
+
+        for code, (df, source_name) in frames.items():
+            try:
+                self.db.save_daily_data(df, code, source_name)
+                self._prefetched_daily_codes.add(code)
+            except Exception as e:
+                logger.warning(f"[{code}] 批量日线保存失败: {e}")
+        logger.info(f"美股/港股日线批量获取完成：{len(self._prefetched_daily_codes & set(overseas))}/{len(overseas)} 只")
+
     def analyze_stock(self, code: str, report_type: ReportType) -> Optional[AnalysisResult]:
         """
         分析单只股票（增强版：含量比、换手率、筹码分析、多维度情报）
         
-        流程：
-        1. 获取实时行情（量比、换手率）- 通过 DataFetcherManager 自动故障切换
-        2. 获取筹码分布 - 通过 DataFetcherManager 带熔断保护
-        3. 进行趋势分析（基于交易理念）
-        4. 多维度情报搜索（最新消息+风险排查+业绩预期）
-        5. 从数据库获取分析上下文
-        6. 调用 AI 进行综合分析
+        流程（各步骤同时作为分阶段流水线的阶段处理函数，见 run）：
+        1. 准备行情数据：实时行情、筹码分布、技术面上下文与趋势分析
+        2. 多维度情报搜索（最新消息+风险排查+业绩预期）
+        3. 调用 AI 进行综合分析
+        4. 保存分析历史
         
         Args:
             code: 股票代码
@@ -165,158 +274,169 @@ class StockAnalysisPipeline:
             AnalysisResult 或 None（如果分析失败）
         """
         try:
-            # 获取股票名称（优先从实时行情获取真实名称）
-            stock_name = STOCK_NAME_MAP.get(code, '')
-            
-            # Step 1: 获取实时行情（量比、换手率等）- 使用统一入口，自动故障切换
-            realtime_quote = None
-            try:
-                realtime_quote = self.fetcher_manager.get_realtime_quote(code)
-                if realtime_quote:
-                    # 使用实时行情返回的真实股票名称
-                    if realtime_quote.name:
-                        stock_name = realtime_quote.name
-                    # 兼容不同数据源的字段（有些数据源可能没有 volume_ratio）
-                    volume_ratio = getattr(realtime_quote, 'volume_ratio', None)
-                    turnover_rate = getattr(realtime_quote, 'turnover_rate', None)
-                    logger.info(f"[{code}] {stock_name} 实时行情: 价格={realtime_quote.price}, "
-                              f"量比={volume_ratio}, 换手率={turnover_rate}% "
-                              f"(来源: {realtime_quote.source.value if hasattr(realtime_quote, 'source') else 'unknown'})")
-                else:
-                    logger.info(f"[{code}] 实时行情获取失败或已禁用，将使用历史数据进行分析")
-            except Exception as e:
-                logger.warning(f"[{code}] 获取实时行情失败: {e}")
+            item = self.prepare_market_data(code)
+            self.search_news(item)
+            self.run_llm_analysis(item)
+            if item.result:
+                self.save_analysis(item, report_type)
+            return item.result
             
-            # 如果还是没有名称，使用代码作为名称
-            if not stock_name:
-                stock_name = f'股票{code}'
-            
-            # Step 2: 获取筹码分布 - 使用统一入口，带熔断保护
-            chip_data = None
-            try:
-                chip_data = self.fetcher_manager.get_chip_distribution(code)
-                if chip_data:
-                    logger.info(f"[{code}] 筹码分布: 获利比例={chip_data.profit_ratio:.1%}, "
-                              f"90%集中度={chip_data.concentration_90:.2%}")
-                else:
-                    logger.debug(f"[{code}] 筹码分布获取失败或已禁用")
-            except Exception as e:
-                logger.warning(f"[{code}] 获取筹码分布失败: {e}")
-            
-            # Step 3: 趋势分析（基于交易理念）
-            trend_result: Optional[TrendAnalysisResult] = None
-            try:
-                # 获取历史数据进行趋势分析
-                context = self.db.get_analysis_context(code)
-                if context and 'raw_data' in context:
-                    import pandas as pd
-                    raw_data = context['raw_data']
-                    if isinstance(raw_data, list) and len(raw_data) > 0:
-                        df = pd.DataFrame(raw_data)
-                        trend_result = self.trend_analyzer.analyze(df, code)
-                        logger.info(f"[{code}] 趋势分析: {trend_result.trend_status.value}, "
-                                  f"买入信号={trend_result.buy_signal.value}, 评分={trend_result.signal_score}")
-            except Exception as e:
-                logger.warning(f"[{code}] 趋势分析失败: {e}")
-            
-            # Step 4: 多维度情报搜索（最新消息+风险排查+业绩预期）
-            news_context = None
-            if self.search_service.is_available:
-                logger.info(f"[{code}] 开始多维度情报搜索...")
-                
-                # 使用多维度搜索（最多5次搜索）
-                intel_results = self.search_service.search_comprehensive_intel(
-                    stock_code=code,
-                    stock_name=stock_name,
-                    max_searches=5
-                )
-                
-                # 格式化情报报告
-                if intel_results:
-                    news_context = self.search_service.format_intel_report(intel_results, stock_name)
-                    total_results = sum(
-                        len(r.results) for r in intel_results.values() if r.success
-                    )
-                    logger.info(f"[{code}] 情报搜索完成: 共 {total_results} 条结果")
-                    logger.debug(f"[{code}] 情报搜索结果:\n{news_context}")
-
-                    # 保存新闻情报到数据库（用于后续复盘与查询）
-                    try:
-                        query_context = self._build_query_context()
-                        for dim_name, response in intel_results.items():
-                            if response and response.success and response.results:
-                                self.db.save_news_intel(
-                                    code=code,
-                                    name=stock_name,
-                                    dimension=dim_name,
-                                    query=response.query,
-                                    response=response,
-                                    query_context=query_context
-                                )
-                    except Exception as e:
-                        logger.warning(f"[{code}] 保存新闻情报失败: {e}")
+        except Exception as e:
+            logger.error(f"[{code}] 分析失败: {e}")
+            logger.exception(f"[{code}] 详细错误信息:")
+            return None
+
+    def prepare_market_data(self, code: str) -> StockWorkItem:
+        """
+        行情数据阶段：实时行情、筹码分布、技术面上下文与趋势分析
+
+        本地日线只查询一次（StockHistoryContext），筹码、趋势、Prompt 上下文与快照共用；
+        单项失败只记录日志
+        """
+        item = StockWorkItem(code=code, history=StockHistoryContext(code, self.db))
+        # 获取股票名称（优先从实时行情获取真实名称）
+        stock_name = lookup_stock_name(code) or STOCK_NAME_MAP.get(code, '')
+
+        # 实时行情（量比、换手率等）- 使用统一入口，自动故障切换
+        try:
+            realtime_quote = self.fetcher_manager.get_realtime_quote(code)
+            if realtime_quote:
+                item.realtime_quote = realtime_quote
+                # 使用实时行情返回的真实股票名称
+                if realtime_quote.name:
+                    stock_name = realtime_quote.name
+                # 兼容不同数据源的字段（有些数据源可能没有 volume_ratio）
+                volume_ratio = getattr(realtime_quote, 'volume_ratio', None)
+                turnover_rate = getattr(realtime_quote, 'turnover_rate', None)
+                logger.info(f"[{code}] {stock_name} 实时行情: 价格={realtime_quote.price}, "
+                          f"量比={volume_ratio}, 换手率={turnover_rate}% "
+                          f"(来源: {realtime_quote.source.value if hasattr(realtime_quote, 'source') else 'unknown'})")
             else:
-                logger.info(f"[{code}] 搜索服务不可用，跳过情报搜索")
-            
-            # Step 5: 获取分析上下文（技术面数据）
-            context = self.db.get_analysis_context(code)
-            
-            if context is None:
-                logger.warning(f"[{code}] 无法获取历史行情数据，将仅基于新闻和实时行情分析")
-                from datetime import date
-                context = {
-                    'code': code,
-                    'stock_name': stock_name,
-                    'date': date.today().isoformat(),
-                    'data_missing': True,
-                    'today': {},
-                    'yesterday': {}
-                }
-            
-            # Step 6: 增强上下文数据（添加实时行情、筹码、趋势分析结果、股票名称）
-            enhanced_context = self._enhance_context(
-                context, 
-                realtime_quote, 
-                chip_data, 
-                trend_result,
-                stock_name  # 传入股票名称
+                logger.info(f"[{code}] 实时行情获取失败或已禁用，将使用历史数据进行分析")
+        except Exception as e:
+            logger.warning(f"[{code}] 获取实时行情失败: {e}")
+
+        # 如果还是没有名称，使用代码作为名称
+        item.stock_name = stock_name or f'股票{code}'
+
+        # 筹码分布 - 使用统一入口，带熔断保护
+        try:
+            item.chip_data = self.fetcher_manager.get_chip_distribution(
+                code,
+                history=item.history.df,
+                realtime_quote=item.realtime_quote,
             )
-            
-            # Step 7: 调用 AI 分析（传入增强的上下文和新闻）
-            result = self.analyzer.analyze(enhanced_context, news_context=news_context)
+            if item.chip_data:
+                logger.info(f"[{code}] 筹码分布: 获利比例={item.chip_data.profit_ratio:.1%}, "
+                          f"90%集中度={item.chip_data.concentration_90:.2%}")
+            else:
+                logger.debug(f"[{code}] 筹码分布获取失败或已禁用")
+        except Exception as e:
+            logger.warning(f"[{code}] 获取筹码分布失败: {e}")
 
-            # Step 7.5: 填充分析时的价格信息到 result
-            if result:
-                realtime_data = enhanced_context.get('realtime', {})
-                result.current_price = realtime_data.get('price')
-                result.change_pct = realtime_data.get('change_pct')
+        # 技术面上下文 + 趋势分析（基于交易理念）
+        context = item.history.analysis_context()
+        try:
+            if not item.history.empty:
+                item.trend_result = self.trend_analyzer.analyze(item.history.df, code)
+                logger.info(f"[{code}] 趋势分析（{len(item.history.df)} 根日线）: "
+                          f"{item.trend_result.trend_status.value}, "
+                          f"买入信号={item.trend_result.buy_signal.value}, 评分={item.trend_result.signal_score}")
+        except Exception as e:
+            logger.warning(f"[{code}] 趋势分析失败: {e}")
 
-            # Step 8: 保存分析历史记录
-            if result:
-                try:
-                    context_snapshot = self._build_context_snapshot(
-                        enhanced_context=enhanced_context,
-                        news_content=news_context,
-                        realtime_quote=realtime_quote,
-                        chip_data=chip_data
-                    )
-                    self.db.save_analysis_history(
-                        result=result,
-                        query_id=self.query_id or "",
-                        report_type=report_type.value,
-                        news_content=news_context,
-                        context_snapshot=context_snapshot,
-                        save_snapshot=self.save_context_snapshot
+        if context is None:
+            logger.warning(f"[{code}] 无法获取历史行情数据，将仅基于新闻和实时行情分析")
+            context = {
+                'code': code,
+                'stock_name': item.stock_name,
+                'date': date.today().isoformat(),
+                'data_missing': True,
+                'today': {},
+                'yesterday': {}
+            }
+        item.context = context
+        return item
+
+    def search_news(self, item: StockWorkItem) -> StockWorkItem:
+        """新闻搜索阶段：多维度情报搜索并保存到数据库"""
+        code, stock_name = item.code, item.stock_name
+        if not self.search_service.is_available:
+            logger.info(f"[{code}] 搜索服务不可用，跳过情报搜索")
+            return item
+
+        logger.info(f"[{code}] 开始多维度情报搜索...")
+        # 使用多维度搜索（最多5次搜索）
+        intel_results = self.search_service.search_comprehensive_intel(
+            stock_code=code,
+            stock_name=stock_name,
+            max_searches=5
+        )
+        if not intel_results:
+            return item
+
+        # 格式化情报报告
+        item.news_context = self.search_service.format_intel_report(intel_results, stock_name)
+        total_results = sum(
+            len(r.results) for r in intel_results.values() if r.success
+        )
+        logger.info(f"[{code}] 情报搜索完成: 共 {total_results} 条结果")
+        logger.debug(f"[{code}] 情报搜索结果:\n{item.news_context}")
+
+        # 保存新闻情报到数据库（用于后续复盘与查询）
+        try:
+            query_context = self._build_query_context()
+            for dim_name, response in intel_results.items():
+                if response and response.success and response.results:
+                    self.db.save_news_intel(
+                        code=code,
+                        name=stock_name,
+                        dimension=dim_name,
+                        query=response.query,
+                        response=response,
+                        query_context=query_context
                     )
-                except Exception as e:
-                    logger.warning(f"[{code}] 保存分析历史失败: {e}")
+        except Exception as e:
+            logger.warning(f"[{code}] 保存新闻情报失败: {e}")
+        return item
 
-            return result
-            
+    def run_llm_analysis(self, item: StockWorkItem) -> StockWorkItem:
+        """LLM 分析阶段：增强上下文后调用 AI 分析，并填充分析时的价格信息"""
+        # 增强上下文数据（添加实时行情、筹码、趋势分析结果、股票名称）
+        item.enhanced_context = self._enhance_context(
+            item.context,
+            item.realtime_quote,
+            item.chip_data,
+            item.trend_result,
+            item.stock_name
+        )
+        item.result = self.analyzer.analyze(item.enhanced_context, news_context=item.news_context)
+        if item.result:
+            realtime_data = item.enhanced_context.get('realtime', {})
+            item.result.current_price = realtime_data.get('price')
+            item.result.change_pct = realtime_data.get('change_pct')
+        return item
+
+    def save_analysis(self, item: StockWorkItem, report_type: ReportType) -> None:
+        """入库阶段：保存分析历史记录（失败只记录日志）"""
+        try:
+            context_snapshot = self._build_context_snapshot(
+                enhanced_context=item.enhanced_context,
+                news_content=item.news_context,
+                realtime_quote=item.realtime_quote,
+                chip_data=item.chip_data,
+                history=item.history
+            )
+            self.db.save_analysis_history(
+                result=item.result,
+                query_id=self.query_id or "",
+                report_type=report_type.value,
+                news_content=item.news_context,
+                context_snapshot=context_snapshot,
+                save_snapshot=self.save_context_snapshot
+            )
         except Exception as e:
-            logger.error(f"[{code}] 分析失败: {e}")
-            logger.exception(f"[{code}] 详细错误信息:")
-            return None
+            logger.warning(f"[{item.code}] 保存分析历史失败: {e}")
     
     def _enhance_context(
         self,
@@ -423,17 +543,21 @@ class StockAnalysisPipeline:
         enhanced_context: Dict[str, Any],
         news_content: Optional[str],
         realtime_quote: Any,
-        chip_data: Optional[ChipDistribution]
+        chip_data: Optional[ChipDistribution],
+        history: Optional[StockHistoryContext] = None
     ) -> Dict[str, Any]:
         """
         构建分析上下文快照
         """
-        return {
+        snapshot = {
             "enhanced_context": enhanced_context,
             "news_content": news_content,
             "realtime_quote_raw": self._safe_to_dict(realtime_quote),
             "chip_distribution_raw": self._safe_to_dict(chip_data),
         }
+        if history is not None:
+            snapshot["history"] = history.summary()
+        return snapshot
 
     @staticmethod
     def _safe_to_dict(value: Any) -> Optional[Dict[str, Any]]:
@@ -548,26 +672,8 @@ class StockAnalysisPipeline:
                     f"[{code}] 分析完成: {result.operation_advice}, "
                     f"评分 {result.sentiment_score}"
                 )
-                
-                # 单股推送模式（#55）：每分析完一只股票立即推送
-                if single_stock_notify and self.notifier.is_available():
-                    try:
-                        # 根据报告类型选择生成方法
-                        if report_type == ReportType.FULL:
-                            # 完整报告：使用决策仪表盘格式
-                            report_content = self.notifier.generate_dashboard_report([result])
-                            logger.info(f"[{code}] 使用完整报告格式")
-                        else:
-                            # 精简报告：使用单股报告格式（默认）
-                            report_content = self.notifier.generate_single_stock_report(result)
-                            logger.info(f"[{code}] 使用精简报告格式")
-                        
-                        if self.notifier.send(report_content):
-                            logger.info(f"[{code}] 单股推送成功")
-                        else:
-                            logger.warning(f"[{code}] 单股推送失败")
-                    except Exception as e:
-                        logger.error(f"[{code}] 单股推送异常: {e}")
+                if single_stock_notify:
+                    self.notify_single_stock(result, report_type)
             
             return result
             
@@ -576,31 +682,72 @@ class StockAnalysisPipeline:
             logger.exception(f"[{code}] 处理过程发生未知异常: {e}")
             return None
     
+    def notify_single_stock(self, result: AnalysisResult, report_type: ReportType) -> None:
+        """单股推送（#55）：每分析完一只股票立即推送"""
+        code = result.code
+        if not self.notifier.is_available():
+            return
+        try:
+            # 根据报告类型选择生成方法
+            if report_type == ReportType.FULL:
+                # 完整报告：使用决策仪表盘格式
+                report_content = self.notifier.generate_dashboard_report([result])
+                logger.info(f"[{code}] 使用完整报告格式")
+            else:
+                # 精简报告：使用单股报告格式（默认）
+                report_content = self.notifier.generate_single_stock_report(result)
+                logger.info(f"[{code}] 使用精简报告格式")
+            
+            if self.notifier.send(report_content):
+                logger.info(f"[{code}] 单股推送成功")
+            else:
+                logger.warning(f"[{code}] 单股推送失败")
+        except Exception as e:
+            logger.error(f"[{code}] 单股推送异常: {e}")
+
     def run(
         self, 
         stock_codes: Optional[List[str]] = None,
         dry_run: bool = False,
-        send_notification: bool = True
+        send_notification: bool = True,
+        resume_run_id: Optional[str] = None
     ) -> List[AnalysisResult]:
         """
         运行完整的分析流程
         
         流程：
         1. 获取待分析的股票列表
-        2. 使用线程池并发处理
+        2. 分阶段流水线并发处理（行情数据/新闻搜索/LLM 分析/入库/推送各自限流）
         3. 收集分析结果
         4. 发送通知
         
+        每个阶段完成后写入运行台账（pipeline_run_ledger），中断后可通过 resume_run_id 续跑，
+        已完成的搜索、AI 分析、入库与推送不再重复执行。
+        
         Args:
-            stock_codes: 股票代码列表（可选，默认使用配置中的自选股）
+            stock_codes: 股票代码列表（可选，默认使用配置中的自选股；续跑时默认使用原运行的列表）
             dry_run: 是否仅获取数据不分析
             send_notification: 是否发送推送通知
+            resume_run_id: 要续跑的运行编号（'latest' 表示最近一次运行）
             
         Returns:
             分析结果列表
         """
         start_time = time.time()
         
+        # 运行台账：续跑时载入已完成的阶段
+        if resume_run_id:
+            try:
+                ledger = RunLedger.resume(self.db, resume_run_id)
+            except ValueError as e:
+                logger.error(f"无法续跑: {e}")
+                return []
+            if stock_codes is None:
+                stock_codes = ledger.codes
+        else:
+            ledger = RunLedger(self.db)
+        self.run_id = ledger.run_id
+        
         # 使用配置中的股票列表
         if stock_codes is None:
             self.config.refresh_stock_list()
@@ -610,87 +757,206 @@ class StockAnalysisPipeline:
             logger.error("未配置自选股列表，请在 .env 文件中设置 STOCK_LIST")
             return []
         
-        logger.info(f"===== 开始分析 {len(stock_codes)} 只股票 =====")
-        logger.info(f"股票列表: {', '.join(stock_codes)}")
-        logger.info(f"并发数: {self.max_workers}, 模式: {'仅获取数据' if dry_run else '完整分析'}")
-        
-        # === 批量预取实时行情（优化：避免每只股票都触发全量拉取）===
-        # 只有股票数量 >= 5 时才进行预取，少量股票直接逐个查询更高效
-        if len(stock_codes) >= 5:
-            prefetch_count = self.fetcher_manager.prefetch_realtime_quotes(stock_codes)
-            if prefetch_count > 0:
-                logger.info(f"已启用批量预取架构：一次拉取全市场数据，{len(stock_codes)} 只股票共享缓存")
-        
-        # 单股推送模式（#55）：从配置读取
-        single_stock_notify = getattr(self.config, 'single_stock_notify', False)
-        # Issue #119: 从配置读取报告类型
-        report_type_str = getattr(self.config, 'report_type', 'simple').lower()
-        report_type = ReportType.FULL if report_type_str == 'full' else ReportType.SIMPLE
-        # Issue #128: 从配置读取分析间隔
-        analysis_delay = getattr(self.config, 'analysis_delay', 0)
-
-        if single_stock_notify:
-            logger.info(f"已启用单股推送模式：每分析完一只股票立即推送（报告类型: {report_type_str}）")
-        
-        results: List[AnalysisResult] = []
-        
-        # 使用线程池并发处理
-        # 注意：max_workers 设置较低（默认3）以避免触发反爬
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 提交任务
-            future_to_code = {
-                executor.submit(
-                    self.process_single_stock,
-                    code,
-                    skip_analysis=dry_run,
-                    single_stock_notify=single_stock_notify and send_notification,
-                    report_type=report_type  # Issue #119: 传递报告类型
-                ): code
-                for code in stock_codes
-            }
-            
-            # 收集结果
-            for idx, future in enumerate(as_completed(future_to_code)):
-                code = future_to_code[future]
-                try:
-                    result = future.result()
-                    if result:
-                        results.append(result)
-
-                    # Issue #128: 分析间隔 - 在个股分析和大盘分析之间添加延迟
-                    if idx < len(stock_codes) - 1 and analysis_delay > 0:
-                        logger.debug(f"等待 {analysis_delay} 秒后继续下一只股票...")
-                        time.sleep(analysis_delay)
-
-                except Exception as e:
-                    logger.error(f"[{code}] 任务执行失败: {e}")
-        
-        # 统计
-        elapsed_time = time.time() - start_time
-        
-        # dry-run 模式下，数据获取成功即视为成功
-        if dry_run:
-            # 检查哪些股票的数据今天已存在
-            success_count = sum(1 for code in stock_codes if self.db.has_today_data(code))
-            fail_count = len(stock_codes) - success_count
-        else:
-            success_count = len(results)
-            fail_count = len(stock_codes) - success_count
+        ledger.start(stock_codes)
+        logger.info(f"运行编号: {ledger.run_id}（中断后可使用 --resume {ledger.run_id} 继续）")
+        # 耗时追踪：各阶段/数据源/搜索/LLM/入库/推送的 span 导出为时间线与 p50/p95 汇总
+        trace = start_trace(ledger.run_id) if getattr(self.config, 'trace_enabled', False) else None
+        try:
+            # 已完成 AI 分析的股票无需再预取行情
+            pending_codes = [code for code in stock_codes if not ledger.is_done(code, STAGE_LLM_ANALYSIS)]
         
-        logger.info("===== 分析完成 =====")
-        logger.info(f"成功: {success_count}, 失败: {fail_count}, 耗时: {elapsed_time:.2f} 秒")
+            logger.info(f"===== 开始分析 {len(stock_codes)} 只股票 =====")
+            logger.info(f"股票列表: {', '.join(stock_codes)}")
+            logger.info(f"并发数: {self.max_workers}, 模式: {'仅获取数据' if dry_run else '完整分析'}")
         
-        # 发送通知（单股推送模式下跳过汇总推送，避免重复）
-        if results and send_notification and not dry_run:
+            # === 股票基础信息预热（每日批量刷新一次，名称查询只读内存）===
+            self.warmup_stock_meta()
+
+            # === 按交易日批量补齐日线（Tushare，可选）===
+            if self.config.tushare_by_date_sync and pending_codes:
+                self.sync_daily_by_trade_date(pending_codes)
+
+            # === 美股/港股日线批量下载 ===
+            self.prefetch_overseas_daily(pending_codes)
+
+            # === 批量预取实时行情（优化：避免每只股票都触发全量拉取）===
+            # 只有股票数量 >= 5 时才进行预取，少量股票直接逐个查询更高效
+            if len(pending_codes) >= 5:
+                prefetch_count = self.fetcher_manager.prefetch_realtime_quotes(pending_codes)
+                if prefetch_count > 0:
+                    logger.info(f"已启用批量预取架构：一次拉取全市场数据，{len(pending_codes)} 只股票共享缓存")
+        
+            # 单股推送模式（#55）：从配置读取
+            single_stock_notify = getattr(self.config, 'single_stock_notify', False)
+            # Issue #119: 从配置读取报告类型
+            report_type_str = getattr(self.config, 'report_type', 'simple').lower()
+            report_type = ReportType.FULL if report_type_str == 'full' else ReportType.SIMPLE
+
             if single_stock_notify:
-                # 单股推送模式：只保存汇总报告，不再重复推送
-                logger.info("单股推送模式：跳过汇总推送，仅保存报告到本地")
-                self._send_notifications(results, skip_push=True)
+                logger.info(f"已启用单股推送模式：每分析完一只股票立即推送（报告类型: {report_type_str}）")
+        
+            # 分阶段流水线：各阶段独立并发，阶段间有界队列衔接
+            # 注意：max_workers 设置较低（默认3）以避免触发反爬
+            staged = self._build_stages(
+                dry_run=dry_run,
+                single_stock_notify=single_stock_notify and send_notification,
+                report_type=report_type,
+                ledger=ledger,
+            )
+            results: List[AnalysisResult] = staged.run(stock_codes)
+            logger.info(f"流水线各阶段: {staged.summary()}")
+        
+            # 统计
+            elapsed_time = time.time() - start_time
+        
+            # dry-run 模式下，数据获取成功即视为成功
+            if dry_run:
+                # 检查哪些股票最近一个交易日的数据已存在
+                success_count = sum(
+                    1 for code in stock_codes
+                    if self.db.has_today_data(code, latest_trading_day_for(code))
+                )
+                fail_count = len(stock_codes) - success_count
             else:
-                self._send_notifications(results)
+                success_count = len(results)
+                fail_count = len(stock_codes) - success_count
         
-        return results
+            logger.info("===== 分析完成 =====")
+            logger.info(f"成功: {success_count}, 失败: {fail_count}, 耗时: {elapsed_time:.2f} 秒")
+        
+            # 发送通知（单股推送模式下跳过汇总推送，避免重复）
+            if results and send_notification and not dry_run:
+                if single_stock_notify:
+                    # 单股推送模式：只保存汇总报告，不再重复推送
+                    logger.info("单股推送模式：跳过汇总推送，仅保存报告到本地")
+                    self._send_notifications(results, skip_push=True)
+                elif ledger.is_done(RUN_SCOPE, STAGE_SUMMARY):
+                    logger.info("[断点续跑] 汇总报告已推送，仅保存报告到本地")
+                    self._send_notifications(results, skip_push=True)
+                else:
+                    self._send_notifications(results)
+                    ledger.mark(RUN_SCOPE, STAGE_SUMMARY)
+        
+            return results
+        finally:
+            if trace is not None:
+                self._export_trace(trace)
+    
+    def _export_trace(self, trace: RunTrace) -> None:
+        """停止采集并导出本次运行的时间线（chrome://tracing 可打开）与各阶段耗时汇总"""
+        stop_trace(trace)
+        logger.info(f"各阶段耗时（p50/p95）:\n{format_trace_summary(trace.summary())}")
+        try:
+            path = trace.export(self.config.trace_dir)
+            logger.info(f"运行时间线已导出: {path}")
+        except OSError as e:
+            logger.warning(f"导出运行时间线失败: {e}")
     
+    def _build_stages(
+        self,
+        dry_run: bool,
+        single_stock_notify: bool,
+        report_type: ReportType,
+        ledger: Optional[RunLedger] = None,
+    ) -> StagedPipeline:
+        """
+        构建分阶段流水线：行情数据 → 新闻搜索 → LLM 分析 → 入库 → 单股推送
+
+        网络密集的行情/搜索阶段与耗时较长的 LLM 阶段各自占用独立的并发名额；
+        入库与推送固定单线程（SQLite 单写者，推送按完成顺序发送）。
+        LLM 请求间隔与配额由全局 LLM 节流器控制（src/llm_governor.py），阶段内不再额外等待。
+        dry-run 模式下只执行行情数据阶段中的日线获取。
+
+        传入 ledger 时每个阶段完成后写入台账，并跳过台账中已完成的阶段：
+        AI 分析已完成的股票直接还原结果，不再获取行情、搜索与调用 LLM。
+        """
+        config = self.config
+        ledger = ledger or RunLedger(self.db)
+
+        def workers(value: int) -> int:
+            return value if value and value > 0 else self.max_workers
+
+        def market_data(code: str) -> Optional[StockWorkItem]:
+            if not dry_run:
+                restored = ledger.restored_result(code)
+                if restored is not None:
+                    logger.info(f"[{code}] [断点续跑] AI 分析已完成，跳过行情获取、搜索与分析")
+                    return StockWorkItem(code=code, stock_name=restored.name, result=restored)
+
+            logger.info(f"========== 开始处理 {code} ==========")
+            started_at = datetime.now()
+            success, error = self.fetch_and_save_stock_data(code)
+            if not success:
+                logger.warning(f"[{code}] 数据获取失败: {error}")
+                # 即使获取失败，也尝试用已有数据分析
+            if dry_run:
+                logger.info(f"[{code}] 跳过 AI 分析（dry-run 模式）")
+                ledger.mark(code, STAGE_MARKET_DATA, started_at=started_at)
+                return None
+            item = self.prepare_market_data(code)
+            ledger.mark(code, STAGE_MARKET_DATA, started_at=started_at)
+            return item
+
+        def news_search(item: StockWorkItem) -> StockWorkItem:
+            if item.result is not None:
+                return item
+            cached = ledger.payload(item.code, STAGE_NEWS_SEARCH)
+            if cached is not None:
+                logger.info(f"[{item.code}] [断点续跑] 复用已完成的情报搜索结果")
+                item.news_context = cached.get('news_context')
+                return item
+            started_at = datetime.now()
+            self.search_news(item)
+            ledger.mark(item.code, STAGE_NEWS_SEARCH, payload={'news_context': item.news_context}, started_at=started_at)
+            return item
+
+        def llm_analysis(item: StockWorkItem) -> Optional[StockWorkItem]:
+            if item.result is None:
+                started_at = datetime.now()
+                self.run_llm_analysis(item)
+                if not item.result:
+                    logger.warning(f"[{item.code}] AI 分析未返回结果")
+                    ledger.mark(item.code, STAGE_LLM_ANALYSIS, STATUS_FAILED, started_at=started_at)
+                    return None
+                # 续跑时重新分析（上次 success=False）：上次的入库/推送对应旧结果，需重新执行；
+                # 旧结果已进入汇总推送时，汇总同样重新推送
+                if ledger.reset(item.code, STAGE_PERSISTENCE, STAGE_NOTIFICATION):
+                    ledger.reset(RUN_SCOPE, STAGE_SUMMARY)
+                # 分析失败（success=False）的结果照常入库推送，但续跑时重新分析
+                if item.result.success:
+                    ledger.mark(item.code, STAGE_LLM_ANALYSIS, payload=item.result.to_dict(), started_at=started_at)
+                else:
+                    ledger.mark(item.code, STAGE_LLM_ANALYSIS, STATUS_FAILED, started_at=started_at)
+            logger.info(
+                f"[{item.code}] 分析完成: {item.result.operation_advice}, "
+                f"评分 {item.result.sentiment_score}"
+            )
+            return item
+
+        def persist(item: StockWorkItem) -> StockWorkItem:
+            if not ledger.is_done(item.code, STAGE_PERSISTENCE):
+                started_at = datetime.now()
+                self.save_analysis(item, report_type)
+                ledger.mark(item.code, STAGE_PERSISTENCE, started_at=started_at)
+            return item
+
+        def notify(item: StockWorkItem) -> AnalysisResult:
+            if single_stock_notify and not ledger.is_done(item.code, STAGE_NOTIFICATION):
+                started_at = datetime.now()
+                self.notify_single_stock(item.result, report_type)
+                ledger.mark(item.code, STAGE_NOTIFICATION, started_at=started_at)
+            return item.result
+
+        stages = [Stage(STAGE_MARKET_DATA, market_data, workers(config.pipeline_fetch_workers))]
+        if not dry_run:
+            stages += [
+                Stage(STAGE_NEWS_SEARCH, news_search, workers(config.pipeline_search_workers)),
+                Stage(STAGE_LLM_ANALYSIS, llm_analysis, workers(config.pipeline_llm_workers)),
+                Stage(STAGE_PERSISTENCE, persist, 1),
+                Stage(STAGE_NOTIFICATION, notify, 1),
+            ]
+        return StagedPipeline(stages, queue_size=config.pipeline_queue_size)
+
     def _send_notifications(self, results: List[AnalysisResult], skip_push: bool = False) -> None:
         """
         发送分析结果通知
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+批量分析运行台账（断点续跑）
+===================================
+
+职责：
+1. 每次批量运行分配 run_id，登记股票列表，逐只记录各流水线阶段的完成状态与时间
+2. 搜索结果与 AI 分析结果随阶段一起保存，恢复时直接复用
+3. --resume <run_id> 时只执行未完成的阶段，已完成的 LLM/搜索调用与推送不再重复
+
+与 has_today_data 的区别：后者只覆盖日线获取，台账覆盖 搜索 → LLM → 入库 → 推送 全流程。
+"""
+
+import logging
+import threading
+import uuid
+from dataclasses import fields
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.analyzer import AnalysisResult
+
+logger = logging.getLogger(__name__)
+
+# 阶段名称（与分阶段流水线一致）
+STAGE_QUEUED = 'queued'
+STAGE_MARKET_DATA = 'market_data'
+STAGE_NEWS_SEARCH = 'news_search'
+STAGE_LLM_ANALYSIS = 'llm_analysis'
+STAGE_PERSISTENCE = 'persistence'
+STAGE_NOTIFICATION = 'notification'
+# 汇总推送按整次运行记录一行
+STAGE_SUMMARY = 'summary'
+RUN_SCOPE = '*'
+
+STATUS_PENDING = 'pending'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_RESULT_FIELDS = {f.name for f in fields(AnalysisResult)}
+
+
+def new_run_id() -> str:
+    """生成 run_id：时间戳 + 随机后缀，便于在日志中辨认"""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def restore_result(payload: Dict[str, Any]) -> AnalysisResult:
+    """由台账中保存的 AnalysisResult.to_dict() 还原分析结果"""
+    return AnalysisResult(**{k: v for k, v in payload.items() if k in _RESULT_FIELDS})
+
+
+class RunLedger:
+    """
+    单次运行的台账（内存状态 + 数据库持久化，线程安全）
+
+    Args:
+        db: 数据库管理器
+        run_id: 运行编号（默认新生成）
+    """
+
+    def __init__(self, db, run_id: Optional[str] = None):
+        self.db = db
+        self.run_id = run_id or new_run_id()
+        self._state: Dict[Tuple[str, str], Tuple[str, Any]] = {}
+        self._codes: List[str] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def resume(cls, db, run_id: str) -> 'RunLedger':
+        """
+        载入已有运行的台账
+
+        Args:
+            run_id: 运行编号，'latest' 表示最近一次运行
+
+        Raises:
+            ValueError: 台账中不存在该运行
+        """
+        if run_id == 'latest':
+            run_id = db.get_latest_run_id()
+            if not run_id:
+                raise ValueError("没有可恢复的运行记录")
+        ledger = cls(db, run_id)
+        rows = db.get_run_ledger(run_id)
+        if not rows:
+            raise ValueError(f"未找到运行记录: {run_id}")
+        for row in rows:
+            if row['stage'] == STAGE_QUEUED:
+                ledger._codes.append(row['code'])
+            else:
+                ledger._state[(row['code'], row['stage'])] = (row['status'], row['payload'])
+        done = sum(1 for code in ledger._codes if ledger.is_done(code, STAGE_PERSISTENCE))
+        logger.info(f"[断点续跑] 载入运行 {run_id}：{len(ledger._codes)} 只股票，{done} 只已完成分析入库")
+        return ledger
+
+    @property
+    def codes(self) -> List[str]:
+        """本次运行登记的股票列表"""
+        return list(self._codes)
+
+    def start(self, codes: List[str]) -> None:
+        """登记股票列表（续跑时追加新增代码）"""
+        new_codes = [code for code in dict.fromkeys(codes) if code not in self._codes]
+        if new_codes:
+            self.db.start_run(self.run_id, new_codes, stage=STAGE_QUEUED)
+            self._codes.extend(new_codes)
+
+    def is_done(self, code: str, stage: str) -> bool:
+        state = self._state.get((code, stage))
+        return state is not None and state[0] == STATUS_DONE
+
+    def payload(self, code: str, stage: str) -> Any:
+        """已完成阶段保存的数据（未完成时返回 None）"""
+        state = self._state.get((code, stage))
+        return state[1] if state and state[0] == STATUS_DONE else None
+
+    def mark(
+        self,
+        code: str,
+        stage: str,
+        status: str = STATUS_DONE,
+        payload: Any = None,
+        started_at: Optional[datetime] = None,
+    ) -> None:
+        """记录阶段完成（或失败），立即写入数据库"""
+        with self._lock:
+            self._state[(code, stage)] = (status, payload)
+        self.db.record_run_stage(self.run_id, code, stage, status, payload=payload, started_at=started_at)
+
+    def reset(self, code: str, *stages: str) -> List[str]:
+        """
+        将已完成的阶段重置为 pending（上游阶段重新执行后，下游结果已过期）
+
+        Returns:
+            实际被重置的阶段
+        """
+        reset = [stage for stage in stages if self.is_done(code, stage)]
+        for stage in reset:
+            self.mark(code, stage, STATUS_PENDING)
+        return reset
+
+    def restored_result(self, code: str) -> Optional[AnalysisResult]:
+        """已完成的 AI 分析结果（未完成或无法还原时返回 None）"""
+        payload = self.payload(code, STAGE_LLM_ANALYSIS)
+        if not payload:
+            return None
+        try:
+            return restore_result(payload)
+        except Exception as e:
+            logger.warning(f"[断点续跑] [{code}] 还原分析结果失败，将重新分析: {e}")
+            return None
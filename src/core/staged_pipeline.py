@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+分阶段流水线执行器
+===================================
+
+职责：
+1. 每个阶段拥有独立的工作线程与并发上限，阶段之间通过有界队列衔接
+2. 上游阶段在队列满时等待（背压），避免行情数据大量堆积在内存中
+3. 单个任务在某阶段失败或被丢弃时不影响其他任务
+
+背景：
+原先每个工作线程串行执行 数据获取 → 搜索 → LLM 分析，一次 120 秒的 LLM 调用会占住一个
+数据获取名额，反之亦然。拆分阶段后第 N+1 只股票的网络请求与第 N 只股票的 LLM 推理重叠，
+整批耗时趋近于最慢阶段的耗时，而不是各阶段耗时之和。
+"""
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from data_provider.tracing import bind, bind_trace, current_trace, record_span
+
+logger = logging.getLogger(__name__)
+
+# 阶段结束标记
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """
+    流水线阶段
+
+    Attributes:
+        name: 阶段名称（用于日志与统计）
+        handler: 处理函数，返回值传给下一阶段；返回 None 表示该任务到此结束
+        workers: 本阶段并发线程数
+    """
+    name: str
+    handler: Callable[[Any], Any]
+    workers: int = 1
+
+
+class StagedPipeline:
+    """
+    分阶段流水线
+
+    Args:
+        stages: 按执行顺序排列的阶段
+        queue_size: 阶段间队列容量（0 表示下一阶段并发数的 2 倍）
+    """
+
+    def __init__(self, stages: Sequence[Stage], queue_size: int = 0):
+        if not stages:
+            raise ValueError("至少需要一个阶段")
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def run(self, items: Iterable[Any]) -> List[Any]:
+        """
+        执行流水线（阻塞直到所有任务处理完毕）
+
+        Args:
+            items: 输入任务，依次送入第一个阶段
+
+        Returns:
+            最后一个阶段的非 None 返回值（按完成顺序）
+        """
+        queues = [
+            queue.Queue(maxsize=self.queue_size or max(1, stage.workers) * 2)
+            for stage in self.stages
+        ]
+        self.stats = {
+            stage.name: {'processed': 0, 'dropped': 0, 'failed': 0, 'busy': 0.0}
+            for stage in self.stages
+        }
+        outputs: List[Any] = []
+        lock = threading.Lock()
+        remaining = [max(1, stage.workers) for stage in self.stages]
+        # 工作线程继承调用线程绑定的运行，span 不会写入并发执行的其他运行
+        run_trace = current_trace()
+
+        def worker(index: int) -> None:
+            with bind_trace(run_trace):
+                work(index)
+
+        def work(index: int) -> None:
+            stage = self.stages[index]
+            stats = self.stats[stage.name]
+            inbox = queues[index]
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    break
+                # 任务为股票代码或带 code 属性的对象；绑定后阶段内的数据源/搜索/LLM 耗时都归属到该股票
+                code = item if isinstance(item, str) else getattr(item, 'code', None)
+                started = time.perf_counter()
+                try:
+                    with bind(code):
+                        output = stage.handler(item)
+                except Exception as e:
+                    logger.exception(f"[流水线] 阶段 {stage.name} 处理失败: {e}")
+                    output, failed = None, True
+                else:
+                    failed = False
+                elapsed = time.perf_counter() - started
+                record_span('pipeline', stage.name, elapsed, code=code, ok=not failed)
+                with lock:
+                    stats['busy'] += elapsed
+                    stats['failed' if failed else ('dropped' if output is None else 'processed')] += 1
+                if output is None:
+                    continue
+                if outbox is not None:
+                    outbox.put(output)
+                else:
+                    with lock:
+                        outputs.append(output)
+
+            # 本阶段最后一个退出的线程通知下一阶段结束
+            with lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+            if last and outbox is not None:
+                for _ in range(remaining[index + 1]):
+                    outbox.put(_DONE)
+
+        threads = [
+            threading.Thread(target=worker, args=(index,), name=f"pipeline-{stage.name}-{n}", daemon=True)
+            for index, stage in enumerate(self.stages)
+            for n in range(remaining[index])
+        ]
+        for thread in threads:
+            thread.start()
+
+        for item in items:
+            queues[0].put(item)
+        for _ in range(remaining[0]):
+            queues[0].put(_DONE)
+
+        for thread in threads:
+            thread.join()
+        return outputs
+
+    def summary(self) -> Optional[str]:
+        """上一次运行各阶段的处理数与累计耗时"""
+        if not self.stats:
+            return None
+        return ", ".join(
+            f"{name}: {int(s['processed'])} 完成/{int(s['failed'])} 失败, 累计 {s['busy']:.1f}s"
+            for name, s in self.stats.items()
+        )
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+单只股票的日线上下文（单次运行内共享）
+===================================
+
+职责：
+1. 每只股票每次运行只查询一次数据库，载入最近 N 根日线为 DataFrame
+2. 供筹码计算、趋势分析、Prompt 上下文（今日/昨日对比）与上下文快照共用
+
+背景：
+原先单只股票分析时，筹码计算、趋势分析、分析上下文各自查询数据库；
+趋势分析读取的 raw_data 字段从未被 get_analysis_context 返回，实际从未执行。
+"""
+
+import math
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from data_provider.chip_engine import DEFAULT_LOOKBACK as CHIP_LOOKBACK
+from src.storage import DatabaseManager
+
+# 载入的日线根数：覆盖筹码计算窗口与 MA60
+HISTORY_BARS = max(CHIP_LOOKBACK, 60)
+
+
+def _bar_dict(row: pd.Series) -> Dict[str, Any]:
+    """DataFrame 行还原为 StockDaily.to_dict 格式（日期为 date，缺失值为 None）"""
+    bar = {}
+    for key, value in row.items():
+        if isinstance(value, np.generic):
+            value = value.item()
+        bar[key] = None if isinstance(value, float) and math.isnan(value) else value
+    if hasattr(bar.get('date'), 'date'):
+        bar['date'] = bar['date'].date()
+    return bar
+
+
+class StockHistoryContext:
+    """
+    单只股票的日线上下文（延迟载入，线程安全）
+
+    Args:
+        code: 股票代码
+        db: 数据库管理器（需提供 get_daily_history_df）
+        bars: 载入的日线根数
+    """
+
+    def __init__(self, code: str, db, bars: int = HISTORY_BARS):
+        self.code = code
+        self.db = db
+        self.bars = bars
+        self._df: Optional[pd.DataFrame] = None
+        self._lock = threading.Lock()
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """按日期升序的日线（首次访问时查询数据库，无数据时为空 DataFrame）"""
+        if self._df is None:
+            with self._lock:
+                if self._df is None:
+                    self._df = self.db.get_daily_history_df(self.code, days=self.bars)
+        return self._df
+
+    @property
+    def empty(self) -> bool:
+        return self.df.empty
+
+    def analysis_context(self) -> Optional[Dict[str, Any]]:
+        """与 DatabaseManager.get_analysis_context 同格式的今日/昨日对比上下文，无数据时返回 None"""
+        df = self.df
+        if df.empty:
+            return None
+        today = _bar_dict(df.iloc[-1])
+        yesterday = _bar_dict(df.iloc[-2]) if len(df) > 1 else None
+        return DatabaseManager.build_analysis_context(self.code, today, yesterday)
+
+    def summary(self) -> Dict[str, Any]:
+        """上下文快照中记录的日线范围"""
+        df = self.df
+        if df.empty:
+            return {'bars': 0}
+        return {
+            'bars': len(df),
+            'start': df['date'].iloc[0].date().isoformat(),
+            'end': df['date'].iloc[-1].date().isoformat(),
+        }
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+LLM 调用全局节流器（RPM / TPM / 并发上限 / 429 退避）
+===================================
+
+职责：
+1. 进程内所有 LLM 请求（CLI 批量分析、API 任务队列、机器人、大盘复盘）共享同一套配额
+2. 按每分钟请求数、每分钟 Token 数两个令牌桶放行，配额内不额外等待
+3. 限制同时进行中的请求数
+4. 收到 429 时解析服务端建议的重试时间，所有线程统一暂停到该时刻
+
+背景：
+原先在结果收集循环中 time.sleep(ANALYSIS_DELAY)，并在每次请求前固定等待 GEMINI_REQUEST_DELAY，
+只拖慢了单个线程，多线程下并不能真正拉开请求间隔，配额充足时又白白等待。
+
+配置（均可选）：
+    LLM_RPM=15             每分钟请求数（未配置时按 60 / GEMINI_REQUEST_DELAY 推算，均未配置则不限）
+    LLM_TPM=1000000        每分钟 Token 数（0 表示不限）
+    LLM_MAX_INFLIGHT=4     同时进行中的请求数（0 表示不限）
+"""
+
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from data_provider.rate_limiter import TokenBucket
+from data_provider.tracing import record_span
+
+logger = logging.getLogger(__name__)
+
+# 按字符数估算 Prompt Token 数（中英文混排的保守估计，请求完成后按实际用量校正）
+CHARS_PER_TOKEN = 2
+# 输出 Token 数的预估上限（分析结果 JSON 通常在此范围内）
+OUTPUT_TOKENS_ESTIMATE = 2048
+# 单次 429 暂停的上限（秒）
+MAX_COOLDOWN = 120.0
+
+_RETRY_AFTER_PATTERNS = (
+    re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+(?:\.\d+)?)', re.IGNORECASE),
+    re.compile(r'retry\s+(?:in|after)\s+(\d+(?:\.\d+)?)\s*(ms|s|sec|seconds)?', re.IGNORECASE),
+    re.compile(r'retry-after:?\s*(\d+(?:\.\d+)?)', re.IGNORECASE),
+)
+
+
+# 限流错误特征：HTTP 429、Gemini RESOURCE_EXHAUSTED、"rate limit"/"too many requests"、配额用尽
+# 只匹配完整短语：命中后会暂停进程内所有 LLM 调用，"generate"/"moderate" 之类的词不能误判
+_RATE_LIMIT_PATTERN = re.compile(
+    r'\b429\b|resource[_ ]exhausted|resource has been exhausted|rate[ _-]?limit|too many requests|\bquota\b',
+    re.IGNORECASE,
+)
+_RATE_LIMIT_ERROR_TYPES = ('RateLimitError', 'ResourceExhausted', 'TooManyRequests')
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """是否为限流/配额错误（429）"""
+    if getattr(error, 'status_code', None) == 429 or getattr(error, 'code', None) == 429:
+        return True
+    if type(error).__name__ in _RATE_LIMIT_ERROR_TYPES:
+        return True
+    return bool(_RATE_LIMIT_PATTERN.search(str(error)))
+
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """
+    从限流错误中解析服务端建议的重试等待秒数
+
+    依次尝试：响应头 retry-after-ms / retry-after（OpenAI SDK），
+    错误信息中的 retry_delay { seconds: N }（Gemini）、"retry in Ns"、"Retry-After: N"
+
+    Returns:
+        等待秒数，无法解析时返回 None
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if headers:
+        try:
+            if headers.get('retry-after-ms'):
+                return float(headers['retry-after-ms']) / 1000.0
+            if headers.get('retry-after'):
+                return float(headers['retry-after'])
+        except (TypeError, ValueError):
+            pass
+
+    message = str(error)
+    for pattern in _RETRY_AFTER_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            value = float(match.group(1))
+            unit = match.group(2) if match.lastindex and match.lastindex >= 2 else None
+            return value / 1000.0 if unit and unit.lower() == 'ms' else value
+    return None
+
+
+def estimate_tokens(prompt: str, max_output_tokens: Optional[int] = None) -> int:
+    """预估一次请求消耗的 Token 数（Prompt + 输出）"""
+    output = min(max_output_tokens or OUTPUT_TOKENS_ESTIMATE, OUTPUT_TOKENS_ESTIMATE)
+    return len(prompt) // CHARS_PER_TOKEN + output
+
+
+def usage_tokens(response: Any) -> Optional[int]:
+    """从 Gemini / OpenAI 响应中读取实际消耗的 Token 数"""
+    usage = getattr(response, 'usage_metadata', None)
+    total = getattr(usage, 'total_token_count', None) if usage is not None else None
+    if total is None:
+        usage = getattr(response, 'usage', None)
+        total = getattr(usage, 'total_tokens', None) if usage is not None else None
+    return int(total) if isinstance(total, (int, float)) and total > 0 else None
+
+
+class LLMRequest:
+    """一次受节流的请求，完成后通过 record_usage 上报实际 Token 用量"""
+
+    def __init__(self, governor: 'LLMGovernor', estimated_tokens: int):
+        self._governor = governor
+        self.estimated_tokens = estimated_tokens
+        self.actual_tokens: Optional[int] = None
+
+    def record_usage(self, response: Any) -> None:
+        actual = usage_tokens(response)
+        if actual is not None and self.actual_tokens is None:
+            self.actual_tokens = actual
+            self._governor._settle(self.estimated_tokens, actual)
+
+
+class LLMGovernor:
+    """
+    LLM 调用节流器（线程安全）
+
+    Args:
+        rpm: 每分钟请求数（0 表示不限）
+        tpm: 每分钟 Token 数（0 表示不限）
+        max_inflight: 同时进行中的请求数（0 表示不限）
+    """
+
+    def __init__(self, rpm: float = 0, tpm: float = 0, max_inflight: int = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_inflight = max_inflight
+        # 请求桶按稳定速率放行（突发容量为 1 秒的配额），避免窗口起点集中发出后整分钟被限流
+        self._requests = TokenBucket('llm_requests', rate=rpm / 60.0, burst=max(1, int(rpm / 60))) if rpm > 0 else None
+        self._tokens = TokenBucket('llm_tokens', rate=tpm / 60.0, burst=max(1, int(tpm / 60))) if tpm > 0 else None
+        self._inflight = threading.BoundedSemaphore(max_inflight) if max_inflight > 0 else None
+        self._lock = threading.Lock()
+        self._cooldown_until = 0.0
+        # 统计信息
+        self.requests = 0
+        self.rate_limited = 0
+        self.total_wait = 0.0
+
+    def _wait_cooldown(self) -> float:
+        waited = 0.0
+        while True:
+            with self._lock:
+                remaining = self._cooldown_until - time.monotonic()
+            if remaining <= 0:
+                return waited
+            time.sleep(remaining)
+            waited += remaining
+
+    @contextmanager
+    def request(self, estimated_tokens: int = 0) -> Iterator[LLMRequest]:
+        """
+        获取一次请求的配额，必要时阻塞等待
+
+        用法：
+            with governor.request(estimate_tokens(prompt)) as slot:
+                response = client.call(...)
+                slot.record_usage(response)
+        """
+        started = time.monotonic()
+        if self._inflight is not None:
+            self._inflight.acquire()
+        try:
+            self._wait_cooldown()
+            if self._requests is not None:
+                self._requests.acquire()
+            if self._tokens is not None and estimated_tokens > 0:
+                self._tokens.acquire(estimated_tokens)
+            # 排队期间其他线程收到 429 时同样遵守暂停
+            self._wait_cooldown()
+            waited = time.monotonic() - started
+            with self._lock:
+                self.requests += 1
+                self.total_wait += waited
+            if waited >= 1:
+                logger.info(f"[LLM节流] 等待 {waited:.1f}s 后发出请求")
+            record_span('llm_wait', 'governor', waited)
+            yield LLMRequest(self, estimated_tokens)
+        finally:
+            if self._inflight is not None:
+                self._inflight.release()
+
+    def _settle(self, estimated: int, actual: int) -> None:
+        if self._tokens is not None and estimated > 0:
+            self._tokens.refund(estimated - actual)
+
+    def on_rate_limited(self, error: Exception, default_delay: float) -> float:
+        """
+        记录一次 429：所有线程暂停到服务端建议的时刻（无法解析时使用 default_delay）
+
+        Returns:
+            本次暂停的秒数
+        """
+        delay = min(parse_retry_after(error) or default_delay, MAX_COOLDOWN)
+        with self._lock:
+            self.rate_limited += 1
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+        logger.warning(f"[LLM节流] 收到限流响应，所有 LLM 请求暂停 {delay:.1f}s")
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'rpm': self.rpm,
+                'tpm': self.tpm,
+                'max_inflight': self.max_inflight,
+                'requests': self.requests,
+                'rate_limited': self.rate_limited,
+                'total_wait': round(self.total_wait, 3),
+            }
+
+
+_governor: Optional[LLMGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_llm_governor() -> LLMGovernor:
+    """获取进程级 LLM 节流器（首次调用时按配置创建）"""
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                from src.config import get_config
+
+                config = get_config()
+                rpm = config.llm_rpm
+                if rpm <= 0 and config.gemini_request_delay > 0:
+                    rpm = 60.0 / config.gemini_request_delay
+                _governor = LLMGovernor(rpm=rpm, tpm=config.llm_tpm, max_inflight=config.llm_max_inflight)
+                logger.info(
+                    f"[LLM节流] RPM={rpm or '不限'}, TPM={config.llm_tpm or '不限'}, "
+                    f"并发上限={config.llm_max_inflight or '不限'}"
+                )
+    return _governor
+
+
+def reset_llm_governor() -> None:
+    """丢弃当前节流器，下次使用时按配置重建（用于测试或配置热更新）"""
+    global _governor
+    with _governor_lock:
+        _governor = None
@@ -19,8 +19,10 @@ from typing import Optional, Dict, Any, List
 import pandas as pd
 
 from src.config import get_config
+from src.llm_governor import estimate_tokens, get_llm_governor
 from src.search_service import SearchService
 from data_provider.base import DataFetcherManager
+from data_provider.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -169,6 +171,8 @@ class MarketAnalyzer:
         try:
             logger.info("[大盘] 获取市场涨跌统计...")
 
+            # 优先由本周期的市场快照在本地计算（与个股分析共用同一次全量行情请求），
+            # 快照不可用时由 DataFetcherManager 逐个请求数据源
             stats = self.data_manager.get_market_stats()
 
             if stats:
@@ -191,6 +195,7 @@ class MarketAnalyzer:
         try:
             logger.info("[大盘] 获取板块涨跌榜...")
 
+            # 有行业映射时由本周期的市场快照本地聚合，否则由 DataFetcherManager 逐个请求数据源
             top_sectors, bottom_sectors = self.data_manager.get_sector_rankings(5)
 
             if top_sectors or bottom_sectors:
@@ -299,11 +304,14 @@ class MarketAnalyzer:
                 # 使用 OpenAI 兼容 API
                 review = self.analyzer._call_openai_api(prompt, generation_config)
             else:
-                # 使用 Gemini API
-                response = self.analyzer._model.generate_content(
-                    prompt,
-                    generation_config=generation_config,
-                )
+                # 使用 Gemini API（与个股分析共享 LLM 节流配额）
+                with get_llm_governor().request(estimate_tokens(prompt, 2048)) as slot, \
+                        span('llm', 'market_review', source=getattr(self.analyzer, '_current_model_name', None)):
+                    response = self.analyzer._model.generate_content(
+                        prompt,
+                        generation_config=generation_config,
+                    )
+                    slot.record_usage(response)
                 review = response.text.strip() if response and response.text else None
             
             if review:
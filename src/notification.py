@@ -36,6 +36,7 @@ try:
 except ImportError:
     discord_available = False
 
+from data_provider.tracing import span
 from src.config import get_config
 from src.analyzer import AnalysisResult
 from src.formatters import format_feishu_markdown
@@ -3058,29 +3059,32 @@ class NotificationService:
         for channel in self._available_channels:
             channel_name = ChannelDetector.get_channel_name(channel)
             try:
-                if channel == NotificationChannel.WECHAT:
-                    result = self.send_to_wechat(content)
-                elif channel == NotificationChannel.FEISHU:
-                    result = self.send_to_feishu(content)
-                elif channel == NotificationChannel.TELEGRAM:
-                    result = self.send_to_telegram(content)
-                elif channel == NotificationChannel.EMAIL:
-                    result = self.send_to_email(content)
-                elif channel == NotificationChannel.PUSHOVER:
-                    result = self.send_to_pushover(content)
-                elif channel == NotificationChannel.PUSHPLUS:
-                    result = self.send_to_pushplus(content)
-                elif channel == NotificationChannel.SERVERCHAN3:
-                    result = self.send_to_serverchan3(content)
-                elif channel == NotificationChannel.CUSTOM:
-                    result = self.send_to_custom(content)
-                elif channel == NotificationChannel.DISCORD:
-                    result = self.send_to_discord(content)
-                elif channel == NotificationChannel.ASTRBOT:
-                    result = self.send_to_astrbot(content)
-                else:
-                    logger.warning(f"不支持的通知渠道: {channel}")
-                    result = False
+                with span('notification', 'send', source=channel_name) as channel_span:
+                    if channel == NotificationChannel.WECHAT:
+                        result = self.send_to_wechat(content)
+                    elif channel == NotificationChannel.FEISHU:
+                        result = self.send_to_feishu(content)
+                    elif channel == NotificationChannel.TELEGRAM:
+                        result = self.send_to_telegram(content)
+                    elif channel == NotificationChannel.EMAIL:
+                        result = self.send_to_email(content)
+                    elif channel == NotificationChannel.PUSHOVER:
+                        result = self.send_to_pushover(content)
+                    elif channel == NotificationChannel.PUSHPLUS:
+                        result = self.send_to_pushplus(content)
+                    elif channel == NotificationChannel.SERVERCHAN3:
+                        result = self.send_to_serverchan3(content)
+                    elif channel == NotificationChannel.CUSTOM:
+                        result = self.send_to_custom(content)
+                    elif channel == NotificationChannel.DISCORD:
+                        result = self.send_to_discord(content)
+                    elif channel == NotificationChannel.ASTRBOT:
+                        result = self.send_to_astrbot(content)
+                    else:
+                        logger.warning(f"不支持的通知渠道: {channel}")
+                        result = False
+                    if not result:
+                        channel_span.fail()
                 
                 if result:
                     success_count += 1
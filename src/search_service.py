@@ -22,6 +22,8 @@ from itertools import cycle
 import requests
 from newspaper import Article, Config
 
+from data_provider.tracing import record_span
+
 logger = logging.getLogger(__name__)
 
 
@@ -188,12 +190,15 @@ class BaseSearchProvider(ABC):
                 logger.info(f"[{self._name}] 搜索 '{query}' 成功，返回 {len(response.results)} 条结果，耗时 {response.search_time:.2f}s")
             else:
                 self._record_error(api_key)
+            record_span('search', 'search', response.search_time, source=self._name,
+                        ok=response.success, error=response.error_message)
             
             return response
             
         except Exception as e:
             self._record_error(api_key)
             elapsed = time.time() - start_time
+            record_span('search', 'search', elapsed, source=self._name, ok=False, error=str(e))
             logger.error(f"[{self._name}] 搜索 '{query}' 失败: {e}")
             return SearchResponse(
                 query=query,
@@ -10,15 +10,20 @@
 
 from src.services.analysis_service import AnalysisService
 from src.services.backtest_service import BacktestService
+from src.services.daily_sync_service import DailySyncService
 from src.services.history_service import HistoryService
+from src.services.stock_meta_service import StockMetaService, get_stock_meta_service
 from src.services.stock_service import StockService
 from src.services.task_service import TaskService, get_task_service
 
 __all__ = [
     "AnalysisService",
     "BacktestService",
+    "DailySyncService",
     "HistoryService",
+    "StockMetaService",
     "StockService",
     "TaskService",
+    "get_stock_meta_service",
     "get_task_service",
 ]
@@ -11,6 +11,7 @@ from typing import Any, Dict, List, Optional
 from sqlalchemy import and_, select
 
 from src.config import get_config
+from data_provider.trading_calendar import latest_trading_day_for
 from src.core.backtest_engine import OVERALL_SENTINEL_CODE, BacktestEngine, EvaluationConfig
 from src.repositories.backtest_repo import BacktestRepository
 from src.repositories.stock_repo import StockRepository
@@ -61,6 +62,8 @@ class BacktestService:
             force=force,
         )
 
+        self._prefill_daily_data(candidates, eval_window_days=int(eval_window_days))
+
         processed = 0
         completed = 0
         insufficient = 0
@@ -117,7 +120,9 @@ class BacktestService:
                     eval_window_days=int(eval_window_days),
                 )
 
-                if len(forward_bars) < int(eval_window_days):
+                if len(forward_bars) < int(eval_window_days) and not self._is_up_to_date(
+                    analysis.code, forward_bars[-1].date if forward_bars else start_daily.date
+                ):
                     self._try_fill_daily_data(code=analysis.code, analysis_date=start_daily.date, eval_window_days=eval_window_days)
                     forward_bars = self.stock_repo.get_forward_bars(
                         code=analysis.code,
@@ -240,12 +245,83 @@ class BacktestService:
         logger.warning(f"无法确定分析日期，跳过记录: {analysis.code}#{getattr(analysis, 'id', '?')}")
         return None
 
+    def _prefill_daily_data(self, candidates: List[Any], *, eval_window_days: int) -> None:
+        """Backfill missing bars for all candidates in one Baostock session.
+
+        Codes that still lack data afterwards fall back to the per-record
+        ``_try_fill_daily_data`` path.
+        """
+        windows: Dict[str, List[date]] = {}
+        for analysis in candidates:
+            analysis_date = self.repo.parse_analysis_date_from_snapshot(analysis.context_snapshot)
+            if analysis_date is None and getattr(analysis, "created_at", None):
+                analysis_date = analysis.created_at.date()
+            if analysis_date is None:
+                continue
+            start_daily = self.stock_repo.get_start_daily(code=analysis.code, analysis_date=analysis_date)
+            if start_daily is not None and start_daily.close is not None:
+                forward_bars = self.stock_repo.get_forward_bars(
+                    code=analysis.code,
+                    analysis_date=start_daily.date,
+                    eval_window_days=eval_window_days,
+                )
+                if len(forward_bars) >= eval_window_days:
+                    continue
+                # Window still open but local bars already reach the latest trading day: nothing to fetch yet.
+                if self._is_up_to_date(analysis.code, forward_bars[-1].date if forward_bars else start_daily.date):
+                    continue
+            end_date = analysis_date + timedelta(days=max(eval_window_days * 2, 30))
+            window = windows.setdefault(analysis.code, [analysis_date, end_date])
+            window[0] = min(window[0], analysis_date)
+            window[1] = max(window[1], end_date)
+
+        if len(windows) < 2:
+            return
+
+        try:
+            from data_provider.baostock_fetcher import BaostockFetcher
+
+            fetcher = BaostockFetcher()
+            start_date = min(w[0] for w in windows.values())
+            end_date = min(
+                max(w[1] for w in windows.values()),
+                max(latest_trading_day_for(code) for code in windows),
+            )
+            frames = fetcher.get_daily_data_batch(
+                list(windows),
+                start_date=start_date.strftime("%Y-%m-%d"),
+                end_date=end_date.strftime("%Y-%m-%d"),
+            )
+        except Exception as exc:
+            logger.warning(f"批量补全日线数据失败，回退到逐只补全: {exc}")
+            return
+
+        for code, df in frames.items():
+            try:
+                self.db.save_daily_data(df, code=code, data_source=fetcher.name)
+            except Exception as exc:
+                logger.warning(f"保存补全日线数据失败({code}): {exc}")
+
+    @staticmethod
+    def _is_up_to_date(code: str, last_bar_date: date) -> bool:
+        """True when local bars already cover the latest trading day of the code's market."""
+        try:
+            return last_bar_date >= latest_trading_day_for(code)
+        except Exception as exc:
+            logger.debug(f"交易日历不可用({code}): {exc}")
+            return False
+
     def _try_fill_daily_data(self, *, code: str, analysis_date: date, eval_window_days: int) -> None:
         try:
             from data_provider.base import DataFetcherManager
 
             # fetch a window that covers start + forward bars
-            end_date = analysis_date + timedelta(days=max(eval_window_days * 2, 30))
+            end_date = min(
+                analysis_date + timedelta(days=max(eval_window_days * 2, 30)),
+                latest_trading_day_for(code),
+            )
+            if end_date < analysis_date:
+                return
             manager = DataFetcherManager()
             df, source = manager.get_daily_data(
                 stock_code=code,
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+按交易日批量同步日线（Tushare）
+===================================
+
+职责：
+1. 计算本地日线缺失的交易日
+2. 每个交易日调用一次 Tushare daily(trade_date=...) 获取全市场数据
+3. 校验本地收盘价与 Tushare 昨收的衔接，发生除权的股票交由逐只全量拉取
+4. 结合本地历史重算均线/量比后批量写入 StockDaily
+
+背景：
+按 ts_code 逐只拉取时，500 只自选股补齐一天需要 500 次受限请求（80 次/分钟）；
+按交易日拉取只需 1 次。
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from data_provider.base import BaseFetcher, DataFetcherManager, STANDARD_COLUMNS
+from src.storage import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# 重算 MA20 需要的本地历史（自然日，覆盖 20 个交易日及节假日）
+_INDICATOR_HISTORY_DAYS = 45
+# 衔接校验允许的收盘价相对误差（与增量拉取的重叠校验一致）
+_CLOSE_TOLERANCE = DataFetcherManager._INCREMENTAL_CLOSE_TOLERANCE
+
+
+class DailySyncService:
+    """按交易日批量补齐日线数据"""
+
+    def __init__(self, db_manager: Optional[DatabaseManager] = None, fetcher=None):
+        self.db = db_manager or DatabaseManager.get_instance()
+        if fetcher is None:
+            from data_provider.tushare_fetcher import TushareFetcher
+            fetcher = TushareFetcher()
+        self.fetcher = fetcher
+
+    def is_available(self) -> bool:
+        return self.fetcher.is_available()
+
+    def sync_by_trade_date(
+        self,
+        stock_codes: Optional[List[str]] = None,
+        end_date: Optional[date] = None,
+        lookback_days: int = 60,
+    ) -> Dict[str, Any]:
+        """
+        补齐缺失交易日的日线
+
+        Args:
+            stock_codes: 需要补齐的股票代码，None 表示全市场
+            end_date: 截止日期（默认今天）
+            lookback_days: 最多回补的自然日数；本地数据更旧（或没有历史）的股票
+                不参与批量同步，交由逐只全量拉取处理
+
+        Returns:
+            统计信息：
+            - trade_dates: 实际获取到数据的交易日
+            - api_calls: 请求次数
+            - saved: 新增记录数
+            - synced_codes: 本地历史连续且已补齐到 last_trade_date 的代码
+            - last_trade_date: 最后一个已获取的交易日
+            - up_to_date: 是否已补齐到日历上最近的交易日（当日数据未发布时为 False）
+        """
+        end = end_date or date.today()
+        result: Dict[str, Any] = {
+            'trade_dates': [],
+            'api_calls': 0,
+            'saved': 0,
+            'synced_codes': set(),
+            'last_trade_date': None,
+            'up_to_date': False,
+        }
+
+        if stock_codes is not None:
+            # 按交易日接口只覆盖 A 股，港股/美股仍走逐只拉取
+            stock_codes = [c for c in dict.fromkeys(stock_codes) if c.isdigit() and len(c) == 6]
+            if not stock_codes:
+                return result
+
+        latest = self.db.get_latest_daily_dates(stock_codes)
+        floor = end - timedelta(days=lookback_days)
+        if stock_codes is not None:
+            stock_codes = [c for c in stock_codes if c in latest and latest[c] >= floor]
+            if not stock_codes:
+                logger.info("[按日同步] 自选股本地无近期历史，跳过批量同步")
+                return result
+            start = min(latest[c] for c in stock_codes) + timedelta(days=1)
+            already_synced = {c for c in stock_codes if latest[c] >= end}
+        else:
+            recent = [d for d in latest.values() if d >= floor]
+            start = max(recent) + timedelta(days=1) if recent else floor
+            already_synced = set()
+        # 全市场模式下 start 取自最新的股票；本地数据更旧的股票若只写入最新几天会在历史中
+        # 留下缺口（增量拉取只从本地最新日期往后补），这些股票不写入、不上报，交由逐只拉取
+        contiguous = {c for c, d in latest.items() if d >= start - timedelta(days=1)}
+        lagging = set(latest) - contiguous
+
+        if start > end:
+            result.update(synced_codes=already_synced, last_trade_date=end, up_to_date=True)
+            return result
+
+        trade_dates = self.fetcher.get_trade_dates(start.isoformat(), end.isoformat())
+        result['api_calls'] += 1
+        if not trade_dates:
+            # 缺口内没有交易日（节假日），本地数据已是最新
+            already_synced = contiguous if stock_codes is None else set(stock_codes)
+            result.update(synced_codes=already_synced, up_to_date=True)
+            return result
+
+        frames = []
+        for trade_date in trade_dates:
+            df = self.fetcher.get_daily_by_trade_date(trade_date, stock_codes)
+            result['api_calls'] += 1
+            if df is None or df.empty:
+                # 当日数据尚未发布（盘中/收盘后不久），之后的日期同样没有
+                logger.info(f"[按日同步] {trade_date} 数据尚未发布，停止同步")
+                break
+            frames.append(df)
+            result['trade_dates'].append(trade_date)
+
+        if not frames:
+            return result
+
+        fresh = pd.concat(frames, ignore_index=True)
+        fresh['date'] = pd.to_datetime(fresh['date'])
+        if lagging:
+            fresh = fresh[~fresh['code'].isin(lagging)].reset_index(drop=True)
+            logger.info(f"[按日同步] {len(lagging)} 只股票本地数据早于 {start - timedelta(days=1)}，留给逐只拉取补齐")
+        if not fresh.empty:
+            history = self._load_history(fresh, stock_codes, start)
+            adjusted = self._find_adjusted_codes(fresh, history)
+            if adjusted:
+                # 本地为前复权历史，除权后直接拼接未复权的 Tushare 日线会使价格序列断档、均线失真
+                fresh = fresh[~fresh['code'].isin(adjusted)].reset_index(drop=True)
+                logger.info(f"[按日同步] {len(adjusted)} 只股票收盘价与 Tushare 昨收不衔接(可能除权)，留给逐只全量拉取")
+        if not fresh.empty:
+            rows = self._with_indicators(fresh, history, start)
+            result['saved'] = self.db.save_daily_data_bulk(
+                rows, data_source=getattr(self.fetcher, 'name', 'TushareFetcher')
+            )
+
+        last_trade_date = result['trade_dates'][-1]
+        result['last_trade_date'] = date.fromisoformat(last_trade_date)
+        result['up_to_date'] = last_trade_date == trade_dates[-1]
+        # 本地无历史的股票只有本次同步的几天数据，不足以分析，同样交由逐只拉取
+        result['synced_codes'] = set(fresh.loc[fresh['date'] == pd.Timestamp(last_trade_date), 'code']) & contiguous
+        logger.info(
+            f"[按日同步] {len(result['trade_dates'])} 个交易日, {fresh['code'].nunique()} 只股票, "
+            f"请求 {result['api_calls']} 次, 新增 {result['saved']} 条"
+        )
+        return result
+
+    def _load_history(
+        self,
+        fresh: pd.DataFrame,
+        stock_codes: Optional[List[str]],
+        start: date,
+    ) -> pd.DataFrame:
+        """读取 start 之前用于重算指标与衔接校验的本地历史"""
+        history = self.db.get_daily_history_bulk(
+            stock_codes if stock_codes is not None else sorted(fresh['code'].unique()),
+            start - timedelta(days=_INDICATOR_HISTORY_DAYS),
+        )
+        if history.empty:
+            return history
+        return history[history['date'] < pd.Timestamp(start)][['code'] + STANDARD_COLUMNS]
+
+    @staticmethod
+    def _find_adjusted_codes(fresh: pd.DataFrame, history: pd.DataFrame) -> set:
+        """
+        找出价格序列不衔接的股票
+
+        逐行比较 Tushare 的 pre_close 与前一交易日收盘价（首行与本地最新收盘价比较）；
+        除权日 pre_close 为除权参考价，与前一日收盘价不一致
+        """
+        if 'pre_close' not in fresh.columns:
+            return set()
+        previous = fresh[['code', 'date', 'close']]
+        if not history.empty:
+            previous = pd.concat([history[['code', 'date', 'close']], previous], ignore_index=True)
+        previous = previous.sort_values(['code', 'date'])
+        previous['prev_close'] = previous.groupby('code')['close'].shift(1)
+
+        checked = fresh[['code', 'date', 'pre_close']].merge(
+            previous[['code', 'date', 'prev_close']], on=['code', 'date'], how='left'
+        ).dropna(subset=['pre_close', 'prev_close'])
+        prev_close = checked['prev_close'].astype(float)
+        rel_diff = (checked['pre_close'].astype(float) - prev_close).abs() / prev_close.abs().clip(lower=1e-9)
+        return set(checked.loc[rel_diff > _CLOSE_TOLERANCE, 'code'])
+
+    @staticmethod
+    def _with_indicators(fresh: pd.DataFrame, history: pd.DataFrame, start: date) -> pd.DataFrame:
+        """拼接本地历史重算均线/量比，只返回新拉取的行"""
+        columns = ['code'] + STANDARD_COLUMNS
+        if not history.empty:
+            combined = pd.concat([history, fresh[columns]], ignore_index=True)
+        else:
+            combined = fresh[columns]
+        combined = combined.sort_values(['code', 'date'])
+
+        computed = pd.concat(
+            [BaseFetcher._calculate_indicators(group) for _, group in combined.groupby('code', sort=False)],
+            ignore_index=True,
+        )
+        return computed[computed['date'] >= pd.Timestamp(start)].reset_index(drop=True)
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+股票基础信息索引（名称/市场/板块/行业/上市状态）
+===================================
+
+职责：
+1. 每日一次从数据源批量拉取全量股票列表，写入 stock_meta 表
+2. 进程启动时整表载入内存字典，名称查询只读内存，不经过网络
+3. 热路径之外通过其他途径解析到的名称（港股/美股等）回写到表中，跨进程复用
+
+背景：
+名称解析原先分散在 STOCK_NAME_MAP、DataFetcherManager 及各数据源的 _stock_name_cache 中，
+每个进程冷启动后都要重新请求，批量查询还可能重复拉取 get_stock_list。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from data_provider.trading_calendar import MARKET_CN, MARKET_HK, MARKET_US, market_of
+from src.storage import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# 批量刷新间隔
+REFRESH_INTERVAL = timedelta(days=1)
+
+# 单只回写记录的数据来源（不计入批量刷新时间）
+LOOKUP_SOURCE = 'lookup'
+
+
+def board_of(code: str, market: Optional[str] = None) -> str:
+    """根据代码推断板块"""
+    market = market or market_of(code)
+    if market == MARKET_HK:
+        return '港股'
+    if market == MARKET_US:
+        return '美股'
+    if code.startswith(('688', '689')):
+        return '科创板'
+    if code.startswith(('300', '301')):
+        return '创业板'
+    if code.startswith(('8', '4', '92')):
+        return '北交所'
+    return '主板'
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None or value != value:  # NaN
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+class StockMetaService:
+    """
+    股票基础信息索引（线程安全）
+
+    Args:
+        db_manager: 数据库管理器（默认单例）
+        fetcher_manager: DataFetcherManager（默认首次刷新时创建）
+        refresh_interval: 批量刷新间隔
+    """
+
+    def __init__(
+        self,
+        db_manager: Optional[DatabaseManager] = None,
+        fetcher_manager=None,
+        refresh_interval: timedelta = REFRESH_INTERVAL,
+    ):
+        self.db = db_manager or DatabaseManager.get_instance()
+        self._fetcher_manager = fetcher_manager
+        self.refresh_interval = refresh_interval
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    # ---------- 内存索引 ----------
+
+    def load(self) -> int:
+        """从数据库载入内存索引（静态映射表 STOCK_NAME_MAP 作为兜底），返回条目数"""
+        from src.analyzer import STOCK_NAME_MAP
+
+        meta = {
+            code: {'code': code, 'name': name, 'market': market_of(code), 'board': board_of(code)}
+            for code, name in STOCK_NAME_MAP.items()
+        }
+        try:
+            for row in self.db.get_all_stock_meta():
+                meta[row['code']] = row
+        except Exception as e:
+            logger.warning(f"[股票信息] 读取 stock_meta 失败，仅使用静态映射: {e}")
+        with self._lock:
+            self._meta = meta
+            self._loaded = True
+        logger.info(f"[股票信息] 已载入 {len(meta)} 条股票基础信息")
+        return len(meta)
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        """查询单只股票的基础信息（只读内存）"""
+        self._ensure_loaded()
+        return self._meta.get(code)
+
+    def get_name(self, code: str) -> Optional[str]:
+        """查询股票名称（只读内存），未收录返回 None"""
+        row = self.get(code)
+        return row['name'] if row else None
+
+    def get_names(self, codes: Iterable[str]) -> Dict[str, str]:
+        self._ensure_loaded()
+        return {code: self._meta[code]['name'] for code in codes if code in self._meta}
+
+    def remember(self, code: str, name: str) -> None:
+        """记录热路径之外解析到的名称（写入内存与数据库）"""
+        if not code or not name or name.startswith('股票'):
+            return
+        self._ensure_loaded()
+        current = self._meta.get(code)
+        if current and current.get('name') == name:
+            return
+        row = {
+            **(current or {'market': market_of(code), 'board': board_of(code), 'list_status': 'L'}),
+            'code': code,
+            'name': name,
+            'data_source': LOOKUP_SOURCE,
+        }
+        with self._lock:
+            self._meta[code] = row
+        try:
+            self.db.save_stock_meta([row])
+        except Exception as e:
+            logger.debug(f"[股票信息] 回写 {code} 失败: {e}")
+
+    # ---------- 批量刷新 ----------
+
+    def needs_refresh(self) -> bool:
+        """距上次批量刷新是否已超过刷新间隔"""
+        try:
+            refreshed_at = self.db.get_stock_meta_refreshed_at(exclude_source=LOOKUP_SOURCE)
+        except Exception as e:
+            logger.debug(f"[股票信息] 读取刷新时间失败: {e}")
+            return True
+        return refreshed_at is None or datetime.now() - refreshed_at >= self.refresh_interval
+
+    def refresh(self, fetcher_manager=None) -> int:
+        """
+        从所有支持 get_stock_list 的数据源拉取全量列表并合并写入
+
+        名称取优先级最高的数据源，行业/板块/上市状态取首个提供该字段的数据源
+
+        Args:
+            fetcher_manager: 本次使用的 DataFetcherManager（默认使用构造时传入的或新建）
+
+        Returns:
+            写入的记录数（所有数据源均失败时为 0）
+        """
+        if fetcher_manager is not None:
+            self._fetcher_manager = fetcher_manager
+        if self._fetcher_manager is None:
+            from data_provider.base import DataFetcherManager
+            self._fetcher_manager = DataFetcherManager()
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        for source, df in self._fetcher_manager.get_stock_lists():
+            for item in df.to_dict('records'):
+                code, name = _text(item.get('code')), _text(item.get('name'))
+                if not code or not name:
+                    continue
+                row = merged.setdefault(code, {
+                    'code': code,
+                    'name': name,
+                    'market': MARKET_CN,
+                    'data_source': source,
+                })
+                # Tushare stock_basic 的 market 字段为板块（主板/创业板/科创板/CDR/北交所）
+                for target, column in (('board', 'market'), ('industry', 'industry'), ('list_status', 'list_status')):
+                    if not row.get(target) and _text(item.get(column)):
+                        row[target] = _text(item.get(column))
+            logger.info(f"[股票信息] {source} 返回 {len(df)} 条")
+
+        if not merged:
+            logger.warning("[股票信息] 所有数据源均未返回股票列表，保留现有数据")
+            return 0
+        for row in merged.values():
+            row.setdefault('board', board_of(row['code'], MARKET_CN))
+            row.setdefault('list_status', 'L')
+
+        saved = self.db.save_stock_meta(list(merged.values()))
+        logger.info(f"[股票信息] 批量刷新完成: {saved} 条")
+        self.load()
+        return saved
+
+    def warmup(self, force: bool = False, fetcher_manager=None) -> int:
+        """
+        启动预热：载入内存索引，数据超过刷新间隔时批量刷新（刷新失败不影响已有数据）
+
+        Returns:
+            内存索引条目数
+        """
+        if force or self.needs_refresh():
+            try:
+                self.refresh(fetcher_manager)
+            except Exception as e:
+                logger.warning(f"[股票信息] 批量刷新失败: {e}")
+        self._ensure_loaded()
+        return len(self._meta)
+
+
+_service: Optional[StockMetaService] = None
+_service_lock = threading.Lock()
+
+
+def get_stock_meta_service() -> StockMetaService:
+    """获取进程级股票基础信息索引"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = StockMetaService()
+    return _service
+
+
+def lookup_stock_name(code: str) -> Optional[str]:
+    """从内存索引查询股票名称（不访问网络，索引不可用时返回 None）"""
+    try:
+        return get_stock_meta_service().get_name(code)
+    except Exception as e:
+        logger.debug(f"[股票信息] 索引不可用: {e}")
+        return None
+
+
+def remember_stock_name(code: str, name: str) -> None:
+    """回写热路径之外解析到的名称（索引不可用时忽略）"""
+    try:
+        get_stock_meta_service().remember(code, name)
+    except Exception as e:
+        logger.debug(f"[股票信息] 索引不可用: {e}")
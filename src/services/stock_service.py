@@ -14,6 +14,7 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 
 from src.repositories.stock_repo import StockRepository
+from src.services.stock_meta_service import lookup_stock_name, remember_stock_name
 
 logger = logging.getLogger(__name__)
 
@@ -123,8 +124,12 @@ class StockService:
                 logger.warning(f"获取 {stock_code} 历史数据失败")
                 return {"stock_code": stock_code, "period": period, "data": []}
             
-            # 获取股票名称
-            stock_name = manager.get_stock_name(stock_code)
+            # 获取股票名称（优先读取内存索引，未收录时才请求数据源）
+            stock_name = lookup_stock_name(stock_code)
+            if not stock_name:
+                stock_name = manager.get_stock_name(stock_code)
+                if stock_name:
+                    remember_stock_name(stock_code, stock_name)
             
             # 转换为响应格式
             data = []
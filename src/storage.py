@@ -36,7 +36,9 @@ from sqlalchemy import (
     select,
     and_,
     desc,
+    func,
 )
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import (
     declarative_base,
     sessionmaker,
@@ -44,6 +46,7 @@ from sqlalchemy.orm import (
 )
 from sqlalchemy.exc import IntegrityError
 
+from data_provider.tracing import traced
 from src.config import get_config
 
 logger = logging.getLogger(__name__)
@@ -363,6 +366,94 @@ class BacktestSummary(Base):
     )
 
 
+class StockMeta(Base):
+    """
+    股票基础信息（名称/市场/板块/行业/上市状态）
+
+    每日从数据源批量刷新一次，进程启动时整表载入内存，
+    名称查询不再经过网络
+    """
+    __tablename__ = 'stock_meta'
+
+    code = Column(String(16), primary_key=True)
+    name = Column(String(64), nullable=False)
+    market = Column(String(8), index=True)       # cn/hk/us
+    board = Column(String(16))                   # 主板/创业板/科创板/北交所/港股/美股
+    industry = Column(String(64))
+    list_status = Column(String(4), default='L')  # L 上市 / D 退市 / P 暂停上市
+    data_source = Column(String(50))
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, index=True)
+
+    def __repr__(self) -> str:
+        return f"<StockMeta(code={self.code}, name={self.name})>"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'code': self.code,
+            'name': self.name,
+            'market': self.market,
+            'board': self.board,
+            'industry': self.industry,
+            'list_status': self.list_status,
+            'data_source': self.data_source,
+        }
+
+
+class ChipDistributionDaily(Base):
+    """
+    筹码分布日缓存
+
+    筹码分布每个交易日只变化一次，按 (股票代码, 交易日) 保存首次获取的结果，
+    同一交易日内的重复分析直接读取
+    """
+    __tablename__ = 'chip_distribution_daily'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    code = Column(String(16), nullable=False, index=True)
+    trade_date = Column(Date, nullable=False)
+    data_date = Column(String(16))  # 数据源返回的数据日期
+    source = Column(String(32))
+
+    profit_ratio = Column(Float)
+    avg_cost = Column(Float)
+    cost_90_low = Column(Float)
+    cost_90_high = Column(Float)
+    concentration_90 = Column(Float)
+    cost_70_low = Column(Float)
+    cost_70_high = Column(Float)
+    concentration_70 = Column(Float)
+
+    created_at = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        UniqueConstraint('code', 'trade_date', name='uix_chip_code_trade_date'),
+    )
+
+
+class PipelineRunLedger(Base):
+    """
+    批量分析运行台账
+
+    每只股票每完成一个流水线阶段写入一行，中断后 --resume <run_id> 只执行未完成的阶段；
+    搜索结果与 AI 分析结果保存在 payload 中，恢复时无需重新调用付费接口
+    """
+    __tablename__ = 'pipeline_run_ledger'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(String(64), nullable=False, index=True)
+    code = Column(String(16), nullable=False)
+    stage = Column(String(32), nullable=False)
+    status = Column(String(16), nullable=False)  # pending / done / failed
+    payload = Column(Text)  # JSON
+
+    started_at = Column(DateTime, default=datetime.now)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        UniqueConstraint('run_id', 'code', 'stage', name='uix_run_code_stage'),
+    )
+
+
 class DatabaseManager:
     """
     数据库管理器 - 单例模式
@@ -474,6 +565,7 @@ class DatabaseManager:
             session.close()
             raise
     
+    @traced('storage')
     def has_today_data(self, code: str, target_date: Optional[date] = None) -> bool:
         """
         检查是否已有指定日期的数据
@@ -529,6 +621,88 @@ class DatabaseManager:
             
             return list(results)
 
+    @traced('storage')
+    def get_daily_history_df(self, code: str, days: int = 60) -> pd.DataFrame:
+        """
+        获取最近 N 个交易日的日线数据（DataFrame 形式）
+
+        用于增量拉取时拼接历史重算技术指标，以及趋势分析等需要整段 K 线的场景
+
+        Args:
+            code: 股票代码
+            days: 获取的交易日数量
+
+        Returns:
+            按日期升序排列的 DataFrame（列同 StockDaily.to_dict），无数据时返回空 DataFrame
+        """
+        bars = self.get_latest_data(code, days=days)
+        if not bars:
+            return pd.DataFrame()
+
+        df = pd.DataFrame([bar.to_dict() for bar in reversed(bars)])
+        df['date'] = pd.to_datetime(df['date'])
+        return df.reset_index(drop=True)
+
+    # IN 查询单批最大代码数（兼容 SQLite 旧版本 999 个绑定参数的限制）
+    _CODE_CHUNK_SIZE = 500
+
+    def _iter_code_chunks(self, codes: Optional[List[str]]):
+        if codes is None:
+            yield None
+            return
+        codes = list(dict.fromkeys(codes))
+        for i in range(0, len(codes), self._CODE_CHUNK_SIZE):
+            yield codes[i:i + self._CODE_CHUNK_SIZE]
+
+    def get_latest_daily_dates(self, codes: Optional[List[str]] = None) -> Dict[str, date]:
+        """
+        批量获取各股票本地最新日线日期（GROUP BY 一次查询）
+
+        Args:
+            codes: 股票代码列表，None 表示全部
+
+        Returns:
+            {code: 最新日期}，无数据的代码不出现在结果中
+        """
+        latest: Dict[str, date] = {}
+        with self.get_session() as session:
+            for chunk in self._iter_code_chunks(codes):
+                query = select(StockDaily.code, func.max(StockDaily.date)).group_by(StockDaily.code)
+                if chunk is not None:
+                    query = query.where(StockDaily.code.in_(chunk))
+                latest.update({code: max_date for code, max_date in session.execute(query)})
+        return latest
+
+    def get_daily_history_bulk(
+        self,
+        codes: Optional[List[str]],
+        start_date: date,
+    ) -> pd.DataFrame:
+        """
+        批量获取多只股票自 start_date 起的日线数据
+
+        Args:
+            codes: 股票代码列表，None 表示全部
+            start_date: 起始日期（含）
+
+        Returns:
+            按 code、date 升序排列的 DataFrame（列同 StockDaily.to_dict），无数据时返回空 DataFrame
+        """
+        rows: List[Dict[str, Any]] = []
+        with self.get_session() as session:
+            for chunk in self._iter_code_chunks(codes):
+                query = select(StockDaily).where(StockDaily.date >= start_date)
+                if chunk is not None:
+                    query = query.where(StockDaily.code.in_(chunk))
+                rows.extend(bar.to_dict() for bar in session.execute(query).scalars())
+
+        if not rows:
+            return pd.DataFrame()
+        df = pd.DataFrame(rows)
+        df['date'] = pd.to_datetime(df['date'])
+        return df.sort_values(['code', 'date']).reset_index(drop=True)
+
+    @traced('storage')
     def save_news_intel(
         self,
         code: str,
@@ -684,6 +858,7 @@ class DatabaseManager:
 
             return list(results)
 
+    @traced('storage')
     def save_analysis_history(
         self,
         result: Any,
@@ -816,6 +991,217 @@ class DatabaseManager:
             
             return list(results), total
     
+    _STOCK_META_COLUMNS = ('name', 'market', 'board', 'industry', 'list_status', 'data_source')
+
+    def save_stock_meta(self, records: List[Dict[str, Any]]) -> int:
+        """
+        批量写入股票基础信息（按 code UPSERT）
+
+        Args:
+            records: 字典列表，至少包含 code、name；缺失字段写入 NULL
+
+        Returns:
+            写入的记录数
+        """
+        if not records:
+            return 0
+
+        now = datetime.now()
+        rows = [
+            {'code': r['code'], **{col: r.get(col) for col in self._STOCK_META_COLUMNS}, 'updated_at': now}
+            for r in records
+            if r.get('code') and r.get('name')
+        ]
+        with self.get_session() as session:
+            try:
+                if self._engine.dialect.name == 'sqlite':
+                    table = StockMeta.__table__
+                    stmt = sqlite_insert(table)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[table.c.code],
+                        set_={col: stmt.excluded[col] for col in (*self._STOCK_META_COLUMNS, 'updated_at')},
+                    )
+                    session.execute(stmt, rows)
+                else:
+                    for row in rows:
+                        session.merge(StockMeta(**row))
+                session.commit()
+                return len(rows)
+            except Exception as e:
+                session.rollback()
+                logger.error(f"保存股票基础信息失败: {e}")
+                raise
+
+    def get_all_stock_meta(self) -> List[Dict[str, Any]]:
+        """读取全部股票基础信息"""
+        with self.get_session() as session:
+            return [row.to_dict() for row in session.execute(select(StockMeta)).scalars()]
+
+    def get_stock_meta_refreshed_at(self, exclude_source: Optional[str] = None) -> Optional[datetime]:
+        """最近一次写入股票基础信息的时间（可排除某个数据来源），无数据返回 None"""
+        with self.get_session() as session:
+            query = select(func.max(StockMeta.updated_at))
+            if exclude_source:
+                query = query.where(StockMeta.data_source != exclude_source)
+            return session.execute(query).scalar()
+
+    _CHIP_VALUE_COLUMNS = (
+        'profit_ratio', 'avg_cost', 'cost_90_low', 'cost_90_high', 'concentration_90',
+        'cost_70_low', 'cost_70_high', 'concentration_70',
+    )
+
+    def load_chip_distribution(self, code: str, trade_date: date) -> Optional[Dict[str, Any]]:
+        """
+        读取某交易日缓存的筹码分布
+
+        Returns:
+            ChipDistribution 字段字典（date 为数据日期），不存在返回 None
+        """
+        with self.get_session() as session:
+            row = session.execute(
+                select(ChipDistributionDaily).where(
+                    and_(ChipDistributionDaily.code == code, ChipDistributionDaily.trade_date == trade_date)
+                )
+            ).scalar_one_or_none()
+            if row is None:
+                return None
+            return {
+                'code': row.code,
+                'date': row.data_date or '',
+                'source': row.source,
+                **{col: getattr(row, col) for col in self._CHIP_VALUE_COLUMNS},
+            }
+
+    @traced('storage')
+    def save_chip_distribution(self, chip: Dict[str, Any], trade_date: date) -> None:
+        """保存某交易日的筹码分布（同一交易日已存在时覆盖）"""
+        values = {
+            'code': chip['code'],
+            'trade_date': trade_date,
+            'data_date': chip.get('date') or None,
+            'source': chip.get('source'),
+            **{col: chip.get(col) for col in self._CHIP_VALUE_COLUMNS},
+            'created_at': datetime.now(),
+        }
+        with self.get_session() as session:
+            try:
+                if self._engine.dialect.name == 'sqlite':
+                    table = ChipDistributionDaily.__table__
+                    stmt = sqlite_insert(table).values(**values)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[table.c.code, table.c.trade_date],
+                        set_={k: stmt.excluded[k] for k in values if k not in ('code', 'trade_date')},
+                    )
+                    session.execute(stmt)
+                else:
+                    session.query(ChipDistributionDaily).filter_by(code=values['code'], trade_date=trade_date).delete()
+                    session.add(ChipDistributionDaily(**values))
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.warning(f"保存 {chip['code']} 筹码分布失败: {e}")
+
+    def record_run_stage(
+        self,
+        run_id: str,
+        code: str,
+        stage: str,
+        status: str,
+        payload: Optional[Any] = None,
+        started_at: Optional[datetime] = None,
+    ) -> None:
+        """写入运行台账（同一 run_id/code/stage 已存在时覆盖状态与 payload，失败只记录日志）"""
+        now = datetime.now()
+        values = {
+            'run_id': run_id,
+            'code': code,
+            'stage': stage,
+            'status': status,
+            'payload': json.dumps(payload, ensure_ascii=False, default=str) if payload is not None else None,
+            'started_at': started_at or now,
+            'finished_at': now if status != 'pending' else None,
+        }
+        with self.get_session() as session:
+            try:
+                if self._engine.dialect.name == 'sqlite':
+                    table = PipelineRunLedger.__table__
+                    stmt = sqlite_insert(table).values(**values)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[table.c.run_id, table.c.code, table.c.stage],
+                        set_={k: stmt.excluded[k] for k in ('status', 'payload', 'started_at', 'finished_at')},
+                    )
+                    session.execute(stmt)
+                else:
+                    row = session.query(PipelineRunLedger).filter_by(run_id=run_id, code=code, stage=stage).first()
+                    if row is None:
+                        session.add(PipelineRunLedger(**values))
+                    else:
+                        for key in ('status', 'payload', 'started_at', 'finished_at'):
+                            setattr(row, key, values[key])
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.warning(f"写入运行台账失败 ({run_id}/{code}/{stage}): {e}")
+
+    def start_run(self, run_id: str, codes: List[str], stage: str = 'queued') -> None:
+        """登记一次运行的股票列表（一次事务批量写入，已登记的代码保持不变）"""
+        now = datetime.now()
+        rows = [
+            {'run_id': run_id, 'code': code, 'stage': stage, 'status': 'pending', 'started_at': now}
+            for code in dict.fromkeys(codes)
+        ]
+        if not rows:
+            return
+        with self.get_session() as session:
+            try:
+                if self._engine.dialect.name == 'sqlite':
+                    stmt = sqlite_insert(PipelineRunLedger.__table__).on_conflict_do_nothing(
+                        index_elements=['run_id', 'code', 'stage']
+                    )
+                    session.execute(stmt, rows)
+                else:
+                    existing = set(session.execute(
+                        select(PipelineRunLedger.code).where(
+                            and_(PipelineRunLedger.run_id == run_id, PipelineRunLedger.stage == stage)
+                        )
+                    ).scalars())
+                    session.add_all(PipelineRunLedger(**row) for row in rows if row['code'] not in existing)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.warning(f"登记运行 {run_id} 失败: {e}")
+
+    def get_run_ledger(self, run_id: str) -> List[Dict[str, Any]]:
+        """读取某次运行的全部台账记录（payload 已解析为对象）"""
+        with self.get_session() as session:
+            rows = session.execute(
+                select(PipelineRunLedger)
+                .where(PipelineRunLedger.run_id == run_id)
+                .order_by(PipelineRunLedger.id)
+            ).scalars().all()
+            return [
+                {
+                    'run_id': row.run_id,
+                    'code': row.code,
+                    'stage': row.stage,
+                    'status': row.status,
+                    'payload': json.loads(row.payload) if row.payload else None,
+                    'started_at': row.started_at,
+                    'finished_at': row.finished_at,
+                }
+                for row in rows
+            ]
+
+    def get_latest_run_id(self) -> Optional[str]:
+        """最近一次运行的 run_id（按登记时间，即 queued 行的 started_at；无记录时返回 None）"""
+        with self.get_session() as session:
+            return session.execute(
+                select(PipelineRunLedger.run_id)
+                .where(PipelineRunLedger.stage == 'queued')
+                .order_by(desc(PipelineRunLedger.started_at), desc(PipelineRunLedger.id))
+                .limit(1)
+            ).scalar_one_or_none()
+
     def get_data_range(
         self, 
         code: str, 
@@ -848,6 +1234,13 @@ class DatabaseManager:
             
             return list(results)
     
+    # 日线表中需要写入的行情/指标字段（与 StockDaily 列名一致）
+    _DAILY_VALUE_COLUMNS = (
+        'open', 'high', 'low', 'close', 'volume', 'amount', 'pct_chg',
+        'ma5', 'ma10', 'ma20', 'volume_ratio',
+    )
+
+    @traced('storage')
     def save_daily_data(
         self, 
         df: pd.DataFrame, 
@@ -859,7 +1252,9 @@ class DatabaseManager:
         
         策略：
         - 使用 UPSERT 逻辑（存在则更新，不存在则插入）
-        - 跳过已存在的数据，避免重复
+        - SQLite 下走批量路径：向量化构造参数，依赖 (code, date) 唯一约束
+          执行 INSERT ... ON CONFLICT DO UPDATE（executemany），避免逐行 SELECT
+        - 其他数据库回退到逐行 ORM 写入
         
         Args:
             df: 包含日线数据的 DataFrame
@@ -867,12 +1262,174 @@ class DatabaseManager:
             data_source: 数据来源名称
             
         Returns:
-            新增/更新的记录数
+            新增的记录数（已存在的记录会被更新，不计入）
         """
         if df is None or df.empty:
             logger.warning(f"保存数据为空，跳过 {code}")
             return 0
-        
+
+        if self._engine.dialect.name != 'sqlite':
+            return self._save_daily_data_rowwise(df, code, data_source)
+
+        records = self._build_daily_records(df, code, data_source)
+        if not records:
+            logger.warning(f"保存数据无有效日期，跳过 {code}")
+            return 0
+
+        dates = {record['date'] for record in records}
+        stmt = self._daily_upsert_stmt()
+
+        with self.get_session() as session:
+            try:
+                # 一次范围查询统计已存在的日期，用于计算新增条数
+                existing_dates = set(session.execute(
+                    select(StockDaily.date).where(
+                        and_(
+                            StockDaily.code == code,
+                            StockDaily.date >= min(dates),
+                            StockDaily.date <= max(dates),
+                        )
+                    )
+                ).scalars())
+
+                session.execute(stmt, records)
+                session.commit()
+
+                saved_count = len(dates - existing_dates)
+                logger.info(f"保存 {code} 数据成功，新增 {saved_count} 条，共写入 {len(records)} 条")
+                return saved_count
+
+            except Exception as e:
+                session.rollback()
+                logger.error(f"保存 {code} 数据失败: {e}")
+                raise
+
+    @traced('storage')
+    def save_daily_data_bulk(
+        self,
+        df: pd.DataFrame,
+        data_source: str = "Unknown"
+    ) -> int:
+        """
+        批量保存多只股票的日线数据（按交易日全市场拉取等场景）
+
+        与 save_daily_data 相同的 UPSERT 语义，但代码取自 df['code']，
+        整批数据一次 executemany 写入
+
+        Args:
+            df: 包含 code、date 及日线字段的 DataFrame
+            data_source: 数据来源名称
+
+        Returns:
+            新增的记录数（已存在的记录会被更新，不计入）
+        """
+        if df is None or df.empty:
+            return 0
+
+        if self._engine.dialect.name != 'sqlite':
+            return sum(
+                self._save_daily_data_rowwise(group, code, data_source)
+                for code, group in df.groupby('code', sort=False)
+            )
+
+        records = self._build_daily_records(df, None, data_source)
+        if not records:
+            return 0
+
+        keys = {(record['code'], record['date']) for record in records}
+        codes = sorted({code for code, _ in keys})
+        min_date = min(d for _, d in keys)
+        max_date = max(d for _, d in keys)
+
+        with self.get_session() as session:
+            try:
+                existing = set()
+                for chunk in self._iter_code_chunks(codes):
+                    existing.update(
+                        (code, row_date) for code, row_date in session.execute(
+                            select(StockDaily.code, StockDaily.date).where(
+                                and_(
+                                    StockDaily.code.in_(chunk),
+                                    StockDaily.date >= min_date,
+                                    StockDaily.date <= max_date,
+                                )
+                            )
+                        )
+                    )
+
+                session.execute(self._daily_upsert_stmt(), records)
+                session.commit()
+
+                saved_count = len(keys - existing)
+                logger.info(f"批量保存日线成功：{len(codes)} 只股票，新增 {saved_count} 条，共写入 {len(records)} 条")
+                return saved_count
+
+            except Exception as e:
+                session.rollback()
+                logger.error(f"批量保存日线失败: {e}")
+                raise
+
+    def _daily_upsert_stmt(self):
+        """SQLite 日线 INSERT ... ON CONFLICT(code, date) DO UPDATE 语句"""
+        table = StockDaily.__table__
+        stmt = sqlite_insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.code, table.c.date],
+            set_={
+                **{col: stmt.excluded[col] for col in self._DAILY_VALUE_COLUMNS},
+                'data_source': stmt.excluded.data_source,
+                'updated_at': stmt.excluded.updated_at,
+            },
+        )
+
+    def _build_daily_records(
+        self,
+        df: pd.DataFrame,
+        code: Optional[str],
+        data_source: str
+    ) -> List[Dict[str, Any]]:
+        """
+        将日线 DataFrame 向量化转换为批量写入参数
+
+        - code 为 None 时使用 df['code'] 列（多股票批量写入）
+        - 日期统一转换为 date，无法解析的行被丢弃
+        - 数值列统一转为 float，缺失列/NaN 写入 NULL
+        """
+        dates = pd.to_datetime(df['date'], errors='coerce') if 'date' in df.columns else None
+        if dates is None:
+            return []
+
+        now = datetime.now()
+        frame = pd.DataFrame(index=df.index)
+        frame['code'] = df['code'].astype(str) if code is None else code
+        frame['date'] = dates.dt.date
+        for col in self._DAILY_VALUE_COLUMNS:
+            if col in df.columns:
+                frame[col] = pd.to_numeric(df[col], errors='coerce').astype(float)
+            else:
+                frame[col] = None
+        frame['data_source'] = data_source
+        frame['created_at'] = now
+        frame['updated_at'] = now
+
+        frame = frame[dates.notna()]
+        frame = frame.astype(object).where(frame.notna(), None)
+        return frame.to_dict('records')
+
+    def _save_daily_data_rowwise(
+        self,
+        df: pd.DataFrame,
+        code: str,
+        data_source: str = "Unknown"
+    ) -> int:
+        """
+        逐行保存日线数据（非 SQLite 数据库的兼容路径）
+
+        每行先查询是否存在，再执行 ORM 更新或插入
+
+        Returns:
+            新增的记录数
+        """
         saved_count = 0
         
         with self.get_session() as session:
@@ -970,35 +1527,51 @@ class DatabaseManager:
             logger.warning(f"未找到 {code} 的数据")
             return None
         
-        today_data = recent_data[0]
-        yesterday_data = recent_data[1] if len(recent_data) > 1 else None
-        
+        return self.build_analysis_context(
+            code,
+            recent_data[0].to_dict(),
+            recent_data[1].to_dict() if len(recent_data) > 1 else None,
+        )
+
+    @classmethod
+    def build_analysis_context(
+        cls,
+        code: str,
+        today_data: Dict[str, Any],
+        yesterday_data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        由最近两日日线（StockDaily.to_dict 格式）构建分析上下文
+
+        供已批量载入日线的调用方复用，避免再次查询数据库
+        """
         context = {
             'code': code,
-            'date': today_data.date.isoformat(),
-            'today': today_data.to_dict(),
+            'date': today_data['date'].isoformat(),
+            'today': today_data,
         }
         
         if yesterday_data:
-            context['yesterday'] = yesterday_data.to_dict()
+            context['yesterday'] = yesterday_data
             
             # 计算相比昨日的变化
-            if yesterday_data.volume and yesterday_data.volume > 0:
+            if yesterday_data.get('volume') and yesterday_data['volume'] > 0:
                 context['volume_change_ratio'] = round(
-                    today_data.volume / yesterday_data.volume, 2
+                    (today_data.get('volume') or 0) / yesterday_data['volume'], 2
                 )
             
-            if yesterday_data.close and yesterday_data.close > 0:
+            if yesterday_data.get('close') and yesterday_data['close'] > 0:
                 context['price_change_ratio'] = round(
-                    (today_data.close - yesterday_data.close) / yesterday_data.close * 100, 2
+                    ((today_data.get('close') or 0) - yesterday_data['close']) / yesterday_data['close'] * 100, 2
                 )
             
             # 均线形态判断
-            context['ma_status'] = self._analyze_ma_status(today_data)
+            context['ma_status'] = cls._analyze_ma_status(today_data)
         
         return context
     
-    def _analyze_ma_status(self, data: StockDaily) -> str:
+    @staticmethod
+    def _analyze_ma_status(data: Dict[str, Any]) -> str:
         """
         分析均线形态
         
@@ -1007,10 +1580,10 @@ class DatabaseManager:
         - 空头排列：close < ma5 < ma10 < ma20
         - 震荡整理：其他情况
         """
-        close = data.close or 0
-        ma5 = data.ma5 or 0
-        ma10 = data.ma10 or 0
-        ma20 = data.ma20 or 0
+        close = data.get('close') or 0
+        ma5 = data.get('ma5') or 0
+        ma10 = data.get('ma10') or 0
+        ma20 = data.get('ma20') or 0
         
         if close > ma5 > ma10 > ma20 > 0:
             return "多头排列 📈"
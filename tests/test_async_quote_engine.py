@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+异步实时行情引擎测试
+===================================
+
+职责：
+1. 验证多只股票按接口上限分块后并发请求，且单主机并发不超过限制
+2. 验证数据源按优先级补齐缺失代码，结果写入逐代码缓存
+3. 验证同步门面可在普通线程中调用
+"""
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider import akshare_fetcher, async_quote_engine
+from data_provider.akshare_fetcher import AkshareFetcher
+from data_provider.async_quote_engine import AsyncQuoteEngine, resolve_engine_sources
+from data_provider.realtime_types import RealtimeSource
+
+
+def _tencent_line(symbol: str, price: float = 10.5) -> str:
+    fields = ['1', f'股票{symbol[2:]}', symbol[2:], f'{price:.2f}', '10.00', '10.00', '12'] + ['0'] * 43
+    fields[49] = '1.5'
+    return f'v_{symbol}="{"~".join(fields)}";'
+
+
+class _MockUpstream:
+    """按主机分派的假行情服务，记录请求与最大并发"""
+
+    def __init__(self, tencent_missing=(), delay: float = 0.02):
+        self.tencent_missing = set(tencent_missing)
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request.url)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+
+        if request.url.host == 'qt.gtimg.cn':
+            symbols = str(request.url).split('q=', 1)[1].split(',')
+            body = '\n'.join(_tencent_line(s) for s in symbols if s[2:] not in self.tencent_missing)
+            return httpx.Response(200, content=body.encode('gbk'))
+        if request.url.host == 'push2.eastmoney.com':
+            secids = request.url.params['secids'].split(',')
+            diff = [{'f12': s.split('.')[1], 'f14': '东财', 'f2': 20.0, 'f3': 1.0, 'f5': 10, 'f10': 0.8}
+                    for s in secids]
+            return httpx.Response(200, json={'data': {'diff': diff}})
+        return httpx.Response(404)
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+
+class TestAsyncQuoteEngine(unittest.TestCase):
+
+    def setUp(self):
+        for cache in akshare_fetcher._lite_quote_caches.values():
+            cache.invalidate()
+        async_quote_engine._em_quote_cache.invalidate()
+        for name in ('acquire_rate_limit_async',):
+            patcher = patch(f'data_provider.async_quote_engine.{name}', new=self._no_wait)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @staticmethod
+    async def _no_wait(upstream, tokens=1.0):
+        return 0.0
+
+    def _engine(self, upstream: _MockUpstream, per_host_limit: int = 2) -> AsyncQuoteEngine:
+        engine = AsyncQuoteEngine(per_host_limit=per_host_limit, http2=False, client_factory=upstream.client)
+        self.addCleanup(engine.close)
+        return engine
+
+    def test_chunks_run_concurrently_within_host_limit(self):
+        upstream = _MockUpstream()
+        engine = self._engine(upstream, per_host_limit=2)
+        codes = [f'{600000 + i}' for i in range(10)]
+
+        with patch.object(AkshareFetcher, 'TENCENT_MAX_CODES_PER_REQUEST', 2):
+            quotes = engine.get_quotes(codes, ['tencent'])
+
+        self.assertEqual(set(quotes), set(codes))
+        self.assertEqual(len(upstream.requests), 5)
+        self.assertEqual(upstream.max_in_flight, 2)
+        self.assertEqual(quotes['600003'].source, RealtimeSource.TENCENT)
+        self.assertEqual(quotes['600003'].volume_ratio, 1.5)
+
+    def test_missing_codes_fall_back_to_next_source_and_are_cached(self):
+        upstream = _MockUpstream(tencent_missing={'000001'})
+        engine = self._engine(upstream)
+
+        quotes = engine.get_quotes(['600519', '000001', 'AAPL', '510300'], ['tencent', 'em'])
+
+        self.assertEqual(set(quotes), {'600519', '000001'})
+        self.assertEqual(quotes['000001'].source, RealtimeSource.AKSHARE_EM)
+        self.assertEqual(quotes['000001'].volume, 1000)
+        em_request = [u for u in upstream.requests if u.host == 'push2.eastmoney.com'][0]
+        self.assertEqual(em_request.params['secids'], '0.000001')
+
+        # 第二次命中缓存，不再请求；同步路径的腾讯单只查询同样命中
+        requests_before = len(upstream.requests)
+        engine.get_quotes(['600519', '000001'], ['tencent', 'em'])
+        self.assertEqual(len(upstream.requests), requests_before)
+        self.assertIsNotNone(akshare_fetcher._lite_quote_caches['tencent'].get('600519'))
+
+        # 不读缓存时强制刷新
+        engine.get_quotes(['600519'], ['tencent'], use_cache=False)
+        self.assertEqual(len(upstream.requests), requests_before + 1)
+
+    def test_resolve_engine_sources(self):
+        self.assertEqual(
+            resolve_engine_sources(['tushare', 'tencent', 'akshare_sina', 'efinance', 'akshare_em']),
+            ['tencent', 'sina', 'em'],
+        )
+
+    def test_failed_chunk_is_skipped(self):
+        async def broken(request):
+            raise httpx.ConnectError('down')
+
+        engine = AsyncQuoteEngine(http2=False, client_factory=lambda: httpx.AsyncClient(transport=httpx.MockTransport(broken)))
+        self.addCleanup(engine.close)
+        with patch('data_provider.async_quote_engine.get_realtime_circuit_breaker') as breaker:
+            breaker.return_value.is_available.return_value = True
+            self.assertEqual(engine.get_quotes(['600519'], ['tencent']), {})
+            breaker.return_value.record_failure.assert_called_once()
+        self.assertEqual(engine.failures, 1)
+
+
+class TestManagerFacade(unittest.TestCase):
+
+    def test_get_realtime_quote_uses_engine_when_enabled(self):
+        from data_provider.base import DataFetcherManager
+        from data_provider.realtime_types import UnifiedRealtimeQuote
+
+        quote = UnifiedRealtimeQuote(
+            code='600519', name='贵州茅台', source=RealtimeSource.AKSHARE_EM, price=1500.0,
+            volume_ratio=1.0, turnover_rate=0.5, pe_ratio=30.0, pb_ratio=9.0,
+            total_mv=1.0, circ_mv=1.0, amplitude=2.0,
+        )
+        config = SimpleNamespace(
+            enable_realtime_quote=True, async_quote_engine=True,
+            realtime_source_priority='tencent,akshare_em',
+        )
+        manager = DataFetcherManager(fetchers=[AkshareFetcher()])
+        with patch('src.config.get_config', return_value=config), \
+                patch('data_provider.async_quote_engine.get_async_quote_engine') as get_engine:
+            get_engine.return_value.get_quotes.return_value = {'600519': quote}
+            result = manager.get_realtime_quote('600519')
+
+        self.assertIs(result, quote)
+        get_engine.return_value.get_quotes.assert_called_once_with(['600519'], ['tencent', 'em'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+Baostock 长会话测试
+===================================
+
+职责：
+1. 验证多次查询只登录一次，且所有调用都在同一个会话线程上执行
+2. 验证会话失效/异常时重新登录并重试
+3. 验证批量接口在同一会话内拉取多只股票
+"""
+
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import DataFetchError
+from data_provider.baostock_fetcher import BaostockFetcher
+from data_provider.baostock_session import BaostockSession
+
+
+class _Result:
+    def __init__(self, rows=None, fields=None, error_code='0', error_msg=''):
+        self._rows = list(rows or [])
+        self.fields = fields or []
+        self.error_code = error_code
+        self.error_msg = error_msg
+
+    def next(self):
+        return bool(self._rows)
+
+    def get_row_data(self):
+        return self._rows.pop(0)
+
+
+class _FakeBaostock:
+    """模拟 baostock 模块，记录登录次数与调用线程"""
+
+    def __init__(self):
+        self.logins = 0
+        self.threads = set()
+        self.fail_next = []
+
+    def login(self):
+        self.logins += 1
+        self.threads.add(threading.current_thread().name)
+        return _Result()
+
+    def logout(self):
+        return _Result()
+
+    def query_history_k_data_plus(self, code, fields, start_date, end_date, frequency, adjustflag):
+        self.threads.add(threading.current_thread().name)
+        if self.fail_next:
+            failure = self.fail_next.pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return _Result(error_code=failure, error_msg='failed')
+        rows = [
+            ['2026-01-05', '10', '11', '9', '10.5', '1000', '10500', '1.0'],
+            ['2026-01-06', '10.5', '11', '10', '11', '1200', '13200', '4.76'],
+        ]
+        return _Result(rows=rows, fields=fields.split(','))
+
+
+class TestBaostockSession(unittest.TestCase):
+
+    def setUp(self):
+        self.bs = _FakeBaostock()
+        self.session = BaostockSession(bs_loader=lambda: self.bs)
+
+    def tearDown(self):
+        self.session.close()
+
+    def _query(self):
+        return self.session.query(
+            'query_history_k_data_plus', code='sh.600519', fields='date,open,high,low,close,volume,amount,pctChg',
+            start_date='2026-01-01', end_date='2026-01-31', frequency='d', adjustflag='2',
+        )
+
+    def test_queries_share_one_login_on_one_thread(self):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            frames = list(pool.map(lambda _: self._query(), range(8)))
+
+        self.assertEqual(self.bs.logins, 1)
+        self.assertEqual(len(self.bs.threads), 1)
+        self.assertTrue(all(len(df) == 2 for df in frames))
+
+    def test_relogin_on_session_error(self):
+        self._query()
+        self.bs.fail_next = ['10001001']
+
+        df = self._query()
+
+        self.assertEqual(len(df), 2)
+        self.assertEqual(self.bs.logins, 2)
+
+    def test_relogin_on_socket_error(self):
+        self._query()
+        self.bs.fail_next = [ConnectionResetError('reset')]
+
+        self.assertEqual(len(self._query()), 2)
+        self.assertEqual(self.bs.logins, 2)
+
+    def test_parameter_error_is_not_retried(self):
+        self.bs.fail_next = ['10004011']
+
+        with self.assertRaises(DataFetchError):
+            self._query()
+        self.assertEqual(self.bs.logins, 1)
+
+    def test_idle_session_relogs_in(self):
+        self.session.idle_timeout = 0
+        self._query()
+        self._query()
+
+        self.assertEqual(self.bs.logins, 2)
+
+
+class TestBaostockBatch(unittest.TestCase):
+
+    def test_batch_fetches_codes_in_one_session(self):
+        bs = _FakeBaostock()
+        session = BaostockSession(bs_loader=lambda: bs)
+        fetcher = BaostockFetcher(session=session)
+        try:
+            with patch('data_provider.baostock_fetcher.acquire_rate_limit'):
+                frames = fetcher.get_daily_data_batch(
+                    ['600519', '000001', 'AAPL'], start_date='2026-01-01', end_date='2026-01-31'
+                )
+        finally:
+            session.close()
+
+        self.assertEqual(set(frames), {'600519', '000001'})
+        self.assertEqual(bs.logins, 1)
+        self.assertIn('ma5', frames['600519'].columns)
+        self.assertEqual(frames['000001']['close'].tolist(), [10.5, 11.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""Tests for the per-(code, trade date) chip distribution cache.
+
+Checks the in-memory LRU, persistence through DatabaseManager across cache
+instances (i.e. processes), and that DataFetcherManager only hits the
+network sources once per trade date.
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from data_provider.base import DataFetcherManager
+from data_provider.realtime_types import ChipDistribution
+from data_provider.snapshot_cache import ChipCache, get_chip_cache
+from src.config import Config
+from src.storage import DatabaseManager
+
+
+def _chip(code: str = '600519') -> ChipDistribution:
+    return ChipDistribution(
+        code=code, date='2025-09-30', source='akshare', profit_ratio=0.62, avg_cost=1480.5,
+        cost_90_low=1400.0, cost_90_high=1550.0, concentration_90=0.051,
+        cost_70_low=1440.0, cost_70_high=1520.0, concentration_70=0.027,
+    )
+
+
+class ChipCacheTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "test_chip_cache.db")
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+
+    def tearDown(self) -> None:
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    def test_lru_eviction(self):
+        cache = ChipCache("test", maxsize=2)
+        day = date(2025, 9, 30)
+        cache.put('600519', day, _chip('600519'))
+        cache.put('000001', day, _chip('000001'))
+        cache.get('600519', day)
+        cache.put('300750', day, _chip('300750'))
+
+        self.assertIsNotNone(cache.get('600519', day))
+        self.assertIsNone(cache.get('000001', day))
+        self.assertIsNone(cache.get('600519', date(2025, 10, 9)))
+
+    def test_persisted_across_instances(self):
+        day = date(2025, 9, 30)
+        writer = ChipCache("writer")
+        writer.set_store(self.db)
+        writer.put('600519', day, _chip())
+
+        reader = ChipCache("reader")
+        reader.set_store(self.db)
+        self.assertEqual(reader.get('600519', day), _chip())
+        self.assertEqual(reader.store_hits, 1)
+        # 回填内存后不再查询数据库
+        reader.get('600519', day)
+        self.assertEqual((reader.hits, reader.store_hits), (1, 1))
+
+        # 覆盖写入同一交易日
+        updated = _chip()
+        updated.profit_ratio = 0.7
+        writer.put('600519', day, updated)
+        fresh = ChipCache("fresh")
+        fresh.set_store(self.db)
+        self.assertEqual(fresh.get('600519', day).profit_ratio, 0.7)
+
+
+class ManagerChipCacheTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        get_chip_cache().invalidate()
+
+    def tearDown(self) -> None:
+        get_chip_cache().invalidate()
+
+    def test_network_source_called_once_per_trade_date(self):
+        fetcher = MagicMock()
+        fetcher.name = 'AkshareFetcher'
+        fetcher.get_chip_distribution.return_value = _chip()
+        manager = DataFetcherManager(fetchers=[fetcher])
+        config = SimpleNamespace(enable_chip_distribution=True, chip_local_engine=False)
+
+        with patch('src.config.get_config', return_value=config), \
+                patch('data_provider.trading_calendar.latest_closed_trading_day_for', return_value=date(2025, 9, 30)), \
+                patch('data_provider.trading_calendar.is_session_open_for', return_value=False):
+            first = manager.get_chip_distribution('600519')
+            second = manager.get_chip_distribution('600519')
+
+        self.assertEqual(first, second)
+        fetcher.get_chip_distribution.assert_called_once_with('600519')
+
+    def test_intraday_or_stale_results_are_not_cached(self):
+        fetcher = MagicMock()
+        fetcher.name = 'AkshareFetcher'
+        fetcher.get_chip_distribution.return_value = _chip()
+        manager = DataFetcherManager(fetchers=[fetcher])
+        config = SimpleNamespace(enable_chip_distribution=True, chip_local_engine=False)
+
+        with patch('src.config.get_config', return_value=config):
+            # 盘中：结果含盘中价格，不写缓存
+            with patch('data_provider.trading_calendar.latest_closed_trading_day_for',
+                       return_value=date(2025, 9, 30)), \
+                    patch('data_provider.trading_calendar.is_session_open_for', return_value=True):
+                manager.get_chip_distribution('600519')
+                manager.get_chip_distribution('600519')
+            self.assertEqual(fetcher.get_chip_distribution.call_count, 2)
+
+            # 收盘后数据源仍只返回前一交易日的数据：不以当天为键缓存
+            with patch('data_provider.trading_calendar.latest_closed_trading_day_for',
+                       return_value=date(2025, 10, 9)), \
+                    patch('data_provider.trading_calendar.is_session_open_for', return_value=False):
+                manager.get_chip_distribution('600519')
+                manager.get_chip_distribution('600519')
+            self.assertEqual(fetcher.get_chip_distribution.call_count, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+本地筹码分布引擎测试
+===================================
+
+职责：
+1. 验证闭式权重与逐日递推的 CYQ 模型结果一致
+2. 验证获利比例、平均成本、成本区间与集中度的口径
+3. 验证数据不足时返回 None，DataFetcherManager 优先使用本地计算
+4. 验证以手为单位入库的成交量（efinance/东财日 K）按行换算为股
+"""
+
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import DataFetcherManager
+from data_provider.snapshot_cache import get_chip_cache
+from data_provider.chip_engine import (
+    _daily_distributions,
+    chip_curve,
+    compute_chip_distribution,
+    compute_chip_distribution_batch,
+)
+
+
+def _bars(closes, turnover=None, volume=1_000_000.0) -> pd.DataFrame:
+    closes = np.asarray(closes, dtype=float)
+    df = pd.DataFrame({
+        'date': pd.bdate_range('2025-01-02', periods=len(closes)),
+        'open': closes,
+        'high': closes * 1.02,
+        'low': closes * 0.98,
+        'close': closes,
+        'volume': volume,
+        'amount': closes * volume,
+    })
+    if turnover is not None:
+        df['turnover_rate'] = turnover
+    return df
+
+
+class TestChipCurve(unittest.TestCase):
+
+    def test_matches_iterative_model(self):
+        rng = np.random.default_rng(7)
+        closes = 10 * np.cumprod(1 + rng.normal(0, 0.02, 80))
+        df = _bars(closes, turnover=rng.uniform(1, 8, 80))
+
+        grid, chips = chip_curve(df)
+
+        # 逐日递推：第一天全部筹码按当日分布，之后按换手率替换
+        daily = _daily_distributions(
+            df['low'].to_numpy(), df['high'].to_numpy(), df['close'].to_numpy(), grid
+        )
+        turnover = df['turnover_rate'].to_numpy() / 100
+        expected = daily[0].copy()
+        for i in range(1, len(df)):
+            expected = expected * (1 - turnover[i]) + turnover[i] * daily[i]
+        np.testing.assert_allclose(chips, expected / expected.sum(), atol=1e-12)
+
+    def test_insufficient_data(self):
+        self.assertIsNone(chip_curve(_bars([10.0] * 10, turnover=5.0)))
+        # 无换手率且无流通股本
+        self.assertIsNone(chip_curve(_bars([10.0] * 60)))
+        # 换手过低，窗口内覆盖不足一半
+        self.assertIsNone(chip_curve(_bars([10.0] * 60, turnover=0.5)))
+
+
+class TestChipDistribution(unittest.TestCase):
+
+    def test_two_regimes(self):
+        # 前 60 天在 10 元附近，后 60 天在 20 元附近，日换手 4%（流通股本推算）
+        df = _bars([10.0] * 60 + [20.0] * 60, volume=400_000.0)
+        chip = compute_chip_distribution(df, '600519', float_shares=10_000_000.0)
+        old_chips = 0.96 ** 60  # 仍停留在 10 元附近的筹码
+
+        self.assertEqual(chip.source, 'local')
+        self.assertEqual(chip.date, df['date'].iloc[-1].strftime('%Y-%m-%d'))
+        self.assertAlmostEqual(chip.avg_cost, 20.0, delta=0.3)
+        self.assertLess(chip.cost_90_low, 15.0)
+        self.assertGreater(chip.cost_70_low, 19.0)
+        self.assertLess(chip.concentration_70, chip.concentration_90)
+        # 20 元附近的筹码按三角形分布，一半低于收盘价
+        self.assertAlmostEqual(chip.profit_ratio, old_chips + (1 - old_chips) / 2, delta=0.03)
+
+        below = compute_chip_distribution(df, '600519', float_shares=10_000_000.0, current_price=15.0)
+        self.assertAlmostEqual(below.profit_ratio, old_chips, delta=0.01)
+
+    def test_volume_in_lots_is_converted(self):
+        # efinance 日 K：成交量 4000 手 = 400000 股，成交额为元
+        shares = _bars([10.0] * 60 + [20.0] * 60, volume=400_000.0)
+        lots = shares.assign(volume=shares['volume'] / 100, data_source='EfinanceFetcher')
+        # 最近 20 天来自按交易日同步的 Tushare（成交量已换算为股）
+        mixed = lots.copy()
+        mixed.loc[100:, 'volume'] = shares.loc[100:, 'volume']
+        mixed.loc[100:, 'data_source'] = 'TushareFetcher'
+
+        expected = compute_chip_distribution(shares, '600519', float_shares=10_000_000.0)
+        for df in (lots, mixed):
+            chip = compute_chip_distribution(df, '600519', float_shares=10_000_000.0)
+            self.assertIsNotNone(chip)
+            self.assertAlmostEqual(chip.avg_cost, expected.avg_cost)
+            self.assertAlmostEqual(chip.profit_ratio, expected.profit_ratio)
+
+        # 缺成交额时按 data_source 判断单位
+        no_amount = lots.drop(columns=['amount'])
+        chip = compute_chip_distribution(no_amount, '600519', float_shares=10_000_000.0)
+        self.assertAlmostEqual(chip.profit_ratio, expected.profit_ratio, delta=0.01)
+
+    def test_batch(self):
+        frames = {
+            '600519': _bars([10.0] * 60, turnover=5.0),
+            '000001': _bars([10.0] * 5, turnover=5.0),
+        }
+        results = compute_chip_distribution_batch(frames)
+        self.assertEqual(list(results), ['600519'])
+
+
+class TestManagerLocalFirst(unittest.TestCase):
+
+    def setUp(self):
+        get_chip_cache().invalidate()
+
+    def test_local_engine_skips_network_sources(self):
+        network = MagicMock()
+        network.name = 'AkshareFetcher'
+        manager = DataFetcherManager(fetchers=[network])
+        quote = SimpleNamespace(price=10.0, circ_mv=100_000_000.0)
+        config = SimpleNamespace(enable_chip_distribution=True, chip_local_engine=True)
+
+        with patch('src.config.get_config', return_value=config):
+            chip = manager.get_chip_distribution('600519', history=_bars([10.0] * 60), realtime_quote=quote)
+
+        self.assertEqual(chip.source, 'local')
+        network.get_chip_distribution.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+熔断器测试
+===================================
+
+职责：
+1. 验证半开状态并发争抢试探名额时只放行一个试探请求
+2. 验证 is_available 不占用试探名额，未上报结果的名额随 probe() 退出释放
+3. 验证状态切换计数与熔断时长统计
+4. 验证熔断状态可通过状态文件在进程间继承，且只在状态切换时写文件
+5. 验证实时行情单只查询路径同样占用半开试探名额
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.akshare_fetcher import AkshareFetcher
+from data_provider.efinance_fetcher import EfinanceFetcher
+from data_provider.realtime_types import CircuitBreaker
+
+
+def _breaker(**kwargs) -> CircuitBreaker:
+    params = dict(failure_threshold=2, cooldown_seconds=60, half_open_max_calls=1, state_file='')
+    params.update(kwargs)
+    return CircuitBreaker(**params)
+
+
+def _trip(breaker: CircuitBreaker, source: str = 'src') -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(source, 'boom')
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_threshold(self):
+        breaker = _breaker()
+        breaker.record_failure('src')
+        self.assertTrue(breaker.is_available('src'))
+
+        breaker.record_failure('src')
+
+        self.assertFalse(breaker.is_available('src'))
+        self.assertEqual(breaker.get_status(), {'src': CircuitBreaker.OPEN})
+
+    def test_half_open_admits_single_probe_across_threads(self):
+        breaker = _breaker()
+        _trip(breaker)
+        breaker._states['src']['last_failure_time'] -= 120
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            admitted = list(pool.map(lambda _: breaker.try_acquire_probe('src'), range(64)))
+
+        self.assertEqual(admitted.count(True), 1)
+        self.assertEqual(breaker.get_status()['src'], CircuitBreaker.HALF_OPEN)
+
+    def test_is_available_does_not_take_probe_slot(self):
+        breaker = _breaker()
+        _trip(breaker)
+        breaker._states['src']['last_failure_time'] -= 120
+
+        for _ in range(5):
+            self.assertTrue(breaker.is_available('src'))
+
+        self.assertTrue(breaker.try_acquire_probe('src'))
+        self.assertFalse(breaker.is_available('src'))
+
+    def test_unreported_probe_is_released_on_exit(self):
+        breaker = _breaker()
+        _trip(breaker)
+        breaker._states['src']['last_failure_time'] -= 120
+
+        with breaker.probe('src') as allowed:
+            self.assertTrue(allowed)
+            self.assertFalse(breaker.try_acquire_probe('src'))
+
+        # 调用方未上报结果（缓存命中、代码不支持等）就退出，下一个调用方立即可以试探
+        with breaker.probe('src') as allowed:
+            self.assertTrue(allowed)
+            breaker.record_success('src')
+        self.assertEqual(breaker.get_status()['src'], CircuitBreaker.CLOSED)
+
+    def test_probe_failure_reopens(self):
+        breaker = _breaker()
+        _trip(breaker)
+        breaker._states['src']['last_failure_time'] -= 120
+        self.assertTrue(breaker.try_acquire_probe('src'))
+
+        breaker.record_failure('src', 'still down')
+
+        self.assertFalse(breaker.is_available('src'))
+
+    def test_stale_probe_slot_is_released(self):
+        breaker = _breaker(probe_timeout=0.05)
+        _trip(breaker)
+        breaker._states['src']['last_failure_time'] -= 120
+        self.assertTrue(breaker.try_acquire_probe('src'))
+        self.assertFalse(breaker.try_acquire_probe('src'))
+
+        time.sleep(0.06)
+
+        self.assertTrue(breaker.try_acquire_probe('src'))
+
+    def test_metrics_track_transitions_and_open_time(self):
+        breaker = _breaker()
+        _trip(breaker)
+        self.assertFalse(breaker.is_available('src'))
+        breaker._states['src']['last_failure_time'] -= 120
+        breaker._states['src']['opened_at'] -= 120
+        self.assertTrue(breaker.is_available('src'))
+        breaker.record_success('src')
+
+        metrics = breaker.get_metrics()['src']
+
+        self.assertEqual(metrics['state'], CircuitBreaker.CLOSED)
+        self.assertEqual(metrics['transitions'], {
+            'closed->open': 1, 'open->half_open': 1, 'half_open->closed': 1,
+        })
+        self.assertGreaterEqual(metrics['open_seconds'], 120)
+        self.assertEqual(metrics['rejected'], 1)
+
+
+class TestRealtimeQuoteProbes(unittest.TestCase):
+    """半开状态下已有试探在途时，单只实时行情查询不得再发起请求"""
+
+    def _half_open_with_probe_in_flight(self, source: str) -> CircuitBreaker:
+        breaker = _breaker()
+        _trip(breaker, source)
+        breaker._states[source]['last_failure_time'] -= 120
+        self.assertTrue(breaker.try_acquire_probe(source))
+        return breaker
+
+    def test_akshare_lite_quote_waits_for_probe(self):
+        breaker = self._half_open_with_probe_in_flight('tencent')
+        fetcher = AkshareFetcher.__new__(AkshareFetcher)
+        fetcher._fetch_lite_quotes = MagicMock(return_value={})
+
+        with patch('data_provider.akshare_fetcher.get_realtime_circuit_breaker', return_value=breaker):
+            self.assertIsNone(fetcher.get_realtime_quote('600519', source='tencent'))
+            fetcher._fetch_lite_quotes.assert_not_called()
+
+            breaker.release_probe('tencent')
+            fetcher.get_realtime_quote('600519', source='tencent')
+            fetcher._fetch_lite_quotes.assert_called_once()
+
+    def test_akshare_hk_quote_waits_for_probe(self):
+        breaker = self._half_open_with_probe_in_flight('akshare_hk')
+        fetcher = AkshareFetcher.__new__(AkshareFetcher)
+        fetcher._enforce_rate_limit = MagicMock()
+
+        with patch('data_provider.akshare_fetcher.get_realtime_circuit_breaker', return_value=breaker):
+            self.assertIsNone(fetcher.get_realtime_quote('hk00700'))
+        fetcher._enforce_rate_limit.assert_not_called()
+
+    def test_efinance_quote_admits_single_concurrent_probe(self):
+        breaker = _breaker()
+        _trip(breaker, 'efinance')
+        breaker._states['efinance']['last_failure_time'] -= 120
+        fetcher = EfinanceFetcher.__new__(EfinanceFetcher)
+        entered, release = threading.Event(), threading.Event()
+
+        def slow_get(loader):
+            entered.set()
+            release.wait(5)
+            raise ConnectionError('still down')
+
+        with patch('data_provider.efinance_fetcher.get_realtime_circuit_breaker', return_value=breaker), \
+                patch('data_provider.efinance_fetcher._realtime_cache') as cache:
+            cache.get.side_effect = slow_get
+            first = threading.Thread(target=fetcher.get_realtime_quote, args=('600519',), daemon=True)
+            first.start()
+            self.assertTrue(entered.wait(5))
+
+            # 第一个试探仍在途，第二个调用应直接跳过
+            self.assertIsNone(fetcher.get_realtime_quote('000001'))
+            release.set()
+            first.join(5)
+
+        self.assertEqual(cache.get.call_count, 1)
+        self.assertEqual(breaker.get_status()['efinance'], CircuitBreaker.OPEN)
+
+
+class TestCircuitBreakerPersistence(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmpdir.name, 'breaker.json')
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_open_state_is_inherited_by_new_process(self):
+        first = _breaker(name='realtime', state_file=self.path)
+        _trip(first)
+
+        second = _breaker(name='realtime', state_file=self.path)
+
+        self.assertFalse(second.is_available('src'))
+        self.assertEqual(second.get_status(), {'src': CircuitBreaker.OPEN})
+
+    def test_recovery_clears_persisted_state(self):
+        first = _breaker(name='realtime', state_file=self.path)
+        _trip(first)
+        first.record_success('src')
+
+        second = _breaker(name='realtime', state_file=self.path)
+
+        self.assertTrue(second.is_available('src'))
+
+    def test_breakers_share_file_by_name(self):
+        realtime = _breaker(name='realtime', state_file=self.path)
+        chip = _breaker(name='chip', state_file=self.path)
+        _trip(realtime, 'a')
+        _trip(chip, 'b')
+
+        reloaded = _breaker(name='realtime', state_file=self.path)
+
+        self.assertEqual(reloaded.get_status(), {'a': CircuitBreaker.OPEN})
+
+    def test_expired_cooldown_is_not_inherited(self):
+        first = _breaker(name='realtime', state_file=self.path, cooldown_seconds=0.01)
+        _trip(first)
+        time.sleep(0.02)
+
+        second = _breaker(name='realtime', state_file=self.path, cooldown_seconds=0.01)
+
+        self.assertEqual(second.get_status(), {})
+
+    def test_failures_while_open_do_not_rewrite_file(self):
+        breaker = _breaker(name='realtime', state_file=self.path)
+        _trip(breaker)
+        mtime = os.stat(self.path).st_mtime_ns
+        os.utime(self.path, ns=(mtime - 10**9, mtime - 10**9))
+
+        breaker.record_failure('src', 'late failure')
+
+        self.assertEqual(os.stat(self.path).st_mtime_ns, mtime - 10**9)
+
+    def test_corrupt_file_is_ignored(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('{not json')
+
+        breaker = _breaker(name='realtime', state_file=self.path)
+
+        self.assertTrue(breaker.is_available('src'))
+
+
+if __name__ == '__main__':
+    unittest.main()
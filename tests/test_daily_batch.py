@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+批量日线获取测试
+===================================
+
+职责：
+1. 验证 YfinanceFetcher 将多只股票合并为一次 yf.download 调用并按代码拆分
+2. 验证 DataFetcherManager.get_daily_data_batch 将美股/港股交给批量下载，其余逐只故障切换
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import BaseFetcher, DataFetcherManager, STANDARD_COLUMNS
+from data_provider.source_health import get_source_health_tracker
+from data_provider.yfinance_fetcher import YfinanceFetcher
+
+
+def _download_frame(tickers):
+    """模拟 yf.download(group_by='ticker') 的 MultiIndex 返回"""
+    index = pd.DatetimeIndex(pd.bdate_range('2026-01-05', periods=3), name='Date')
+    frames = {}
+    for i, ticker in enumerate(tickers):
+        base = 100.0 * (i + 1)
+        frames[ticker] = pd.DataFrame({
+            'Open': [base, base + 1, base + 2],
+            'High': [base, base + 1, base + 2],
+            'Low': [base, base + 1, base + 2],
+            'Close': [base, base + 1, base + 2],
+            'Volume': [1000.0, 1000.0, 1000.0],
+        }, index=index)
+    # 港股最后一天休市
+    if '0700.HK' in frames:
+        frames['0700.HK'].iloc[-1] = np.nan
+    return pd.concat(frames, axis=1)
+
+
+class _FakeYfinance(YfinanceFetcher):
+    def __init__(self):
+        self.batch_calls = []
+
+    def get_daily_data_batch(self, stock_codes, start_date=None, end_date=None, days=30):
+        self.batch_calls.append(list(stock_codes))
+        return super().get_daily_data_batch(stock_codes, start_date, end_date, days)
+
+
+class _FakeAShare(BaseFetcher):
+    name = 'FakeAShare'
+    priority = 0
+
+    def __init__(self):
+        self.calls = []
+
+    def _fetch_raw_data(self, stock_code, start_date, end_date):
+        self.calls.append(stock_code)
+        if not stock_code.isdigit() or len(stock_code) != 6:
+            raise ValueError('A 股数据源不支持')
+        return pd.DataFrame({
+            'date': pd.bdate_range('2026-01-05', periods=2),
+            'open': [1.0, 2.0], 'high': [1.0, 2.0], 'low': [1.0, 2.0], 'close': [1.0, 2.0],
+            'volume': [1.0, 1.0], 'amount': [1.0, 2.0], 'pct_chg': [0.0, 100.0],
+        })
+
+    def _normalize_data(self, df, stock_code):
+        df = df.copy()
+        df['code'] = stock_code
+        return df[['code'] + STANDARD_COLUMNS]
+
+
+class TestYfinanceBatch(unittest.TestCase):
+
+    def test_single_download_split_per_code(self):
+        fetcher = YfinanceFetcher()
+        with patch('yfinance.download', side_effect=lambda tickers, **kw: _download_frame(tickers)) as download, \
+                patch('data_provider.yfinance_fetcher.acquire_rate_limit'):
+            frames = fetcher.get_daily_data_batch(['AAPL', 'MSFT', 'hk00700'], start_date='2026-01-01', end_date='2026-01-10')
+
+        self.assertEqual(download.call_count, 1)
+        self.assertEqual(download.call_args.kwargs['tickers'], ['AAPL', 'MSFT', '0700.HK'])
+        self.assertEqual(set(frames), {'AAPL', 'MSFT', 'hk00700'})
+        self.assertEqual(frames['MSFT']['close'].tolist(), [200.0, 201.0, 202.0])
+        self.assertEqual(len(frames['hk00700']), 2)
+        self.assertEqual(frames['AAPL']['code'].iloc[0], 'AAPL')
+        self.assertIn('ma5', frames['AAPL'].columns)
+
+
+class TestManagerDailyBatch(unittest.TestCase):
+
+    def setUp(self):
+        get_source_health_tracker().reset()
+
+    def tearDown(self):
+        get_source_health_tracker().reset()
+
+    def test_overseas_codes_grouped_into_one_batch(self):
+        yfinance = _FakeYfinance()
+        ashare = _FakeAShare()
+        manager = DataFetcherManager(fetchers=[ashare, yfinance], hedge_delay=0)
+
+        with patch('yfinance.download', side_effect=lambda tickers, **kw: _download_frame(tickers)), \
+                patch('data_provider.yfinance_fetcher.acquire_rate_limit'):
+            results = manager.get_daily_data_batch(['AAPL', '600519', 'TSLA'])
+
+        self.assertEqual(yfinance.batch_calls, [['AAPL', 'TSLA']])
+        self.assertEqual(ashare.calls, ['600519'])
+        self.assertEqual(results['AAPL'][1], 'YfinanceFetcher')
+        self.assertEqual(results['600519'][1], 'FakeAShare')
+
+    def test_fallback_can_be_disabled(self):
+        manager = DataFetcherManager(fetchers=[_FakeAShare(), _FakeYfinance()], hedge_delay=0)
+
+        with patch('yfinance.download', side_effect=lambda tickers, **kw: _download_frame(tickers)), \
+                patch('data_provider.yfinance_fetcher.acquire_rate_limit'):
+            results = manager.get_daily_data_batch(['AAPL', '600519', 'TSLA'], fallback=False)
+
+        self.assertEqual(set(results), {'AAPL', 'TSLA'})
+
+
+if __name__ == '__main__':
+    unittest.main()
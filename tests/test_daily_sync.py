@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""Tests for DailySyncService (market-wide daily bars by trade date).
+
+Uses a fake Tushare fetcher and a temporary SQLite DB to check that each
+missing trade date costs exactly one upstream call for the whole watchlist.
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import date
+
+import pandas as pd
+
+from src.config import Config
+from src.services.daily_sync_service import DailySyncService
+from src.storage import DatabaseManager
+
+
+def _history(code: str, start: str, periods: int) -> pd.DataFrame:
+    dates = pd.bdate_range(start=start, periods=periods)
+    closes = [10.0 + i for i in range(periods)]
+    return pd.DataFrame({
+        'date': dates,
+        'open': closes,
+        'high': closes,
+        'low': closes,
+        'close': closes,
+        'volume': [1000.0] * periods,
+        'amount': [c * 1000 for c in closes],
+        'pct_chg': [1.0] * periods,
+    })
+
+
+class _FakeTushare:
+    name = 'TushareFetcher'
+
+    def __init__(self, trade_dates, published, market, pre_close=None):
+        self.trade_dates = trade_dates
+        self.published = published
+        self.market = market
+        # {(code, trade_date): 昨收}；未提供时返回的数据不含 pre_close 列
+        self.pre_close = pre_close
+        self.calls = []
+
+    def is_available(self):
+        return True
+
+    def get_trade_dates(self, start_date, end_date):
+        self.calls.append(('trade_cal', start_date, end_date))
+        return [d for d in self.trade_dates if start_date <= d <= end_date]
+
+    def get_daily_by_trade_date(self, trade_date, stock_codes=None):
+        self.calls.append(('daily', trade_date))
+        if trade_date not in self.published:
+            return pd.DataFrame()
+        codes = [c for c in self.market if stock_codes is None or c in stock_codes]
+        df = pd.DataFrame({
+            'code': codes,
+            'date': pd.Timestamp(trade_date),
+            'open': [self.market[c] for c in codes],
+            'high': [self.market[c] for c in codes],
+            'low': [self.market[c] for c in codes],
+            'close': [self.market[c] for c in codes],
+            'volume': 1000.0,
+            'amount': 1.0,
+            'pct_chg': 0.0,
+        })
+        if self.pre_close is not None:
+            df['pre_close'] = [self.pre_close.get((c, trade_date), self.market[c]) for c in codes]
+        return df
+
+
+class DailySyncServiceTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "test_daily_sync.db")
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+        # 本地已有 2026-01-05 ~ 2026-01-30 共 20 个交易日
+        for code in ('600519', '000001'):
+            self.db.save_daily_data(_history(code, '2026-01-05', 20), code, 'Seed')
+
+    def tearDown(self) -> None:
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    def test_one_call_per_missing_trade_date(self):
+        fetcher = _FakeTushare(
+            trade_dates=['2026-02-02', '2026-02-03'],
+            published={'2026-02-02', '2026-02-03'},
+            market={'600519': 50.0, '000001': 60.0, '300750': 70.0},
+        )
+        service = DailySyncService(db_manager=self.db, fetcher=fetcher)
+
+        stats = service.sync_by_trade_date(['600519', '000001', 'hk00700'], end_date=date(2026, 2, 3))
+
+        self.assertEqual([c for c in fetcher.calls if c[0] == 'daily'], [('daily', '2026-02-02'), ('daily', '2026-02-03')])
+        self.assertEqual(stats['api_calls'], 3)
+        self.assertEqual(stats['saved'], 4)
+        self.assertTrue(stats['up_to_date'])
+        self.assertEqual(stats['synced_codes'], {'600519', '000001'})
+        self.assertEqual(self.db.get_latest_daily_dates(['300750']), {})
+
+        history = self.db.get_daily_history_df('600519', days=5)
+        last = history.iloc[-1]
+        self.assertEqual(last['date'].date(), date(2026, 2, 3))
+        # MA5 结合本地历史重算：27, 28, 29, 50, 50
+        self.assertAlmostEqual(last['ma5'], 36.8)
+        self.assertEqual(last['data_source'], 'TushareFetcher')
+
+    def test_unpublished_date_stops_sync(self):
+        fetcher = _FakeTushare(
+            trade_dates=['2026-02-02', '2026-02-03'],
+            published={'2026-02-02'},
+            market={'600519': 50.0, '000001': 60.0},
+        )
+        service = DailySyncService(db_manager=self.db, fetcher=fetcher)
+
+        stats = service.sync_by_trade_date(['600519', '000001'], end_date=date(2026, 2, 3))
+
+        self.assertEqual(stats['trade_dates'], ['2026-02-02'])
+        self.assertFalse(stats['up_to_date'])
+        self.assertEqual(stats['last_trade_date'], date(2026, 2, 2))
+
+    def test_codes_without_history_are_left_to_per_stock_fetch(self):
+        fetcher = _FakeTushare(trade_dates=[], published=set(), market={})
+        service = DailySyncService(db_manager=self.db, fetcher=fetcher)
+
+        stats = service.sync_by_trade_date(['300750'], end_date=date(2026, 2, 3))
+
+        self.assertEqual(fetcher.calls, [])
+        self.assertEqual(stats['synced_codes'], set())
+
+    def test_up_to_date_local_data_skips_upstream(self):
+        fetcher = _FakeTushare(trade_dates=[], published=set(), market={})
+        service = DailySyncService(db_manager=self.db, fetcher=fetcher)
+
+        stats = service.sync_by_trade_date(['600519'], end_date=date(2026, 1, 30))
+
+        self.assertEqual(fetcher.calls, [])
+        self.assertTrue(stats['up_to_date'])
+        self.assertEqual(stats['synced_codes'], {'600519'})
+
+    def test_market_wide_sync_skips_lagging_codes(self):
+        # 300750 本地只到 2026-01-23，比其他股票落后一周
+        self.db.save_daily_data(_history('300750', '2026-01-05', 15), '300750', 'Seed')
+        fetcher = _FakeTushare(
+            trade_dates=['2026-02-02', '2026-02-03'],
+            published={'2026-02-02', '2026-02-03'},
+            market={'600519': 50.0, '000001': 60.0, '300750': 70.0, '688981': 80.0},
+        )
+        service = DailySyncService(db_manager=self.db, fetcher=fetcher)
+
+        stats = service.sync_by_trade_date(None, end_date=date(2026, 2, 3))
+
+        self.assertTrue(stats['up_to_date'])
+        self.assertEqual(stats['synced_codes'], {'600519', '000001'})
+        # 落后的股票不写入最新几天，避免增量拉取跳过中间的缺口
+        self.assertEqual(self.db.get_latest_daily_dates(['300750']), {'300750': date(2026, 1, 23)})
+        # 本地无历史的股票照常写入，但不视为已补齐
+        self.assertEqual(self.db.get_latest_daily_dates(['688981']), {'688981': date(2026, 2, 3)})
+
+    def test_ex_rights_codes_are_left_to_per_stock_fetch(self):
+        # 本地最新收盘价为 29（前复权历史）
+        fetcher = _FakeTushare(
+            trade_dates=['2026-02-02', '2026-02-03'],
+            published={'2026-02-02', '2026-02-03'},
+            market={'600519': 29.5, '000001': 15.0},
+            pre_close={
+                ('600519', '2026-02-02'): 29.0,
+                # 000001 在 02-02 除权（10 送 10），昨收为除权参考价
+                ('000001', '2026-02-02'): 14.5,
+            },
+        )
+        service = DailySyncService(db_manager=self.db, fetcher=fetcher)
+
+        stats = service.sync_by_trade_date(['600519', '000001'], end_date=date(2026, 2, 3))
+
+        self.assertEqual(stats['synced_codes'], {'600519'})
+        self.assertEqual(stats['saved'], 2)
+        self.assertEqual(self.db.get_latest_daily_dates(['000001']), {'000001': date(2026, 1, 30)})
+
+    def test_ex_rights_inside_sync_window_is_detected(self):
+        fetcher = _FakeTushare(
+            trade_dates=['2026-02-02', '2026-02-03'],
+            published={'2026-02-02', '2026-02-03'},
+            market={'600519': 29.0, '000001': 29.0},
+            pre_close={
+                # 600519 在 02-03 除权：昨收 14.5 与 02-02 收盘价 29 不衔接
+                ('600519', '2026-02-03'): 14.5,
+            },
+        )
+        service = DailySyncService(db_manager=self.db, fetcher=fetcher)
+
+        stats = service.sync_by_trade_date(['600519', '000001'], end_date=date(2026, 2, 3))
+
+        self.assertEqual(stats['synced_codes'], {'000001'})
+        self.assertEqual(self.db.get_latest_daily_dates(['600519']), {'600519': date(2026, 1, 30)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+日线对冲拉取测试
+===================================
+
+职责：
+1. 验证主数据源超出延迟预算时并行启动备用数据源，先返回者胜出
+2. 验证主数据源快速失败时立即切换
+3. 验证全部失败时抛出 DataFetchError
+4. 验证数据源不支持该市场时不计入健康度
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import (
+    BaseFetcher,
+    DataFetchError,
+    DataFetcherManager,
+    STANDARD_COLUMNS,
+    UnsupportedMarketError,
+)
+from data_provider.source_health import get_source_health_tracker
+
+
+class _FakeFetcher(BaseFetcher):
+    """可控延迟/失败的假数据源"""
+
+    def __init__(self, name: str, priority: int, delay: float = 0.0, fail: bool = False, a_share_only: bool = False):
+        self.name = name
+        self.priority = priority
+        self.delay = delay
+        self.fail = fail
+        self.a_share_only = a_share_only
+        self.started = threading.Event()
+
+    def _fetch_raw_data(self, stock_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        self.started.set()
+        if self.a_share_only and stock_code.isalpha():
+            raise UnsupportedMarketError(f"{self.name} 不支持美股 {stock_code}")
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.name} down")
+        return pd.DataFrame({
+            'date': pd.bdate_range('2026-01-05', periods=3),
+            'open': [1.0, 2.0, 3.0],
+            'high': [1.0, 2.0, 3.0],
+            'low': [1.0, 2.0, 3.0],
+            'close': [1.0, 2.0, 3.0],
+            'volume': [100.0, 100.0, 100.0],
+            'amount': [100.0, 200.0, 300.0],
+            'pct_chg': [0.0, 0.0, 0.0],
+        })
+
+    def _normalize_data(self, df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
+        df = df.copy()
+        df['code'] = stock_code
+        return df[['code'] + STANDARD_COLUMNS]
+
+
+class TestHedgedFetch(unittest.TestCase):
+
+    def setUp(self):
+        get_source_health_tracker().reset()
+
+    def tearDown(self):
+        get_source_health_tracker().reset()
+
+    def test_slow_primary_is_hedged(self):
+        primary = _FakeFetcher('Slow', 0, delay=1.5)
+        backup = _FakeFetcher('Fast', 1)
+        manager = DataFetcherManager(fetchers=[primary, backup], hedge_delay=0.1)
+
+        start = time.monotonic()
+        df, source = manager.get_daily_data('600519')
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(source, 'Fast')
+        self.assertEqual(len(df), 3)
+        self.assertLess(elapsed, 1.0)
+
+    def test_fast_primary_does_not_start_backup(self):
+        primary = _FakeFetcher('Primary', 0)
+        backup = _FakeFetcher('Backup', 1)
+        manager = DataFetcherManager(fetchers=[primary, backup], hedge_delay=1.0)
+
+        _, source = manager.get_daily_data('600519')
+
+        self.assertEqual(source, 'Primary')
+        self.assertFalse(backup.started.is_set())
+
+    def test_primary_failure_switches_immediately(self):
+        primary = _FakeFetcher('Broken', 0, fail=True)
+        backup = _FakeFetcher('Backup', 1)
+        manager = DataFetcherManager(fetchers=[primary, backup], hedge_delay=5.0)
+
+        start = time.monotonic()
+        _, source = manager.get_daily_data('600519')
+
+        self.assertEqual(source, 'Backup')
+        self.assertLess(time.monotonic() - start, 2.0)
+
+    def test_all_failures_raise(self):
+        manager = DataFetcherManager(
+            fetchers=[_FakeFetcher('A', 0, fail=True), _FakeFetcher('B', 1, fail=True)],
+            hedge_delay=0.1,
+        )
+
+        with self.assertRaises(DataFetchError) as ctx:
+            manager.get_daily_data('600519')
+        self.assertIn('[A]', str(ctx.exception))
+        self.assertIn('[B]', str(ctx.exception))
+
+    def test_unsupported_market_not_recorded_as_failure(self):
+        for hedge_delay in (0.0, 0.1):
+            get_source_health_tracker().reset()
+            manager = DataFetcherManager(
+                fetchers=[_FakeFetcher('AShare', 0, a_share_only=True), _FakeFetcher('Global', 1)],
+                hedge_delay=hedge_delay,
+            )
+
+            for code in ('AAPL', 'TSLA', 'NVDA', 'MSFT', 'AMZN'):
+                _, source = manager.get_daily_data(code)
+                self.assertEqual(source, 'Global')
+
+            self.assertIsNone(get_source_health_tracker().get('daily', 'AShare'))
+            self.assertFalse(get_source_health_tracker().is_degraded('daily', 'AShare'))
+
+    def test_budget_uses_p90_once_enough_samples(self):
+        manager = DataFetcherManager(fetchers=[_FakeFetcher('A', 0)], hedge_delay=8.0)
+        self.assertEqual(manager._hedge_budget('A'), 8.0)
+
+        # 样本记录在进程级健康度统计中，其他 manager 实例同样可见
+        for _ in range(DataFetcherManager._HEDGE_MIN_SAMPLES):
+            get_source_health_tracker().record('daily', 'A', True, 0.5)
+
+        other = DataFetcherManager(fetchers=[_FakeFetcher('A', 0)], hedge_delay=8.0)
+        self.assertAlmostEqual(manager._hedge_budget('A'), 0.5)
+        self.assertAlmostEqual(other._hedge_budget('A'), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+日线增量拉取测试
+===================================
+
+职责：
+1. 验证本地历史不足时退化为全量拉取
+2. 验证增量数据与本地历史拼接后技术指标正确
+3. 验证重叠区间价格变动（除权）时触发全量重拉
+"""
+
+import os
+import sys
+import unittest
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import BaseFetcher, DataFetcherManager, STANDARD_COLUMNS
+
+
+def _make_bars(start: str, periods: int, base_close: float = 10.0) -> pd.DataFrame:
+    dates = pd.bdate_range(start=start, periods=periods)
+    closes = [base_close + i * 0.1 for i in range(periods)]
+    return pd.DataFrame({
+        'date': dates,
+        'open': closes,
+        'high': [c + 0.2 for c in closes],
+        'low': [c - 0.2 for c in closes],
+        'close': closes,
+        'volume': [1000.0 + i for i in range(periods)],
+        'amount': [c * 1000 for c in closes],
+        'pct_chg': [0.0] * periods,
+    })
+
+
+class _FakeFetcher(BaseFetcher):
+    """基于内存 K 线的假数据源，记录每次请求的日期范围"""
+
+    name = "FakeFetcher"
+    priority = 0
+
+    def __init__(self, bars: pd.DataFrame):
+        self.bars = bars
+        self.calls: List[Tuple[str, str]] = []
+
+    def _fetch_raw_data(self, stock_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        self.calls.append((start_date, end_date))
+        mask = (self.bars['date'] >= start_date) & (self.bars['date'] <= end_date)
+        return self.bars.loc[mask].copy()
+
+    def _normalize_data(self, df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
+        df = df.copy()
+        df['code'] = stock_code
+        return df[['code'] + STANDARD_COLUMNS]
+
+
+class TestIncrementalFetch(unittest.TestCase):
+
+    def setUp(self):
+        self.remote = _make_bars('2026-01-05', 40)
+        self.end_date = self.remote['date'].iloc[-1].strftime('%Y-%m-%d')
+        self.fetcher = _FakeFetcher(self.remote)
+        self.manager = DataFetcherManager(fetchers=[self.fetcher])
+
+    def _local_history(self, n: int, df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        source = self.remote if df is None else df
+        return BaseFetcher._calculate_indicators(source.iloc[:n].copy())
+
+    def test_short_history_falls_back_to_full_fetch(self):
+        history = self._local_history(5)
+
+        df, source = self.manager.get_daily_data_incremental(
+            '600519', history=history, end_date=self.end_date, days=30
+        )
+
+        self.assertEqual(source, 'FakeFetcher')
+        self.assertEqual(len(self.fetcher.calls), 1)
+        # 全量拉取按 days * 2 个日历日回溯
+        self.assertLess(self.fetcher.calls[0][0], history['date'].iloc[-1].strftime('%Y-%m-%d'))
+        self.assertGreater(len(df), 5)
+
+    def test_delta_merge_recomputes_indicators(self):
+        history = self._local_history(35)
+
+        df, _ = self.manager.get_daily_data_incremental(
+            '600519', history=history, end_date=self.end_date, overlap_bars=2
+        )
+
+        # 仅请求倒数第 2 根 K 线之后的数据
+        self.assertEqual(self.fetcher.calls[0][0], history['date'].iloc[-2].strftime('%Y-%m-%d'))
+        # 返回本地最新一根 + 5 根新 K 线
+        self.assertEqual(len(df), 6)
+        self.assertEqual(df['date'].iloc[0], history['date'].iloc[-1])
+
+        expected = BaseFetcher._calculate_indicators(self.remote.copy()).iloc[-6:].reset_index(drop=True)
+        for col in ['ma5', 'ma10', 'ma20', 'volume_ratio']:
+            self.assertListEqual(df[col].tolist(), expected[col].tolist())
+
+    def test_overlap_mismatch_triggers_full_refetch(self):
+        # 本地价格为除权前价格，远端已整体前复权
+        stale = self.remote.copy()
+        stale['close'] = stale['close'] * 1.1
+        history = self._local_history(35, stale)
+
+        df, _ = self.manager.get_daily_data_incremental(
+            '600519', history=history, end_date=self.end_date, days=30
+        )
+
+        self.assertEqual(len(self.fetcher.calls), 2)
+        self.assertGreater(len(df), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+新浪/腾讯批量实时行情测试
+===================================
+
+职责：
+1. 验证多只股票按接口上限分块，每块一次 HTTP 请求
+2. 验证批量结果写入逐代码缓存，后续单只查询不再请求
+3. 验证 prefetch_realtime_quotes 在新浪/腾讯优先时走批量查询
+"""
+
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider import akshare_fetcher
+from data_provider.akshare_fetcher import AkshareFetcher
+from data_provider.base import DataFetcherManager
+from data_provider.realtime_types import RealtimeSource
+
+
+def _sina_line(symbol: str, name: str, price: float) -> str:
+    fields = [name, '10.00', '10.00', f'{price:.2f}', '11.00', '9.00', '0', '0', '1000', '10000'] + ['0'] * 22
+    return f'var hq_str_{symbol}="{",".join(fields)}";'
+
+
+def _tencent_line(symbol: str, name: str, price: float) -> str:
+    fields = ['1', name, symbol[2:], f'{price:.2f}', '10.00', '10.00', '12'] + ['0'] * 43
+    fields[49] = '1.5'
+    return f'v_{symbol}="{"~".join(fields)}";'
+
+
+class _FakeSession:
+    """记录请求 URL，按 URL 中的代码列表返回行情"""
+
+    def __init__(self, line_builder):
+        self.line_builder = line_builder
+        self.urls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.urls.append(url)
+        symbols = url.split('=', 1)[1].split(',')
+        text = '\n'.join(self.line_builder(s, f'股票{s[2:]}', 10.5) for s in symbols if s != 'sz000404')
+        return SimpleNamespace(status_code=200, text=text, encoding=None)
+
+
+class TestLiteQuoteBatch(unittest.TestCase):
+
+    def setUp(self):
+        for cache in akshare_fetcher._lite_quote_caches.values():
+            cache.invalidate()
+        self.fetcher = AkshareFetcher()
+        patcher = patch('data_provider.akshare_fetcher.acquire_rate_limit')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        for cache in akshare_fetcher._lite_quote_caches.values():
+            cache.invalidate()
+
+    def test_tencent_batch_is_chunked_and_cached(self):
+        session = _FakeSession(_tencent_line)
+        codes = ['600519', '000001', '300750', '000404', 'AAPL', '510300']
+        with patch.object(AkshareFetcher, 'TENCENT_MAX_CODES_PER_REQUEST', 2), \
+                patch('data_provider.akshare_fetcher._get_http_session', return_value=session):
+            quotes = self.fetcher.get_realtime_quotes_batch(codes, source='tencent')
+            self.assertEqual(len(session.urls), 2)
+            self.assertIn('q=sh600519,sz000001', session.urls[0])
+
+            self.assertEqual(set(quotes), {'600519', '000001', '300750'})
+            self.assertEqual(quotes['600519'].source, RealtimeSource.TENCENT)
+            self.assertEqual(quotes['600519'].volume, 1200)
+            self.assertEqual(quotes['600519'].volume_ratio, 1.5)
+
+            quote = self.fetcher.get_realtime_quote('300750', source='tencent')
+            self.assertEqual(quote.price, 10.5)
+            self.assertEqual(len(session.urls), 2)
+
+    def test_sina_single_quote_uses_cache_after_batch(self):
+        session = _FakeSession(_sina_line)
+        with patch('data_provider.akshare_fetcher._get_http_session', return_value=session):
+            quotes = self.fetcher.get_realtime_quotes_batch(['600519', '000001'], source='sina')
+            self.assertEqual(len(session.urls), 1)
+            self.assertAlmostEqual(quotes['000001'].change_pct, 5.0)
+
+            self.assertIsNotNone(self.fetcher.get_realtime_quote('600519', source='sina'))
+            self.assertEqual(len(session.urls), 1)
+
+            # 缓存未命中的单只查询仍然走接口
+            self.assertIsNotNone(self.fetcher.get_realtime_quote('600036', source='sina'))
+            self.assertEqual(len(session.urls), 2)
+
+    def test_unknown_source_rejected(self):
+        with self.assertRaises(ValueError):
+            self.fetcher.get_realtime_quotes_batch(['600519'], source='em')
+
+
+class TestPrefetchLiteQuotes(unittest.TestCase):
+
+    def setUp(self):
+        for cache in akshare_fetcher._lite_quote_caches.values():
+            cache.invalidate()
+
+    def test_prefetch_uses_batch_when_lite_source_leads(self):
+        fetcher = AkshareFetcher()
+        manager = DataFetcherManager(fetchers=[fetcher])
+        config = SimpleNamespace(enable_realtime_quote=True, realtime_source_priority='tencent,akshare_sina,efinance')
+
+        with patch('src.config.get_config', return_value=config), \
+                patch.object(fetcher, 'get_realtime_quotes_batch', return_value={'600519': object()}) as batch:
+            count = manager.prefetch_realtime_quotes(['600519', '000001'])
+
+        self.assertEqual(count, 1)
+        batch.assert_called_once_with(['600519', '000001'], source='tencent')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+LLM 全局节流器测试
+===================================
+
+职责：
+1. 验证 RPM / TPM 令牌桶放行速率与按实际用量校正，限流错误识别不误判
+2. 验证并发上限与 429 后所有线程统一暂停
+3. 验证 GeminiAnalyzer 限流重试改由节流器暂停，不再叠加指数退避
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.analyzer import GeminiAnalyzer
+from src.llm_governor import LLMGovernor, estimate_tokens, is_rate_limit_error, parse_retry_after
+
+
+class TestParseRetryAfter(unittest.TestCase):
+
+    def test_sources(self):
+        gemini = Exception("429 Resource has been exhausted. retry_delay {\n  seconds: 37\n}")
+        self.assertEqual(parse_retry_after(gemini), 37.0)
+        self.assertEqual(parse_retry_after(Exception("Rate limit reached. Please retry in 1.5s.")), 1.5)
+        self.assertEqual(parse_retry_after(Exception("Please retry after 250ms")), 0.25)
+
+        error = Exception("Error code: 429")
+        error.response = SimpleNamespace(headers={'retry-after': '12'})
+        self.assertEqual(parse_retry_after(error), 12.0)
+        self.assertIsNone(parse_retry_after(Exception("429 Too Many Requests")))
+
+
+class TestIsRateLimitError(unittest.TestCase):
+
+    def test_rate_limit_errors(self):
+        for message in (
+            "429 Resource has been exhausted (e.g. check quota).",
+            "RESOURCE_EXHAUSTED",
+            "Rate limit reached for gpt-4o-mini",
+            "Error code: 429 - Too Many Requests",
+            "You exceeded your current quota",
+        ):
+            self.assertTrue(is_rate_limit_error(Exception(message)), message)
+        self.assertTrue(is_rate_limit_error(SimpleNamespace(status_code=429)))
+
+    def test_unrelated_errors_are_not_rate_limits(self):
+        for message in (
+            "Failed to generate content: model is overloaded",
+            "Content flagged by moderate safety filter",
+            "Please separate system and user messages",
+            "Invalid temperature: must be between 0 and 2",
+            "Request took 14290ms and timed out",
+            "500 Internal Server Error",
+        ):
+            self.assertFalse(is_rate_limit_error(Exception(message)), message)
+
+
+class TestLLMGovernor(unittest.TestCase):
+
+    def test_rpm_pacing(self):
+        governor = LLMGovernor(rpm=240)  # 4 次/秒，突发 4
+        started = time.perf_counter()
+        for _ in range(8):
+            with governor.request():
+                pass
+        elapsed = time.perf_counter() - started
+
+        # 前 4 次立即放行，之后每 0.25 秒一次
+        self.assertGreater(elapsed, 0.9)
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual(governor.stats()['requests'], 8)
+
+    def test_tpm_settles_with_actual_usage(self):
+        governor = LLMGovernor(tpm=60000)  # 1000 token/秒，突发 1000
+        with governor.request(1000) as slot:
+            slot.record_usage(SimpleNamespace(usage_metadata=SimpleNamespace(total_token_count=100)))
+
+        # 多扣的 900 已归还，下一次 500 token 的请求无需等待（未归还时需等待 0.5 秒）
+        started = time.perf_counter()
+        with governor.request(500):
+            pass
+        self.assertLess(time.perf_counter() - started, 0.2)
+
+        # 超出配额时按速率等待
+        started = time.perf_counter()
+        with governor.request(1000):
+            pass
+        self.assertGreater(time.perf_counter() - started, 0.4)
+
+    def test_max_inflight(self):
+        governor = LLMGovernor(max_inflight=2)
+        lock = threading.Lock()
+        active = {'now': 0, 'peak': 0}
+
+        def call():
+            with governor.request():
+                with lock:
+                    active['now'] += 1
+                    active['peak'] = max(active['peak'], active['now'])
+                time.sleep(0.05)
+                with lock:
+                    active['now'] -= 1
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(active['peak'], 2)
+
+    def test_rate_limit_pauses_all_callers(self):
+        governor = LLMGovernor()
+        delay = governor.on_rate_limited(Exception("429: retry in 0.3s"), default_delay=10)
+        self.assertEqual(delay, 0.3)
+
+        started = time.perf_counter()
+        with governor.request():
+            pass
+        self.assertGreaterEqual(time.perf_counter() - started, 0.25)
+        self.assertEqual(governor.stats()['rate_limited'], 1)
+
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens('a' * 1000, 8192), 500 + 2048)
+        self.assertEqual(estimate_tokens('a' * 1000, 100), 600)
+
+
+class TestAnalyzerUsesGovernor(unittest.TestCase):
+
+    def test_gemini_429_waits_for_governor_instead_of_backoff(self):
+        governor = LLMGovernor()
+        analyzer = GeminiAnalyzer.__new__(GeminiAnalyzer)
+        analyzer._use_openai = False
+        analyzer._openai_client = None
+        analyzer._using_fallback = True
+        analyzer._model = MagicMock()
+        analyzer._model.generate_content.side_effect = [
+            Exception("429 Resource has been exhausted, retry in 0.2s"),
+            SimpleNamespace(text='ok', usage_metadata=SimpleNamespace(total_token_count=10)),
+        ]
+        config = SimpleNamespace(gemini_max_retries=3, gemini_retry_delay=30.0)
+
+        started = time.perf_counter()
+        with patch('src.analyzer.get_config', return_value=config), \
+                patch('src.analyzer.get_llm_governor', return_value=governor):
+            text = analyzer._call_api_with_retry('prompt', {'max_output_tokens': 100})
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(text, 'ok')
+        self.assertGreaterEqual(elapsed, 0.15)
+        self.assertLess(elapsed, 5)
+        self.assertEqual(governor.stats()['requests'], 2)
+        self.assertEqual(governor.stats()['rate_limited'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+全市场行情快照测试
+===================================
+
+职责：
+1. 验证涨跌家数、按板块区分的涨跌停家数、成交额在本地正确计算
+2. 验证行业聚合（流通市值加权）与板块涨跌榜
+3. 验证同一底层快照只构建一次，市场统计与板块排行共享同一次拉取
+4. 验证行业映射加载失败时只短暂缓存空结果
+"""
+
+import os
+import sys
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import BaseFetcher, DataFetcherManager
+from data_provider import market_snapshot
+from data_provider.market_snapshot import MarketSnapshot, get_industry_map, reset_market_snapshot
+from data_provider.snapshot_cache import Snapshot
+
+
+def _spot_frame() -> pd.DataFrame:
+    """东财 stock_zh_a_spot_em 风格的全量行情"""
+    return pd.DataFrame({
+        '代码': ['600519', '000001', '300750', '600000', '688981', '830799', '600001', '000002'],
+        '名称': ['贵州茅台', '平安银行', '宁德时代', '浦发银行', '中芯国际', '艾融软件', '*ST某某', 'N新股'],
+        '最新价': [1500.0, 11.0, 200.0, 8.0, 50.0, 30.0, 2.1, 40.0],
+        '涨跌幅': [1.0, 10.0, 12.0, 0.0, 19.98, -30.0, 4.98, 150.0],
+        '成交额': [5e9, 2e9, 3e9, 1e9, 4e9, 5e8, 1e8, 4e8],
+        '流通市值': [2e12, 2e11, 8e11, 2e11, 3e11, 1e10, 1e9, 1e10],
+        '量比': [1.1, 2.0, 1.5, 0.9, 1.2, 0.8, 1.0, None],
+    })
+
+
+_INDUSTRIES = {
+    '600519': '白酒', '000001': '银行', '600000': '银行', '300750': '电池', '688981': '半导体',
+}
+
+
+class TestMarketSnapshot(unittest.TestCase):
+
+    def test_stats_use_board_specific_limits(self):
+        snapshot = MarketSnapshot.from_spot_frame(_spot_frame())
+        stats = snapshot.stats()
+
+        self.assertEqual(stats['up_count'], 6)
+        self.assertEqual(stats['down_count'], 1)
+        self.assertEqual(stats['flat_count'], 1)
+        # 平安银行 10%、中芯国际 20%、*ST 5% 涨停；创业板 12% 与新股不算
+        self.assertEqual(stats['limit_up_count'], 3)
+        self.assertEqual(stats['limit_down_count'], 1)
+        self.assertAlmostEqual(stats['total_amount'], 160.0)
+
+    def test_industry_rankings_are_cap_weighted(self):
+        snapshot = MarketSnapshot.from_spot_frame(_spot_frame(), industries=_INDUSTRIES)
+        top, bottom = snapshot.sector_rankings(2)
+
+        self.assertEqual([s['name'] for s in top], ['半导体', '电池'])
+        self.assertEqual([s['name'] for s in bottom], ['白酒', '银行'])
+        # 银行：(10% * 2e11 + 0% * 2e11) / 4e11
+        self.assertEqual(bottom[1]['change_pct'], 5.0)
+        frame = snapshot.industry_frame()
+        self.assertEqual(frame.loc['银行', 'stock_count'], 2)
+        self.assertEqual(frame.loc['银行', 'up_count'], 1)
+
+    def test_rankings_without_industries(self):
+        self.assertIsNone(MarketSnapshot.from_spot_frame(_spot_frame()).sector_rankings())
+
+
+class _SpotFetcher(BaseFetcher):
+    name = 'AkshareFetcher'
+    priority = 0
+
+    def __init__(self):
+        self.spot = Snapshot(data=_spot_frame(), timestamp=1.0)
+        self.calls = 0
+
+    def get_spot_snapshot(self):
+        self.calls += 1
+        return self.spot
+
+    def _fetch_raw_data(self, stock_code, start_date, end_date):
+        raise NotImplementedError
+
+    def _normalize_data(self, df, stock_code):
+        raise NotImplementedError
+
+
+class TestManagerSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        reset_market_snapshot()
+        self.addCleanup(reset_market_snapshot)
+
+    def test_snapshot_built_once_per_spot_refresh(self):
+        fetcher = _SpotFetcher()
+        manager = DataFetcherManager(fetchers=[fetcher])
+
+        first = manager.get_market_snapshot()
+        stats = manager.get_market_stats()
+        self.assertIs(manager.get_market_snapshot(), first)
+        self.assertEqual(stats['limit_up_count'], 3)
+
+        # 底层缓存刷新（新的 Snapshot 对象）后重新构建
+        fetcher.spot = Snapshot(data=_spot_frame(), timestamp=2.0)
+        self.assertIsNot(manager.get_market_snapshot(), first)
+
+    def test_empty_industry_map_is_retried_after_short_ttl(self):
+        calls = []
+
+        def failing():
+            calls.append(1)
+            raise ConnectionError("tushare down")
+
+        self.assertEqual(get_industry_map(failing), {})
+        self.assertEqual(get_industry_map(lambda: _INDUSTRIES), {})
+        self.assertEqual(len(calls), 1)
+
+        # 空映射过期时间远短于正常的 24 小时
+        loaded_at, cached = market_snapshot._industries
+        market_snapshot._industries = (loaded_at - market_snapshot._INDUSTRY_EMPTY_TTL - 1, cached)
+        self.assertEqual(get_industry_map(lambda: _INDUSTRIES), _INDUSTRIES)
+        self.assertEqual(get_industry_map(failing), _INDUSTRIES)
+
+
+if __name__ == '__main__':
+    unittest.main()
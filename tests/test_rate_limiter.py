@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+进程级令牌桶限流测试
+===================================
+
+职责：
+1. 验证突发容量内立即放行、超出后按速率排队
+2. 验证多线程共享同一令牌桶
+3. 验证 RATE_LIMITS 配置解析与注册表覆盖
+"""
+
+import os
+import sys
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.rate_limiter import (
+    DEFAULT_RATE_LIMITS,
+    RateLimiterRegistry,
+    TokenBucket,
+    parse_rate_limits,
+)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_passes_without_waiting(self):
+        bucket = TokenBucket('test', rate=1.0, burst=3)
+
+        waits = [bucket.acquire() for _ in range(3)]
+
+        self.assertEqual(waits, [0.0, 0.0, 0.0])
+        self.assertFalse(bucket.try_acquire())
+
+    def test_requests_beyond_burst_are_paced(self):
+        bucket = TokenBucket('test', rate=20.0, burst=1)
+
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        elapsed = time.monotonic() - start
+
+        # 首个令牌立即可用，其余 4 个按 20/s 补充
+        self.assertGreaterEqual(elapsed, 0.18)
+        self.assertLess(elapsed, 1.0)
+
+    def test_threads_share_one_bucket(self):
+        bucket = TokenBucket('test', rate=50.0, burst=1)
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            list(pool.map(lambda _: bucket.acquire(), range(10)))
+        elapsed = time.monotonic() - start
+
+        self.assertGreaterEqual(elapsed, 0.17)
+        self.assertEqual(bucket.stats()['acquired'], 10)
+
+    def test_invalid_rate_rejected(self):
+        with self.assertRaises(ValueError):
+            TokenBucket('test', rate=0, burst=1)
+
+
+class TestRateLimiterRegistry(unittest.TestCase):
+
+    def test_parse_rate_limits(self):
+        limits = parse_rate_limits("EastMoney=30/3, tushare=200,bad, sina=x/1")
+
+        self.assertEqual(limits, {'eastmoney': (30.0, 3), 'tushare': (200.0, 1)})
+
+    def test_registry_uses_overrides_then_defaults(self):
+        registry = RateLimiterRegistry(overrides={'eastmoney': (120, 4)})
+
+        eastmoney = registry.get('eastmoney')
+        tushare = registry.get('TUSHARE')
+
+        self.assertEqual(eastmoney.rate, 2.0)
+        self.assertEqual(eastmoney.burst, 4)
+        self.assertEqual(tushare.rate * 60, DEFAULT_RATE_LIMITS['tushare'][0])
+        self.assertIs(registry.get('eastmoney'), eastmoney)
+        self.assertEqual(set(registry.stats()), {'eastmoney', 'tushare'})
+
+    def test_tushare_default_first_minute_within_quota(self):
+        # 首分钟最多放行 速率 + 突发容量 次，不得超过 Tushare 免费配额 80 次/分钟
+        per_minute, burst = DEFAULT_RATE_LIMITS['tushare']
+        self.assertLessEqual(per_minute + burst, 80)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+全量实时行情缓存代码索引测试
+===================================
+
+职责：
+1. 验证 build_code_index 的构建规则（补零、去重、空表）
+2. 验证东财/efinance 实时行情从缓存索引中取数，不再扫描整表
+"""
+
+import os
+import sys
+import time
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider import akshare_fetcher, efinance_fetcher
+from data_provider.akshare_fetcher import AkshareFetcher
+from data_provider.efinance_fetcher import EfinanceFetcher
+from data_provider.realtime_types import RealtimeSource, build_code_index
+from data_provider.snapshot_cache import Snapshot
+
+
+class _ExplodingFrame(pd.DataFrame):
+    """缓存命中后若仍按列做布尔扫描则直接失败"""
+
+    def __getitem__(self, key):
+        raise AssertionError(f"unexpected column scan: {key}")
+
+
+class TestBuildCodeIndex(unittest.TestCase):
+
+    def test_index_keeps_first_row_and_zfills(self):
+        df = pd.DataFrame({
+            '股票代码': [510300, '159915', 510300],
+            '最新价': [4.0, 2.5, 9.9],
+        })
+
+        index = build_code_index(df, '股票代码', zfill=6)
+
+        self.assertEqual(set(index), {'510300', '159915'})
+        self.assertEqual(index['510300']['最新价'], 4.0)
+
+    def test_empty_or_missing_column_returns_empty(self):
+        self.assertEqual(build_code_index(None, '代码'), {})
+        self.assertEqual(build_code_index(pd.DataFrame(), '代码'), {})
+        self.assertEqual(build_code_index(pd.DataFrame({'x': [1]}), '代码'), {})
+
+
+class TestRealtimeQuoteFromIndex(unittest.TestCase):
+
+    def setUp(self):
+        self._saved = (
+            akshare_fetcher._realtime_cache.snapshot,
+            efinance_fetcher._realtime_cache.snapshot,
+        )
+
+    def tearDown(self):
+        akshare_fetcher._realtime_cache._snapshot = self._saved[0]
+        efinance_fetcher._realtime_cache._snapshot = self._saved[1]
+
+    @staticmethod
+    def _seed(cache, df, code_column):
+        cache._snapshot = Snapshot(
+            data=_ExplodingFrame(df),
+            index=build_code_index(df, code_column),
+            timestamp=time.time(),
+        )
+
+    def test_akshare_em_quote_uses_index(self):
+        df = pd.DataFrame({
+            '代码': ['600519', '000001'],
+            '名称': ['贵州茅台', '平安银行'],
+            '最新价': [1500.0, 10.5],
+            '涨跌幅': [1.2, -0.3],
+            '量比': [1.1, 0.9],
+        })
+        self._seed(akshare_fetcher._realtime_cache, df, '代码')
+
+        quote = AkshareFetcher()._get_stock_realtime_quote_em('000001')
+
+        self.assertIsNotNone(quote)
+        self.assertEqual(quote.name, '平安银行')
+        self.assertEqual(quote.price, 10.5)
+        self.assertEqual(quote.source, RealtimeSource.AKSHARE_EM)
+        self.assertIsNone(AkshareFetcher()._get_stock_realtime_quote_em('300750'))
+
+    def test_efinance_quote_uses_index(self):
+        df = pd.DataFrame({
+            '股票代码': ['600519'],
+            '股票名称': ['贵州茅台'],
+            '最新价': [1500.0],
+            '涨跌幅': [1.2],
+        })
+        self._seed(efinance_fetcher._realtime_cache, df, '股票代码')
+
+        quote = EfinanceFetcher().get_realtime_quote('600519')
+
+        self.assertIsNotNone(quote)
+        self.assertEqual(quote.name, '贵州茅台')
+        self.assertEqual(quote.change_pct, 1.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""Tests for the batch run ledger and --resume.
+
+Runs StockAnalysisPipeline.run with stubbed stage work against a temporary
+SQLite DB, fails some stages midway, then resumes the same run_id and checks
+that only the unfinished stages execute again.
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import ANY, MagicMock
+
+from src.analyzer import AnalysisResult
+from src.config import Config
+from src.core.pipeline import StockAnalysisPipeline, StockWorkItem
+from src.core.run_ledger import (
+    RunLedger,
+    STAGE_LLM_ANALYSIS,
+    STAGE_NEWS_SEARCH,
+    STAGE_NOTIFICATION,
+    STAGE_PERSISTENCE,
+    STAGE_QUEUED,
+)
+from src.storage import DatabaseManager
+
+
+class RunLedgerTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "test_run_ledger.db")
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+
+    def tearDown(self) -> None:
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    def _pipeline(self, fail_search=(), fail_save=(), fail_llm=()) -> StockAnalysisPipeline:
+        pipeline = StockAnalysisPipeline.__new__(StockAnalysisPipeline)
+        pipeline.db = self.db
+        pipeline.max_workers = 2
+        pipeline.config = SimpleNamespace(
+            pipeline_fetch_workers=0, pipeline_search_workers=0, pipeline_llm_workers=0,
+            pipeline_queue_size=0, tushare_by_date_sync=False,
+            single_stock_notify=False, report_type='simple',
+        )
+        pipeline.fetcher_manager = MagicMock()
+        for name in ('warmup_stock_meta', 'prefetch_overseas_daily', '_send_notifications'):
+            setattr(pipeline, name, MagicMock())
+        pipeline.fetch_and_save_stock_data = MagicMock(return_value=(True, None))
+        pipeline.prepare_market_data = MagicMock(side_effect=lambda code: StockWorkItem(code=code, stock_name=code))
+
+        def search(item):
+            if item.code in fail_search:
+                raise RuntimeError("search outage")
+            item.news_context = f"news {item.code}"
+            return item
+
+        def analyze(item):
+            item.result = AnalysisResult(
+                code=item.code, name=item.stock_name, sentiment_score=70,
+                trend_prediction='看多', operation_advice='持有', analysis_summary=item.news_context,
+                success=item.code not in fail_llm,
+            )
+            return item
+
+        def save(item, report_type):
+            if item.code in fail_save:
+                raise RuntimeError("db outage")
+
+        pipeline.search_news = MagicMock(side_effect=search)
+        pipeline.run_llm_analysis = MagicMock(side_effect=analyze)
+        pipeline.save_analysis = MagicMock(side_effect=save)
+        return pipeline
+
+    def test_resume_runs_only_unfinished_stages(self):
+        first = self._pipeline(fail_search={'000002'}, fail_save={'000003'})
+        results = first.run(['000001', '000002', '000003'])
+        self.assertEqual(sorted(r.code for r in results), ['000001'])
+        first._send_notifications.assert_called_once()
+        run_id = first.run_id
+
+        resumed = self._pipeline()
+        results = resumed.run(resume_run_id=run_id)
+
+        self.assertEqual(resumed.run_id, run_id)
+        self.assertEqual(sorted(r.code for r in results), ['000001', '000002', '000003'])
+        # 只有 000002 需要重新搜索与分析；000003 只需重新入库
+        self.assertEqual([c.args[0].code for c in resumed.search_news.call_args_list], ['000002'])
+        self.assertEqual([c.args[0].code for c in resumed.run_llm_analysis.call_args_list], ['000002'])
+        self.assertEqual(sorted(c.args[0].code for c in resumed.save_analysis.call_args_list), ['000002', '000003'])
+        self.assertEqual([c.args[0] for c in resumed.fetch_and_save_stock_data.call_args_list], ['000002'])
+        # 已推送过汇总报告，续跑时只保存不推送
+        resumed._send_notifications.assert_called_once()
+        self.assertTrue(resumed._send_notifications.call_args.kwargs.get('skip_push'))
+
+        restored = next(r for r in results if r.code == '000003')
+        self.assertEqual(restored.analysis_summary, 'news 000003')
+
+    def test_search_result_reused_when_llm_unfinished(self):
+        ledger = RunLedger(self.db)
+        ledger.start(['600519'])
+        ledger.mark('600519', STAGE_NEWS_SEARCH, payload={'news_context': 'cached news'})
+
+        pipeline = self._pipeline()
+        results = pipeline.run(resume_run_id='latest')
+
+        pipeline.search_news.assert_not_called()
+        self.assertEqual(results[0].analysis_summary, 'cached news')
+        self.assertTrue(RunLedger.resume(self.db, ledger.run_id).is_done('600519', STAGE_LLM_ANALYSIS))
+
+    def test_reanalysis_on_resume_reruns_persist_and_notify(self):
+        first = self._pipeline(fail_llm={'000001'})
+        first.config.single_stock_notify = True
+        first.notify_single_stock = MagicMock()
+        first.run(['000001', '000002'])
+        run_id = first.run_id
+        self.assertTrue(RunLedger.resume(self.db, run_id).is_done('000001', STAGE_PERSISTENCE))
+
+        resumed = self._pipeline()
+        resumed.config.single_stock_notify = True
+        resumed.notify_single_stock = MagicMock()
+        results = resumed.run(resume_run_id=run_id)
+
+        # 000001 上次分析失败：重新分析后的结果必须重新入库与推送，000002 保持跳过
+        self.assertEqual([c.args[0].code for c in resumed.run_llm_analysis.call_args_list], ['000001'])
+        self.assertEqual([c.args[0].code for c in resumed.save_analysis.call_args_list], ['000001'])
+        self.assertEqual([c.args[0].code for c in resumed.notify_single_stock.call_args_list], ['000001'])
+        self.assertTrue(next(r for r in results if r.code == '000001').success)
+        ledger = RunLedger.resume(self.db, run_id)
+        self.assertTrue(ledger.is_done('000001', STAGE_LLM_ANALYSIS))
+        self.assertTrue(ledger.is_done('000001', STAGE_NOTIFICATION))
+
+    def test_reanalysis_on_resume_repushes_summary(self):
+        first = self._pipeline(fail_llm={'000001'})
+        first.run(['000001', '000002'])
+        first._send_notifications.assert_called_once_with(ANY)
+
+        resumed = self._pipeline()
+        resumed.run(resume_run_id=first.run_id)
+
+        # 上次汇总中的 000001 是失败结果，重新分析后汇总需要重新推送
+        resumed._send_notifications.assert_called_once()
+        self.assertFalse(resumed._send_notifications.call_args.kwargs.get('skip_push', False))
+
+    def test_latest_run_ordered_by_registration_time(self):
+        older, newer = RunLedger(self.db, 'run-older'), RunLedger(self.db, 'run-newer')
+        newer.start(['600519'])
+        older.start(['000001'])
+        # 模拟旧运行先登记、后写入阶段记录
+        self.db.record_run_stage(
+            'run-older', '000001', STAGE_QUEUED, 'pending',
+            started_at=datetime.now() - timedelta(hours=1),
+        )
+        older.mark('000001', STAGE_NEWS_SEARCH, payload={'news_context': 'late write'})
+
+        self.assertEqual(self.db.get_latest_run_id(), 'run-newer')
+
+    def test_unknown_run(self):
+        self.assertEqual(self._pipeline().run(resume_run_id='missing'), [])
+        with self.assertRaises(ValueError):
+            RunLedger.resume(self.db, 'latest')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Tests for the bulk upsert path of DatabaseManager.save_daily_data.
+
+Runs against a temporary SQLite DB and checks that the bulk path keeps the
+insert/update semantics of the original row-by-row implementation.
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import select
+
+from src.config import Config
+from src.storage import DatabaseManager, StockDaily
+
+
+def _make_daily_df(start: str, periods: int, close_offset: float = 0.0) -> pd.DataFrame:
+    dates = pd.bdate_range(start=start, periods=periods)
+    closes = [10.0 + i + close_offset for i in range(periods)]
+    return pd.DataFrame({
+        'date': dates,
+        'open': closes,
+        'high': [c + 1 for c in closes],
+        'low': [c - 1 for c in closes],
+        'close': closes,
+        'volume': [1000 + i for i in range(periods)],
+        'amount': [c * 1000 for c in closes],
+        'pct_chg': [0.5] * periods,
+        'ma5': closes,
+        'ma10': closes,
+        'ma20': closes,
+        'volume_ratio': [1.0] * periods,
+    })
+
+
+class SaveDailyDataTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "test_save_daily_data.db")
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+
+    def tearDown(self) -> None:
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    def _load(self, code: str):
+        with self.db.get_session() as session:
+            rows = session.execute(
+                select(StockDaily).where(StockDaily.code == code).order_by(StockDaily.date)
+            ).scalars().all()
+            return [row.to_dict() for row in rows]
+
+    def test_insert_then_update_counts_only_new_rows(self):
+        self.assertEqual(self.db.save_daily_data(_make_daily_df('2026-01-05', 5), '600519', 'A'), 5)
+
+        # 后 2 条与已有数据重叠，前 3 条为新数据
+        updated = _make_daily_df('2026-01-08', 5, close_offset=100.0)
+        self.assertEqual(self.db.save_daily_data(updated, '600519', 'B'), 3)
+
+        rows = self._load('600519')
+        self.assertEqual(len(rows), 8)
+        overlapped = {row['date']: row for row in rows}[date(2026, 1, 8)]
+        self.assertEqual(overlapped['close'], 110.0)
+        self.assertEqual(overlapped['data_source'], 'B')
+
+    def test_handles_string_dates_missing_columns_and_nan(self):
+        df = pd.DataFrame({
+            'date': ['2026-02-02', '2026-02-03', None],
+            'close': [10.0, float('nan'), 12.0],
+            'volume': [100, 200, 300],
+        })
+
+        self.assertEqual(self.db.save_daily_data(df, '000001', 'A'), 2)
+
+        rows = self._load('000001')
+        self.assertEqual([row['date'] for row in rows], [date(2026, 2, 2), date(2026, 2, 3)])
+        self.assertIsNone(rows[1]['close'])
+        self.assertIsNone(rows[0]['ma5'])
+        self.assertEqual(rows[1]['volume'], 200.0)
+
+    def test_bulk_path_matches_rowwise_path(self):
+        first = _make_daily_df('2026-03-02', 10)
+        second = _make_daily_df('2026-03-09', 10, close_offset=0.5)
+
+        self.db.save_daily_data(first, 'BULK', 'A')
+        bulk_new = self.db.save_daily_data(second, 'BULK', 'B')
+        self.db._save_daily_data_rowwise(first, 'ROW', 'A')
+        row_new = self.db._save_daily_data_rowwise(second, 'ROW', 'B')
+
+        self.assertEqual(bulk_new, row_new)
+        strip = lambda rows: [{k: v for k, v in row.items() if k != 'code'} for row in rows]
+        self.assertEqual(strip(self._load('BULK')), strip(self._load('ROW')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+跨进程共享快照存储测试
+===================================
+
+职责：
+1. 验证快照原子写入与按 TTL 读取
+2. 验证并发刷新时只有持有文件锁的一方调用 loader
+3. 验证 SnapshotCache 通过 shared_key 复用其他"进程"写入的快照
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.shared_snapshot_store import SharedSnapshotStore
+from data_provider.snapshot_cache import SnapshotCache
+
+
+def _spot() -> pd.DataFrame:
+    return pd.DataFrame({'代码': ['600519', '000001'], '最新价': [1500.0, 11.0]})
+
+
+class TestSharedSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.dir = self._tmp.name
+
+    def test_save_and_load_with_ttl(self):
+        store = SharedSnapshotStore(self.dir, use_feather=False)
+        self.assertTrue(store.save('spot', _spot()))
+
+        df, timestamp = store.load('spot', max_age=60)
+        pd.testing.assert_frame_equal(df, _spot())
+        self.assertAlmostEqual(timestamp, time.time(), delta=5)
+
+        # 文件修改时间即快照时间，超过 TTL 视为过期
+        path = store._path('spot')
+        os.utime(path, (time.time() - 120, time.time() - 120))
+        self.assertIsNone(store.load('spot', max_age=60))
+        # 原子替换不留下临时文件
+        self.assertEqual([f for f in os.listdir(self.dir) if f.endswith('.tmp')], [])
+
+    def test_concurrent_refresh_calls_loader_once(self):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.3)
+            return _spot()
+
+        # 每个"进程"各自持有一个 store 实例，只通过磁盘文件与文件锁协调
+        results = []
+
+        def worker():
+            store = SharedSnapshotStore(self.dir, use_feather=False)
+            df, _ = store.get_or_refresh('spot', loader, ttl=60)
+            results.append(len(df))
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [2, 2, 2])
+
+    def test_empty_result_is_not_persisted(self):
+        store = SharedSnapshotStore(self.dir, use_feather=False)
+        df, _ = store.get_or_refresh('spot', pd.DataFrame, ttl=60)
+
+        self.assertTrue(df.empty)
+        self.assertFalse(os.path.exists(store._path('spot')))
+
+    def test_snapshot_cache_reuses_shared_snapshot(self):
+        store = SharedSnapshotStore(self.dir, use_feather=False)
+        store.save('spot', _spot())
+        os.utime(store._path('spot'), (time.time() - 30, time.time() - 30))
+
+        calls = []
+        cache = SnapshotCache("测试", ttl=60, shared_key='spot')
+        with patch('data_provider.shared_snapshot_store.get_shared_snapshot_store', return_value=store):
+            snapshot = cache.get(lambda: calls.append(1) or _spot())
+
+        self.assertEqual(calls, [])
+        self.assertEqual(len(snapshot.data), 2)
+        # 沿用磁盘快照的拉取时间，进程内缓存不会把它当成新数据
+        self.assertGreaterEqual(snapshot.age, 29)
+
+
+if __name__ == '__main__':
+    unittest.main()
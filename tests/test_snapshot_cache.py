@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+全量行情快照缓存测试
+===================================
+
+职责：
+1. 验证并发未命中时只有一个线程调用 loader（Single-Flight）
+2. 验证过期宽限期内返回旧快照并在后台刷新（Stale-While-Revalidate）
+3. 验证刷新失败时异常传递给所有等待者
+4. 验证 loader 返回空数据时保留原快照并在下次调用时重试
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.realtime_types import build_code_index
+from data_provider.snapshot_cache import Snapshot, SnapshotCache
+
+
+def _frame(price: float) -> pd.DataFrame:
+    return pd.DataFrame({'代码': ['600519'], '最新价': [price]})
+
+
+class TestSnapshotCache(unittest.TestCase):
+
+    def _cache(self, ttl: float = 60, stale_ttl: float = 60) -> SnapshotCache:
+        return SnapshotCache(
+            "test", ttl=ttl, stale_ttl=stale_ttl,
+            index_builder=lambda df: build_code_index(df, '代码'),
+        )
+
+    def test_concurrent_misses_share_one_load(self):
+        cache = self._cache()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.2)
+            return _frame(1.0)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            snapshots = list(pool.map(lambda _: cache.get(loader), range(8)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(s is snapshots[0] for s in snapshots))
+        self.assertEqual(snapshots[0].index['600519']['最新价'], 1.0)
+
+    def test_fresh_snapshot_skips_loader(self):
+        cache = self._cache()
+        cache.set(_frame(1.0))
+
+        snapshot = cache.get(lambda: self.fail("loader should not be called"))
+
+        self.assertEqual(snapshot.index['600519']['最新价'], 1.0)
+
+    def test_stale_snapshot_served_while_refreshing(self):
+        cache = self._cache(ttl=1, stale_ttl=60)
+        cache._snapshot = Snapshot(data=_frame(1.0), index=build_code_index(_frame(1.0), '代码'),
+                                   timestamp=time.time() - 5)
+        release = threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            release.wait(5)
+            return _frame(2.0)
+
+        first = cache.get(loader)
+        second = cache.get(loader)
+
+        # 旧快照立即返回，后台只启动一次刷新
+        self.assertEqual(first.index['600519']['最新价'], 1.0)
+        self.assertIs(first, second)
+        release.set()
+        for _ in range(50):
+            if cache.snapshot is not first:
+                break
+            time.sleep(0.02)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.get(loader).index['600519']['最新价'], 2.0)
+
+    def test_expired_beyond_grace_period_refreshes_synchronously(self):
+        cache = self._cache(ttl=1, stale_ttl=1)
+        cache._snapshot = Snapshot(data=_frame(1.0), timestamp=time.time() - 10)
+
+        snapshot = cache.get(lambda: _frame(3.0))
+
+        self.assertEqual(snapshot.index['600519']['最新价'], 3.0)
+
+    def test_loader_error_propagates_to_waiters(self):
+        cache = self._cache()
+
+        def loader():
+            time.sleep(0.2)
+            raise ConnectionError("boom")
+
+        def call():
+            try:
+                cache.get(loader)
+            except ConnectionError as e:
+                return str(e)
+            return None
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: call(), range(4)))
+
+        self.assertEqual(results, ["boom"] * 4)
+        self.assertIsNone(cache.snapshot)
+
+    def test_empty_background_refresh_keeps_stale_snapshot(self):
+        cache = self._cache(ttl=1, stale_ttl=60)
+        stale = Snapshot(data=_frame(1.0), index=build_code_index(_frame(1.0), '代码'),
+                         timestamp=time.time() - 5)
+        cache._snapshot = stale
+        calls = []
+
+        def failing_loader():
+            calls.append(1)
+            return pd.DataFrame()
+
+        self.assertIs(cache.get(failing_loader), stale)
+        for _ in range(50):
+            if cache._flight is None:
+                break
+            time.sleep(0.02)
+
+        # 空结果不覆盖旧快照，时间戳不变，下一次调用重新触发刷新
+        self.assertIs(cache.snapshot, stale)
+        self.assertEqual(len(calls), 1)
+        cache.get(lambda: _frame(2.0))
+        for _ in range(50):
+            if cache.snapshot is not stale:
+                break
+            time.sleep(0.02)
+        self.assertEqual(cache.snapshot.index['600519']['最新价'], 2.0)
+
+    def test_empty_synchronous_refresh_is_not_cached(self):
+        cache = self._cache()
+
+        snapshot = cache.get(lambda: pd.DataFrame())
+
+        self.assertTrue(snapshot.data.empty)
+        self.assertIsNone(cache.snapshot)
+        self.assertEqual(cache.get(lambda: _frame(3.0)).index['600519']['最新价'], 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+数据源健康度与自适应排序测试
+===================================
+
+职责：
+1. 验证 EWMA 延迟/成功率的更新
+2. 验证退化数据源移到队尾，健康数据源保持静态优先级
+3. 验证 DataFetcherManager 日线拉取会降级持续失败的数据源
+"""
+
+import os
+import sys
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import BaseFetcher, DataFetcherManager, STANDARD_COLUMNS
+from data_provider.source_health import (
+    SourceHealthTracker,
+    format_source_health_table,
+    get_source_health_tracker,
+)
+
+
+class _FakeFetcher(BaseFetcher):
+    """可控失败的假数据源，记录被调用次数"""
+
+    def __init__(self, name: str, priority: int, fail: bool = False):
+        self.name = name
+        self.priority = priority
+        self.fail = fail
+        self.calls = 0
+
+    def _fetch_raw_data(self, stock_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError(f"{self.name} down")
+        return pd.DataFrame({
+            'date': pd.bdate_range('2026-01-05', periods=3),
+            'open': [1.0, 2.0, 3.0],
+            'high': [1.0, 2.0, 3.0],
+            'low': [1.0, 2.0, 3.0],
+            'close': [1.0, 2.0, 3.0],
+            'volume': [100.0, 100.0, 100.0],
+            'amount': [100.0, 200.0, 300.0],
+            'pct_chg': [0.0, 0.0, 0.0],
+        })
+
+    def _normalize_data(self, df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
+        df = df.copy()
+        df['code'] = stock_code
+        return df[['code'] + STANDARD_COLUMNS]
+
+
+class TestSourceHealthTracker(unittest.TestCase):
+
+    def test_ewma_updates(self):
+        tracker = SourceHealthTracker(alpha=0.5)
+
+        tracker.record('daily', 'A', True, 1.0)
+        tracker.record('daily', 'A', False, 3.0, 'timeout')
+
+        stats = tracker.get('daily', 'A')
+        self.assertAlmostEqual(stats.latency_ewma, 2.0)
+        self.assertAlmostEqual(stats.success_ewma, 0.5)
+        self.assertEqual((stats.samples, stats.successes, stats.failures), (2, 1, 1))
+        self.assertEqual(stats.last_error, 'timeout')
+
+    def test_unreliable_source_moves_to_tail(self):
+        tracker = SourceHealthTracker(min_samples=3)
+        for _ in range(5):
+            tracker.record('daily', 'A', False, 0.5)
+            tracker.record('daily', 'B', True, 2.0)
+            tracker.record('daily', 'C', True, 1.0)
+
+        # 健康数据源保持原始优先级（B 在 C 前），即使 C 更快
+        self.assertEqual(tracker.rank('daily', ['A', 'B', 'C']), ['B', 'C', 'A'])
+        self.assertTrue(tracker.is_degraded('daily', 'A'))
+
+    def test_slow_source_is_demoted(self):
+        tracker = SourceHealthTracker(min_samples=3, slow_factor=5.0)
+        for _ in range(3):
+            tracker.record('realtime', 'slow', True, 10.0)
+            tracker.record('realtime', 'fast', True, 0.5)
+
+        self.assertEqual(tracker.rank('realtime', ['slow', 'fast']), ['fast', 'slow'])
+
+    def test_degraded_source_is_probed_again_after_recovery_window(self):
+        tracker = SourceHealthTracker(min_samples=1, recovery_after=60)
+        for _ in range(5):
+            tracker.record('daily', 'A', False, 0.5)
+        self.assertEqual(tracker.rank('daily', ['A', 'B']), ['B', 'A'])
+
+        tracker.get('daily', 'A').updated_at -= 120
+
+        self.assertEqual(tracker.rank('daily', ['A', 'B']), ['A', 'B'])
+
+    def test_insufficient_samples_keep_order(self):
+        tracker = SourceHealthTracker(min_samples=3)
+        tracker.record('daily', 'A', False, 0.5)
+
+        self.assertEqual(tracker.rank('daily', ['A', 'B']), ['A', 'B'])
+
+    def test_operations_are_tracked_separately(self):
+        tracker = SourceHealthTracker(alpha=0.6, min_samples=1)
+        tracker.record('chip', 'A', False, 0.1)
+
+        self.assertEqual(tracker.rank('daily', ['A', 'B']), ['A', 'B'])
+        self.assertEqual(tracker.rank('chip', ['A', 'B']), ['B', 'A'])
+
+    def test_format_table(self):
+        tracker = SourceHealthTracker(alpha=0.6, min_samples=1)
+        tracker.record('daily', 'EfinanceFetcher', False, 1.2, 'HTTP 403')
+
+        table = format_source_health_table(tracker.snapshot())
+
+        self.assertIn('EfinanceFetcher', table)
+        self.assertIn('降级', table)
+        self.assertIn('HTTP 403', table)
+        self.assertIn('暂无', format_source_health_table([]))
+
+
+class TestManagerAdaptiveOrder(unittest.TestCase):
+
+    def setUp(self):
+        get_source_health_tracker().reset()
+
+    def tearDown(self):
+        get_source_health_tracker().reset()
+
+    def test_failing_primary_is_demoted(self):
+        primary = _FakeFetcher('Broken', 0, fail=True)
+        backup = _FakeFetcher('Backup', 1)
+        manager = DataFetcherManager(fetchers=[primary, backup], hedge_delay=0)
+        manager._adaptive_order = True
+
+        for _ in range(5):
+            _, source = manager.get_daily_data('600519')
+            self.assertEqual(source, 'Backup')
+
+        # 默认 alpha=0.2：连续失败 4 次后成功率 0.8^4 < 0.5，之后不再优先尝试
+        self.assertEqual(primary.calls, 4)
+        self.assertEqual([f.name for f in manager._ordered('daily', manager._fetchers)], ['Backup', 'Broken'])
+
+    def test_adaptive_order_can_be_disabled(self):
+        primary = _FakeFetcher('Broken', 0, fail=True)
+        backup = _FakeFetcher('Backup', 1)
+        manager = DataFetcherManager(fetchers=[primary, backup], hedge_delay=0)
+        manager._adaptive_order = False
+
+        for _ in range(5):
+            manager.get_daily_data('600519')
+
+        self.assertEqual(primary.calls, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+分阶段流水线测试
+===================================
+
+职责：
+1. 验证阶段之间重叠执行，整批耗时趋近最慢阶段而不是各阶段之和
+2. 验证有界队列的背压与各阶段并发上限
+3. 验证单个任务失败/被丢弃不影响其他任务，以及 StockAnalysisPipeline 的阶段编排
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.analyzer import AnalysisResult
+from src.core.pipeline import StockAnalysisPipeline, StockWorkItem
+from src.core.staged_pipeline import Stage, StagedPipeline
+from src.enums import ReportType
+
+
+def _sleeper(seconds: float):
+    def handler(item):
+        time.sleep(seconds)
+        return item
+    return handler
+
+
+class TestStagedPipeline(unittest.TestCase):
+
+    def test_stages_overlap(self):
+        # 串行执行需要 6 × (0.05 + 0.1) = 0.9 秒；流水线约为 0.05 + 6 × 0.1 = 0.65 秒
+        pipeline = StagedPipeline([
+            Stage('fetch', _sleeper(0.05), workers=1),
+            Stage('llm', _sleeper(0.1), workers=1),
+        ])
+        started = time.perf_counter()
+        outputs = pipeline.run(range(6))
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(outputs, list(range(6)))
+        self.assertLess(elapsed, 0.8)
+        self.assertEqual(pipeline.stats['llm']['processed'], 6)
+
+    def test_per_stage_concurrency(self):
+        lock = threading.Lock()
+        active = {'now': 0, 'peak': 0}
+
+        def slow(item):
+            with lock:
+                active['now'] += 1
+                active['peak'] = max(active['peak'], active['now'])
+            time.sleep(0.02)
+            with lock:
+                active['now'] -= 1
+            return item
+
+        pipeline = StagedPipeline([
+            Stage('fetch', lambda item: item, workers=4),
+            Stage('slow', slow, workers=2),
+        ])
+        outputs = pipeline.run(range(12))
+
+        self.assertEqual(sorted(outputs), list(range(12)))
+        self.assertEqual(active['peak'], 2)
+
+    def test_bounded_queue_backpressure(self):
+        fetched = []
+        backlog = []
+
+        def fetch(item):
+            fetched.append(item)
+            return item
+
+        def slow(item):
+            if item == 0:
+                time.sleep(0.1)
+                backlog.append(len(fetched))
+            return item
+
+        pipeline = StagedPipeline([
+            Stage('fetch', fetch, workers=1),
+            Stage('slow', slow, workers=1),
+        ], queue_size=2)
+        pipeline.run(range(20))
+
+        # 下游卡住时，上游最多领先：处理中 1 + 队列 2 + 等待入队 1
+        self.assertLessEqual(backlog[0], 4)
+
+    def test_failures_and_drops_are_isolated(self):
+        def fetch(item):
+            if item == 1:
+                raise RuntimeError("boom")
+            return None if item == 2 else item
+
+        pipeline = StagedPipeline([
+            Stage('fetch', fetch, workers=2),
+            Stage('llm', lambda item: item * 10, workers=2),
+        ])
+        outputs = pipeline.run(range(4))
+
+        self.assertEqual(sorted(outputs), [0, 30])
+        self.assertEqual(pipeline.stats['fetch']['failed'], 1)
+        self.assertEqual(pipeline.stats['fetch']['dropped'], 1)
+
+
+class TestPipelineStages(unittest.TestCase):
+
+    def _pipeline(self, **config):
+        pipeline = StockAnalysisPipeline.__new__(StockAnalysisPipeline)
+        pipeline.config = SimpleNamespace(
+            pipeline_fetch_workers=0, pipeline_search_workers=0,
+            pipeline_llm_workers=1, pipeline_queue_size=0, **config,
+        )
+        pipeline.max_workers = 3
+        pipeline.db = MagicMock()
+        pipeline.fetch_and_save_stock_data = MagicMock(return_value=(True, None))
+        pipeline.prepare_market_data = MagicMock(side_effect=lambda code: StockWorkItem(code=code))
+        pipeline.search_news = MagicMock(side_effect=lambda item: item)
+        pipeline.save_analysis = MagicMock()
+        pipeline.notify_single_stock = MagicMock()
+
+        def analyze(item):
+            item.result = None if item.code == 'BAD' else AnalysisResult(
+                code=item.code, name=item.code, sentiment_score=60,
+                trend_prediction='震荡', operation_advice='持有',
+            )
+            return item
+        pipeline.run_llm_analysis = MagicMock(side_effect=analyze)
+        return pipeline
+
+    def test_full_run(self):
+        pipeline = self._pipeline()
+        staged = pipeline._build_stages(dry_run=False, single_stock_notify=True, report_type=ReportType.SIMPLE)
+
+        self.assertEqual([s.workers for s in staged.stages], [3, 3, 1, 1, 1])
+        results = staged.run(['600519', 'BAD', '000001'])
+
+        self.assertEqual(sorted(r.code for r in results), ['000001', '600519'])
+        self.assertEqual(pipeline.save_analysis.call_count, 2)
+        self.assertEqual(pipeline.notify_single_stock.call_count, 2)
+
+    def test_dry_run_only_fetches(self):
+        pipeline = self._pipeline()
+        staged = pipeline._build_stages(dry_run=True, single_stock_notify=False, report_type=ReportType.SIMPLE)
+
+        self.assertEqual(staged.run(['600519', '000001']), [])
+        self.assertEqual([s.name for s in staged.stages], ['market_data'])
+        self.assertEqual(pipeline.fetch_and_save_stock_data.call_count, 2)
+        pipeline.prepare_market_data.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Tests for the per-run stock history context.
+
+Checks that one stock's analysis touches stock_daily exactly once, that the
+trend analyzer sees the full history instead of nothing, and that the
+prompt context matches DatabaseManager.get_analysis_context.
+"""
+
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pandas as pd
+from sqlalchemy import event
+
+from src.config import Config
+from src.core.pipeline import StockAnalysisPipeline
+from src.core.stock_context import HISTORY_BARS, StockHistoryContext
+from src.stock_analyzer import StockTrendAnalyzer
+from src.storage import DatabaseManager
+
+
+def _history(periods: int) -> pd.DataFrame:
+    closes = [10.0 + i * 0.1 for i in range(periods)]
+    return pd.DataFrame({
+        'date': pd.bdate_range(start='2025-06-02', periods=periods),
+        'open': closes,
+        'high': [c * 1.01 for c in closes],
+        'low': [c * 0.99 for c in closes],
+        'close': closes,
+        'volume': [1000.0 + i for i in range(periods)],
+        'amount': [c * 1000 for c in closes],
+        'pct_chg': [1.0] * periods,
+    })
+
+
+class StockHistoryContextTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "test_stock_context.db")
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+        self.db.save_daily_data(_history(150), '600519', 'Seed')
+
+        self.daily_queries = 0
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT') and 'stock_daily' in statement:
+                self.daily_queries += 1
+        event.listen(self.db._engine, 'before_cursor_execute', count)
+
+    def tearDown(self) -> None:
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    def _pipeline(self) -> StockAnalysisPipeline:
+        pipeline = StockAnalysisPipeline.__new__(StockAnalysisPipeline)
+        pipeline.db = self.db
+        pipeline.fetcher_manager = MagicMock()
+        pipeline.fetcher_manager.get_realtime_quote.return_value = None
+        pipeline.fetcher_manager.get_chip_distribution.return_value = None
+        pipeline.trend_analyzer = StockTrendAnalyzer()
+        pipeline.analyzer = MagicMock()
+        pipeline.analyzer.analyze.return_value = SimpleNamespace()
+        return pipeline
+
+    def test_single_query_per_stock(self):
+        pipeline = self._pipeline()
+        item = pipeline.prepare_market_data('600519')
+        pipeline.run_llm_analysis(item)
+        snapshot = pipeline._build_context_snapshot(
+            item.enhanced_context, None, item.realtime_quote, item.chip_data, history=item.history
+        )
+
+        self.assertEqual(self.daily_queries, 1)
+        # 筹码计算与趋势分析拿到同一份完整日线
+        chip_history = pipeline.fetcher_manager.get_chip_distribution.call_args.kwargs['history']
+        self.assertIs(chip_history, item.history.df)
+        self.assertEqual(len(chip_history), HISTORY_BARS)
+        self.assertIsNotNone(item.trend_result)
+        self.assertGreater(item.trend_result.ma20, 0)
+        self.assertIn('trend_analysis', item.enhanced_context)
+        self.assertEqual(snapshot['history']['bars'], HISTORY_BARS)
+
+    def test_context_matches_database_query(self):
+        expected = self.db.get_analysis_context('600519')
+        context = StockHistoryContext('600519', self.db).analysis_context()
+
+        self.assertEqual(context['date'], expected['date'])
+        self.assertEqual(context['ma_status'], expected['ma_status'])
+        self.assertEqual(context['volume_change_ratio'], expected['volume_change_ratio'])
+        self.assertEqual(context['price_change_ratio'], expected['price_change_ratio'])
+        self.assertEqual(context['today'], expected['today'])
+
+    def test_missing_history(self):
+        history = StockHistoryContext('000001', self.db)
+        self.assertIsNone(history.analysis_context())
+        self.assertEqual(history.summary(), {'bars': 0})
+        self.assertEqual(self.daily_queries, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Tests for StockMetaService (persistent stock name/metadata index).
+
+Uses a fake fetcher manager and a temporary SQLite DB to check that the
+full stock list is fetched at most once a day and that name lookups are
+served from memory afterwards, including from a fresh process.
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+
+import pandas as pd
+
+from src.config import Config
+from src.services.stock_meta_service import StockMetaService
+from src.storage import DatabaseManager
+
+
+class _FakeManager:
+    def __init__(self):
+        self.calls = 0
+
+    def get_stock_lists(self):
+        self.calls += 1
+        return [
+            ('TushareFetcher', pd.DataFrame({
+                'code': ['600519', '300750'],
+                'name': ['贵州茅台', '宁德时代'],
+                'industry': ['白酒', '电池'],
+                'market': ['主板', '创业板'],
+            })),
+            ('BaostockFetcher', pd.DataFrame({
+                'code': ['600519', '688981', '600001'],
+                'name': ['贵州茅台(BS)', '中芯国际', '邯郸钢铁'],
+                'list_status': ['L', 'L', 'D'],
+            })),
+        ]
+
+    def get_stock_name(self, code):
+        raise AssertionError("hot path must not hit the network")
+
+
+class StockMetaServiceTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "test_stock_meta.db")
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+
+    def tearDown(self) -> None:
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    def test_warmup_merges_sources_and_persists(self):
+        manager = _FakeManager()
+        service = StockMetaService(db_manager=self.db, fetcher_manager=manager)
+        service.warmup()
+
+        self.assertEqual(manager.calls, 1)
+        self.assertEqual(service.get_name('600519'), '贵州茅台')
+        meta = service.get('600519')
+        self.assertEqual(meta['industry'], '白酒')
+        self.assertEqual(meta['list_status'], 'L')
+        self.assertEqual(service.get('300750')['board'], '创业板')
+        self.assertEqual(service.get('688981')['board'], '科创板')
+        self.assertEqual(service.get('600001')['list_status'], 'D')
+        # 静态映射表兜底港股/美股
+        self.assertEqual(service.get_name('AAPL'), '苹果')
+
+        # 新进程：一天内不再拉取，直接从数据库载入
+        other = StockMetaService(db_manager=self.db, fetcher_manager=manager)
+        other.warmup()
+        self.assertEqual(manager.calls, 1)
+        self.assertEqual(other.get_name('688981'), '中芯国际')
+
+    def test_refresh_after_interval(self):
+        manager = _FakeManager()
+        StockMetaService(db_manager=self.db, fetcher_manager=manager).warmup()
+        stale = StockMetaService(db_manager=self.db, fetcher_manager=manager, refresh_interval=timedelta(0))
+        stale.warmup()
+        self.assertEqual(manager.calls, 2)
+
+    def test_remember_does_not_count_as_refresh(self):
+        manager = _FakeManager()
+        service = StockMetaService(db_manager=self.db, fetcher_manager=manager)
+        service.remember('hk09999', '网易-S')
+
+        self.assertTrue(service.needs_refresh())
+        self.assertEqual(StockMetaService(db_manager=self.db).get_name('hk09999'), '网易-S')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+通达信长连接池测试
+===================================
+
+职责：
+1. 验证服务器按测速结果排序，不可用的排在最后
+2. 验证连接被复用，心跳失败/查询失败时透明重连
+3. 验证批量实时行情按 80 只一组合并请求
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.pytdx_fetcher import PytdxFetcher
+from data_provider.tdx_pool import TdxConnectionPool
+
+
+class _FakeApi:
+    """模拟 TdxHq_API：按服务器配置连接延迟/可用性"""
+
+    servers = {}
+    instances = []
+
+    def __init__(self):
+        self.host = None
+        self.alive = False
+        self.calls = []
+        _FakeApi.instances.append(self)
+
+    def connect(self, host, port, time_out=5):
+        cfg = self.servers[host]
+        time.sleep(cfg.get('delay', 0))
+        if cfg.get('down'):
+            return False
+        self.host = host
+        self.alive = True
+        return self
+
+    def disconnect(self):
+        self.alive = False
+
+    def get_security_count(self, market):
+        if not self.alive or self.servers[self.host].get('dead_link'):
+            raise ConnectionError("socket closed")
+        return 1000
+
+    def get_security_quotes(self, pairs):
+        self.calls.append(list(pairs))
+        if not self.alive or self.servers[self.host].get('dead_link'):
+            raise ConnectionError("socket closed")
+        return [{'market': m, 'code': c, 'name': c, 'price': 1.0, 'last_close': 1.0} for m, c in pairs]
+
+
+HOSTS = [('slow', 7709), ('down', 7709), ('fast', 7709)]
+
+
+class TestTdxConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        _FakeApi.servers = {'slow': {'delay': 0.05}, 'down': {'down': True}, 'fast': {}}
+        _FakeApi.instances = []
+
+    def _pool(self, **kwargs):
+        return TdxConnectionPool(HOSTS, api_factory=_FakeApi, **kwargs)
+
+    def test_hosts_ranked_by_latency(self):
+        pool = self._pool()
+
+        results = pool.rank_hosts()
+
+        self.assertEqual([r.host for r in results], ['fast', 'slow', 'down'])
+        self.assertFalse(results[-1].ok)
+
+    def test_connection_is_reused(self):
+        pool = self._pool(size=1)
+
+        for _ in range(5):
+            pool.call(lambda api: api.get_security_count(0))
+
+        self.assertEqual(pool.connects, 1)
+        self.assertEqual(pool.stats()['idle_connections'], 1)
+
+    def test_failed_query_reconnects_to_next_host(self):
+        pool = self._pool(size=1)
+        pool.call(lambda api: api.get_security_count(0))
+        _FakeApi.servers['fast']['dead_link'] = True
+
+        result = pool.call(lambda api: api.get_security_count(0))
+
+        self.assertEqual(result, 1000)
+        self.assertEqual(pool.reconnects, 1)
+        self.assertEqual(pool._idle.queue[0].host, ('slow', 7709))
+
+    def test_heartbeat_on_idle_connection(self):
+        pool = self._pool(size=1, heartbeat_interval=0)
+        pool.call(lambda api: api.get_security_count(0))
+        _FakeApi.servers['fast']['dead_link'] = True
+
+        with pool.connection() as api:
+            self.assertEqual(api.host, 'slow')
+        self.assertEqual(pool.reconnects, 1)
+
+    def test_waiter_reconnects_when_every_holder_discards(self):
+        pool = self._pool(size=2)
+        holders_ready = threading.Barrier(3)
+        release = threading.Event()
+        results = []
+
+        def hold_and_fail():
+            try:
+                with pool.connection():
+                    holders_ready.wait(5)
+                    release.wait(5)
+                    raise ConnectionError("socket closed")
+            except ConnectionError:
+                pass
+
+        holders = [threading.Thread(target=hold_and_fail, daemon=True) for _ in range(2)]
+        for t in holders:
+            t.start()
+        holders_ready.wait(5)
+
+        waiter = threading.Thread(
+            target=lambda: results.append(pool.call(lambda api: api.get_security_count(0))), daemon=True
+        )
+        waiter.start()
+        time.sleep(0.05)
+        release.set()
+        for t in holders:
+            t.join(5)
+        waiter.join(5)
+
+        # 两个持有者都丢弃了连接、没有放回队列，等待者仍能新建连接
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(results, [1000])
+
+
+class TestPytdxBatchQuotes(unittest.TestCase):
+
+    def setUp(self):
+        _FakeApi.servers = {'a': {}}
+        _FakeApi.instances = []
+
+    def test_quotes_batched_by_80(self):
+        fetcher = PytdxFetcher(hosts=[('a', 7709)])
+        fetcher._pool = TdxConnectionPool([('a', 7709)], size=1, api_factory=_FakeApi)
+        codes = [f"{600000 + i}" for i in range(100)] + [f"{i:06d}" for i in range(1, 71)] + ['AAPL']
+
+        with patch('data_provider.pytdx_fetcher.acquire_rate_limit'):
+            quotes = fetcher.get_realtime_quotes_batch(codes)
+
+        calls = [call for api in _FakeApi.instances for call in api.calls]
+        self.assertEqual([len(c) for c in calls], [80, 80, 10])
+        self.assertEqual(len(quotes), 170)
+        self.assertEqual(quotes['600001']['code'], '600001')
+        self.assertNotIn('AAPL', quotes)
+
+
+if __name__ == '__main__':
+    unittest.main()
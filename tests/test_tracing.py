@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+耗时追踪与运行时间线导出测试
+===================================
+
+职责：
+1. 验证 span / record_span / traced 的记录内容与未开启追踪时不记录
+2. 验证股票代码绑定、p50/p95 汇总与 Chrome Trace 导出格式
+3. 验证分阶段流水线与数据源健康统计会写入 span
+4. 验证并发运行的 span 只写入各自的运行
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.source_health import SourceHealthTracker
+from data_provider.tracing import (
+    bind,
+    format_trace_summary,
+    record_span,
+    span,
+    start_trace,
+    stop_trace,
+    traced,
+)
+from src.core.staged_pipeline import Stage, StagedPipeline
+
+
+class TracingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.trace = start_trace('test-run')
+
+    def tearDown(self):
+        stop_trace(self.trace)
+
+    def test_span_records_duration_and_failure(self):
+        with span('search', 'search', source='Bocha', code='600519'):
+            time.sleep(0.02)
+        with self.assertRaises(RuntimeError):
+            with span('llm', 'generate', source='gemini'):
+                raise RuntimeError('boom')
+        with span('notification', 'send', source='飞书') as s:
+            s.fail('webhook 400')
+
+        first, second, third = self.trace.spans
+        self.assertEqual((first.stage, first.source, first.code), ('search', 'Bocha', '600519'))
+        self.assertGreaterEqual(first.duration, 0.015)
+        self.assertTrue(first.ok)
+        self.assertFalse(second.ok)
+        self.assertEqual(second.error, 'boom')
+        self.assertEqual(third.error, 'webhook 400')
+
+    def test_inactive_trace_records_nothing(self):
+        stop_trace(self.trace)
+        with span('search', 'search'):
+            pass
+        record_span('data', 'daily', 0.1, source='Efinance')
+        self.assertEqual(self.trace.spans, [])
+
+    def test_bound_code_and_traced_decorator(self):
+        class Repo:
+            @traced('storage')
+            def save(self, df, code):
+                return len(df)
+
+            @traced('storage')
+            def load(self):
+                return None
+
+        repo = Repo()
+        with bind('000001'):
+            repo.load()
+            self.assertEqual(repo.save([1, 2], code='600519'), 2)
+        repo.save([1], '300750')
+
+        codes = [(s.name, s.code) for s in self.trace.spans]
+        self.assertEqual(codes, [('load', '000001'), ('save', '600519'), ('save', '300750')])
+
+    def test_summary_percentiles(self):
+        for ms in range(1, 21):
+            record_span('data', 'daily', ms / 1000.0, source='Efinance')
+        record_span('data', 'daily', 1.0, source='Akshare', ok=False, error='timeout')
+
+        rows = {row['source']: row for row in self.trace.summary()}
+        self.assertEqual(rows['Efinance']['count'], 20)
+        self.assertAlmostEqual(rows['Efinance']['p50'], 0.010)
+        self.assertAlmostEqual(rows['Efinance']['p95'], 0.019)
+        self.assertAlmostEqual(rows['Efinance']['max'], 0.020)
+        self.assertEqual(rows['Akshare']['errors'], 1)
+        self.assertIn('Efinance', format_trace_summary(self.trace.summary()))
+
+    def test_chrome_trace_export(self):
+        with span('pipeline', 'market_data', code='600519'):
+            pass
+        record_span('llm', 'generate', 0.5, source='gemini-2.0-flash')
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.trace.export(directory)
+            self.assertEqual(os.path.basename(path), 'trace_test-run.json')
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+
+        events = [e for e in data['traceEvents'] if e['ph'] == 'X']
+        self.assertEqual(len(events), 2)
+        self.assertTrue(any(e['ph'] == 'M' and e['name'] == 'thread_name' for e in data['traceEvents']))
+        market = next(e for e in events if e['cat'] == 'pipeline')
+        self.assertEqual(market['args']['code'], '600519')
+        llm = next(e for e in events if e['cat'] == 'llm')
+        self.assertEqual(llm['name'], 'generate:gemini-2.0-flash')
+        self.assertAlmostEqual(llm['dur'], 500000, delta=1)
+        self.assertEqual(data['otherData']['run_id'], 'test-run')
+        self.assertEqual(len(data['otherData']['summary']), 2)
+
+    def test_pipeline_and_source_health_emit_spans(self):
+        tracker = SourceHealthTracker()
+
+        def fetch(code):
+            tracker.record('daily', 'Efinance', True, 0.05)
+            return code
+
+        StagedPipeline([Stage('market_data', fetch, workers=2)]).run(['600519', '000001'])
+
+        data_spans = [s for s in self.trace.spans if s.stage == 'data']
+        self.assertEqual(sorted(s.code for s in data_spans), ['000001', '600519'])
+        self.assertTrue(all(s.source == 'Efinance' for s in data_spans))
+        stage_spans = [s for s in self.trace.spans if s.stage == 'pipeline']
+        self.assertEqual(sorted(s.code for s in stage_spans), ['000001', '600519'])
+
+    def test_concurrent_runs_do_not_share_spans(self):
+        stop_trace(self.trace)
+        tracker = SourceHealthTracker()
+        traces = {}
+        barrier = threading.Barrier(2)
+
+        def fetch(code):
+            barrier.wait(5)
+            tracker.record('daily', 'Efinance', True, 0.01)
+            return code
+
+        def run(run_id, code):
+            trace = traces[run_id] = start_trace(run_id)
+            try:
+                StagedPipeline([Stage('market_data', fetch, workers=1)]).run([code])
+            finally:
+                stop_trace(trace)
+
+        runs = [
+            threading.Thread(target=run, args=('scheduled', '600519')),
+            threading.Thread(target=run, args=('bot-batch', '000001')),
+        ]
+        for t in runs:
+            t.start()
+        for t in runs:
+            t.join(10)
+
+        self.assertEqual({s.code for s in traces['scheduled'].spans}, {'600519'})
+        self.assertEqual({s.code for s in traces['bot-batch'].spans}, {'000001'})
+        self.assertEqual(len(traces['scheduled'].spans), 2)
+
+    def test_unbound_thread_records_nothing(self):
+        worker = threading.Thread(target=record_span, args=('data', 'daily', 0.1))
+        worker.start()
+        worker.join()
+
+        self.assertEqual(self.trace.spans, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
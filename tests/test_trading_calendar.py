@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+交易日历测试
+===================================
+
+职责：
+1. 验证内置休市表下的交易日判断与"最近交易日"/"最近已收盘交易日"解析（A 股/港股/美股）
+2. 验证内置表未覆盖的年份从远程加载一次并缓存，不可用时仅按周末判断
+3. 验证断点续传在周末/节假日以最近交易日的数据判断是否跳过
+"""
+
+import os
+import sys
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.trading_calendar import (
+    MARKET_CN,
+    MARKET_HK,
+    MARKET_US,
+    TradingCalendar,
+    market_of,
+)
+
+
+class TestBundledCalendar(unittest.TestCase):
+
+    def setUp(self):
+        self.calendar = TradingCalendar(loader=None)
+
+    def test_weekend_and_holidays(self):
+        self.assertFalse(self.calendar.is_trading_day(MARKET_CN, date(2025, 10, 4)))   # 周六
+        self.assertFalse(self.calendar.is_trading_day(MARKET_CN, date(2025, 10, 8)))   # 国庆
+        self.assertTrue(self.calendar.is_trading_day(MARKET_CN, date(2025, 10, 9)))
+        self.assertFalse(self.calendar.is_trading_day(MARKET_US, date(2025, 7, 4)))    # 独立日
+        self.assertTrue(self.calendar.is_trading_day(MARKET_CN, date(2025, 7, 4)))
+        self.assertFalse(self.calendar.is_trading_day(MARKET_HK, date(2025, 12, 26)))  # 节礼日
+
+    def test_latest_trading_day(self):
+        # 周日 -> 周五
+        self.assertEqual(self.calendar.latest_trading_day(MARKET_CN, date(2025, 9, 28)), date(2025, 9, 26))
+        # 国庆长假最后一天 -> 节前最后一个交易日
+        self.assertEqual(self.calendar.latest_trading_day(MARKET_CN, date(2025, 10, 8)), date(2025, 9, 30))
+        # 交易日当天 -> 当天
+        self.assertEqual(self.calendar.latest_trading_day(MARKET_US, date(2025, 10, 8)), date(2025, 10, 8))
+
+    def test_latest_closed_trading_day(self):
+        shanghai = timezone(timedelta(hours=8))
+        morning = datetime(2025, 10, 9, 10, 0, tzinfo=shanghai)
+        evening = datetime(2025, 10, 9, 18, 0, tzinfo=shanghai)
+
+        # 节后首个交易日盘中 -> 节前最后一个交易日；收盘后 -> 当天
+        self.assertEqual(self.calendar.latest_closed_trading_day(MARKET_CN, morning), date(2025, 9, 30))
+        self.assertTrue(self.calendar.is_session_open(MARKET_CN, morning))
+        self.assertEqual(self.calendar.latest_closed_trading_day(MARKET_CN, evening), date(2025, 10, 9))
+        self.assertFalse(self.calendar.is_session_open(MARKET_CN, evening))
+
+    def test_trading_days(self):
+        days = self.calendar.trading_days(MARKET_CN, date(2025, 9, 29), date(2025, 10, 10))
+        self.assertEqual(days, [date(2025, 9, 29), date(2025, 9, 30), date(2025, 10, 9), date(2025, 10, 10)])
+
+    def test_market_of(self):
+        self.assertEqual(market_of('600519'), MARKET_CN)
+        self.assertEqual(market_of('hk00700'), MARKET_HK)
+        self.assertEqual(market_of('AAPL'), MARKET_US)
+
+
+class TestRemoteYears(unittest.TestCase):
+
+    def test_uncovered_year_loaded_once(self):
+        calls = []
+
+        def loader(market, year):
+            calls.append((market, year))
+            # 2030-01-01（周二）休市，其余工作日开市
+            return {d for d in TradingCalendar(holidays={}, loader=None).trading_days(
+                market, date(year, 1, 1), date(year, 12, 31)) if d != date(2030, 1, 1)}
+
+        calendar = TradingCalendar(loader=loader)
+        self.assertFalse(calendar.is_trading_day(MARKET_CN, date(2030, 1, 1)))
+        self.assertTrue(calendar.is_trading_day(MARKET_CN, date(2030, 1, 2)))
+        self.assertEqual(calendar.latest_trading_day(MARKET_CN, date(2030, 1, 1)), date(2029, 12, 31))
+        self.assertEqual(calls, [(MARKET_CN, 2030), (MARKET_CN, 2029)])
+
+    def test_unavailable_source_falls_back_to_weekdays(self):
+        loader = MagicMock(return_value=None)
+        calendar = TradingCalendar(loader=loader)
+        self.assertTrue(calendar.is_trading_day(MARKET_US, date(2031, 1, 1)))
+        self.assertTrue(calendar.is_trading_day(MARKET_US, date(2031, 1, 2)))
+        self.assertEqual(loader.call_count, 1)
+
+
+class TestPipelineResume(unittest.TestCase):
+
+    def test_weekend_checks_latest_trading_day(self):
+        from src.core.pipeline import StockAnalysisPipeline
+
+        pipeline = StockAnalysisPipeline.__new__(StockAnalysisPipeline)
+        pipeline.db = MagicMock()
+        pipeline.db.has_today_data.return_value = True
+        pipeline.fetcher_manager = MagicMock()
+        pipeline._prefetched_daily_codes = set()
+
+        with patch('src.core.pipeline.latest_trading_day_for', return_value=date(2025, 9, 30)):
+            ok, error = pipeline.fetch_and_save_stock_data('600519')
+
+        self.assertTrue(ok)
+        self.assertIsNone(error)
+        pipeline.db.has_today_data.assert_called_once_with('600519', date(2025, 9, 30))
+        pipeline.fetcher_manager.get_daily_data.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()